@@ -20,8 +20,18 @@ def check_tables():
         'DimPaciente',
         'DimUbicacion',
         'DimExposicion',
+        'DimEstacion',
         'HechoHospitalizaciones',
-        'HechoMedicionAmbiental'
+        'HechoMedicionAmbiental',
+        'HechoMedicionDiaria',
+        'HechoMedicionMensual',
+        'HechoEpisodioContaminacion',
+        'HechoMedicionCuantilMensual',
+        'AnalisisCorrelacion',
+        'AnalisisCorrelacionLag',
+        'AnalisisCorrelacionResumen',
+        'AnalisisPerfilEstacional',
+        'AnalisisResidualEstacional'
     ]
     
     try:
@@ -26,7 +26,7 @@ try:
     
     # PASO 1: Limpiar tablas de hechos primero (tienen FKs a dimensiones)
     print("PASO 1: Limpiando tablas de HECHOS...")
-    tables_hechos = ['HechoMedicionAmbiental', 'HechoHospitalizaciones']
+    tables_hechos = ['HechoMedicionCuantilMensual', 'HechoEpisodioContaminacion', 'HechoMedicionDiaria', 'HechoMedicionMensual', 'HechoMedicionAmbiental', 'HechoHospitalizaciones']
     
     for table in tables_hechos:
         try:
@@ -53,7 +53,8 @@ try:
     
     # PASO 2: Limpiar tablas de análisis
     print("\nPASO 2: Limpiando tablas de ANÁLISIS...")
-    tables_analisis = ['AnalisisCorrelacion']
+    tables_analisis = ['AnalisisCorrelacion', 'AnalisisCorrelacionLag', 'AnalisisCorrelacionResumen',
+                       'AnalisisPerfilEstacional', 'AnalisisResidualEstacional']
     
     for table in tables_analisis:
         try:
@@ -80,7 +81,7 @@ try:
     
     # PASO 3: Limpiar dimensiones
     print("\nPASO 3: Limpiando tablas de DIMENSIONES...")
-    tables_dims = ['DimFecha', 'DimHora', 'DimClinica', 'DimPaciente', 'DimUbicacion', 'DimExposicion']
+    tables_dims = ['DimFecha', 'DimHora', 'DimClinica', 'DimPaciente', 'DimUbicacion', 'DimExposicion', 'DimEstacion']
     
     for table in tables_dims:
         try:
@@ -0,0 +1,77 @@
+"""
+Configuración de opciones del proceso ETL
+"""
+import os
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+def _get_bool(name, default=False):
+    """Lee una variable de entorno booleana ('yes', 'true', '1')"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('yes', 'true', '1', 'si', 'sí')
+
+class ETLConfig:
+    """Clase para manejar las opciones de ejecución del ETL"""
+
+    def __init__(self):
+        # Agrupar HechoHospitalizaciones por la tupla completa de dimensiones
+        self.preagregar_hospitalizaciones = _get_bool('ETL_PREAGREGAR_HOSPITALIZACIONES', False)
+
+        # Mantener AnalisisCorrelacion de forma incremental por partición
+        self.analisis_incremental = _get_bool('ETL_ANALISIS_INCREMENTAL', False)
+
+        # Llaves inteligentes: IDFecha = yyyymmdd, IDHora = hora (sin lookups a la BD)
+        self.claves_inteligentes = _get_bool('ETL_CLAVES_INTELIGENTES', False)
+
+        # Interpolación lineal de huecos cortos en las series horarias por estación
+        self.interpolar_huecos = _get_bool('ETL_INTERPOLAR_HUECOS', False)
+        self.max_horas_hueco = int(os.getenv('ETL_MAX_HORAS_HUECO', '3'))
+
+        # Rezago máximo (en años, la resolución de las hospitalizaciones) para AnalisisCorrelacionLag
+        self.max_lag_anios = int(os.getenv('ETL_MAX_LAG_ANIOS', '2'))
+
+        # Réplicas bootstrap para los intervalos de AnalisisCorrelacionResumen
+        self.bootstrap_replicas = int(os.getenv('ETL_BOOTSTRAP_REPLICAS', '1000'))
+
+        # DimPaciente y DimUbicacion como SCD tipo 2 (versiones con vigencia en vez de truncar);
+        # los hechos se siguen recargando completos contra las versiones vigentes
+        self.dimensiones_scd2 = _get_bool('ETL_DIMENSIONES_SCD2', False)
+
+        # Miembros inferidos: las llaves sin correspondencia en una dimensión se insertan
+        # como miembros provisionales en vez de descartar los hechos
+        self.miembros_inferidos = _get_bool('ETL_MIEMBROS_INFERIDOS', False)
+
+        # Duración mínima (horas) de los episodios de contaminación reportados
+        self.episodio_min_horas = int(os.getenv('ETL_EPISODIO_MIN_HORAS', '1'))
+
+        # Percentiles mensuales por estación: error relativo de los sketches y
+        # persistencia de los sketches para solo reconstruir los meses nuevos
+        self.cuantiles_alfa = float(os.getenv('ETL_CUANTILES_ALFA', '0.01'))
+        self.cuantiles_incremental = _get_bool('ETL_CUANTILES_INCREMENTAL', False)
+
+        # Descomposición estacional: ancho (semanas) de la media móvil de la tendencia e
+        # iteraciones alternadas de tendencia y perfil semanal (1 = descomposición clásica)
+        self.tendencia_semanas = int(os.getenv('ETL_TENDENCIA_SEMANAS', '4'))
+        self.estacionalidad_iteraciones = int(os.getenv('ETL_ESTACIONALIDAD_ITERACIONES', '2'))
+
+        # Exposición por localidad interpolada (IDW) desde las k estaciones más cercanas
+        # que reportan en cada hora; si está activa, AnalisisCorrelacion la usa en vez de
+        # asignar cada estación a una sola localidad
+        self.exposicion_idw = _get_bool('ETL_EXPOSICION_IDW', False)
+        self.idw_vecinos = int(os.getenv('ETL_IDW_VECINOS', '3'))
+        self.idw_potencia = float(os.getenv('ETL_IDW_POTENCIA', '2'))
+        self.idw_max_km = float(os.getenv('ETL_IDW_MAX_KM', '10'))
+
+        # Motor de DataFrame de los transformadores de mediciones: 'pandas' (por defecto)
+        # o 'polars' (experimental, requiere polars; sin mejora de tiempo en un núcleo)
+        self.motor_dataframe = os.getenv('ETL_MOTOR_DATAFRAME', 'pandas').strip().lower()
+
+        # Directorio para el estado persistente entre ejecuciones
+        self.state_dir = os.getenv('ETL_STATE_DIR', 'state')
+
+# Instancia global
+etl_config = ETLConfig()
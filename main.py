@@ -70,7 +70,9 @@ def main():
         # 3. CARGA
         logger.start_process("CARGA A SQL SERVER")
         loader = MasterLoader()
-        results = loader.load_all(transformed_data, truncate=True)
+        results = loader.load_all(
+            transformed_data, truncate=True, estados_pendientes=transformer.get_estados_pendientes()
+        )
         logger.end_process("CARGA A SQL SERVER", success=True)
         
         # 4. RESUMEN FINAL
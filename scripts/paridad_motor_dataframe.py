@@ -0,0 +1,191 @@
+"""
+Paridad y benchmark de los motores de DataFrame (pandas y polars)
+1. Verifica cada operación del motor sobre casos borde (nulos, NaN, fechas,
+   categóricas, llaves sin correspondencia).
+2. Verifica que HechoMedicionAmbiental, CompletitudMedicion y los rollups
+   den el mismo resultado con ambos motores sobre data_raw/.
+3. Mide los tiempos de esos transformadores sobre data_raw/ y sobre datos
+   sintéticos de factor veces el tamaño: las fuentes se replican para el
+   hecho y el hecho se replica con estaciones renombradas (más series) para
+   completitud y rollups. El factor 100 requiere del orden de 40 GB de RAM.
+
+Uso: python scripts/paridad_motor_dataframe.py [--factor 100] [--repeticiones 3]
+"""
+import argparse
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.extractors.master_extractor import MasterExtractor
+from src.transformers.transform_hecho_medicion import HechoMedicionAmbientalTransformer, FUENTES_MEDICION
+from src.transformers.transform_calidad_medicion import CalidadMedicionTransformer
+from src.transformers.transform_completitud_medicion import CompletitudMedicionTransformer
+from src.transformers.transform_rollup_medicion import RollupMedicionTransformer
+from src.utils.motor_dataframe import crear_motor, MOTORES
+
+def comparar(nombre, esperado, obtenido):
+    """Compara dos DataFrames (o arreglos) e imprime el resultado; retorna True si son iguales"""
+    try:
+        if isinstance(esperado, pd.DataFrame):
+            pd.testing.assert_frame_equal(esperado, obtenido)
+        else:
+            np.testing.assert_array_equal(esperado, obtenido)
+        print(f"  ✓ {nombre}")
+        return True
+    except AssertionError as e:
+        print(f"  ✗ {nombre}: {e}")
+        return False
+
+def paridad_operaciones(referencia, motor):
+    """Cada operación del motor contra la de referencia sobre casos borde"""
+    df = pd.DataFrame({
+        'localidad': ['Kennedy', 'Suba', None, 'Kennedy', 'Suba', 'Bosa'],
+        'tipo': pd.Categorical(['CO', 'PM25', 'CO', 'CO', None, 'PM25']),
+        'fecha': [date(2024, 1, 2), date(2024, 1, 1), None, date(2024, 1, 2), date(2024, 1, 1), date(2024, 1, 3)],
+        'hora': np.array([3, 1, 2, 3, 0, 5], dtype=np.int64),
+        'valor': [1.5, np.nan, 2.0, 4.0, np.nan, 7.25],
+        'valido': [True, False, True, True, False, True],
+    })
+    otro = pd.DataFrame({'localidad': ['Suba', 'Kennedy', 'Usme'], 'codigo': [11, 8, 5]})
+    agregaciones = {
+        'suma': ('valor', 'sum'), 'media': ('valor', 'mean'), 'minimo': ('valor', 'min'),
+        'maximo': ('valor', 'max'), 'filas': ('valor', 'size'), 'observadas': ('valor', 'count'),
+        'primera_hora': ('hora', 'first'), 'validas': ('valido', 'sum'),
+    }
+    casos = [
+        ('concatenar', lambda m: m.concatenar([df, df.iloc[::-1]])),
+        ('combinar left', lambda m: m.combinar(df, otro, on='localidad', how='left')),
+        ('combinar inner', lambda m: m.combinar(df, otro, on='localidad', how='inner')),
+        ('agrupar ordenado', lambda m: m.agrupar(df, ['localidad', 'fecha'], agregaciones)),
+        ('agrupar por aparición', lambda m: m.agrupar(df, ['localidad'], agregaciones, ordenar=False)),
+        ('agrupar por categórica', lambda m: m.agrupar(df, ['tipo', 'localidad'], agregaciones)),
+        ('mapear_categorico', lambda m: m.mapear_categorico(df['localidad'], {'Suba': 11.0, 'Bosa': 7.0}, default=np.inf)),
+        ('sin_duplicados', lambda m: m.sin_duplicados(df, subset=['localidad', 'fecha'])),
+        # Cadenas en el formato nativo del motor (una sola conversión a pandas al final)
+        ('concatenar nativo', lambda m: m.a_pandas(m.concatenar(
+            [m.sin_duplicados(df, nativo=True), df.iloc[::-1]], nativo=True
+        ))),
+        ('agrupar -> combinar nativo', lambda m: m.combinar(
+            m.agrupar(df, ['localidad'], agregaciones, nativo=True), otro, on='localidad'
+        )),
+        ('agrupar categórica -> agrupar nativo', lambda m: m.agrupar(
+            m.agrupar(df, ['tipo', 'localidad'], agregaciones, nativo=True),
+            ['tipo'], {'total': ('suma', 'sum'), 'grupos': ('filas', 'size')}
+        )),
+    ]
+    return [comparar(nombre, operacion(referencia), operacion(motor)) for nombre, operacion in casos]
+
+def ejecutar_transformadores(motor, data):
+    """Hecho de mediciones, completitud y rollups con un motor; retorna (resultados, tiempos)"""
+    tiempos = {}
+    inicio = time.perf_counter()
+    medicion = HechoMedicionAmbientalTransformer(motor).transform(data)
+    tiempos['HechoMedicionAmbiental'] = time.perf_counter() - inicio
+    
+    medicion = CalidadMedicionTransformer().transform(medicion)
+    resultados = {'hecho_medicion': medicion}
+    resultados.update(ejecutar_agregados(motor, medicion, tiempos))
+    return resultados, tiempos
+
+def ejecutar_agregados(motor, medicion, tiempos):
+    """Completitud y rollups con un motor (tiempos en el diccionario recibido)"""
+    inicio = time.perf_counter()
+    completitud = CompletitudMedicionTransformer(motor=motor).transform(medicion)
+    tiempos['CompletitudMedicion'] = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    rollups = RollupMedicionTransformer(motor).transform(medicion, df_completitud=completitud)
+    tiempos['RollupMedicion'] = time.perf_counter() - inicio
+    return {'completitud': completitud, 'diaria': rollups['diaria'], 'mensual': rollups['mensual']}
+
+def datos_sinteticos(data, factor):
+    """Fuentes de mediciones replicadas factor veces"""
+    sintetico = dict(data)
+    for llave, *_ in FUENTES_MEDICION:
+        if llave in data:
+            sintetico[llave] = pd.concat([data[llave]] * factor, ignore_index=True)
+    return sintetico
+
+def medicion_sintetica(medicion, factor):
+    """Hecho de mediciones replicado factor veces con estaciones renombradas (series nuevas)"""
+    partes = [
+        medicion.assign(estacion=medicion['estacion'] + f' R{i}') if i else medicion
+        for i in range(factor)
+    ]
+    return pd.concat(partes, ignore_index=True)
+
+def imprimir_tiempos(titulo, tiempos_por_motor):
+    """Tabla de tiempos (mejor de las repeticiones) por transformador y motor"""
+    print(f"\n{titulo}")
+    motores = list(tiempos_por_motor)
+    print(f"  {'Transformador':<25}" + ''.join(f"{m:>10}" for m in motores))
+    for paso in tiempos_por_motor[motores[0]]:
+        print(f"  {paso:<25}" + ''.join(f"{min(tiempos_por_motor[m][paso]):>9.2f}s" for m in motores))
+
+def cronometrar(motores, funcion, repeticiones):
+    """Ejecuta funcion(motor, tiempos) repeticiones veces por motor y acumula los tiempos"""
+    resultado = {}
+    for nombre, motor in motores.items():
+        resultado[nombre] = {}
+        for _ in range(repeticiones):
+            tiempos = {}
+            funcion(motor, tiempos)
+            for paso, segundos in tiempos.items():
+                resultado[nombre].setdefault(paso, []).append(segundos)
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--factor', type=int, default=100, help='Factor de los datos sintéticos')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Repeticiones por medición de tiempo')
+    args = parser.parse_args()
+    
+    motores = {nombre: crear_motor(nombre) for nombre in MOTORES}
+    referencia = motores.pop('pandas')
+    
+    print("Paridad por operación")
+    iguales = []
+    for nombre, motor in motores.items():
+        print(f" {nombre}:")
+        iguales += paridad_operaciones(referencia, motor)
+    
+    data = MasterExtractor().extract_all()
+    esperado, _ = ejecutar_transformadores(referencia, data)
+    print("\nParidad de transformadores sobre data_raw/")
+    for nombre, motor in motores.items():
+        obtenido, _ = ejecutar_transformadores(motor, data)
+        print(f" {nombre}:")
+        for tabla in esperado:
+            iguales.append(comparar(tabla, esperado[tabla], obtenido[tabla]))
+    
+    motores = {'pandas': referencia, **motores}
+    imprimir_tiempos('Tiempos sobre data_raw/', cronometrar(
+        motores, lambda motor, tiempos: tiempos.update(ejecutar_transformadores(motor, data)[1]),
+        args.repeticiones
+    ))
+    
+    sintetico = datos_sinteticos(data, args.factor)
+    medicion = medicion_sintetica(esperado['hecho_medicion'], args.factor)
+    print(f"\nDatos sintéticos x{args.factor}: {len(medicion):,} mediciones")
+    
+    def paso_sintetico(motor, tiempos):
+        inicio = time.perf_counter()
+        HechoMedicionAmbientalTransformer(motor).transform(sintetico)
+        tiempos['HechoMedicionAmbiental'] = time.perf_counter() - inicio
+        ejecutar_agregados(motor, medicion, tiempos)
+    
+    imprimir_tiempos(f'Tiempos sobre datos sintéticos x{args.factor}', cronometrar(
+        motores, paso_sintetico, args.repeticiones
+    ))
+    
+    print(f"\n{'✓ Paridad completa' if all(iguales) else '✗ Hay diferencias'}")
+    return 0 if all(iguales) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Prueba de memoria de la etapa de transformación
+Genera datos sintéticos de mediciones, ejecuta MasterTransformer y verifica
+que el pico de memoria (RSS) no supere un límite proporcional al tamaño de
+los datos de entrada.
+
+Uso: python scripts/prueba_memoria.py [--filas 500000] [--factor 4]
+"""
+import argparse
+import gc
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.transformers.master_transformer import MasterTransformer
+
+try:
+    import resource
+except ImportError:  # Windows: se usa tracemalloc como aproximación
+    resource = None
+    import tracemalloc
+
+ESTACIONES = ['USME', 'TUNAL', 'KENNEDY', 'SUBA', 'GUAYMARAL', 'FONTIBON', 'USAQUEN', 'PUENTE ARANDA']
+
+def pico_mb():
+    """Pico de memoria del proceso en MB (ru_maxrss en Linux está en KB, en macOS en bytes)"""
+    if resource is None:
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024 / 1024 if sys.platform == 'darwin' else maxrss / 1024
+
+def datos_sinteticos(filas, semilla=0):
+    """Datos con la misma estructura que la salida de MasterExtractor"""
+    rng = np.random.default_rng(semilla)
+    
+    horas = filas // len(ESTACIONES)
+    fecha_hora = np.tile(
+        pd.date_range('2020-01-01', periods=horas, freq='h').to_numpy(), len(ESTACIONES)
+    )
+    estacion = np.repeat(ESTACIONES, horas)
+    fh = pd.Series(fecha_hora)
+    
+    def mediciones(columna, media):
+        df = pd.DataFrame({
+            'Estacion': pd.array(estacion, dtype='string'),
+            'Fecha_Hora': fecha_hora,
+            columna: rng.gamma(2.0, media / 2.0, len(fecha_hora)),
+            'source_file': pd.array(np.full(len(fecha_hora), 'sintetico.csv'), dtype='string'),
+            'anio': fh.dt.year.astype(np.int32),
+            'mes': fh.dt.month.astype(np.int32),
+            'dia': fh.dt.day.astype(np.int32),
+            'hora': fh.dt.hour.astype(np.int32),
+            'fecha': fh.dt.date,
+        })
+        # Huecos aleatorios (5%) para que la completitud no sea trivial
+        return df[rng.random(len(df)) > 0.05].reset_index(drop=True)
+    
+    df_pm25 = mediciones('PM25', 20.0)
+    df_co = mediciones('CO', 600.0).rename(columns={'Fecha_Hora': 'Fecha_Inicial'})
+    df_co['Fecha_Final'] = df_co['Fecha_Inicial'] + pd.Timedelta(minutes=59)
+    
+    anios = pd.date_range('2020-01-01', periods=horas, freq='h').year.unique()
+    n_casos = 2000
+    casos = pd.DataFrame({
+        'anio': rng.choice(anios, n_casos),
+        'sexo': rng.choice(['Femenino', 'Masculino'], n_casos),
+        'migrante': 'Colombiano',
+        'localidad': rng.choice(['Usme', 'Tunjuelito', 'Kennedy', 'Suba', 'Fontibón'], n_casos),
+        'codigo_localidad': 'Sin Dato',
+        'enfoque_diferencial': 'Otro',
+        'regimen_seguridad': rng.choice(['Contributivo', 'Subsidiado'], n_casos),
+        'source_file': 'sintetico.csv',
+    })
+    
+    return {
+        'ira_agregado': pd.DataFrame({'anio': anios, 'numero_casos': 1000, 'source_file': 'sintetico.csv'}),
+        'neumonia': casos.assign(tipo_enfermedad='Neumonía'),
+        'ira5anos': casos.assign(tipo_enfermedad='IRA', grupo_etario='Menores de 5 años'),
+        'sisaire_co': df_co,
+        'iboca_pm25': df_pm25,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filas', type=int, default=500_000,
+                        help='Filas sintéticas por fuente de mediciones')
+    parser.add_argument('--factor', type=float, default=4.0,
+                        help='Límite del pico de transformación como múltiplo del tamaño de entrada')
+    args = parser.parse_args()
+    
+    if resource is None:
+        tracemalloc.start()
+    
+    datos = datos_sinteticos(args.filas)
+    gc.collect()
+    entrada_mb = sum(df.memory_usage(deep=True).sum() for df in datos.values()) / 1024 / 1024
+    base_mb = pico_mb()
+    
+    MasterTransformer().transform_all(datos)
+    transformacion_mb = pico_mb() - base_mb
+    limite_mb = args.factor * entrada_mb
+    
+    print("\n" + "="*60)
+    print("PRUEBA DE MEMORIA - TRANSFORMACIÓN")
+    print("="*60)
+    print(f"Datos de entrada:        {entrada_mb:10,.1f} MB")
+    print(f"Pico antes de transformar: {base_mb:8,.1f} MB")
+    print(f"Incremento del pico:     {transformacion_mb:10,.1f} MB ({transformacion_mb / entrada_mb:.1f}x la entrada)")
+    print(f"Límite:                  {limite_mb:10,.1f} MB ({args.factor:.1f}x la entrada)")
+    
+    if transformacion_mb > limite_mb:
+        print("\n❌ El pico de memoria supera el límite")
+        return 1
+    
+    print("\n✓ Pico de memoria dentro del límite")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
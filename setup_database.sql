@@ -70,21 +70,40 @@ CREATE TABLE dbo.DimPaciente (
     Migrante NVARCHAR(50),
     EnfoqueDiferencial NVARCHAR(100),
     RegimenSeguridadSocial NVARCHAR(100),
+    HashPaciente BIGINT NOT NULL,
     SourceFile NVARCHAR(200),
-    CreatedAt DATETIME2 DEFAULT SYSUTCDATETIME()
+    CreatedAt DATETIME2 DEFAULT SYSUTCDATETIME(),
+    -- Versionado SCD tipo 2 (ETL_DIMENSIONES_SCD2)
+    HashDiff BIGINT NULL,
+    FechaInicio DATE NOT NULL DEFAULT CAST(GETDATE() AS DATE),
+    FechaFin DATE NULL,
+    EsActual BIT NOT NULL DEFAULT 1
 );
 GO
 
+-- Una sola versión vigente por paciente
+CREATE UNIQUE INDEX UX_DimPaciente_Hash_Actual ON dbo.DimPaciente(HashPaciente) WHERE EsActual = 1;
+GO
+
 CREATE TABLE dbo.DimUbicacion (
     IDUbicacion INT IDENTITY(1,1) PRIMARY KEY,
     Barrio NVARCHAR(150),
     Localidad NVARCHAR(150),
     CodigoLocalidad NVARCHAR(50),
     Tipo NVARCHAR(100),
-    SourceFile NVARCHAR(200)
+    SourceFile NVARCHAR(200),
+    -- Versionado SCD tipo 2 (ETL_DIMENSIONES_SCD2)
+    HashDiff BIGINT NULL,
+    FechaInicio DATE NOT NULL DEFAULT CAST(GETDATE() AS DATE),
+    FechaFin DATE NULL,
+    EsActual BIT NOT NULL DEFAULT 1
 );
 GO
 
+-- Una sola versión vigente por ubicación
+CREATE UNIQUE INDEX UX_DimUbicacion_Codigo_Actual ON dbo.DimUbicacion(CodigoLocalidad) WHERE EsActual = 1;
+GO
+
 CREATE TABLE dbo.DimExposicion (
     IDExposicion INT IDENTITY(1,1) PRIMARY KEY,
     Indicador NVARCHAR(200),
@@ -97,7 +116,9 @@ CREATE TABLE dbo.DimEstacion (
     IDEstacion INT IDENTITY(1,1) PRIMARY KEY,
     NombreEstacion NVARCHAR(200) NOT NULL,
     TipoEstacion NVARCHAR(100),
-    Ubicacion NVARCHAR(200)
+    Ubicacion NVARCHAR(200),
+    Localidad NVARCHAR(150),
+    UNIQUE (NombreEstacion)
 );
 GO
 
@@ -129,24 +150,186 @@ CREATE TABLE dbo.HechoMedicionAmbiental (
     Concentracion FLOAT NOT NULL,
     IDExposicion INT NOT NULL,
     IDUbicacion INT NOT NULL,
+    IDEstacion INT NOT NULL,
+    -- 0 válida, 1 negativa, 2 fuera de rango físico, 3 sensor plano, 4 pico atípico
+    CodigoCalidad TINYINT NOT NULL DEFAULT 0,
     CONSTRAINT FK_Med_Fecha FOREIGN KEY (IDFecha) REFERENCES dbo.DimFecha(IDFecha),
     CONSTRAINT FK_Med_Hora FOREIGN KEY (IDHora) REFERENCES dbo.DimHora(IDHora),
     CONSTRAINT FK_Med_Exposicion FOREIGN KEY (IDExposicion) REFERENCES dbo.DimExposicion(IDExposicion),
-    CONSTRAINT FK_Med_Ubicacion FOREIGN KEY (IDUbicacion) REFERENCES dbo.DimUbicacion(IDUbicacion)
+    CONSTRAINT FK_Med_Ubicacion FOREIGN KEY (IDUbicacion) REFERENCES dbo.DimUbicacion(IDUbicacion),
+    CONSTRAINT FK_Med_Estacion FOREIGN KEY (IDEstacion) REFERENCES dbo.DimEstacion(IDEstacion)
+);
+GO
+
+-- Rollup diario de HechoMedicionAmbiental (Localidad-Día-Indicador)
+CREATE TABLE dbo.HechoMedicionDiaria (
+    IDMedicionDiaria BIGINT IDENTITY(1,1) PRIMARY KEY,
+    IDFecha INT NOT NULL,
+    IDUbicacion INT NOT NULL,
+    IDExposicion INT NOT NULL,
+    Concentracion_avg FLOAT,
+    Concentracion_max FLOAT,
+    NumMediciones INT NOT NULL,
+    HorasSobreUmbral INT NOT NULL,
+    HorasEsperadas INT,
+    CompletitudPct FLOAT,
+    -- Máximos del día de la media móvil regulatoria de las estaciones y de su IBOCA
+    MediaMovilMax FLOAT,
+    IndiceIBOCAMax FLOAT,
+    CONSTRAINT FK_MedDia_Fecha FOREIGN KEY (IDFecha) REFERENCES dbo.DimFecha(IDFecha),
+    CONSTRAINT FK_MedDia_Ubicacion FOREIGN KEY (IDUbicacion) REFERENCES dbo.DimUbicacion(IDUbicacion),
+    CONSTRAINT FK_MedDia_Exposicion FOREIGN KEY (IDExposicion) REFERENCES dbo.DimExposicion(IDExposicion)
+);
+GO
+
+-- Rollup mensual de HechoMedicionAmbiental (IDFecha = primer día del mes)
+CREATE TABLE dbo.HechoMedicionMensual (
+    IDMedicionMensual INT IDENTITY(1,1) PRIMARY KEY,
+    Anio INT NOT NULL,
+    Mes INT NOT NULL,
+    IDFecha INT NOT NULL,
+    IDUbicacion INT NOT NULL,
+    IDExposicion INT NOT NULL,
+    Concentracion_avg FLOAT,
+    Concentracion_max FLOAT,
+    NumMediciones INT NOT NULL,
+    HorasSobreUmbral INT NOT NULL,
+    HorasEsperadas INT,
+    CompletitudPct FLOAT,
+    MediaMovilMax FLOAT,
+    IndiceIBOCAMax FLOAT,
+    CONSTRAINT FK_MedMes_Fecha FOREIGN KEY (IDFecha) REFERENCES dbo.DimFecha(IDFecha),
+    CONSTRAINT FK_MedMes_Ubicacion FOREIGN KEY (IDUbicacion) REFERENCES dbo.DimUbicacion(IDUbicacion),
+    CONSTRAINT FK_MedMes_Exposicion FOREIGN KEY (IDExposicion) REFERENCES dbo.DimExposicion(IDExposicion)
+);
+GO
+
+-- Episodios de contaminación: horas consecutivas de una estación sobre el umbral de alerta
+CREATE TABLE dbo.HechoEpisodioContaminacion (
+    IDEpisodio BIGINT IDENTITY(1,1) PRIMARY KEY,
+    IDFechaInicio INT NOT NULL,
+    IDHoraInicio INT NOT NULL,
+    IDFechaFin INT NOT NULL,
+    IDHoraFin INT NOT NULL,
+    IDExposicion INT NOT NULL,
+    IDUbicacion INT NOT NULL,
+    IDEstacion INT NOT NULL,
+    DuracionHoras INT NOT NULL,
+    Concentracion_max FLOAT NOT NULL,
+    Concentracion_avg FLOAT NOT NULL,
+    Umbral FLOAT NOT NULL,
+    CONSTRAINT FK_Epi_FechaInicio FOREIGN KEY (IDFechaInicio) REFERENCES dbo.DimFecha(IDFecha),
+    CONSTRAINT FK_Epi_HoraInicio FOREIGN KEY (IDHoraInicio) REFERENCES dbo.DimHora(IDHora),
+    CONSTRAINT FK_Epi_FechaFin FOREIGN KEY (IDFechaFin) REFERENCES dbo.DimFecha(IDFecha),
+    CONSTRAINT FK_Epi_HoraFin FOREIGN KEY (IDHoraFin) REFERENCES dbo.DimHora(IDHora),
+    CONSTRAINT FK_Epi_Exposicion FOREIGN KEY (IDExposicion) REFERENCES dbo.DimExposicion(IDExposicion),
+    CONSTRAINT FK_Epi_Ubicacion FOREIGN KEY (IDUbicacion) REFERENCES dbo.DimUbicacion(IDUbicacion),
+    CONSTRAINT FK_Epi_Estacion FOREIGN KEY (IDEstacion) REFERENCES dbo.DimEstacion(IDEstacion)
+);
+GO
+
+-- Percentiles mensuales por estación (IDFecha = primer día del mes). Aproximados con
+-- sketches de cubetas logarítmicas: error relativo de a lo sumo ErrorRelativo
+CREATE TABLE dbo.HechoMedicionCuantilMensual (
+    IDCuantilMensual INT IDENTITY(1,1) PRIMARY KEY,
+    Anio INT NOT NULL,
+    Mes INT NOT NULL,
+    IDFecha INT NOT NULL,
+    IDUbicacion INT NOT NULL,
+    IDExposicion INT NOT NULL,
+    IDEstacion INT NOT NULL,
+    NumMediciones INT NOT NULL,
+    Concentracion_p50 FLOAT NOT NULL,
+    Concentracion_p95 FLOAT NOT NULL,
+    Concentracion_p99 FLOAT NOT NULL,
+    ErrorRelativo FLOAT NOT NULL,
+    CONSTRAINT FK_CuaMes_Fecha FOREIGN KEY (IDFecha) REFERENCES dbo.DimFecha(IDFecha),
+    CONSTRAINT FK_CuaMes_Ubicacion FOREIGN KEY (IDUbicacion) REFERENCES dbo.DimUbicacion(IDUbicacion),
+    CONSTRAINT FK_CuaMes_Exposicion FOREIGN KEY (IDExposicion) REFERENCES dbo.DimExposicion(IDExposicion),
+    CONSTRAINT FK_CuaMes_Estacion FOREIGN KEY (IDEstacion) REFERENCES dbo.DimEstacion(IDEstacion)
 );
 GO
 
--- Tabla de Análisis: Correlación por Localidad-Bimestre
+-- Tabla de Análisis: Correlación por Localidad-Bimestre-Indicador
 CREATE TABLE dbo.AnalisisCorrelacion (
     IDAnalisis INT IDENTITY(1,1) PRIMARY KEY,
     Localidad NVARCHAR(150) NOT NULL,
     Anio INT NOT NULL,
     Bimestre INT NOT NULL,
+    Indicador NVARCHAR(200) NOT NULL,
     Concentracion_avg FLOAT,
+    Concentracion_min FLOAT,
+    Concentracion_max FLOAT,
+    Concentracion_p95 FLOAT,
     NumMediciones INT,
+    Completitud_pct FLOAT,
     Hospitalizaciones INT,
     HospitalizacionRate FLOAT,
-    UNIQUE (Localidad, Anio, Bimestre)
+    UNIQUE (Localidad, Anio, Bimestre, Indicador)
+);
+GO
+
+-- Tabla de Análisis: Correlación exposición-hospitalización con rezago (en años)
+CREATE TABLE dbo.AnalisisCorrelacionLag (
+    IDAnalisisLag INT IDENTITY(1,1) PRIMARY KEY,
+    Localidad NVARCHAR(150) NOT NULL,
+    Indicador NVARCHAR(200) NOT NULL,
+    Lag INT NOT NULL,
+    NumPeriodos INT NOT NULL,
+    Correlacion FLOAT,
+    UNIQUE (Localidad, Indicador, Lag)
+);
+GO
+
+-- Tabla de Análisis: Pearson y Spearman por Localidad-Indicador con intervalos bootstrap
+CREATE TABLE dbo.AnalisisCorrelacionResumen (
+    IDResumen INT IDENTITY(1,1) PRIMARY KEY,
+    Localidad NVARCHAR(150) NOT NULL,
+    Indicador NVARCHAR(200) NOT NULL,
+    NumPeriodos INT NOT NULL,
+    Pearson FLOAT,
+    Pearson_ICInf FLOAT,
+    Pearson_ICSup FLOAT,
+    Spearman FLOAT,
+    Spearman_ICInf FLOAT,
+    Spearman_ICSup FLOAT,
+    NumBootstrap INT NOT NULL,
+    UNIQUE (Localidad, Indicador)
+);
+GO
+
+-- Tabla de Análisis: perfil estacional por Estación-Indicador y hora de la semana
+-- (componente aditiva centrada; Estacional_diario promedia los 7 días de cada hora)
+CREATE TABLE dbo.AnalisisPerfilEstacional (
+    IDPerfil INT IDENTITY(1,1) PRIMARY KEY,
+    Estacion NVARCHAR(200) NOT NULL,
+    Localidad NVARCHAR(150),
+    Indicador NVARCHAR(200) NOT NULL,
+    HoraSemana INT NOT NULL,
+    DiaSemana INT NOT NULL,
+    Hora INT NOT NULL,
+    Estacional_semanal FLOAT,
+    Estacional_diario FLOAT,
+    NumMediciones INT NOT NULL,
+    UNIQUE (Estacion, Indicador, HoraSemana)
+);
+GO
+
+-- Tabla de Análisis: tendencia, estacionalidad y residuo por Localidad-Bimestre-Indicador
+-- (misma llave que AnalisisCorrelacion)
+CREATE TABLE dbo.AnalisisResidualEstacional (
+    IDResidual INT IDENTITY(1,1) PRIMARY KEY,
+    Localidad NVARCHAR(150) NOT NULL,
+    Anio INT NOT NULL,
+    Bimestre INT NOT NULL,
+    Indicador NVARCHAR(200) NOT NULL,
+    NumMediciones INT NOT NULL,
+    Concentracion_avg FLOAT NOT NULL,
+    Tendencia_avg FLOAT NOT NULL,
+    Estacional_avg FLOAT NOT NULL,
+    Residual_avg FLOAT NOT NULL,
+    Residual_std FLOAT,
+    UNIQUE (Localidad, Anio, Bimestre, Indicador)
 );
 GO
 
@@ -195,5 +378,119 @@ CREATE NONCLUSTERED INDEX IX_HechoMedicionAmbiental_Fecha
 ON dbo.HechoMedicionAmbiental(IDFecha);
 GO
 
+CREATE NONCLUSTERED INDEX IX_HechoMedicionAmbiental_Estacion 
+ON dbo.HechoMedicionAmbiental(IDEstacion, IDFecha);
+GO
+
+CREATE NONCLUSTERED INDEX IX_HechoMedicionDiaria_Fecha 
+ON dbo.HechoMedicionDiaria(IDFecha);
+GO
+
+CREATE NONCLUSTERED INDEX IX_HechoEpisodioContaminacion_Fecha 
+ON dbo.HechoEpisodioContaminacion(IDFechaInicio, IDUbicacion);
+GO
+
+CREATE NONCLUSTERED INDEX IX_HechoMedicionCuantilMensual_Estacion 
+ON dbo.HechoMedicionCuantilMensual(IDEstacion, IDFecha);
+GO
+
+-- 6. Migración a llaves inteligentes (IDFecha = yyyymmdd, IDHora = hora)
+-- Reconstruye DimFecha y DimHora sin IDENTITY y remapea las llaves en todas
+-- las tablas que las referencian. Uso: EXEC dbo.usp_MigrarClavesInteligentes;
+-- Después de migrar, ejecutar el ETL con ETL_CLAVES_INTELIGENTES=yes
+CREATE OR ALTER PROCEDURE dbo.usp_MigrarClavesInteligentes
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+    
+    IF COLUMNPROPERTY(OBJECT_ID('dbo.DimFecha'), 'IDFecha', 'IsIdentity') = 0
+       AND COLUMNPROPERTY(OBJECT_ID('dbo.DimHora'), 'IDHora', 'IsIdentity') = 0
+    BEGIN
+        PRINT 'DimFecha y DimHora ya usan llaves inteligentes';
+        RETURN;
+    END
+    
+    BEGIN TRANSACTION;
+    
+    -- Mapas llave anterior -> llave inteligente
+    SELECT IDFecha AS Anterior, YEAR(Fecha) * 10000 + MONTH(Fecha) * 100 + DAY(Fecha) AS Nueva
+    INTO #MapaFecha
+    FROM dbo.DimFecha;
+    
+    SELECT IDHora AS Anterior, Hora AS Nueva
+    INTO #MapaHora
+    FROM dbo.DimHora;
+    
+    -- Llaves foráneas que referencian DimFecha o DimHora
+    DECLARE @fks TABLE (Tabla SYSNAME, Nombre SYSNAME, Columna SYSNAME, Referencia SYSNAME);
+    INSERT INTO @fks (Tabla, Nombre, Columna, Referencia)
+    SELECT OBJECT_NAME(fk.parent_object_id), fk.name,
+           COL_NAME(fkc.parent_object_id, fkc.parent_column_id),
+           OBJECT_NAME(fk.referenced_object_id)
+    FROM sys.foreign_keys fk
+    JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+    WHERE fk.referenced_object_id IN (OBJECT_ID('dbo.DimFecha'), OBJECT_ID('dbo.DimHora'));
+    
+    DECLARE @sql NVARCHAR(MAX) = N'';
+    
+    -- 1. Eliminar FKs
+    SELECT @sql += N'ALTER TABLE dbo.' + QUOTENAME(Tabla) + N' DROP CONSTRAINT ' + QUOTENAME(Nombre) + N';'
+    FROM @fks;
+    EXEC sp_executesql @sql;
+    
+    -- 2. Remapear llaves en las tablas de hechos
+    SET @sql = N'';
+    SELECT @sql += N'UPDATE h SET ' + QUOTENAME(Columna) + N' = m.Nueva FROM dbo.' + QUOTENAME(Tabla)
+        + N' h JOIN ' + CASE Referencia WHEN 'DimFecha' THEN N'#MapaFecha' ELSE N'#MapaHora' END
+        + N' m ON m.Anterior = h.' + QUOTENAME(Columna) + N';'
+    FROM @fks;
+    EXEC sp_executesql @sql;
+    
+    -- 3. Reconstruir dimensiones sin IDENTITY
+    CREATE TABLE dbo.DimFecha_Migracion (
+        IDFecha INT NOT NULL PRIMARY KEY,
+        Fecha DATE NOT NULL UNIQUE,
+        Anio INT,
+        Mes INT,
+        Dia INT,
+        NombreMes NVARCHAR(20),
+        Trimestre INT,
+        Bimestre INT
+    );
+    INSERT INTO dbo.DimFecha_Migracion (IDFecha, Fecha, Anio, Mes, Dia, NombreMes, Trimestre, Bimestre)
+    SELECT m.Nueva, d.Fecha, d.Anio, d.Mes, d.Dia, d.NombreMes, d.Trimestre, d.Bimestre
+    FROM dbo.DimFecha d
+    JOIN #MapaFecha m ON m.Anterior = d.IDFecha;
+    
+    CREATE TABLE dbo.DimHora_Migracion (
+        IDHora INT NOT NULL PRIMARY KEY,
+        Hora INT,
+        RangoHorario NVARCHAR(20),
+        Periodo NVARCHAR(5),
+        HoraFormato NVARCHAR(10)
+    );
+    INSERT INTO dbo.DimHora_Migracion (IDHora, Hora, RangoHorario, Periodo, HoraFormato)
+    SELECT Hora, Hora, RangoHorario, Periodo, HoraFormato
+    FROM dbo.DimHora;
+    
+    DROP TABLE dbo.DimFecha;
+    DROP TABLE dbo.DimHora;
+    EXEC sp_rename 'dbo.DimFecha_Migracion', 'DimFecha';
+    EXEC sp_rename 'dbo.DimHora_Migracion', 'DimHora';
+    
+    -- 4. Recrear FKs
+    SET @sql = N'';
+    SELECT @sql += N'ALTER TABLE dbo.' + QUOTENAME(Tabla) + N' ADD CONSTRAINT ' + QUOTENAME(Nombre)
+        + N' FOREIGN KEY (' + QUOTENAME(Columna) + N') REFERENCES dbo.' + QUOTENAME(Referencia)
+        + N'(' + CASE Referencia WHEN 'DimFecha' THEN N'IDFecha' ELSE N'IDHora' END + N');'
+    FROM @fks;
+    EXEC sp_executesql @sql;
+    
+    COMMIT TRANSACTION;
+    PRINT 'Migración a llaves inteligentes completada';
+END
+GO
+
 PRINT 'Base de datos DW_Salud creada exitosamente!';
 GO
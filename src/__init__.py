@@ -1 +1,6 @@
-# Source package
\ No newline at end of file
+# Source package
+from src.utils.helpers import habilitar_copy_on_write
+
+# Todo el pipeline trabaja con copy-on-write: las selecciones y los resultados
+# de métodos comparten memoria hasta que se modifican
+habilitar_copy_on_write()
@@ -1,7 +1,9 @@
 """
 Extractor para archivos IBOCA-PM25
 Lee mediciones de material particulado PM2.5 de múltiples archivos Excel
+(concentración horaria en µg/m³ y el índice IBOCA publicado en la hoja)
 """
+import numpy as np
 import pandas as pd
 import glob
 from pathlib import Path
@@ -9,6 +11,15 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.logger import ETLLogger
+from src.utils.fechas import parsear_fechas
+
+def _es_numero(valores):
+    """Máscara de valores numéricos no nulos (el texto de la hoja no cuenta)"""
+    if pd.api.types.is_numeric_dtype(valores.dtype):
+        return valores.notna().to_numpy()
+    return valores.map(
+        lambda v: isinstance(v, (int, float, np.number)) and not pd.isna(v)
+    ).to_numpy(dtype=bool)
 
 class IBOCAPM25Extractor:
     """Extractor para archivos IBOCA-PM25 (Excel)"""
@@ -52,44 +63,57 @@ class IBOCAPM25Extractor:
                     # La primera columna es la fecha/hora
                     fecha_col = df_data.columns[0]
                     
-                    # Las columnas IBOCA están cada 3 columnas (índices 3, 6, 9, 12, ...)
-                    # Corresponden a: Concentración, Media móvil, IBOCA (repetido para cada estación)
+                    # Cada estación tiene 3 columnas: Concentración (µg/m³), Media móvil o
+                    # NowCast, e IBOCA (índice 0-500, no una concentración)
+                    conc_cols = [col for col in df_data.columns if str(col).startswith('Concentr')]
                     iboca_cols = [col for col in df_data.columns if 'IBOCA' in str(col)]
+                    if len(conc_cols) != len(iboca_cols):
+                        raise ValueError(
+                            f"{len(conc_cols)} columnas de concentración y {len(iboca_cols)} de IBOCA"
+                        )
+                    
+                    # Fecha/hora de cada fila: las filas de resumen al final de la
+                    # hoja ('AVG', 'Num', 'Datos [%]') no son fechas y se omiten
+                    fechas, fallidas = parsear_fechas(df_data[fecha_col], fuente='iboca_pm25')
+                    if fallidas.any():
+                        self.logger.info(f"  {int(fallidas.sum())} filas sin fecha válida omitidas")
+                    con_fecha = fechas.notna().to_numpy()
                     
-                    # Crear lista de registros
-                    records = []
+                    # Un bloque por estación con sus valores numéricos
+                    bloques = []
+                    for col_idx, (conc_col, iboca_col) in enumerate(zip(conc_cols, iboca_cols)):
+                        # Obtener nombre de estación
+                        if col_idx < len(station_names):
+                            estacion = station_names[col_idx]
+                        else:
+                            estacion = f"Estacion_{col_idx + 1}"
+                        
+                        # Una fila por hora con concentración; el índice se conserva si es numérico
+                        valores = df_data[conc_col]
+                        filas = np.flatnonzero(con_fecha & _es_numero(valores))
+                        iboca = df_data[iboca_col]
+                        bloques.append(pd.DataFrame({
+                            'fila': filas,
+                            'Estacion': estacion,
+                            'Fecha_Hora': fechas.to_numpy()[filas],
+                            'PM25': valores.to_numpy()[filas].astype(np.float64),
+                            'IBOCA': np.where(
+                                _es_numero(iboca)[filas], iboca.to_numpy()[filas], np.nan
+                            ).astype(np.float64)
+                        }))
                     
-                    for idx, row in df_data.iterrows():
-                        try:
-                            fecha_hora = pd.to_datetime(row[fecha_col])
-                            
-                            # Para cada columna IBOCA
-                            for col_idx, iboca_col in enumerate(iboca_cols):
-                                pm25_value = row[iboca_col]
-                                
-                                # Obtener nombre de estación
-                                if col_idx < len(station_names):
-                                    estacion = station_names[col_idx]
-                                else:
-                                    estacion = f"Estacion_{col_idx + 1}"
-                                
-                                if pd.notna(pm25_value) and isinstance(pm25_value, (int, float)):
-                                    records.append({
-                                        'Estacion': estacion,
-                                        'Fecha_Hora': fecha_hora,
-                                        'PM25': float(pm25_value),
-                                        'source_file': file_name
-                                    })
-                        except:
-                            continue
+                    # Orden fila por fila, estación por estación (como en la hoja)
+                    records = pd.concat(bloques, ignore_index=True) if bloques else pd.DataFrame({'fila': []})
+                    records = records.sort_values('fila', kind='stable')
+                    records = records.drop(columns=['fila']).reset_index(drop=True)
+                    records['source_file'] = file_name
                     
-                    if records:
-                        df_file = pd.DataFrame(records)
-                        dfs.append(df_file)
-                        self.logger.info(f"  ✓ {len(df_file)} registros leídos de {file_name}")
+                    if not records.empty:
+                        dfs.append(records)
+                        self.logger.info(f"  ✓ {len(records)} registros leídos de {file_name}")
                     else:
                         self.logger.warning(f"No se pudieron extraer datos de {file_name}")
-                    
+                
                 except Exception as e:
                     self.logger.error(f"Error leyendo {file_name}: {str(e)}")
                     continue
@@ -105,14 +129,14 @@ class IBOCAPM25Extractor:
             
             self.logger.success(f"Extracción completada: {len(self.df_pm25)} registros totales de PM2.5")
             return self.df_pm25
-            
+        
         except Exception as e:
             self.logger.error(f"Error en extracción IBOCA-PM25: {str(e)}")
             raise
     
     def _clean_data(self):
         """Limpia y valida los datos extraídos"""
-        df = self.df_pm25.copy()
+        df = self.df_pm25
         
         # Remover registros con valores nulos críticos
         initial_count = len(df)
@@ -9,6 +9,7 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.logger import ETLLogger
+from src.utils.fechas import parsear_fechas
 
 class SISAIRECOExtractor:
     """Extractor para archivos SISAIRE-CO (CSV)"""
@@ -60,9 +61,11 @@ class SISAIRECOExtractor:
                     # Limpiar valores con comillas dobles en Estacion
                     df['Estacion'] = df['Estacion'].astype(str).str.replace('"', '').str.strip()
                     
-                    # Convertir fechas
-                    df['Fecha_Inicial'] = pd.to_datetime(df['Fecha_Inicial'], errors='coerce')
-                    df['Fecha_Final'] = pd.to_datetime(df['Fecha_Final'], errors='coerce')
+                    # Convertir fechas (las que no parsean quedan NaT y se reportan)
+                    for col in ['Fecha_Inicial', 'Fecha_Final']:
+                        df[col], fallidas = parsear_fechas(df[col], fuente='sisaire_co')
+                        if fallidas.any():
+                            self.logger.warning(f"  {int(fallidas.sum())} valores de {col} con formato no reconocido")
                     
                     # CO ya viene como float
                     
@@ -71,7 +74,7 @@ class SISAIRECOExtractor:
                     
                     dfs.append(df)
                     self.logger.info(f"  ✓ {len(df)} registros leídos de {file_name}")
-                    
+                
                 except Exception as e:
                     self.logger.error(f"Error leyendo {file_name}: {str(e)}")
                     continue
@@ -87,14 +90,14 @@ class SISAIRECOExtractor:
             
             self.logger.success(f"Extracción completada: {len(self.df_co)} registros totales de CO")
             return self.df_co
-            
+        
         except Exception as e:
             self.logger.error(f"Error en extracción SISAIRE-CO: {str(e)}")
             raise
     
     def _clean_data(self):
         """Limpia y valida los datos extraídos"""
-        df = self.df_co.copy()
+        df = self.df_co
         
         # Remover registros con valores nulos críticos
         initial_count = len(df)
@@ -0,0 +1,79 @@
+"""
+Loader para AnalisisCorrelacionLag
+"""
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.loaders.base_loader import BaseLoader
+from src.loaders.contracts import validar_contrato
+from src.utils.logger import ETLLogger
+
+class AnalisisCorrelacionLagLoader:
+    """Loader para la tabla de correlaciones rezagadas"""
+    
+    def __init__(self):
+        self.logger = ETLLogger('AnalisisCorrelacionLagLoader')
+    
+    def load(self, df_lag, truncate=True):
+        """
+        Carga las correlaciones rezagadas
+        
+        Args:
+            df_lag: DataFrame de AnalisisCorrelacionLagTransformer
+            truncate: Si True, limpia la tabla antes de cargar (las correlaciones
+                dependen de toda la serie, por lo que siempre se recalculan completas)
+        """
+        self.logger.start_process("CARGA DE ANALISIS CORRELACION LAG")
+        
+        try:
+            # Preparar DataFrame final
+            df_final = pd.DataFrame({
+                'Localidad': df_lag['Localidad'],
+                'Indicador': df_lag['Indicador'],
+                'Lag': df_lag['Lag'].astype(int),
+                'NumPeriodos': df_lag['NumPeriodos'].astype(int),
+                'Correlacion': df_lag['Correlacion']
+            })
+            
+            # Validar contra el contrato de la tabla antes de conectarse
+            validar_contrato(df_final, 'AnalisisCorrelacionLag')
+            
+            # Cargar a la base de datos
+            loader = BaseLoader('AnalisisCorrelacionLag')
+            
+            try:
+                loader.connect()
+                
+                if truncate:
+                    loader.truncate_table()
+                
+                rows = loader.load_dataframe(df_final, if_exists='append')
+                
+                loader.update_etl_control(
+                    process_name='Load_AnalisisCorrelacionLag',
+                    rows_loaded=rows,
+                    status='Success',
+                    notes=f'Carga exitosa: {rows} registros'
+                )
+                
+                self.logger.end_process("CARGA DE ANALISIS CORRELACION LAG", success=True)
+                return rows
+            
+            finally:
+                loader.disconnect()
+        
+        except Exception as e:
+            self.logger.error(f"Error en carga de AnalisisCorrelacionLag: {str(e)}")
+            self.logger.end_process("CARGA DE ANALISIS CORRELACION LAG", success=False)
+            raise
+
+# Función de conveniencia
+def load_analisis_correlacion_lag(df_lag, truncate=True):
+    """Carga las correlaciones rezagadas"""
+    loader = AnalisisCorrelacionLagLoader()
+    return loader.load(df_lag, truncate)
+
+if __name__ == "__main__":
+    print("Testing AnalisisCorrelacionLagLoader...")
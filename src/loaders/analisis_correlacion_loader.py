@@ -7,6 +7,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.loaders.base_loader import BaseLoader
+from src.loaders.contracts import validar_contrato
 from src.utils.logger import ETLLogger
 
 class AnalisisCorrelacionLoader:
@@ -15,13 +16,15 @@ class AnalisisCorrelacionLoader:
     def __init__(self):
         self.logger = ETLLogger('AnalisisCorrelacionLoader')
     
-    def load(self, df_analisis, truncate=True):
+    def load(self, df_analisis, truncate=True, incremental=False):
         """
         Carga el análisis de correlación
         
         Args:
             df_analisis: DataFrame con los datos del análisis
             truncate: Si True, limpia la tabla antes de cargar
+            incremental: Si True, reemplaza solo los grupos (Anio, Bimestre)
+                presentes en df_analisis en lugar de truncar la tabla
         """
         self.logger.start_process("CARGA DE ANALISIS CORRELACION")
         
@@ -31,19 +34,29 @@ class AnalisisCorrelacionLoader:
                 'Localidad': df_analisis['Localidad'],
                 'Anio': df_analisis['Anio'].astype(int),
                 'Bimestre': df_analisis['Bimestre'].astype(int),
+                'Indicador': df_analisis['Indicador'],
                 'Concentracion_avg': df_analisis['Concentracion_avg'],
+                'Concentracion_min': df_analisis['Concentracion_min'],
+                'Concentracion_max': df_analisis['Concentracion_max'],
+                'Concentracion_p95': df_analisis['Concentracion_p95'],
                 'NumMediciones': df_analisis['NumMediciones'].astype(int),
-                'Hospitalizaciones': df_analisis['Hospitalizaciones'].astype(int),
+                'Completitud_pct': df_analisis['Completitud_pct'],
+                'Hospitalizaciones': df_analisis['Hospitalizaciones'].astype('Int64'),
                 'HospitalizacionRate': df_analisis['HospitalizacionRate']
             })
             
+            # Validar contra el contrato de la tabla antes de conectarse
+            validar_contrato(df_final, 'AnalisisCorrelacion')
+            
             # Cargar a la base de datos
             loader = BaseLoader('AnalisisCorrelacion')
             
             try:
                 loader.connect()
                 
-                if truncate:
+                if incremental:
+                    self._delete_grupos(loader, df_final)
+                elif truncate:
                     loader.truncate_table()
                 
                 rows = loader.load_dataframe(df_final, if_exists='append')
@@ -57,20 +70,31 @@ class AnalisisCorrelacionLoader:
                 
                 self.logger.end_process("CARGA DE ANALISIS CORRELACION", success=True)
                 return rows
-                
+            
             finally:
                 loader.disconnect()
-            
+        
         except Exception as e:
             self.logger.error(f"Error en carga de AnalisisCorrelacion: {str(e)}")
             self.logger.end_process("CARGA DE ANALISIS CORRELACION", success=False)
             raise
+    
+    def _delete_grupos(self, loader, df_final):
+        """Elimina en una sola sentencia los grupos (Anio, Bimestre) que se van a reescribir"""
+        grupos = df_final[['Anio', 'Bimestre']].drop_duplicates()
+        if grupos.empty:
+            return
+        
+        claves = ', '.join(str(c) for c in (grupos['Anio'] * 10 + grupos['Bimestre']).tolist())
+        query = f"DELETE FROM dbo.AnalisisCorrelacion WHERE Anio * 10 + Bimestre IN ({claves})"
+        loader.execute_query(query)
+        self.logger.info(f"Eliminados los registros de {len(grupos)} grupos (Anio, Bimestre) a recalcular")
 
 # Función de conveniencia
-def load_analisis_correlacion(df_analisis, truncate=True):
+def load_analisis_correlacion(df_analisis, truncate=True, incremental=False):
     """Carga el análisis de correlación"""
     loader = AnalisisCorrelacionLoader()
-    return loader.load(df_analisis, truncate)
+    return loader.load(df_analisis, truncate, incremental)
 
 if __name__ == "__main__":
     print("Testing AnalisisCorrelacionLoader...")
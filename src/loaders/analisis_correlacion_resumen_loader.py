@@ -0,0 +1,84 @@
+"""
+Loader para AnalisisCorrelacionResumen
+"""
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.loaders.base_loader import BaseLoader
+from src.loaders.contracts import validar_contrato
+from src.utils.logger import ETLLogger
+
+class AnalisisCorrelacionResumenLoader:
+    """Loader para la tabla de resumen de correlaciones"""
+    
+    def __init__(self):
+        self.logger = ETLLogger('AnalisisCorrelacionResumenLoader')
+    
+    def load(self, df_resumen, truncate=True):
+        """
+        Carga el resumen de correlaciones con sus intervalos bootstrap
+        
+        Args:
+            df_resumen: DataFrame de AnalisisCorrelacionResumenTransformer
+            truncate: Si True, limpia la tabla antes de cargar (las correlaciones
+                dependen de toda la serie, por lo que siempre se recalculan completas)
+        """
+        self.logger.start_process("CARGA DE ANALISIS CORRELACION RESUMEN")
+        
+        try:
+            # Preparar DataFrame final
+            df_final = pd.DataFrame({
+                'Localidad': df_resumen['Localidad'],
+                'Indicador': df_resumen['Indicador'],
+                'NumPeriodos': df_resumen['NumPeriodos'].astype(int),
+                'Pearson': df_resumen['Pearson'],
+                'Pearson_ICInf': df_resumen['Pearson_ICInf'],
+                'Pearson_ICSup': df_resumen['Pearson_ICSup'],
+                'Spearman': df_resumen['Spearman'],
+                'Spearman_ICInf': df_resumen['Spearman_ICInf'],
+                'Spearman_ICSup': df_resumen['Spearman_ICSup'],
+                'NumBootstrap': df_resumen['NumBootstrap'].astype(int)
+            })
+            
+            # Validar contra el contrato de la tabla antes de conectarse
+            validar_contrato(df_final, 'AnalisisCorrelacionResumen')
+            
+            # Cargar a la base de datos
+            loader = BaseLoader('AnalisisCorrelacionResumen')
+            
+            try:
+                loader.connect()
+                
+                if truncate:
+                    loader.truncate_table()
+                
+                rows = loader.load_dataframe(df_final, if_exists='append')
+                
+                loader.update_etl_control(
+                    process_name='Load_AnalisisCorrelacionResumen',
+                    rows_loaded=rows,
+                    status='Success',
+                    notes=f'Carga exitosa: {rows} registros'
+                )
+                
+                self.logger.end_process("CARGA DE ANALISIS CORRELACION RESUMEN", success=True)
+                return rows
+            
+            finally:
+                loader.disconnect()
+        
+        except Exception as e:
+            self.logger.error(f"Error en carga de AnalisisCorrelacionResumen: {str(e)}")
+            self.logger.end_process("CARGA DE ANALISIS CORRELACION RESUMEN", success=False)
+            raise
+
+# Función de conveniencia
+def load_analisis_correlacion_resumen(df_resumen, truncate=True):
+    """Carga el resumen de correlaciones"""
+    loader = AnalisisCorrelacionResumenLoader()
+    return loader.load(df_resumen, truncate)
+
+if __name__ == "__main__":
+    print("Testing AnalisisCorrelacionResumenLoader...")
@@ -0,0 +1,103 @@
+"""
+Loader para AnalisisPerfilEstacional y AnalisisResidualEstacional
+"""
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.loaders.base_loader import BaseLoader
+from src.loaders.contracts import validar_contrato, CONTRATOS
+from src.utils.logger import ETLLogger
+
+# Tabla destino por componente de la descomposición
+TABLAS_ESTACIONALIDAD = {
+    'perfil': 'AnalisisPerfilEstacional',
+    'residual': 'AnalisisResidualEstacional',
+}
+
+# Columnas enteras de cada tabla (el resto se carga tal cual)
+COLUMNAS_ENTERAS = {
+    'perfil': ['HoraSemana', 'DiaSemana', 'Hora', 'NumMediciones'],
+    'residual': ['Anio', 'Bimestre', 'NumMediciones'],
+}
+
+class AnalisisEstacionalidadLoader:
+    """Loader para las tablas de descomposición estacional"""
+    
+    def __init__(self):
+        self.logger = ETLLogger('AnalisisEstacionalidadLoader')
+    
+    def load(self, df_componente, componente, truncate=True):
+        """
+        Carga el perfil estacional o los residuos agregados
+        
+        Args:
+            df_componente: DataFrame de EstacionalidadMedicionTransformer
+            componente: 'perfil' o 'residual'
+            truncate: Si True, limpia la tabla antes de cargar (la descomposición
+                depende de toda la serie, por lo que siempre se recalcula completa)
+        """
+        if componente not in TABLAS_ESTACIONALIDAD:
+            raise ValueError(f"Componente no soportado: {componente}. Use {list(TABLAS_ESTACIONALIDAD)}")
+        
+        table_name = TABLAS_ESTACIONALIDAD[componente]
+        self.logger.start_process(f"CARGA DE {table_name.upper()}")
+        
+        try:
+            # Preparar DataFrame final con las columnas de la tabla
+            columnas = [c for c, regla in CONTRATOS[table_name].items() if not regla.get('auto')]
+            df_final = df_componente[columnas].astype({c: int for c in COLUMNAS_ENTERAS[componente]})
+            
+            # Validar contra el contrato de la tabla antes de conectarse
+            validar_contrato(df_final, table_name)
+            
+            # Cargar a la base de datos
+            loader = BaseLoader(table_name)
+            
+            try:
+                loader.connect()
+                
+                if truncate:
+                    loader.truncate_table()
+                
+                rows = loader.load_dataframe(df_final, if_exists='append')
+                
+                loader.update_etl_control(
+                    process_name=f'Load_{table_name}',
+                    rows_loaded=rows,
+                    status='Success',
+                    notes=f'Carga exitosa: {rows} registros'
+                )
+                
+                self.logger.end_process(f"CARGA DE {table_name.upper()}", success=True)
+                return rows
+            
+            finally:
+                loader.disconnect()
+        
+        except Exception as e:
+            self.logger.error(f"Error en carga de {table_name}: {str(e)}")
+            self.logger.end_process(f"CARGA DE {table_name.upper()}", success=False)
+            raise
+
+# Función de conveniencia
+def load_analisis_estacionalidad(df_componente, componente, truncate=True):
+    """Carga una tabla de la descomposición estacional"""
+    loader = AnalisisEstacionalidadLoader()
+    return loader.load(df_componente, componente, truncate)
+
+if __name__ == "__main__":
+    print("Testing AnalisisEstacionalidadLoader...")
+    
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    from src.transformers.transform_estacionalidad_medicion import transform_estacionalidad_medicion
+    
+    extractor = MasterExtractor()
+    extracted_data = extractor.extract_all()
+    
+    resultados = transform_estacionalidad_medicion(transform_hecho_medicion_ambiental(extracted_data))
+    for componente, table_name in TABLAS_ESTACIONALIDAD.items():
+        rows = load_analisis_estacionalidad(resultados[componente], componente, truncate=True)
+        print(f"{table_name}: {rows:,} registros cargados")
@@ -4,6 +4,7 @@ Funcionalidades comunes para todos los loaders
 """
 import pandas as pd
 from datetime import datetime
+from sqlalchemy import text
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
@@ -42,16 +43,24 @@ class BaseLoader:
             self.logger.error(f"Error al cerrar conexión: {str(e)}")
     
     def truncate_table(self):
-        """Limpia la tabla antes de cargar"""
+        """
+        Limpia la tabla antes de cargar
+        
+        SQL Server no permite TRUNCATE en tablas referenciadas por llaves
+        foráneas (dimensiones); en ese caso se usa DELETE. Si la tabla no se
+        puede limpiar el error se propaga: cargar encima duplicaría las filas.
+        """
+        self.logger.info(f"Limpiando tabla {self.table_name}...")
         try:
-            self.logger.info(f"Limpiando tabla {self.table_name}...")
-            query = f"TRUNCATE TABLE dbo.{self.table_name}"
-            self.connection.execute(query)
-            self.logger.success(f"Tabla {self.table_name} limpiada")
+            self.connection.execute(text(f"TRUNCATE TABLE dbo.{self.table_name}"))
+            self.connection.commit()
         except Exception as e:
-            self.logger.warning(f"No se pudo truncar {self.table_name}: {str(e)}")
+            self.connection.rollback()
+            self.logger.warning(f"No se pudo truncar {self.table_name} ({str(e)}); se usa DELETE")
+            self.execute_query(f"DELETE FROM dbo.{self.table_name}")
+        self.logger.success(f"Tabla {self.table_name} limpiada")
     
-    def load_dataframe(self, df, if_exists='append', chunksize=100):
+    def load_dataframe(self, df, if_exists='append', chunksize=100, identity_insert=False):
         """
         Carga un DataFrame a SQL Server
         
@@ -59,28 +68,47 @@ class BaseLoader:
             df: DataFrame a cargar
             if_exists: 'append', 'replace', 'fail'
             chunksize: Tamaño del lote (reducido para SQL Server)
+            identity_insert: Si True, inserta valores explícitos en la columna
+                IDENTITY (SET IDENTITY_INSERT en la misma sesión)
         """
         try:
             rows_before = self.get_row_count()
             
             self.logger.info(f"Cargando {len(df)} registros a {self.table_name}...")
             
-            df.to_sql(
-                name=self.table_name,
-                con=self.engine,
-                schema='dbo',
-                if_exists=if_exists,
-                index=False,
-                chunksize=chunksize,
-                method='multi'
-            )
+            if identity_insert:
+                # IDENTITY_INSERT es por sesión: la carga debe usar esta conexión
+                self.execute_query(f"SET IDENTITY_INSERT dbo.{self.table_name} ON")
+                try:
+                    df.to_sql(
+                        name=self.table_name,
+                        con=self.connection,
+                        schema='dbo',
+                        if_exists=if_exists,
+                        index=False,
+                        chunksize=chunksize,
+                        method='multi'
+                    )
+                    self.connection.commit()
+                finally:
+                    self.execute_query(f"SET IDENTITY_INSERT dbo.{self.table_name} OFF")
+            else:
+                df.to_sql(
+                    name=self.table_name,
+                    con=self.engine,
+                    schema='dbo',
+                    if_exists=if_exists,
+                    index=False,
+                    chunksize=chunksize,
+                    method='multi'
+                )
             
             rows_after = self.get_row_count()
             rows_inserted = rows_after - rows_before
             
             self.logger.success(f"Cargados {rows_inserted} registros a {self.table_name}")
             return rows_inserted
-            
+        
         except Exception as e:
             self.logger.error(f"Error al cargar datos a {self.table_name}: {str(e)}")
             raise
@@ -94,6 +122,14 @@ class BaseLoader:
         except:
             return 0
     
+    def is_identity(self, column):
+        """Indica si una columna de la tabla es IDENTITY"""
+        query = (
+            f"SELECT COLUMNPROPERTY(OBJECT_ID('dbo.{self.table_name}'), '{column}', 'IsIdentity') as is_identity"
+        )
+        result = pd.read_sql(query, self.connection)
+        return result['is_identity'].iloc[0] == 1
+    
     def update_etl_control(self, process_name, rows_loaded, status='Success', notes=''):
         """Actualiza la tabla de control ETL"""
         try:
@@ -117,7 +153,7 @@ class BaseLoader:
                     Notes = '{notes}'
                 WHERE ProcessName = '{process_name}'
                 """
-                self.connection.execute(update_query)
+                self.execute_query(update_query)
             else:
                 # Insert
                 insert_query = f"""
@@ -126,22 +162,44 @@ class BaseLoader:
                 VALUES ('{process_name}', GETDATE(), '{self.table_name}', 
                         {rows_loaded}, '{status}', '{notes}')
                 """
-                self.connection.execute(update_query)
+                self.execute_query(insert_query)
             
             self.logger.info(f"ETL_Control actualizado para {process_name}")
-            
+        
         except Exception as e:
             self.logger.warning(f"No se pudo actualizar ETL_Control: {str(e)}")
     
     def execute_query(self, query):
-        """Ejecuta una query SQL"""
+        """Ejecuta una query SQL y confirma la transacción"""
         try:
+            if isinstance(query, str):
+                query = text(query)
             result = self.connection.execute(query)
+            self.connection.commit()
             return result
         except Exception as e:
             self.logger.error(f"Error al ejecutar query: {str(e)}")
             raise
     
+    def execute_fetch(self, query, params=None):
+        """
+        Ejecuta una sentencia que retorna filas (p. ej. INSERT ... OUTPUT),
+        lee el resultado y confirma la transacción
+        
+        Returns:
+            DataFrame con las filas retornadas
+        """
+        try:
+            if isinstance(query, str):
+                query = text(query)
+            result = self.connection.execute(query, params or {})
+            df = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+            self.connection.commit()
+            return df
+        except Exception as e:
+            self.logger.error(f"Error al ejecutar query: {str(e)}")
+            raise
+    
     def read_table(self, query=None):
         """Lee datos de la tabla"""
         try:
@@ -0,0 +1,414 @@
+"""
+Contratos de datos de las tablas del Data Warehouse
+Describen cada tabla de setup_database.sql (tipo, nulos, longitud, rangos y
+llaves foráneas) y se validan de forma vectorizada antes de conectarse a la BD
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+# Rangos de los tipos enteros de SQL Server
+RANGOS_TIPO = {
+    'tinyint': (0, 255),
+    'int': (-2**31, 2**31 - 1),
+    'bigint': (-2**63, 2**63 - 1),
+    'bit': (0, 1),
+}
+
+# Filas de ejemplo reportadas por violación
+MAX_MUESTRAS = 5
+
+def col(tipo, nulo=True, largo=None, rango=None, fk=None, auto=False):
+    """
+    Especificación de una columna del contrato
+    
+    Args:
+        tipo: 'int', 'tinyint', 'bigint', 'bit', 'float', 'texto' o 'fecha'
+        nulo: Si False, la columna es NOT NULL
+        largo: Longitud máxima de NVARCHAR(n)
+        rango: Tupla (mínimo, máximo) de valores permitidos
+        fk: Nombre del dominio de llave foránea ('Tabla.Columna')
+        auto: Si True, la BD puede asignar el valor (IDENTITY o DEFAULT) y la
+            columna puede faltar en el DataFrame
+    """
+    return {'tipo': tipo, 'nulo': nulo, 'largo': largo, 'rango': rango, 'fk': fk, 'auto': auto}
+
+# Columnas comunes
+_SOURCE_FILE = col('texto', largo=200)
+_CREATED_AT = col('fecha', auto=True)
+_CORRELACION = col('float', rango=(-1, 1))
+_VERSION_SCD2 = {
+    'HashDiff': col('bigint'),
+    'FechaInicio': col('fecha', nulo=False, auto=True),
+    'FechaFin': col('fecha'),
+    'EsActual': col('bit', nulo=False, auto=True),
+}
+
+CONTRATOS = {
+    'DimFecha': {
+        'IDFecha': col('int', nulo=False, auto=True),
+        'Fecha': col('fecha', nulo=False),
+        'Anio': col('int', rango=(1900, 2100)),
+        'Mes': col('int', rango=(1, 12)),
+        'Dia': col('int', rango=(1, 31)),
+        'NombreMes': col('texto', largo=20),
+        'Trimestre': col('int', rango=(1, 4)),
+        'Bimestre': col('int', rango=(1, 6)),
+    },
+    'DimHora': {
+        'IDHora': col('int', nulo=False, auto=True),
+        'Hora': col('int', rango=(0, 23)),
+        'RangoHorario': col('texto', largo=20),
+        'Periodo': col('texto', largo=5),
+        'HoraFormato': col('texto', largo=10),
+    },
+    'DimClinica': {
+        'IDClinica': col('int', nulo=False, auto=True),
+        'CodigoCIE': col('texto', largo=50),
+        'NombreClinica': col('texto', largo=200),
+        'TipoHospitalizacion': col('texto', largo=100),
+        'SourceFile': _SOURCE_FILE,
+        'CreatedAt': _CREATED_AT,
+    },
+    'DimPaciente': {
+        'IDPaciente': col('int', nulo=False, auto=True),
+        'Sexo': col('texto', largo=20),
+        'GrupoEtario': col('texto', largo=50),
+        'Ciudad': col('texto', largo=100),
+        'Estrato': col('int'),
+        'Migrante': col('texto', largo=50),
+        'EnfoqueDiferencial': col('texto', largo=100),
+        'RegimenSeguridadSocial': col('texto', largo=100),
+        'HashPaciente': col('bigint', nulo=False),
+        'SourceFile': _SOURCE_FILE,
+        'CreatedAt': _CREATED_AT,
+        **_VERSION_SCD2,
+    },
+    'DimUbicacion': {
+        'IDUbicacion': col('int', nulo=False, auto=True),
+        'Barrio': col('texto', largo=150),
+        'Localidad': col('texto', largo=150),
+        'CodigoLocalidad': col('texto', largo=50),
+        'Tipo': col('texto', largo=100),
+        'SourceFile': _SOURCE_FILE,
+        **_VERSION_SCD2,
+    },
+    'DimExposicion': {
+        'IDExposicion': col('int', nulo=False, auto=True),
+        'Indicador': col('texto', largo=200),
+        'TipoIndicador': col('texto', largo=100),
+        'SourceFile': _SOURCE_FILE,
+    },
+    'DimEstacion': {
+        'IDEstacion': col('int', nulo=False, auto=True),
+        'NombreEstacion': col('texto', nulo=False, largo=200),
+        'TipoEstacion': col('texto', largo=100),
+        'Ubicacion': col('texto', largo=200),
+        'Localidad': col('texto', largo=150),
+    },
+    'HechoHospitalizaciones': {
+        'IDHospitalizacion': col('bigint', nulo=False, auto=True),
+        'IDClinica': col('int', fk='DimClinica.IDClinica'),
+        'IDFecha': col('int', nulo=False, fk='DimFecha.IDFecha'),
+        'IDHora': col('int', fk='DimHora.IDHora'),
+        'IDPaciente': col('int', fk='DimPaciente.IDPaciente'),
+        'IDUbicacion': col('int', fk='DimUbicacion.IDUbicacion'),
+        'NumeroCasos': col('int', rango=(0, None), auto=True),
+        'TipoIngreso': col('texto', largo=50),
+        'DuracionDias': col('int', rango=(0, None)),
+        'SourceFile': _SOURCE_FILE,
+        'CreatedAt': _CREATED_AT,
+    },
+    'HechoMedicionAmbiental': {
+        'IDMedicion': col('bigint', nulo=False, auto=True),
+        'IDFecha': col('int', nulo=False, fk='DimFecha.IDFecha'),
+        'IDHora': col('int', nulo=False, fk='DimHora.IDHora'),
+        'Concentracion': col('float', nulo=False),
+        'IDExposicion': col('int', nulo=False, fk='DimExposicion.IDExposicion'),
+        'IDUbicacion': col('int', nulo=False, fk='DimUbicacion.IDUbicacion'),
+        'IDEstacion': col('int', nulo=False, fk='DimEstacion.IDEstacion'),
+        'CodigoCalidad': col('tinyint', nulo=False, rango=(0, 4), auto=True),
+    },
+    'HechoMedicionDiaria': {
+        'IDMedicionDiaria': col('bigint', nulo=False, auto=True),
+        'IDFecha': col('int', nulo=False, fk='DimFecha.IDFecha'),
+        'IDUbicacion': col('int', nulo=False, fk='DimUbicacion.IDUbicacion'),
+        'IDExposicion': col('int', nulo=False, fk='DimExposicion.IDExposicion'),
+        'Concentracion_avg': col('float'),
+        'Concentracion_max': col('float'),
+        'NumMediciones': col('int', nulo=False, rango=(0, None)),
+        'HorasSobreUmbral': col('int', nulo=False, rango=(0, None)),
+        'HorasEsperadas': col('int', rango=(0, None)),
+        'CompletitudPct': col('float', rango=(0, 100)),
+        'MediaMovilMax': col('float', rango=(0, None)),
+        'IndiceIBOCAMax': col('float', rango=(0, 500)),
+    },
+    'HechoMedicionMensual': {
+        'IDMedicionMensual': col('int', nulo=False, auto=True),
+        'Anio': col('int', nulo=False, rango=(1900, 2100)),
+        'Mes': col('int', nulo=False, rango=(1, 12)),
+        'IDFecha': col('int', nulo=False, fk='DimFecha.IDFecha'),
+        'IDUbicacion': col('int', nulo=False, fk='DimUbicacion.IDUbicacion'),
+        'IDExposicion': col('int', nulo=False, fk='DimExposicion.IDExposicion'),
+        'Concentracion_avg': col('float'),
+        'Concentracion_max': col('float'),
+        'NumMediciones': col('int', nulo=False, rango=(0, None)),
+        'HorasSobreUmbral': col('int', nulo=False, rango=(0, None)),
+        'HorasEsperadas': col('int', rango=(0, None)),
+        'CompletitudPct': col('float', rango=(0, 100)),
+        'MediaMovilMax': col('float', rango=(0, None)),
+        'IndiceIBOCAMax': col('float', rango=(0, 500)),
+    },
+    'HechoEpisodioContaminacion': {
+        'IDEpisodio': col('bigint', nulo=False, auto=True),
+        'IDFechaInicio': col('int', nulo=False, fk='DimFecha.IDFecha'),
+        'IDHoraInicio': col('int', nulo=False, fk='DimHora.IDHora'),
+        'IDFechaFin': col('int', nulo=False, fk='DimFecha.IDFecha'),
+        'IDHoraFin': col('int', nulo=False, fk='DimHora.IDHora'),
+        'IDExposicion': col('int', nulo=False, fk='DimExposicion.IDExposicion'),
+        'IDUbicacion': col('int', nulo=False, fk='DimUbicacion.IDUbicacion'),
+        'IDEstacion': col('int', nulo=False, fk='DimEstacion.IDEstacion'),
+        'DuracionHoras': col('int', nulo=False, rango=(1, None)),
+        'Concentracion_max': col('float', nulo=False),
+        'Concentracion_avg': col('float', nulo=False),
+        'Umbral': col('float', nulo=False),
+    },
+    'HechoMedicionCuantilMensual': {
+        'IDCuantilMensual': col('int', nulo=False, auto=True),
+        'Anio': col('int', nulo=False, rango=(1900, 2100)),
+        'Mes': col('int', nulo=False, rango=(1, 12)),
+        'IDFecha': col('int', nulo=False, fk='DimFecha.IDFecha'),
+        'IDUbicacion': col('int', nulo=False, fk='DimUbicacion.IDUbicacion'),
+        'IDExposicion': col('int', nulo=False, fk='DimExposicion.IDExposicion'),
+        'IDEstacion': col('int', nulo=False, fk='DimEstacion.IDEstacion'),
+        'NumMediciones': col('int', nulo=False, rango=(1, None)),
+        'Concentracion_p50': col('float', nulo=False, rango=(0, None)),
+        'Concentracion_p95': col('float', nulo=False, rango=(0, None)),
+        'Concentracion_p99': col('float', nulo=False, rango=(0, None)),
+        'ErrorRelativo': col('float', nulo=False, rango=(0, 1)),
+    },
+    'AnalisisCorrelacion': {
+        'IDAnalisis': col('int', nulo=False, auto=True),
+        'Localidad': col('texto', nulo=False, largo=150),
+        'Anio': col('int', nulo=False, rango=(1900, 2100)),
+        'Bimestre': col('int', nulo=False, rango=(1, 6)),
+        'Indicador': col('texto', nulo=False, largo=200),
+        'Concentracion_avg': col('float'),
+        'Concentracion_min': col('float'),
+        'Concentracion_max': col('float'),
+        'Concentracion_p95': col('float'),
+        'NumMediciones': col('int', rango=(0, None)),
+        'Completitud_pct': col('float', rango=(0, 100)),
+        'Hospitalizaciones': col('int', rango=(0, None)),
+        'HospitalizacionRate': col('float'),
+    },
+    'AnalisisCorrelacionLag': {
+        'IDAnalisisLag': col('int', nulo=False, auto=True),
+        'Localidad': col('texto', nulo=False, largo=150),
+        'Indicador': col('texto', nulo=False, largo=200),
+        'Lag': col('int', nulo=False, rango=(0, None)),
+        'NumPeriodos': col('int', nulo=False, rango=(0, None)),
+        'Correlacion': _CORRELACION,
+    },
+    'AnalisisCorrelacionResumen': {
+        'IDResumen': col('int', nulo=False, auto=True),
+        'Localidad': col('texto', nulo=False, largo=150),
+        'Indicador': col('texto', nulo=False, largo=200),
+        'NumPeriodos': col('int', nulo=False, rango=(0, None)),
+        'Pearson': _CORRELACION,
+        'Pearson_ICInf': _CORRELACION,
+        'Pearson_ICSup': _CORRELACION,
+        'Spearman': _CORRELACION,
+        'Spearman_ICInf': _CORRELACION,
+        'Spearman_ICSup': _CORRELACION,
+        'NumBootstrap': col('int', nulo=False, rango=(0, None)),
+    },
+    'AnalisisPerfilEstacional': {
+        'IDPerfil': col('int', nulo=False, auto=True),
+        'Estacion': col('texto', nulo=False, largo=200),
+        'Localidad': col('texto', largo=150),
+        'Indicador': col('texto', nulo=False, largo=200),
+        'HoraSemana': col('int', nulo=False, rango=(0, 167)),
+        'DiaSemana': col('int', nulo=False, rango=(0, 6)),
+        'Hora': col('int', nulo=False, rango=(0, 23)),
+        'Estacional_semanal': col('float'),
+        'Estacional_diario': col('float'),
+        'NumMediciones': col('int', nulo=False, rango=(0, None)),
+    },
+    'AnalisisResidualEstacional': {
+        'IDResidual': col('int', nulo=False, auto=True),
+        'Localidad': col('texto', nulo=False, largo=150),
+        'Anio': col('int', nulo=False, rango=(1900, 2100)),
+        'Bimestre': col('int', nulo=False, rango=(1, 6)),
+        'Indicador': col('texto', nulo=False, largo=200),
+        'NumMediciones': col('int', nulo=False, rango=(1, None)),
+        'Concentracion_avg': col('float', nulo=False),
+        'Tendencia_avg': col('float', nulo=False),
+        'Estacional_avg': col('float', nulo=False),
+        'Residual_avg': col('float', nulo=False),
+        'Residual_std': col('float', rango=(0, None)),
+    },
+}
+
+# Salidas de MasterTransformer que se cargan tal cual a una tabla
+TABLAS_TRANSFORMADAS = {
+    'dim_fecha': 'DimFecha',
+    'dim_hora': 'DimHora',
+    'dim_clinica': 'DimClinica',
+    'dim_paciente': 'DimPaciente',
+    'dim_ubicacion': 'DimUbicacion',
+    'dim_exposicion': 'DimExposicion',
+    'dim_estacion': 'DimEstacion',
+    'analisis_correlacion': 'AnalisisCorrelacion',
+    'analisis_correlacion_lag': 'AnalisisCorrelacionLag',
+    'analisis_correlacion_resumen': 'AnalisisCorrelacionResumen',
+    'analisis_perfil_estacional': 'AnalisisPerfilEstacional',
+    'analisis_residual_estacional': 'AnalisisResidualEstacional',
+}
+
+def _como_numero(serie):
+    """Valores numéricos (float) y máscara de los que no son convertibles"""
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_numeric_dtype(serie):
+        valores = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+        return valores, np.zeros(len(serie), dtype=bool)
+    valores = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return valores, serie.notna().to_numpy() & np.isnan(valores)
+
+def _largos(serie):
+    """Longitud en caracteres de cada valor (calculada sobre los valores únicos)"""
+    codes, uniques = pd.factorize(serie)
+    largos = np.fromiter((len(str(v)) for v in uniques), dtype=np.int64, count=len(uniques))
+    return np.where(codes >= 0, np.append(largos, 0)[codes], 0)
+
+def _verificar_columna(serie, spec, dominio):
+    """Lista de (motivo, máscara) de las filas que violan la especificación"""
+    violaciones = []
+    nulos = serie.isna().to_numpy()
+    
+    if not spec['nulo'] and nulos.any():
+        violaciones.append(('nulo en columna NOT NULL', nulos))
+    
+    tipo = spec['tipo']
+    if tipo == 'texto':
+        if spec['largo'] is not None:
+            violaciones.append((f"texto de más de {spec['largo']} caracteres", _largos(serie) > spec['largo']))
+    elif tipo == 'fecha':
+        fechas = pd.to_datetime(serie, errors='coerce')
+        violaciones.append(('fecha no válida', ~nulos & fechas.isna().to_numpy()))
+    else:
+        valores, no_numericos = _como_numero(serie)
+        violaciones.append((f'valor no numérico para {tipo}', no_numericos))
+        if tipo == 'float':
+            violaciones.append(('valor infinito', np.isinf(valores)))
+        else:
+            with np.errstate(invalid='ignore'):
+                violaciones.append((f'valor no entero para {tipo}', ~np.isnan(valores) & (valores % 1 != 0)))
+            minimo, maximo = RANGOS_TIPO[tipo]
+            violaciones.append((f'fuera del rango de {tipo}', (valores < minimo) | (valores > maximo)))
+        
+        if spec['rango'] is not None:
+            minimo, maximo = spec['rango']
+            fuera = np.zeros(len(serie), dtype=bool)
+            if minimo is not None:
+                fuera |= valores < minimo
+            if maximo is not None:
+                fuera |= valores > maximo
+            violaciones.append((f'fuera del rango {spec["rango"]}', fuera))
+    
+    if dominio is not None:
+        fuera = ~nulos & ~serie.isin(dominio).to_numpy()
+        violaciones.append((f"llave sin correspondencia en {spec['fk']}", fuera))
+    
+    return [(motivo, mask) for motivo, mask in violaciones if mask.any()]
+
+def verificar_contrato(df, tabla, dominios=None):
+    """
+    Verifica un DataFrame contra el contrato de una tabla
+    
+    Args:
+        df: DataFrame a cargar
+        tabla: Nombre de la tabla en CONTRATOS
+        dominios: Diccionario 'Tabla.Columna' -> valores válidos de las llaves
+            foráneas (las que no se reciben no se verifican)
+    
+    Returns:
+        Lista de diccionarios con columna, motivo, filas y muestra (filas
+        de ejemplo); vacía si el DataFrame cumple el contrato
+    """
+    contrato = CONTRATOS[tabla]
+    dominios = dominios or {}
+    violaciones = []
+    
+    for columna in df.columns:
+        if columna not in contrato:
+            violaciones.append({'columna': columna, 'motivo': 'columna inexistente en la tabla', 'filas': len(df), 'muestra': None})
+    
+    for columna, spec in contrato.items():
+        if columna not in df.columns:
+            if not spec['nulo'] and not spec['auto']:
+                violaciones.append({'columna': columna, 'motivo': 'columna NOT NULL ausente', 'filas': len(df), 'muestra': None})
+            continue
+        
+        for motivo, mask in _verificar_columna(df[columna], spec, dominios.get(spec['fk'])):
+            violaciones.append({
+                'columna': columna,
+                'motivo': motivo,
+                'filas': int(mask.sum()),
+                'muestra': df[mask].head(MAX_MUESTRAS)
+            })
+    
+    return violaciones
+
+def validar_contrato(df, tabla, dominios=None):
+    """
+    Valida un DataFrame contra el contrato de su tabla
+    
+    Raises:
+        ValueError: Con cada violación y sus filas de ejemplo
+    """
+    violaciones = verificar_contrato(df, tabla, dominios)
+    if not violaciones:
+        return
+    
+    lineas = [f"{tabla}: {len(violaciones)} violaciones del contrato de datos ({len(df):,} filas)"]
+    for v in violaciones:
+        lineas.append(f"  - {v['columna']}: {v['motivo']} ({v['filas']:,} filas)")
+        if v['muestra'] is not None:
+            lineas.append('      ' + v['muestra'].to_string(max_colwidth=60).replace('\n', '\n      '))
+    raise ValueError('\n'.join(lineas))
+
+def dominios_de(dimensiones):
+    """
+    Dominios de llaves foráneas a partir de dimensiones ya leídas
+    
+    Args:
+        dimensiones: Diccionario 'DimX' -> DataFrame (o None si no se leyó)
+    """
+    dominios = {}
+    for tabla, df in dimensiones.items():
+        clave = next(iter(CONTRATOS[tabla]))
+        if df is not None and clave in df.columns:
+            dominios[f'{tabla}.{clave}'] = df[clave]
+    return dominios
+
+def validar_transformados(transformed_data):
+    """Valida las salidas de MasterTransformer que se cargan sin lookups"""
+    for data_key, tabla in TABLAS_TRANSFORMADAS.items():
+        df = transformed_data.get(data_key)
+        if df is not None:
+            validar_contrato(df, tabla)
+
+if __name__ == "__main__":
+    # Test de los contratos
+    print("Testing contratos de datos...")
+    df = pd.DataFrame({
+        'Localidad': ['Usme', 'x' * 200, None],
+        'Indicador': ['PM2.5', 'CO', 'CO'],
+        'Lag': [0, 1, -1],
+        'NumPeriodos': [5, 6, 7],
+        'Correlacion': [0.5, 1.5, np.nan],
+    })
+    for v in verificar_contrato(df, 'AnalisisCorrelacionLag'):
+        print(f"{v['columna']}: {v['motivo']} ({v['filas']} filas)")
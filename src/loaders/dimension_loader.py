@@ -7,7 +7,12 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.loaders.base_loader import BaseLoader
+from src.loaders.contracts import validar_contrato
 from src.utils.logger import ETLLogger
+from src.utils.claves import CLAVES_INTELIGENTES
+from src.loaders.scd2_loader import DIMENSIONES_SCD2, SCD2Loader, solo_versiones_actuales
+from src.loaders.miembros_inferidos import MIEMBROS_INFERIDOS, enriquecer_inferidos
+from config.etl_config import etl_config
 
 class DimensionLoader:
     """Loader para cargar todas las dimensiones"""
@@ -15,6 +20,8 @@ class DimensionLoader:
     def __init__(self):
         self.logger = ETLLogger('DimensionLoader')
         self.results = {}
+        self.dimensiones_scd2 = etl_config.dimensiones_scd2
+        self.miembros_inferidos = etl_config.miembros_inferidos
     
     def load_all_dimensions(self, transformed_data, truncate=True):
         """
@@ -34,9 +41,15 @@ class DimensionLoader:
                 ('dim_clinica', 'DimClinica'),
                 ('dim_paciente', 'DimPaciente'),
                 ('dim_ubicacion', 'DimUbicacion'),
-                ('dim_exposicion', 'DimExposicion')
+                ('dim_exposicion', 'DimExposicion'),
+                ('dim_estacion', 'DimEstacion')
             ]
             
+            # Validar todas las dimensiones antes de truncar cualquiera
+            for data_key, table_name in dimensions:
+                if transformed_data.get(data_key) is not None:
+                    validar_contrato(transformed_data[data_key], table_name)
+            
             for data_key, table_name in dimensions:
                 if data_key in transformed_data and transformed_data[data_key] is not None:
                     self.logger.info(f"\nCargando {table_name}...")
@@ -59,6 +72,18 @@ class DimensionLoader:
     
     def _load_dimension(self, df, table_name, truncate=True):
         """Carga una dimensión específica"""
+        scd2 = self.dimensiones_scd2 and table_name in DIMENSIONES_SCD2
+        
+        # Miembros inferidos que ya llegaron: se completan en su lugar (los
+        # hechos no cambian) y no se vuelven a insertar. Solo aplica si la
+        # tabla no se trunca.
+        if self.miembros_inferidos and table_name in MIEMBROS_INFERIDOS and (scd2 or not truncate):
+            df = self._completar_inferidos(df, table_name)
+        
+        # Dimensiones SCD2: se versionan los cambios en vez de truncar
+        if scd2:
+            return SCD2Loader(table_name).load(df)
+        
         loader = BaseLoader(table_name)
         
         try:
@@ -67,7 +92,14 @@ class DimensionLoader:
             if truncate:
                 loader.truncate_table()
             
-            rows = loader.load_dataframe(df, if_exists='append')
+            # Llaves inteligentes: si la tabla aún tiene IDENTITY (esquema sin
+            # migrar) los valores se insertan explícitamente
+            identity_insert = False
+            clave = CLAVES_INTELIGENTES.get(table_name)
+            if clave is not None and clave in df.columns:
+                identity_insert = loader.is_identity(clave)
+            
+            rows = loader.load_dataframe(df, if_exists='append', identity_insert=identity_insert)
             
             # Actualizar control ETL
             loader.update_etl_control(
@@ -85,16 +117,27 @@ class DimensionLoader:
         finally:
             loader.disconnect()
     
+    def _completar_inferidos(self, df, table_name):
+        """Completa los miembros inferidos de la tabla y retorna las filas restantes de df"""
+        loader = BaseLoader(table_name)
+        try:
+            loader.connect()
+            completa = enriquecer_inferidos(loader, df, table_name)
+            return df[~completa]
+        finally:
+            loader.disconnect()
+    
     def get_dimension_ids(self, table_name):
         """
         Obtiene los IDs de una dimensión cargada (para hacer lookups)
-        Retorna un DataFrame con todos los datos de la dimensión
+        Retorna un DataFrame con todos los datos de la dimensión (solo las
+        versiones vigentes en dimensiones SCD2)
         """
         loader = BaseLoader(table_name)
         try:
             loader.connect()
             df = loader.read_table()
-            return df
+            return solo_versiones_actuales(df)
         finally:
             loader.disconnect()
 
@@ -121,6 +164,9 @@ if __name__ == "__main__":
     transformed_data = transformer.transform_all(extracted_data)
     
     print("\n3. Cargando dimensiones...")
+    # Los hechos referencian a las dimensiones: se limpian primero
+    from src.loaders.master_loader import MasterLoader
+    MasterLoader().limpiar_dependientes()
     loader = DimensionLoader()
     results = loader.load_all_dimensions(transformed_data, truncate=True)
     
@@ -0,0 +1,160 @@
+"""
+Loader para HechoMedicionCuantilMensual
+"""
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.loaders.base_loader import BaseLoader
+from src.loaders.contracts import validar_contrato, dominios_de
+from src.loaders.dimension_loader import DimensionLoader
+from src.utils.logger import ETLLogger
+from src.utils.claves import id_fecha
+from src.utils.gazetteer import gazetteer, ids_ubicacion_por_codigo
+from config.etl_config import etl_config
+
+class HechoMedicionCuantilMensualLoader:
+    """Loader para la tabla de percentiles mensuales por estación"""
+    
+    def __init__(self, claves_inteligentes=None):
+        """
+        Args:
+            claves_inteligentes: Si True, IDFecha se calcula sin consultar
+                DimFecha (por defecto según etl_config)
+        """
+        self.logger = ETLLogger('HechoMedicionCuantilMensualLoader')
+        self.dim_loader = DimensionLoader()
+        if claves_inteligentes is None:
+            claves_inteligentes = etl_config.claves_inteligentes
+        self.claves_inteligentes = claves_inteligentes
+    
+    def load(self, df_cuantiles, truncate=True):
+        """
+        Carga los percentiles mensuales
+        
+        Args:
+            df_cuantiles: DataFrame de CuantilesMedicionTransformer
+            truncate: Si True, limpia la tabla antes de cargar
+        """
+        self.logger.start_process("CARGA DE HECHO MEDICION CUANTIL MENSUAL")
+        
+        try:
+            # 1. Obtener dimensiones para lookups
+            self.logger.info("Obteniendo dimensiones para lookups...")
+            dim_fecha = None if self.claves_inteligentes else self.dim_loader.get_dimension_ids('DimFecha')
+            dim_exposicion = self.dim_loader.get_dimension_ids('DimExposicion')
+            dim_ubicacion = self.dim_loader.get_dimension_ids('DimUbicacion')
+            dim_estacion = self.dim_loader.get_dimension_ids('DimEstacion')
+            
+            # 2. Hacer lookups y preparar datos para carga
+            df_final = self._prepare_cuantil_data(
+                df_cuantiles, dim_fecha, dim_exposicion, dim_ubicacion, dim_estacion
+            )
+            
+            # Validar contra el contrato (llaves foráneas contra las dimensiones leídas)
+            validar_contrato(df_final, 'HechoMedicionCuantilMensual', dominios_de({
+                'DimFecha': dim_fecha, 'DimExposicion': dim_exposicion,
+                'DimUbicacion': dim_ubicacion, 'DimEstacion': dim_estacion
+            }))
+            
+            # 3. Cargar a SQL Server
+            self.logger.info(f"Preparados {len(df_final)} registros para carga...")
+            loader = BaseLoader('HechoMedicionCuantilMensual')
+            
+            try:
+                loader.connect()
+                
+                if truncate:
+                    loader.truncate_table()
+                
+                rows = loader.load_dataframe(df_final, if_exists='append')
+                
+                loader.update_etl_control(
+                    process_name='Load_HechoMedicionCuantilMensual',
+                    rows_loaded=rows,
+                    status='Success',
+                    notes=f'Carga exitosa: {rows} registros'
+                )
+                
+                self.logger.end_process("CARGA DE HECHO MEDICION CUANTIL MENSUAL", success=True)
+                return rows
+            
+            finally:
+                loader.disconnect()
+        
+        except Exception as e:
+            self.logger.error(f"Error en carga de HechoMedicionCuantilMensual: {str(e)}")
+            self.logger.end_process("CARGA DE HECHO MEDICION CUANTIL MENSUAL", success=False)
+            raise
+    
+    def _prepare_cuantil_data(self, df_cuantiles, dim_fecha, dim_exposicion, dim_ubicacion, dim_estacion):
+        """Prepara los percentiles con lookups a dimensiones"""
+        # Copia superficial: las columnas nuevas no alteran df_cuantiles
+        df = df_cuantiles.copy(deep=False)
+        
+        # Lookup IDFecha (primer día del mes)
+        df['fecha'] = pd.to_datetime(pd.DataFrame({'year': df['anio'], 'month': df['mes'], 'day': 1}))
+        if dim_fecha is None:
+            df['IDFecha'] = id_fecha(df['fecha'])
+        else:
+            dim_fecha['Fecha'] = pd.to_datetime(dim_fecha['Fecha'])
+            df = df.merge(dim_fecha[['IDFecha', 'Fecha']], left_on='fecha', right_on='Fecha', how='left')
+        
+        # Lookup IDExposicion
+        df = df.merge(
+            dim_exposicion[['IDExposicion', 'Indicador']],
+            left_on='indicador', right_on='Indicador', how='left'
+        )
+        
+        # Lookup IDUbicacion por el código entero del gazetteer
+        df['codigo_localidad'] = gazetteer().resolve(df['localidad'])
+        df = df.merge(ids_ubicacion_por_codigo(dim_ubicacion), on='codigo_localidad', how='left')
+        
+        # Lookup IDEstacion
+        df = df.merge(
+            dim_estacion[['IDEstacion', 'NombreEstacion']],
+            left_on='estacion', right_on='NombreEstacion', how='left'
+        )
+        
+        # Remover registros sin llaves requeridas
+        llaves = ['IDFecha', 'IDUbicacion', 'IDExposicion', 'IDEstacion']
+        initial_count = len(df)
+        df = df.dropna(subset=llaves)
+        removed = initial_count - len(df)
+        
+        if removed > 0:
+            self.logger.warning(f"{removed} registros removidos por falta de llaves requeridas")
+        
+        df_final = pd.DataFrame({
+            'Anio': df['anio'].astype(int),
+            'Mes': df['mes'].astype(int),
+        })
+        df_final[llaves] = df[llaves].astype(int)
+        df_final['NumMediciones'] = df['num_mediciones'].astype(int)
+        df_final['Concentracion_p50'] = df['p50']
+        df_final['Concentracion_p95'] = df['p95']
+        df_final['Concentracion_p99'] = df['p99']
+        df_final['ErrorRelativo'] = df['error_relativo']
+        return df_final.reset_index(drop=True)
+
+# Función de conveniencia
+def load_hecho_medicion_cuantil_mensual(df_cuantiles, truncate=True):
+    """Carga los percentiles mensuales por estación"""
+    loader = HechoMedicionCuantilMensualLoader()
+    return loader.load(df_cuantiles, truncate)
+
+if __name__ == "__main__":
+    # Test del loader
+    print("Testing HechoMedicionCuantilMensualLoader...")
+    
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    from src.transformers.transform_cuantiles_medicion import transform_cuantiles_medicion
+    
+    extractor = MasterExtractor()
+    extracted_data = extractor.extract_all()
+    
+    df_cuantiles = transform_cuantiles_medicion(transform_hecho_medicion_ambiental(extracted_data))
+    rows = load_hecho_medicion_cuantil_mensual(df_cuantiles, truncate=True)
+    print(f"HechoMedicionCuantilMensual: {rows:,} registros cargados")
@@ -0,0 +1,164 @@
+"""
+Loader para HechoEpisodioContaminacion
+"""
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.loaders.base_loader import BaseLoader
+from src.loaders.contracts import validar_contrato, dominios_de
+from src.loaders.dimension_loader import DimensionLoader
+from src.utils.logger import ETLLogger
+from src.utils.claves import id_fecha, id_hora
+from src.utils.gazetteer import gazetteer, ids_ubicacion_por_codigo
+from config.etl_config import etl_config
+
+class HechoEpisodioContaminacionLoader:
+    """Loader para la tabla de hechos de episodios de contaminación"""
+    
+    def __init__(self, claves_inteligentes=None):
+        """
+        Args:
+            claves_inteligentes: Si True, IDFecha e IDHora se calculan sin
+                consultar DimFecha ni DimHora (por defecto según etl_config)
+        """
+        self.logger = ETLLogger('HechoEpisodioContaminacionLoader')
+        self.dim_loader = DimensionLoader()
+        if claves_inteligentes is None:
+            claves_inteligentes = etl_config.claves_inteligentes
+        self.claves_inteligentes = claves_inteligentes
+    
+    def load(self, df_episodios, truncate=True):
+        """
+        Carga los episodios de contaminación
+        
+        Args:
+            df_episodios: DataFrame de EpisodioContaminacionTransformer
+            truncate: Si True, limpia la tabla antes de cargar
+        """
+        self.logger.start_process("CARGA DE HECHO EPISODIO CONTAMINACION")
+        
+        try:
+            # 1. Obtener dimensiones para lookups
+            self.logger.info("Obteniendo dimensiones para lookups...")
+            if self.claves_inteligentes:
+                dim_fecha = dim_hora = None
+            else:
+                dim_fecha = self.dim_loader.get_dimension_ids('DimFecha')
+                dim_hora = self.dim_loader.get_dimension_ids('DimHora')
+            dim_exposicion = self.dim_loader.get_dimension_ids('DimExposicion')
+            dim_ubicacion = self.dim_loader.get_dimension_ids('DimUbicacion')
+            dim_estacion = self.dim_loader.get_dimension_ids('DimEstacion')
+            
+            # 2. Hacer lookups y preparar datos para carga
+            df_final = self._prepare_episodio_data(
+                df_episodios, dim_fecha, dim_hora, dim_exposicion, dim_ubicacion, dim_estacion
+            )
+            
+            # Validar contra el contrato (llaves foráneas contra las dimensiones leídas)
+            validar_contrato(df_final, 'HechoEpisodioContaminacion', dominios_de({
+                'DimFecha': dim_fecha, 'DimHora': dim_hora, 'DimExposicion': dim_exposicion,
+                'DimUbicacion': dim_ubicacion, 'DimEstacion': dim_estacion
+            }))
+            
+            # 3. Cargar a SQL Server
+            self.logger.info(f"Preparados {len(df_final)} registros para carga...")
+            loader = BaseLoader('HechoEpisodioContaminacion')
+            
+            try:
+                loader.connect()
+                
+                if truncate:
+                    loader.truncate_table()
+                
+                rows = loader.load_dataframe(df_final, if_exists='append')
+                
+                loader.update_etl_control(
+                    process_name='Load_HechoEpisodioContaminacion',
+                    rows_loaded=rows,
+                    status='Success',
+                    notes=f'Carga exitosa: {rows} registros'
+                )
+                
+                self.logger.end_process("CARGA DE HECHO EPISODIO CONTAMINACION", success=True)
+                return rows
+            
+            finally:
+                loader.disconnect()
+        
+        except Exception as e:
+            self.logger.error(f"Error en carga de HechoEpisodioContaminacion: {str(e)}")
+            self.logger.end_process("CARGA DE HECHO EPISODIO CONTAMINACION", success=False)
+            raise
+    
+    def _prepare_episodio_data(self, df_episodios, dim_fecha, dim_hora, dim_exposicion, dim_ubicacion, dim_estacion):
+        """Prepara los episodios con lookups a dimensiones"""
+        # Copia superficial: las columnas nuevas no alteran df_episodios
+        df = df_episodios.copy(deep=False)
+        
+        # Lookup IDFecha e IDHora del inicio y del fin de cada episodio
+        if dim_fecha is None:
+            for extremo in ('Inicio', 'Fin'):
+                df[f'IDFecha{extremo}'] = id_fecha(df[f'fecha_{extremo.lower()}'])
+                df[f'IDHora{extremo}'] = id_hora(df[f'hora_{extremo.lower()}'])
+        else:
+            ids_fecha = pd.Series(dim_fecha['IDFecha'].to_numpy(), index=pd.to_datetime(dim_fecha['Fecha']))
+            ids_hora = pd.Series(dim_hora['IDHora'].to_numpy(), index=dim_hora['Hora'].to_numpy())
+            for extremo in ('Inicio', 'Fin'):
+                df[f'IDFecha{extremo}'] = pd.to_datetime(df[f'fecha_{extremo.lower()}']).map(ids_fecha)
+                df[f'IDHora{extremo}'] = df[f'hora_{extremo.lower()}'].map(ids_hora)
+        
+        # Lookup IDExposicion
+        df = df.merge(
+            dim_exposicion[['IDExposicion', 'Indicador']],
+            left_on='indicador', right_on='Indicador', how='left'
+        )
+        
+        # Lookup IDUbicacion por el código entero del gazetteer
+        if 'codigo_localidad' not in df.columns:
+            df['codigo_localidad'] = gazetteer().resolve(df['localidad'])
+        df = df.merge(ids_ubicacion_por_codigo(dim_ubicacion), on='codigo_localidad', how='left')
+        
+        # Lookup IDEstacion
+        df = df.merge(
+            dim_estacion[['IDEstacion', 'NombreEstacion']],
+            left_on='estacion', right_on='NombreEstacion', how='left'
+        )
+        
+        # Remover registros sin llaves requeridas
+        llaves = ['IDFechaInicio', 'IDHoraInicio', 'IDFechaFin', 'IDHoraFin', 'IDExposicion', 'IDUbicacion', 'IDEstacion']
+        initial_count = len(df)
+        df = df.dropna(subset=llaves)
+        removed = initial_count - len(df)
+        
+        if removed > 0:
+            self.logger.warning(f"{removed} registros removidos por falta de llaves requeridas")
+        
+        df_final = df[llaves].astype(int)
+        df_final['DuracionHoras'] = df['duracion_horas'].astype(int)
+        df_final['Concentracion_max'] = df['concentracion_max']
+        df_final['Concentracion_avg'] = df['concentracion_avg']
+        df_final['Umbral'] = df['umbral']
+        return df_final.reset_index(drop=True)
+
+# Función de conveniencia
+def load_hecho_episodio_contaminacion(df_episodios, truncate=True):
+    """Carga los episodios de contaminación"""
+    loader = HechoEpisodioContaminacionLoader()
+    return loader.load(df_episodios, truncate)
+
+if __name__ == "__main__":
+    # Test del loader
+    print("Testing HechoEpisodioContaminacionLoader...")
+    
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    from src.transformers.transform_episodio_contaminacion import transform_episodio_contaminacion
+    
+    extractor = MasterExtractor()
+    extracted_data = extractor.extract_all()
+    
+    df_episodios = transform_episodio_contaminacion(transform_hecho_medicion_ambiental(extracted_data))
+    rows = load_hecho_episodio_contaminacion(df_episodios, truncate=True)
+    print(f"HechoEpisodioContaminacion: {rows:,} registros cargados")
@@ -8,15 +8,35 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.loaders.base_loader import BaseLoader
+from src.loaders.contracts import validar_contrato, dominios_de
+from src.loaders.miembros_inferidos import completar_inferidos
 from src.loaders.dimension_loader import DimensionLoader
 from src.utils.logger import ETLLogger
+from src.utils.claves import id_fecha
+from src.utils.gazetteer import gazetteer, ids_ubicacion_por_codigo
+from src.utils.helpers import hash_filas, COLUMNAS_PACIENTE
+from config.etl_config import etl_config
 
 class HechoHospitalizacionesLoader:
     """Loader para la tabla de hechos de hospitalizaciones"""
     
-    def __init__(self):
+    def __init__(self, claves_inteligentes=None, miembros_inferidos=None):
+        """
+        Args:
+            claves_inteligentes: Si True, IDFecha se calcula como yyyymmdd sin
+                consultar DimFecha (por defecto según etl_config)
+            miembros_inferidos: Si True, las clínicas, pacientes y ubicaciones
+                sin correspondencia se insertan como miembros inferidos (por
+                defecto según etl_config)
+        """
         self.logger = ETLLogger('HechoHospitalizacionesLoader')
         self.dim_loader = DimensionLoader()
+        if claves_inteligentes is None:
+            claves_inteligentes = etl_config.claves_inteligentes
+        self.claves_inteligentes = claves_inteligentes
+        if miembros_inferidos is None:
+            miembros_inferidos = etl_config.miembros_inferidos
+        self.miembros_inferidos = miembros_inferidos
     
     def load(self, df_hechos, truncate=True):
         """
@@ -31,12 +51,12 @@ class HechoHospitalizacionesLoader:
         try:
             # 1. Obtener dimensiones para lookups
             self.logger.info("Obteniendo dimensiones para lookups...")
-            dim_fecha = self.dim_loader.get_dimension_ids('DimFecha')
+            dim_fecha = None if self.claves_inteligentes else self.dim_loader.get_dimension_ids('DimFecha')
             dim_clinica = self.dim_loader.get_dimension_ids('DimClinica')
             dim_paciente = self.dim_loader.get_dimension_ids('DimPaciente')
             dim_ubicacion = self.dim_loader.get_dimension_ids('DimUbicacion')
             
-            self.logger.info(f"Dimensiones cargadas: Fecha={len(dim_fecha)}, Clinica={len(dim_clinica)}, Paciente={len(dim_paciente)}, Ubicacion={len(dim_ubicacion)}")
+            self.logger.info(f"Dimensiones cargadas: Fecha={'llave inteligente' if dim_fecha is None else len(dim_fecha)}, Clinica={len(dim_clinica)}, Paciente={len(dim_paciente)}, Ubicacion={len(dim_ubicacion)}")
             
             # 2. Hacer lookups y preparar datos para carga
             self.logger.info("Realizando lookups a dimensiones...")
@@ -44,8 +64,14 @@ class HechoHospitalizacionesLoader:
                 df_hechos, dim_fecha, dim_clinica, dim_paciente, dim_ubicacion
             )
             
+            # Validar contra el contrato (llaves foráneas contra las dimensiones leídas)
+            validar_contrato(df_final, 'HechoHospitalizaciones', dominios_de({
+                'DimFecha': dim_fecha, 'DimClinica': dim_clinica,
+                'DimPaciente': dim_paciente, 'DimUbicacion': dim_ubicacion
+            }))
+            
             # 3. Cargar a SQL Server
-            self.logger.info(f"Preparados {len(df_final)} registros para carga...")
+            self.logger.info(f"Preparados {len(df_final)} registros para carga ({df_final['NumeroCasos'].sum():,} casos)...")
             loader = BaseLoader('HechoHospitalizaciones')
             
             try:
@@ -78,17 +104,22 @@ class HechoHospitalizacionesLoader:
     def _prepare_fact_data(self, df_hechos, dim_fecha, dim_clinica, dim_paciente, dim_ubicacion):
         """Prepara los datos de hechos con lookups a dimensiones"""
         
-        df = df_hechos.copy()
+        # Copia superficial: las columnas nuevas no alteran df_hechos
+        df = df_hechos.copy(deep=False)
         
-        # Lookup IDFecha
-        self.logger.info("Lookup IDFecha...")
-        df['Fecha'] = pd.to_datetime(df['Fecha'])
-        dim_fecha['Fecha'] = pd.to_datetime(dim_fecha['Fecha'])
-        df = df.merge(
-            dim_fecha[['IDFecha', 'Fecha']],
-            on='Fecha',
-            how='left'
-        )
+        # Lookup IDFecha (con llaves inteligentes se calcula como yyyymmdd)
+        if dim_fecha is None:
+            self.logger.info("IDFecha calculado como yyyymmdd...")
+            df['IDFecha'] = id_fecha(df['Fecha'])
+        else:
+            self.logger.info("Lookup IDFecha...")
+            df['Fecha'] = pd.to_datetime(df['Fecha'])
+            dim_fecha['Fecha'] = pd.to_datetime(dim_fecha['Fecha'])
+            df = df.merge(
+                dim_fecha[['IDFecha', 'Fecha']],
+                on='Fecha',
+                how='left'
+            )
         
         # Lookup IDClinica (por TipoEnfermedad -> NombreClinica)
         self.logger.info("Lookup IDClinica...")
@@ -99,27 +130,35 @@ class HechoHospitalizacionesLoader:
             how='left'
         )
         
-        # Lookup IDPaciente
+        # Lookup IDPaciente por hash de fila (un solo join entero; los nulos
+        # se canonicalizan igual que en DimPaciente)
         self.logger.info("Lookup IDPaciente...")
+        df['HashPaciente'] = hash_filas(df, COLUMNAS_PACIENTE)
         df = df.merge(
-            dim_paciente[['IDPaciente', 'Sexo', 'Migrante', 'GrupoEtario', 
-                         'EnfoqueDiferencial', 'RegimenSeguridadSocial']],
-            left_on=['Sexo', 'Migrante', 'GrupoEtario', 'EnfoqueDiferencial', 'RegimenSeguridadSocial'],
-            right_on=['Sexo', 'Migrante', 'GrupoEtario', 'EnfoqueDiferencial', 'RegimenSeguridadSocial'],
+            dim_paciente[['IDPaciente', 'HashPaciente']],
+            on='HashPaciente',
             how='left'
         )
         
-        # Lookup IDUbicacion
+        # Lookup IDUbicacion por el código entero del gazetteer
         self.logger.info("Lookup IDUbicacion...")
-        df = df.merge(
-            dim_ubicacion[['IDUbicacion', 'Localidad', 'CodigoLocalidad']],
-            left_on=['Localidad', 'CodigoLocalidad'],
-            right_on=['Localidad', 'CodigoLocalidad'],
-            how='left'
-        )
+        df['codigo_localidad'] = gazetteer().resolve(df['Localidad'], respaldo=df['CodigoLocalidad'])
+        df = df.merge(ids_ubicacion_por_codigo(dim_ubicacion), on='codigo_localidad', how='left')
+        
+        # Llaves sin correspondencia -> miembros inferidos (en vez de NULL o descartar)
+        if self.miembros_inferidos:
+            df = completar_inferidos(df, 'DimClinica', 'IDClinica', {'TipoEnfermedad': 'NombreClinica'})
+            df = completar_inferidos(
+                df, 'DimPaciente', 'IDPaciente',
+                {col: col for col in ['HashPaciente'] + COLUMNAS_PACIENTE}, naturales=['HashPaciente']
+            )
+            df = completar_inferidos(
+                df, 'DimUbicacion', 'IDUbicacion',
+                {'Localidad': 'Localidad', 'CodigoLocalidad': 'CodigoLocalidad'}
+            )
         
         # Seleccionar solo las columnas necesarias para la tabla de hechos
-        df_final = df[['IDClinica', 'IDFecha', 'IDPaciente', 'IDUbicacion', 'NumeroCasos']].copy()
+        df_final = df[['IDClinica', 'IDFecha', 'IDPaciente', 'IDUbicacion', 'NumeroCasos']]
         
         # Agregar columnas que no tenemos datos (como NULL)
         df_final['IDHora'] = None
@@ -175,6 +214,8 @@ if __name__ == "__main__":
     
     print("\n3. Cargando dimensiones...")
     from src.loaders.dimension_loader import load_dimensions
+    from src.loaders.master_loader import MasterLoader
+    MasterLoader().limpiar_dependientes()
     load_dimensions(transformed_data, truncate=True)
     
     print("\n4. Cargando hechos...")
@@ -7,13 +7,33 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.loaders.base_loader import BaseLoader
+from src.loaders.contracts import validar_contrato, dominios_de
+from src.loaders.miembros_inferidos import completar_inferidos
+from src.loaders.scd2_loader import solo_versiones_actuales
 from src.utils.logger import ETLLogger
+from src.utils.claves import id_fecha, id_hora
+from src.utils.gazetteer import gazetteer, ids_ubicacion_por_codigo
+from config.etl_config import etl_config
 
 class HechoMedicionAmbientalLoader:
     """Loader para la tabla de hechos de mediciones ambientales"""
     
-    def __init__(self):
+    def __init__(self, claves_inteligentes=None, miembros_inferidos=None):
+        """
+        Args:
+            claves_inteligentes: Si True, IDFecha e IDHora se calculan sin
+                consultar DimFecha ni DimHora (por defecto según etl_config)
+            miembros_inferidos: Si True, los indicadores, localidades y
+                estaciones sin correspondencia se insertan como miembros
+                inferidos (por defecto según etl_config)
+        """
         self.logger = ETLLogger('HechoMedicionAmbientalLoader')
+        if claves_inteligentes is None:
+            claves_inteligentes = etl_config.claves_inteligentes
+        self.claves_inteligentes = claves_inteligentes
+        if miembros_inferidos is None:
+            miembros_inferidos = etl_config.miembros_inferidos
+        self.miembros_inferidos = miembros_inferidos
     
     def load(self, df_hecho, transformed_data, truncate=True):
         """
@@ -31,40 +51,51 @@ class HechoMedicionAmbientalLoader:
             # 1. Obtener las dimensiones para hacer lookups
             self.logger.info("Obteniendo dimensiones para lookups...")
             
-            # Cargar dimensiones desde la BD
-            dim_fecha = self._get_dimension_data('DimFecha')
-            dim_hora = self._get_dimension_data('DimHora')
+            # Cargar dimensiones desde la BD (DimFecha y DimHora no se leen con llaves inteligentes)
+            if self.claves_inteligentes:
+                dim_fecha = dim_hora = pd.DataFrame()
+            else:
+                dim_fecha = self._get_dimension_data('DimFecha')
+                dim_hora = self._get_dimension_data('DimHora')
             dim_exposicion = self._get_dimension_data('DimExposicion')
             dim_ubicacion = self._get_dimension_data('DimUbicacion')
+            dim_estacion = self._get_dimension_data('DimEstacion')
             
-            self.logger.info(f"Dimensiones cargadas: Fecha={len(dim_fecha)}, Hora={len(dim_hora)}, Exposicion={len(dim_exposicion)}, Ubicacion={len(dim_ubicacion)}")
+            self.logger.info(f"Dimensiones cargadas: Fecha={len(dim_fecha)}, Hora={len(dim_hora)}, Exposicion={len(dim_exposicion)}, Ubicacion={len(dim_ubicacion)}, Estacion={len(dim_estacion)}")
             
             # 2. Hacer los lookups
             self.logger.info("Realizando lookups a dimensiones...")
             
-            df_fact = df_hecho.copy()
-            
-            # Lookup IDFecha
-            self.logger.info("Lookup IDFecha...")
-            df_fact['fecha_pd'] = pd.to_datetime(df_fact['fecha'])
-            dim_fecha['Fecha_pd'] = pd.to_datetime(dim_fecha['Fecha'])
-            df_fact = df_fact.merge(
-                dim_fecha[['IDFecha', 'Fecha_pd']],
-                left_on='fecha_pd',
-                right_on='Fecha_pd',
-                how='left'
-            )
-            df_fact.drop(['fecha_pd', 'Fecha_pd'], axis=1, inplace=True)
-            
-            # Lookup IDHora
-            self.logger.info("Lookup IDHora...")
-            df_fact = df_fact.merge(
-                dim_hora[['IDHora', 'Hora']],
-                left_on='hora',
-                right_on='Hora',
-                how='left'
-            )
-            df_fact.drop(['Hora'], axis=1, inplace=True)
+            # Copia superficial: las columnas nuevas no alteran df_hecho
+            df_fact = df_hecho.copy(deep=False)
+            
+            if self.claves_inteligentes:
+                # IDFecha = yyyymmdd, IDHora = hora: sin joins contra la BD
+                self.logger.info("IDFecha e IDHora calculados como llaves inteligentes...")
+                df_fact['IDFecha'] = id_fecha(df_fact['fecha'])
+                df_fact['IDHora'] = id_hora(df_fact['hora'])
+            else:
+                # Lookup IDFecha
+                self.logger.info("Lookup IDFecha...")
+                df_fact['fecha_pd'] = pd.to_datetime(df_fact['fecha'])
+                dim_fecha['Fecha_pd'] = pd.to_datetime(dim_fecha['Fecha'])
+                df_fact = df_fact.merge(
+                    dim_fecha[['IDFecha', 'Fecha_pd']],
+                    left_on='fecha_pd',
+                    right_on='Fecha_pd',
+                    how='left'
+                )
+                df_fact.drop(['fecha_pd', 'Fecha_pd'], axis=1, inplace=True)
+                
+                # Lookup IDHora
+                self.logger.info("Lookup IDHora...")
+                df_fact = df_fact.merge(
+                    dim_hora[['IDHora', 'Hora']],
+                    left_on='hora',
+                    right_on='Hora',
+                    how='left'
+                )
+                df_fact.drop(['Hora'], axis=1, inplace=True)
             
             # Lookup IDExposicion
             self.logger.info("Lookup IDExposicion...")
@@ -78,19 +109,41 @@ class HechoMedicionAmbientalLoader:
             
             # Lookup IDUbicacion
             self.logger.info("Lookup IDUbicacion...")
+            # Cruce por el código entero del gazetteer (no por la etiqueta de texto)
+            if 'codigo_localidad' not in df_fact.columns:
+                df_fact['codigo_localidad'] = gazetteer().resolve(df_fact['localidad'])
+            df_fact = df_fact.merge(
+                ids_ubicacion_por_codigo(dim_ubicacion),
+                on='codigo_localidad',
+                how='left'
+            )
+            
+            # Lookup IDEstacion
+            self.logger.info("Lookup IDEstacion...")
             df_fact = df_fact.merge(
-                dim_ubicacion[['IDUbicacion', 'Localidad']],
-                left_on='localidad',
-                right_on='Localidad',
+                dim_estacion[['IDEstacion', 'NombreEstacion']],
+                left_on='estacion',
+                right_on='NombreEstacion',
                 how='left'
             )
-            df_fact.drop(['Localidad'], axis=1, inplace=True)
+            df_fact.drop(['NombreEstacion'], axis=1, inplace=True)
+            
+            # Llaves sin correspondencia -> miembros inferidos (en vez de descartar)
+            if self.miembros_inferidos:
+                df_fact = completar_inferidos(df_fact, 'DimExposicion', 'IDExposicion', {'indicador': 'Indicador'})
+                df_fact = completar_inferidos(
+                    df_fact.assign(CodigoLocalidad=df_fact['codigo_localidad'].astype(str)),
+                    'DimUbicacion', 'IDUbicacion',
+                    {'localidad': 'Localidad', 'CodigoLocalidad': 'CodigoLocalidad'}
+                )
+                df_fact = completar_inferidos(df_fact, 'DimEstacion', 'IDEstacion', {'estacion': 'NombreEstacion'})
             
             # 3. Verificar lookups
             missing_fecha = df_fact['IDFecha'].isna().sum()
             missing_hora = df_fact['IDHora'].isna().sum()
             missing_exposicion = df_fact['IDExposicion'].isna().sum()
             missing_ubicacion = df_fact['IDUbicacion'].isna().sum()
+            missing_estacion = df_fact['IDEstacion'].isna().sum()
             
             if missing_fecha > 0:
                 self.logger.warning(f"{missing_fecha} registros sin IDFecha")
@@ -100,10 +153,12 @@ class HechoMedicionAmbientalLoader:
                 self.logger.warning(f"{missing_exposicion} registros sin IDExposicion")
             if missing_ubicacion > 0:
                 self.logger.warning(f"{missing_ubicacion} registros sin IDUbicacion")
+            if missing_estacion > 0:
+                self.logger.warning(f"{missing_estacion} registros sin IDEstacion")
             
             # Remover registros sin llaves requeridas
             initial_count = len(df_fact)
-            df_fact = df_fact.dropna(subset=['IDFecha', 'IDHora', 'IDExposicion', 'IDUbicacion'])
+            df_fact = df_fact.dropna(subset=['IDFecha', 'IDHora', 'IDExposicion', 'IDUbicacion', 'IDEstacion'])
             removed = initial_count - len(df_fact)
             
             if removed > 0:
@@ -117,9 +172,20 @@ class HechoMedicionAmbientalLoader:
                 'IDHora': df_fact['IDHora'].astype(int),
                 'Concentracion': df_fact['concentracion'],
                 'IDExposicion': df_fact['IDExposicion'].astype(int),
-                'IDUbicacion': df_fact['IDUbicacion'].astype(int)
+                'IDUbicacion': df_fact['IDUbicacion'].astype(int),
+                'IDEstacion': df_fact['IDEstacion'].astype(int),
+                'CodigoCalidad': df_fact['codigo_calidad'].astype(int) if 'codigo_calidad' in df_fact.columns else 0
             })
             
+            # Validar contra el contrato; con llaves inteligentes los dominios de
+            # IDFecha e IDHora son los de las dimensiones transformadas
+            if self.claves_inteligentes:
+                dim_fecha, dim_hora = transformed_data.get('dim_fecha'), transformed_data.get('dim_hora')
+            validar_contrato(df_final, 'HechoMedicionAmbiental', dominios_de({
+                'DimFecha': dim_fecha, 'DimHora': dim_hora, 'DimExposicion': dim_exposicion,
+                'DimUbicacion': dim_ubicacion, 'DimEstacion': dim_estacion
+            }))
+            
             # 5. Cargar a la base de datos
             loader = BaseLoader('HechoMedicionAmbiental')
             
@@ -157,7 +223,7 @@ class HechoMedicionAmbientalLoader:
             loader.connect()
             query = f"SELECT * FROM dbo.{table_name}"
             df = pd.read_sql(query, loader.engine)
-            return df
+            return solo_versiones_actuales(df)
         finally:
             loader.disconnect()
 
@@ -0,0 +1,174 @@
+"""
+Loader para los rollups de HechoMedicionAmbiental
+Carga HechoMedicionDiaria y HechoMedicionMensual (cada uno refrescable por separado)
+"""
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.loaders.base_loader import BaseLoader
+from src.loaders.contracts import validar_contrato, dominios_de
+from src.loaders.dimension_loader import DimensionLoader
+from src.utils.logger import ETLLogger
+from src.utils.claves import id_fecha
+from src.utils.gazetteer import gazetteer, ids_ubicacion_por_codigo
+from config.etl_config import etl_config
+
+# Tabla destino por nivel de rollup
+TABLAS_ROLLUP = {
+    'diaria': 'HechoMedicionDiaria',
+    'mensual': 'HechoMedicionMensual',
+}
+
+class HechoMedicionRollupLoader:
+    """Loader para las tablas de rollup de mediciones ambientales"""
+    
+    def __init__(self, claves_inteligentes=None):
+        """
+        Args:
+            claves_inteligentes: Si True, IDFecha se calcula como yyyymmdd sin
+                consultar DimFecha (por defecto según etl_config)
+        """
+        self.logger = ETLLogger('HechoMedicionRollupLoader')
+        self.dim_loader = DimensionLoader()
+        if claves_inteligentes is None:
+            claves_inteligentes = etl_config.claves_inteligentes
+        self.claves_inteligentes = claves_inteligentes
+    
+    def load(self, df_rollup, nivel, truncate=True):
+        """
+        Carga un rollup de mediciones
+        
+        Args:
+            df_rollup: DataFrame de RollupMedicionTransformer para el nivel
+            nivel: 'diaria' o 'mensual'
+            truncate: Si True, limpia solo la tabla de este nivel antes de cargar
+        """
+        table_name = TABLAS_ROLLUP[nivel]
+        self.logger.start_process(f"CARGA DE {table_name.upper()}")
+        
+        try:
+            # 1. Obtener dimensiones para lookups
+            self.logger.info("Obteniendo dimensiones para lookups...")
+            dim_fecha = None if self.claves_inteligentes else self.dim_loader.get_dimension_ids('DimFecha')
+            dim_exposicion = self.dim_loader.get_dimension_ids('DimExposicion')
+            dim_ubicacion = self.dim_loader.get_dimension_ids('DimUbicacion')
+            
+            # 2. Hacer lookups y preparar datos para carga
+            df_final = self._prepare_rollup_data(
+                df_rollup, nivel, dim_fecha, dim_exposicion, dim_ubicacion
+            )
+            
+            # Validar contra el contrato (llaves foráneas contra las dimensiones leídas)
+            validar_contrato(df_final, table_name, dominios_de({
+                'DimFecha': dim_fecha, 'DimExposicion': dim_exposicion, 'DimUbicacion': dim_ubicacion
+            }))
+            
+            # 3. Cargar a SQL Server
+            self.logger.info(f"Preparados {len(df_final)} registros para carga...")
+            loader = BaseLoader(table_name)
+            
+            try:
+                loader.connect()
+                
+                if truncate:
+                    loader.truncate_table()
+                
+                rows = loader.load_dataframe(df_final, if_exists='append')
+                
+                loader.update_etl_control(
+                    process_name=f'Load_{table_name}',
+                    rows_loaded=rows,
+                    status='Success',
+                    notes=f'Carga exitosa: {rows} registros'
+                )
+                
+                self.logger.end_process(f"CARGA DE {table_name.upper()}", success=True)
+                return rows
+            
+            finally:
+                loader.disconnect()
+        
+        except Exception as e:
+            self.logger.error(f"Error en carga de {table_name}: {str(e)}")
+            self.logger.end_process(f"CARGA DE {table_name.upper()}", success=False)
+            raise
+    
+    def _prepare_rollup_data(self, df_rollup, nivel, dim_fecha, dim_exposicion, dim_ubicacion):
+        """Prepara el rollup con lookups a dimensiones"""
+        # Copia superficial: las columnas nuevas no alteran df_rollup
+        df = df_rollup.copy(deep=False)
+        
+        # Lookup IDFecha (el rollup mensual usa el primer día del mes)
+        if nivel == 'mensual':
+            df['fecha'] = pd.to_datetime(pd.DataFrame({'year': df['anio'], 'month': df['mes'], 'day': 1}))
+        if dim_fecha is None:
+            df['IDFecha'] = id_fecha(df['fecha'])
+        else:
+            df['fecha'] = pd.to_datetime(df['fecha'])
+            dim_fecha['Fecha'] = pd.to_datetime(dim_fecha['Fecha'])
+            df = df.merge(dim_fecha[['IDFecha', 'Fecha']], left_on='fecha', right_on='Fecha', how='left')
+        
+        # Lookup IDExposicion
+        df = df.merge(
+            dim_exposicion[['IDExposicion', 'Indicador']],
+            left_on='indicador', right_on='Indicador', how='left'
+        )
+        
+        # Lookup IDUbicacion por el código entero del gazetteer
+        df['codigo_localidad'] = gazetteer().resolve(df['localidad'])
+        df = df.merge(ids_ubicacion_por_codigo(dim_ubicacion), on='codigo_localidad', how='left')
+        
+        # Remover registros sin llaves requeridas
+        initial_count = len(df)
+        df = df.dropna(subset=['IDFecha', 'IDExposicion', 'IDUbicacion'])
+        removed = initial_count - len(df)
+        
+        if removed > 0:
+            self.logger.warning(f"{removed} registros removidos por falta de llaves requeridas")
+        
+        df_final = pd.DataFrame({
+            'IDFecha': df['IDFecha'].astype(int),
+            'IDUbicacion': df['IDUbicacion'].astype(int),
+            'IDExposicion': df['IDExposicion'].astype(int),
+            'Concentracion_avg': df['concentracion_avg'],
+            'Concentracion_max': df['concentracion_max'],
+            'NumMediciones': df['num_mediciones'].astype(int),
+            'HorasSobreUmbral': df['horas_sobre_umbral'].astype(int),
+            'HorasEsperadas': df['horas_esperadas'] if 'horas_esperadas' in df.columns else None,
+            'CompletitudPct': df['completitud_pct'] if 'completitud_pct' in df.columns else None,
+            'MediaMovilMax': df['media_movil_max'] if 'media_movil_max' in df.columns else None,
+            'IndiceIBOCAMax': df['indice_iboca_max'] if 'indice_iboca_max' in df.columns else None
+        })
+        
+        if nivel == 'mensual':
+            df_final.insert(0, 'Anio', df['anio'].astype(int))
+            df_final.insert(1, 'Mes', df['mes'].astype(int))
+        
+        return df_final
+
+# Función de conveniencia
+def load_hecho_medicion_rollup(df_rollup, nivel, truncate=True):
+    """Carga (o refresca) un rollup de mediciones"""
+    loader = HechoMedicionRollupLoader()
+    return loader.load(df_rollup, nivel, truncate)
+
+if __name__ == "__main__":
+    # Refresca un solo rollup: python -m src.loaders.hecho_medicion_rollup_loader mensual
+    nivel = sys.argv[1] if len(sys.argv) > 1 else 'diaria'
+    print(f"Refrescando rollup {nivel}...")
+    
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    from src.transformers.master_transformer import MasterTransformer
+    
+    extractor = MasterExtractor()
+    extracted_data = extractor.extract_all()
+    
+    # Misma cadena que la ejecución completa (calidad, completitud, exposición móvil y rollups)
+    transformer = MasterTransformer()
+    transformer.transform_mediciones(transform_hecho_medicion_ambiental(extracted_data))
+    df_rollup = transformer.get_data(f'hecho_medicion_{nivel}')
+    rows = load_hecho_medicion_rollup(df_rollup, nivel, truncate=True)
+    print(f"{TABLAS_ROLLUP[nivel]}: {rows:,} registros cargados")
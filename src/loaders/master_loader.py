@@ -6,11 +6,39 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from src.loaders.base_loader import BaseLoader
 from src.loaders.dimension_loader import DimensionLoader
 from src.loaders.hecho_loader import HechoHospitalizacionesLoader
 from src.loaders.hecho_medicion_loader import HechoMedicionAmbientalLoader
+from src.loaders.hecho_medicion_rollup_loader import HechoMedicionRollupLoader
+from src.loaders.hecho_episodio_loader import HechoEpisodioContaminacionLoader
+from src.loaders.hecho_cuantil_loader import HechoMedicionCuantilMensualLoader
 from src.loaders.analisis_correlacion_loader import AnalisisCorrelacionLoader
+from src.loaders.analisis_correlacion_lag_loader import AnalisisCorrelacionLagLoader
+from src.loaders.analisis_correlacion_resumen_loader import AnalisisCorrelacionResumenLoader
+from src.loaders.analisis_estacionalidad_loader import AnalisisEstacionalidadLoader
+from src.loaders.contracts import validar_transformados
 from src.utils.logger import ETLLogger
+from config.etl_config import etl_config
+
+# Tablas que referencian a las dimensiones por llave foránea, en orden inverso de
+# dependencia: se limpian antes de recargar las dimensiones
+HECHOS_DEPENDIENTES = [
+    'HechoMedicionCuantilMensual',
+    'HechoEpisodioContaminacion',
+    'HechoMedicionMensual',
+    'HechoMedicionDiaria',
+    'HechoMedicionAmbiental',
+    'HechoHospitalizaciones',
+]
+
+# Tablas de análisis (sin llaves foráneas) que se recargan completas
+ANALISIS_COMPLETOS = [
+    'AnalisisResidualEstacional',
+    'AnalisisPerfilEstacional',
+    'AnalisisCorrelacionResumen',
+    'AnalisisCorrelacionLag',
+]
 
 class MasterLoader:
     """Orquestador para cargar todas las dimensiones y hechos"""
@@ -19,17 +47,35 @@ class MasterLoader:
         self.logger = ETLLogger('MasterLoader')
         self.results = {}
     
-    def load_all(self, transformed_data, truncate=True):
+    def load_all(self, transformed_data, truncate=True, estados_pendientes=()):
         """
         Carga todos los datos en SQL Server
         
         Args:
             transformed_data: Diccionario con datos transformados
-            truncate: Si True, limpia las tablas antes de cargar
+            truncate: Si True, limpia las tablas antes de cargar (primero
+                hechos y análisis, luego las dimensiones que los hechos referencian)
+            estados_pendientes: Transformadores con estado incremental
+                (MasterTransformer.get_estados_pendientes()); su estado se
+                guarda solo si todas las cargas terminan bien
         """
         self.logger.start_process("CARGA COMPLETA DEL DATA WAREHOUSE")
         
         try:
+            # 0. Validar contratos de datos antes de cualquier conexión
+            self.logger.info("Validando contratos de datos...")
+            validar_transformados(transformed_data)
+            
+            # Limpiar hechos y análisis antes que las dimensiones: un DELETE sobre
+            # una dimensión referenciada por hechos viola las llaves foráneas
+            if truncate:
+                if etl_config.dimensiones_scd2:
+                    self.logger.warning(
+                        "SCD2 versiona DimPaciente y DimUbicacion, pero los hechos se recargan "
+                        "completos contra las versiones vigentes (no hay carga incremental de hechos)"
+                    )
+                self.limpiar_dependientes()
+            
             # 1. Cargar dimensiones primero
             self.logger.info("\n" + "="*60)
             self.logger.info("PASO 1: CARGANDO DIMENSIONES")
@@ -61,9 +107,37 @@ class MasterLoader:
                 truncate
             )
             
+            # Cargar rollups HechoMedicionDiaria y HechoMedicionMensual
+            self.logger.info("\nCargando rollups de mediciones...")
+            rollup_loader = HechoMedicionRollupLoader()
+            hecho_diaria_rows = rollup_loader.load(
+                transformed_data['hecho_medicion_diaria'], 'diaria', truncate
+            )
+            hecho_mensual_rows = rollup_loader.load(
+                transformed_data['hecho_medicion_mensual'], 'mensual', truncate
+            )
+            
+            # Cargar HechoEpisodioContaminacion
+            self.logger.info("\nCargando HechoEpisodioContaminacion...")
+            episodio_loader = HechoEpisodioContaminacionLoader()
+            hecho_episodio_rows = episodio_loader.load(
+                transformed_data['hecho_episodio_contaminacion'], truncate
+            )
+            
+            # Cargar HechoMedicionCuantilMensual
+            self.logger.info("\nCargando HechoMedicionCuantilMensual...")
+            cuantil_loader = HechoMedicionCuantilMensualLoader()
+            hecho_cuantil_rows = cuantil_loader.load(
+                transformed_data['hecho_medicion_cuantil_mensual'], truncate
+            )
+            
             self.results['hechos'] = {
                 'HechoHospitalizaciones': hecho_hosp_rows,
-                'HechoMedicionAmbiental': hecho_medicion_rows
+                'HechoMedicionAmbiental': hecho_medicion_rows,
+                'HechoMedicionDiaria': hecho_diaria_rows,
+                'HechoMedicionMensual': hecho_mensual_rows,
+                'HechoEpisodioContaminacion': hecho_episodio_rows,
+                'HechoMedicionCuantilMensual': hecho_cuantil_rows
             }
             
             # 3. Cargar tabla de análisis
@@ -76,21 +150,70 @@ class MasterLoader:
             analisis_loader = AnalisisCorrelacionLoader()
             analisis_rows = analisis_loader.load(
                 transformed_data['analisis_correlacion'],
-                truncate
+                truncate,
+                incremental=etl_config.analisis_incremental
             )
             
+            # Cargar AnalisisCorrelacionLag
+            self.logger.info("\nCargando AnalisisCorrelacionLag...")
+            lag_loader = AnalisisCorrelacionLagLoader()
+            lag_rows = lag_loader.load(transformed_data['analisis_correlacion_lag'], truncate)
+            
+            # Cargar AnalisisCorrelacionResumen
+            self.logger.info("\nCargando AnalisisCorrelacionResumen...")
+            resumen_loader = AnalisisCorrelacionResumenLoader()
+            resumen_rows = resumen_loader.load(transformed_data['analisis_correlacion_resumen'], truncate)
+            
+            # Cargar AnalisisPerfilEstacional y AnalisisResidualEstacional
+            self.logger.info("\nCargando descomposición estacional...")
+            estacionalidad_loader = AnalisisEstacionalidadLoader()
+            perfil_rows = estacionalidad_loader.load(transformed_data['analisis_perfil_estacional'], 'perfil', truncate)
+            residual_rows = estacionalidad_loader.load(transformed_data['analisis_residual_estacional'], 'residual', truncate)
+            
             self.results['analisis'] = {
-                'AnalisisCorrelacion': analisis_rows
+                'AnalisisCorrelacion': analisis_rows,
+                'AnalisisCorrelacionLag': lag_rows,
+                'AnalisisCorrelacionResumen': resumen_rows,
+                'AnalisisPerfilEstacional': perfil_rows,
+                'AnalisisResidualEstacional': residual_rows
             }
             
+            # 4. Confirmar el estado incremental (si alguna carga falló, no se llega aquí
+            # y la próxima ejecución vuelve a procesar las mismas particiones)
+            for transformer in estados_pendientes:
+                transformer.guardar_estado()
+            
             self.logger.end_process("CARGA COMPLETA DEL DATA WAREHOUSE", success=True)
             return self.results
-            
+        
         except Exception as e:
             self.logger.error(f"Error en carga maestra: {str(e)}")
             self.logger.end_process("CARGA COMPLETA DEL DATA WAREHOUSE", success=False)
             raise
     
+    def limpiar_dependientes(self):
+        """
+        Limpia las tablas de hechos y de análisis en orden inverso de dependencia
+        
+        AnalisisCorrelacion en modo incremental no se limpia: su loader
+        reemplaza solo los grupos recalculados.
+        """
+        self.logger.info("\n" + "="*60)
+        self.logger.info("PASO 0: LIMPIANDO HECHOS Y ANÁLISIS")
+        self.logger.info("="*60)
+        
+        tablas = HECHOS_DEPENDIENTES + ANALISIS_COMPLETOS
+        if not etl_config.analisis_incremental:
+            tablas = tablas + ['AnalisisCorrelacion']
+        
+        for table_name in tablas:
+            loader = BaseLoader(table_name)
+            try:
+                loader.connect()
+                loader.truncate_table()
+            finally:
+                loader.disconnect()
+    
     def get_load_summary(self):
         """Retorna un resumen de la carga"""
         summary = {
@@ -118,10 +241,10 @@ class MasterLoader:
         return summary
 
 # Función de conveniencia
-def load_all_data(transformed_data, truncate=True):
+def load_all_data(transformed_data, truncate=True, estados_pendientes=()):
     """Carga todos los datos al DW"""
     master = MasterLoader()
-    return master.load_all(transformed_data, truncate)
+    return master.load_all(transformed_data, truncate, estados_pendientes)
 
 if __name__ == "__main__":
     # Test completo del ETL
@@ -152,7 +275,9 @@ if __name__ == "__main__":
         print("FASE 3: CARGA")
         print("="*60)
         master_loader = MasterLoader()
-        results = master_loader.load_all(transformed_data, truncate=True)
+        results = master_loader.load_all(
+            transformed_data, truncate=True, estados_pendientes=transformer.get_estados_pendientes()
+        )
         
         # RESUMEN FINAL
         print("\n" + "="*60)
@@ -171,7 +296,7 @@ if __name__ == "__main__":
         
         print(f"\nTOTAL REGISTROS CARGADOS: {summary['total_registros']:,}")
         print("\n✓ ETL COMPLETADO EXITOSAMENTE")
-        
+    
     except Exception as e:
         print(f"\n✗ ERROR EN ETL: {str(e)}")
         import traceback
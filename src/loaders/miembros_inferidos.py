@@ -0,0 +1,210 @@
+"""
+Miembros inferidos de dimensiones (valores que llegan antes que su dimensión)
+Los hechos cuyas llaves naturales no están en la dimensión no se descartan:
+se inserta un miembro provisional por llave en una sola sentencia y los
+hechos se cargan en la misma ejecución. Cuando la dimensión trae luego el
+miembro real, la fila provisional se completa en su lugar (sin recargar hechos).
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.loaders.base_loader import BaseLoader
+from src.utils.logger import ETLLogger
+
+# Valor de la columna marca en los miembros provisionales
+MARCA_INFERIDO = 'Inferido'
+
+# Dimensiones que admiten miembros inferidos: llave sustituta, llave natural
+# (para completarlos) y columna que marca el miembro como provisional. En
+# DimPaciente el hecho trae todos los atributos, así que no hay marca.
+MIEMBROS_INFERIDOS = {
+    'DimUbicacion': {'clave': 'IDUbicacion', 'naturales': ['Localidad', 'CodigoLocalidad'], 'marca': 'Tipo'},
+    'DimEstacion': {'clave': 'IDEstacion', 'naturales': ['NombreEstacion'], 'marca': 'TipoEstacion'},
+    'DimExposicion': {'clave': 'IDExposicion', 'naturales': ['Indicador'], 'marca': 'TipoIndicador'},
+    'DimClinica': {'clave': 'IDClinica', 'naturales': ['NombreClinica'], 'marca': 'TipoHospitalizacion'},
+    'DimPaciente': {'clave': 'IDPaciente', 'naturales': ['HashPaciente'], 'marca': None},
+}
+
+# Máximo de parámetros por sentencia (SQL Server admite 2100)
+MAX_PARAMETROS = 2000
+
+logger = ETLLogger('MiembrosInferidos')
+
+def _valores_sql(df, columnas):
+    """Constructor VALUES con parámetros enlazados y su diccionario de parámetros"""
+    filas, params = [], {}
+    for i, fila in enumerate(df[columnas].itertuples(index=False)):
+        nombres = [f"p{i}_{j}" for j in range(len(columnas))]
+        filas.append('(' + ', '.join(f":{n}" for n in nombres) + ')')
+        params.update({n: (None if pd.isna(v) else v.item() if isinstance(v, np.generic) else v)
+                       for n, v in zip(nombres, fila)})
+    return ', '.join(filas), params
+
+def _lotes(df, columnas):
+    """Divide df en lotes que respetan el máximo de parámetros"""
+    tamano = max(1, min(1000, MAX_PARAMETROS // len(columnas)))
+    for inicio in range(0, len(df), tamano):
+        yield df.iloc[inicio:inicio + tamano]
+
+def _coincide(naturales, alias_d='d', alias_v='v'):
+    """Condición de igualdad por llave natural que trata NULL = NULL como igual"""
+    return ' AND '.join(
+        f"({alias_d}.{c} = {alias_v}.{c} OR ({alias_d}.{c} IS NULL AND {alias_v}.{c} IS NULL))"
+        for c in naturales
+    )
+
+def inferir_miembros(tabla, df_claves, naturales):
+    """
+    Inserta miembros provisionales para llaves naturales faltantes
+    
+    Una sentencia INSERT ... OUTPUT por lote (VALUES + NOT EXISTS) inserta
+    los miembros y retorna sus llaves sustitutas sin una consulta adicional.
+    
+    Args:
+        tabla: Dimensión de MIEMBROS_INFERIDOS
+        df_claves: DataFrame con las columnas de la dimensión a insertar
+            (llaves naturales y, opcionalmente, otros atributos conocidos)
+        naturales: Columnas de df_claves que identifican al miembro
+    
+    Returns:
+        DataFrame con naturales + llave sustituta de los miembros insertados
+    """
+    config = MIEMBROS_INFERIDOS[tabla]
+    clave, marca = config['clave'], config['marca']
+    
+    df_claves = df_claves.drop_duplicates(subset=naturales)
+    columnas = list(df_claves.columns)
+    insertar = columnas + ([marca] if marca else [])
+    salida = ', '.join(f"INSERTED.{c}" for c in [clave] + naturales)
+    origen = ', '.join(f"v.{c}" for c in columnas) + (f", '{MARCA_INFERIDO}'" if marca else '')
+    
+    loader = BaseLoader(tabla)
+    resultados = []
+    try:
+        loader.connect()
+        for lote in _lotes(df_claves, columnas):
+            valores, params = _valores_sql(lote, columnas)
+            resultados.append(loader.execute_fetch(
+                f"INSERT INTO dbo.{tabla} ({', '.join(insertar)}) "
+                f"OUTPUT {salida} "
+                f"SELECT {origen} FROM (VALUES {valores}) AS v({', '.join(columnas)}) "
+                f"WHERE NOT EXISTS (SELECT 1 FROM dbo.{tabla} d WHERE {_coincide(naturales)})",
+                params
+            ))
+    finally:
+        loader.disconnect()
+    
+    insertados = pd.concat(resultados, ignore_index=True)
+    logger.info(f"{tabla}: {len(insertados)} miembros inferidos insertados")
+    return insertados
+
+def completar_inferidos(df, tabla, id_col, columnas, naturales=None):
+    """
+    Completa las llaves faltantes de un hecho con miembros inferidos
+    
+    Args:
+        df: DataFrame del hecho con la llave sustituta id_col ya buscada
+            (NaN donde el lookup falló)
+        tabla: Dimensión de MIEMBROS_INFERIDOS
+        id_col: Columna de la llave sustituta en df
+        columnas: Diccionario columna del hecho -> columna de la dimensión
+            que se inserta en el miembro provisional
+        naturales: Columnas de la dimensión que identifican al miembro (por
+            defecto todas las de columnas)
+    
+    Returns:
+        df con id_col completada para los miembros inferidos
+    """
+    faltantes = df[id_col].isna().to_numpy()
+    if not faltantes.any():
+        return df
+    
+    naturales = naturales or list(columnas.values())
+    claves = df.loc[faltantes, list(columnas)].rename(columns=columnas)
+    claves = claves.astype(object).dropna(subset=naturales)
+    if claves.empty:
+        return df
+    
+    insertados = inferir_miembros(tabla, claves, naturales)
+    if insertados.empty:
+        return df
+    
+    # Llaves de las filas faltantes -> posición en los miembros insertados
+    indice = pd.MultiIndex.from_frame(insertados[naturales].astype(object))
+    buscadas = pd.MultiIndex.from_frame(
+        df.loc[faltantes, [c for c, d in columnas.items() if d in naturales]].astype(object).set_axis(naturales, axis=1)
+    )
+    pos = indice.get_indexer(buscadas)
+    
+    ids = df[id_col].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    nuevos = ids[faltantes]
+    nuevos[pos >= 0] = insertados[MIEMBROS_INFERIDOS[tabla]['clave']].to_numpy(dtype=np.float64)[pos[pos >= 0]]
+    ids[faltantes] = nuevos
+    return df.assign(**{id_col: ids})
+
+def enriquecer_inferidos(loader, df, tabla):
+    """
+    Completa en su lugar los miembros inferidos que ya llegaron a la dimensión
+    
+    Los miembros provisionales (marca = 'Inferido') cuya llave natural está en
+    df se actualizan con sus atributos; conservan su llave sustituta, así que
+    los hechos ya cargados quedan apuntando al miembro completo. Una llave
+    natural nula del miembro provisional coincide con cualquier valor.
+    
+    Args:
+        loader: BaseLoader conectado a la tabla
+        df: DataFrame transformado de la dimensión
+    
+    Returns:
+        Máscara de las filas de df que completaron un miembro inferido
+    """
+    config = MIEMBROS_INFERIDOS.get(tabla)
+    if config is None or config['marca'] is None:
+        return np.zeros(len(df), dtype=bool)
+    
+    naturales, marca = config['naturales'], config['marca']
+    inferidos = loader.read_table(
+        f"SELECT {', '.join(naturales)} FROM dbo.{tabla} WHERE {marca} = '{MARCA_INFERIDO}'"
+    )
+    if inferidos.empty:
+        return np.zeros(len(df), dtype=bool)
+    
+    # Filas de df que completan algún inferido (la primera por inferido). Se
+    # cruza por grupos de inferidos con el mismo patrón de llaves nulas.
+    df_pos = df.reset_index(drop=True).assign(_fila=np.arange(len(df)))
+    completa = np.zeros(len(df), dtype=bool)
+    nulos = inferidos[naturales].isna()
+    for patron, grupo in inferidos.groupby([nulos[c] for c in naturales]):
+        on = [c for c, nulo in zip(naturales, patron) if not nulo and c in df.columns]
+        if not on:
+            continue
+        cruce = grupo[on].astype(object).merge(df_pos[on + ['_fila']].astype(object), on=on)
+        completa[cruce.drop_duplicates(subset=on)['_fila'].to_numpy(dtype=np.int64)] = True
+    
+    if not completa.any():
+        return completa
+    
+    columnas = [c for c in df.columns if c != config['clave']]
+    df_completa = df.loc[completa, columnas]
+    if marca not in columnas:
+        columnas.append(marca)
+        df_completa = df_completa.assign(**{marca: None})
+    
+    asignar = ', '.join(f"{c} = v.{c}" for c in columnas)
+    coincide = ' AND '.join(f"(d.{c} = v.{c} OR d.{c} IS NULL)" for c in naturales if c in columnas)
+    actualizados = 0
+    for lote in _lotes(df_completa, columnas):
+        valores, params = _valores_sql(lote, columnas)
+        actualizados += len(loader.execute_fetch(
+            f"UPDATE d SET {asignar} "
+            f"OUTPUT INSERTED.{config['clave']} "
+            f"FROM dbo.{tabla} d JOIN (VALUES {valores}) AS v({', '.join(columnas)}) "
+            f"ON {coincide} WHERE d.{marca} = '{MARCA_INFERIDO}'",
+            params
+        ))
+    
+    logger.info(f"{tabla}: {actualizados} miembros inferidos completados")
+    return completa
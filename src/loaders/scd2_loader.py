@@ -0,0 +1,213 @@
+"""
+Loader de dimensiones lentamente cambiantes (SCD tipo 2)
+Compara un hash de los atributos contra la versión vigente de cada miembro e
+inserta solo las versiones nuevas; las llaves sustitutas existentes no cambian
+"""
+import numpy as np
+import pandas as pd
+from datetime import date
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.loaders.base_loader import BaseLoader
+from src.utils.logger import ETLLogger
+from src.utils.helpers import hash_filas
+
+# Configuración por dimensión: llave sustituta, llave de negocio (identifica
+# al miembro) y atributos versionados (un cambio genera una nueva versión)
+DIMENSIONES_SCD2 = {
+    'DimUbicacion': {
+        'clave': 'IDUbicacion',
+        # El código DANE identifica la localidad; el nombre canónico del
+        # gazetteer (data_ref/localidades.csv) puede corregirse entre cargas
+        'negocio': ['CodigoLocalidad'],
+        'atributos': ['Localidad'],
+    },
+    'DimPaciente': {
+        'clave': 'IDPaciente',
+        'negocio': ['HashPaciente'],
+        # Dimensión de perfiles: todos los atributos demográficos forman
+        # HashPaciente, así que un cambio es un miembro nuevo y no una versión.
+        # SCD2 solo agrega los perfiles nuevos sin alterar las llaves existentes
+        'atributos': [],
+    },
+}
+
+# Columnas de control de versiones
+COLUMNAS_VERSION = ['HashDiff', 'FechaInicio', 'FechaFin', 'EsActual']
+
+# Máximo de llaves por sentencia UPDATE ... WHERE clave IN (...)
+LOTE_EXPIRACION = 1000
+
+def solo_versiones_actuales(df):
+    """Filtra una dimensión leída de la BD a sus versiones vigentes (si es SCD2)"""
+    if 'EsActual' not in df.columns:
+        return df
+    return df[df['EsActual'].astype(bool)].reset_index(drop=True)
+
+def hash_diff(df, atributos):
+    """
+    Hash de 64 bits de los atributos versionados (vectorizado)
+    
+    Los atributos que no vienen en df se toman como nulos, igual que en la BD.
+    Sin atributos versionados el hash es 0 (nunca hay versiones nuevas).
+    """
+    if not atributos:
+        return np.zeros(len(df), dtype=np.int64)
+    faltantes = {col: None for col in atributos if col not in df.columns}
+    return hash_filas(df.assign(**faltantes) if faltantes else df, atributos)
+
+def comparar_versiones(df, actual, config):
+    """
+    Cruza la entrada con las versiones vigentes por llave de negocio (vectorizado)
+    
+    Args:
+        df: Entrada con un registro por llave de negocio
+        actual: Versiones vigentes leídas de la BD (clave, negocio, atributos y HashDiff)
+        config: Configuración de la dimensión en DIMENSIONES_SCD2
+    
+    Returns:
+        Diccionario con máscaras sobre df (nuevo, cambiado), HashDiff de la
+        entrada y las claves vigentes a cerrar (una por fila cambiada)
+    """
+    negocio, atributos = config['negocio'], config['atributos']
+    llave_entrada = hash_filas(df, negocio)
+    diff_entrada = hash_diff(df, atributos)
+    llave_actual = hash_filas(actual, negocio)
+    
+    # Cruce por llave de negocio (hash entero)
+    pos = pd.Index(llave_actual).get_indexer(llave_entrada)
+    existe = pos >= 0
+    # Filas anteriores a SCD2 (HashDiff nulo): el hash se calcula de sus atributos
+    diff_actual = np.where(
+        actual['HashDiff'].isna().to_numpy(),
+        hash_diff(actual, atributos),
+        actual['HashDiff'].astype('Int64').to_numpy(dtype=np.int64, na_value=0)
+    )
+    # Centinela al final: pos = -1 (miembro nuevo) apunta a él. Sin atributos
+    # versionados no hay cambios (HashDiff de configuraciones anteriores se ignora)
+    cambiado = existe & (np.append(diff_actual, 0)[pos] != diff_entrada) & bool(atributos)
+    return {
+        'nuevo': ~existe,
+        'cambiado': cambiado,
+        'diff_entrada': diff_entrada,
+        'expirar': actual[config['clave']].to_numpy()[pos[cambiado]],
+    }
+
+class SCD2Loader:
+    """Loader SCD tipo 2 para una dimensión de DIMENSIONES_SCD2"""
+    
+    def __init__(self, table_name):
+        if table_name not in DIMENSIONES_SCD2:
+            raise ValueError(f"{table_name} no está configurada como dimensión SCD2")
+        self.table_name = table_name
+        self.config = DIMENSIONES_SCD2[table_name]
+        self.logger = ETLLogger(f'SCD2Loader_{table_name}')
+    
+    def load(self, df, fecha_carga=None):
+        """
+        Aplica los cambios de la dimensión como versiones SCD2
+        
+        - Miembros nuevos (llave de negocio sin versión vigente): se insertan
+        - Miembros con HashDiff distinto: se cierra la versión vigente
+          (FechaFin, EsActual = 0) y se inserta la nueva
+        - Miembros sin cambios o ausentes en df: no se tocan
+        
+        Args:
+            df: DataFrame transformado de la dimensión
+            fecha_carga: Fecha de vigencia de las nuevas versiones (por defecto hoy)
+        
+        Returns:
+            Número de versiones insertadas
+        """
+        fecha_carga = fecha_carga or date.today()
+        clave, negocio, atributos = self.config['clave'], self.config['negocio'], self.config['atributos']
+        
+        # Un registro por llave de negocio en la entrada
+        df = df.drop_duplicates(subset=negocio).reset_index(drop=True)
+        
+        loader = BaseLoader(self.table_name)
+        try:
+            loader.connect()
+            
+            columnas = ', '.join([clave] + negocio + atributos + ['HashDiff'])
+            actual = loader.read_table(
+                f"SELECT {columnas} FROM dbo.{self.table_name} WHERE EsActual = 1"
+            )
+            cruce = comparar_versiones(df, actual, self.config)
+            nuevo, cambiado, diff_entrada = cruce['nuevo'], cruce['cambiado'], cruce['diff_entrada']
+            
+            self.logger.info(
+                f"{self.table_name}: {int(nuevo.sum())} miembros nuevos, "
+                f"{int(cambiado.sum())} con cambios, {int((~nuevo & ~cambiado).sum())} sin cambios"
+            )
+            
+            if cambiado.any():
+                self._expirar(loader, cruce['expirar'], fecha_carga)
+            
+            insertar = nuevo | cambiado
+            if not insertar.any():
+                return 0
+            
+            df_nuevas = df[insertar].assign(
+                HashDiff=diff_entrada[insertar],
+                FechaInicio=fecha_carga,
+                FechaFin=None,
+                EsActual=True
+            )
+            df_nuevas = df_nuevas.drop(columns=[clave], errors='ignore')
+            rows = loader.load_dataframe(df_nuevas, if_exists='append')
+            
+            loader.update_etl_control(
+                process_name=f'Load_{self.table_name}',
+                rows_loaded=rows,
+                status='Success',
+                notes=f'SCD2: {int(nuevo.sum())} nuevos, {int(cambiado.sum())} versionados'
+            )
+            return rows
+        
+        finally:
+            loader.disconnect()
+    
+    def _expirar(self, loader, claves, fecha_carga):
+        """Cierra las versiones vigentes de las llaves dadas"""
+        clave = self.config['clave']
+        for inicio in range(0, len(claves), LOTE_EXPIRACION):
+            lote = ', '.join(str(int(c)) for c in claves[inicio:inicio + LOTE_EXPIRACION])
+            loader.execute_query(
+                f"UPDATE dbo.{self.table_name} SET FechaFin = '{fecha_carga.isoformat()}', EsActual = 0 "
+                f"WHERE {clave} IN ({lote}) AND EsActual = 1"
+            )
+        self.logger.info(f"{len(claves)} versiones cerradas en {self.table_name}")
+
+# Función de conveniencia
+def load_dimension_scd2(df, table_name, fecha_carga=None):
+    """Carga una dimensión como SCD tipo 2"""
+    loader = SCD2Loader(table_name)
+    return loader.load(df, fecha_carga)
+
+if __name__ == "__main__":
+    # Test del cruce de versiones (sin base de datos): la localidad 10 cambia de
+    # nombre, la 11 es anterior a SCD2 (HashDiff nulo) y no cambia, la 12 es nueva
+    print("Testing SCD2Loader...")
+    config = DIMENSIONES_SCD2['DimUbicacion']
+    actual = pd.DataFrame({
+        'IDUbicacion': [1, 2],
+        'CodigoLocalidad': ['10', '11'],
+        'Localidad': ['Engativa, Bogota, Colombia', 'Suba, Bogota, Colombia'],
+    })
+    actual['HashDiff'] = pd.array([hash_diff(actual, config['atributos'])[0], None], dtype='Int64')
+    entrada = pd.DataFrame({
+        'CodigoLocalidad': ['10', '11', '12'],
+        'Localidad': ['Engativá, Bogota, Colombia', 'Suba, Bogota, Colombia', 'Barrios Unidos, Bogota, Colombia'],
+    })
+    cruce = comparar_versiones(entrada, actual, config)
+    assert cruce['nuevo'].tolist() == [False, False, True]
+    assert cruce['cambiado'].tolist() == [True, False, False]
+    assert cruce['expirar'].tolist() == [1]
+    print("✓ Cierre de la versión de IDUbicacion 1 e inserción de 2 versiones (10 renombrada, 12 nueva)")
+    
+    cruce = comparar_versiones(entrada.iloc[:2], actual, DIMENSIONES_SCD2['DimUbicacion'] | {'atributos': []})
+    assert not cruce['cambiado'].any() and not cruce['nuevo'].any()
+    print("✓ Sin atributos versionados no hay versiones nuevas")
@@ -6,16 +6,30 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
+from config.etl_config import etl_config
 from src.utils.logger import ETLLogger
+from src.transformers.transform_casos import CasosTransformer
 from src.transformers.transform_dim_fecha import DimFechaTransformer
 from src.transformers.transform_dim_paciente import DimPacienteTransformer
 from src.transformers.transform_dim_ubicacion import DimUbicacionTransformer
 from src.transformers.transform_dim_clinica import DimClinicaTransformer
 from src.transformers.transform_dim_exposicion import DimExposicionTransformer
 from src.transformers.transform_dim_hora import DimHoraTransformer
+from src.transformers.transform_dim_estacion import DimEstacionTransformer
 from src.transformers.transform_hecho_hospitalizaciones import HechoHospitalizacionesTransformer
 from src.transformers.transform_hecho_medicion import HechoMedicionAmbientalTransformer
+from src.transformers.transform_calidad_medicion import CalidadMedicionTransformer
+from src.transformers.transform_exposicion_movil import ExposicionMovilTransformer
+from src.transformers.transform_completitud_medicion import CompletitudMedicionTransformer
+from src.transformers.transform_rollup_medicion import RollupMedicionTransformer
+from src.transformers.transform_episodio_contaminacion import EpisodioContaminacionTransformer
+from src.transformers.transform_cuantiles_medicion import CuantilesMedicionTransformer
+from src.transformers.transform_estacionalidad_medicion import EstacionalidadMedicionTransformer
+from src.transformers.transform_exposicion_localidad import ExposicionLocalidadTransformer
 from src.transformers.transform_analisis_correlacion import AnalisisCorrelacionTransformer
+from src.transformers.transform_analisis_correlacion_lag import AnalisisCorrelacionLagTransformer
+from src.transformers.transform_analisis_correlacion_resumen import AnalisisCorrelacionResumenTransformer
+from src.utils.motor_dataframe import crear_motor
 
 class MasterTransformer:
     """Orquestador para transformar todos los datos"""
@@ -23,6 +37,7 @@ class MasterTransformer:
     def __init__(self):
         self.logger = ETLLogger('MasterTransformer')
         self.transformed_data = {}
+        self.estados_pendientes = []
     
     def transform_all(self, extracted_data):
         """
@@ -30,16 +45,27 @@ class MasterTransformer:
         
         Args:
             extracted_data: Diccionario con los datos extraídos
-            
+        
         Returns:
             Diccionario con todas las dimensiones y hechos transformados
         """
         self.logger.start_process("TRANSFORMACIÓN DE TODAS LAS DIMENSIONES Y HECHOS")
         
+        # Motor de DataFrame de los transformadores de mediciones (pandas o polars)
+        motor_df = crear_motor(etl_config.motor_dataframe)
+        self.logger.info(f"Motor de DataFrame: {motor_df.nombre}")
+        if motor_df.nombre != 'pandas':
+            self.logger.warning(f"El motor {motor_df.nombre} es experimental (ver README, Motores de DataFrame)")
+        
         try:
+            # 0. Tabla intermedia de casos (compartida por DimPaciente, DimUbicacion y HechoHospitalizaciones)
+            self.logger.info("\n0. Construyendo tabla de casos...")
+            transformer_casos = CasosTransformer()
+            self.transformed_data['casos'] = transformer_casos.transform(extracted_data)
+            
             # 1. Transformar DimFecha
             self.logger.info("\n1. Transformando DimFecha...")
-            transformer_fecha = DimFechaTransformer()
+            transformer_fecha = DimFechaTransformer(claves_inteligentes=etl_config.claves_inteligentes)
             self.transformed_data['dim_fecha'] = transformer_fecha.transform(extracted_data)
             
             # 2. Transformar DimClinica
@@ -50,12 +76,16 @@ class MasterTransformer:
             # 3. Transformar DimPaciente
             self.logger.info("\n3. Transformando DimPaciente...")
             transformer_paciente = DimPacienteTransformer()
-            self.transformed_data['dim_paciente'] = transformer_paciente.transform(extracted_data)
+            self.transformed_data['dim_paciente'] = transformer_paciente.transform(
+                extracted_data, self.transformed_data['casos']
+            )
             
             # 4. Transformar DimUbicacion
             self.logger.info("\n4. Transformando DimUbicacion...")
             transformer_ubicacion = DimUbicacionTransformer()
-            self.transformed_data['dim_ubicacion'] = transformer_ubicacion.transform(extracted_data)
+            self.transformed_data['dim_ubicacion'] = transformer_ubicacion.transform(
+                extracted_data, self.transformed_data['casos']
+            )
             
             # 5. Transformar DimExposicion
             self.logger.info("\n5. Transformando DimExposicion...")
@@ -64,35 +94,105 @@ class MasterTransformer:
             
             # 6. Transformar DimHora
             self.logger.info("\n6. Transformando DimHora...")
-            transformer_hora = DimHoraTransformer()
+            transformer_hora = DimHoraTransformer(claves_inteligentes=etl_config.claves_inteligentes)
             self.transformed_data['dim_hora'] = transformer_hora.transform(extracted_data)
             
+            # 6.1 Transformar DimEstacion
+            self.logger.info("\n6.1 Transformando DimEstacion...")
+            transformer_estacion = DimEstacionTransformer()
+            self.transformed_data['dim_estacion'] = transformer_estacion.transform(extracted_data)
+            
             # 7. Transformar HechoHospitalizaciones
             self.logger.info("\n7. Transformando HechoHospitalizaciones...")
-            transformer_hechos = HechoHospitalizacionesTransformer()
-            self.transformed_data['hecho_hospitalizaciones'] = transformer_hechos.transform(extracted_data)
+            transformer_hechos = HechoHospitalizacionesTransformer(
+                preagregar=etl_config.preagregar_hospitalizaciones
+            )
+            self.transformed_data['hecho_hospitalizaciones'] = transformer_hechos.transform(
+                extracted_data, self.transformed_data['casos']
+            )
             
             # 8. Transformar HechoMedicionAmbiental
             self.logger.info("\n8. Transformando HechoMedicionAmbiental...")
-            transformer_mediciones = HechoMedicionAmbientalTransformer()
-            self.transformed_data['hecho_medicion_ambiental'] = transformer_mediciones.transform(extracted_data)
+            transformer_mediciones = HechoMedicionAmbientalTransformer(motor_df)
+            df_medicion = transformer_mediciones.transform(extracted_data)
+            
+            # 8.1-8.4 Calidad, completitud, exposición móvil y rollups
+            df_agregados = self.transform_mediciones(df_medicion, motor_df)
+            
+            # 8.5 Episodios de contaminación (horas consecutivas sobre el umbral de alerta)
+            self.logger.info("\n8.5 Transformando HechoEpisodioContaminacion...")
+            transformer_episodios = EpisodioContaminacionTransformer(min_horas=etl_config.episodio_min_horas)
+            self.transformed_data['hecho_episodio_contaminacion'] = transformer_episodios.transform(
+                self.transformed_data['hecho_medicion_ambiental']
+            )
+            
+            # 8.6 Percentiles mensuales por estación (sketches fusionables)
+            self.logger.info("\n8.6 Transformando HechoMedicionCuantilMensual...")
+            transformer_cuantiles = CuantilesMedicionTransformer(
+                alfa=etl_config.cuantiles_alfa,
+                incremental=etl_config.cuantiles_incremental,
+                state_dir=etl_config.state_dir
+            )
+            self.transformed_data['hecho_medicion_cuantil_mensual'] = transformer_cuantiles.transform(
+                self.transformed_data['hecho_medicion_ambiental']
+            )
+            self.estados_pendientes.append(transformer_cuantiles)
+            
+            # 8.7 Descomposición estacional (perfil semanal y residuos por bimestre)
+            self.logger.info("\n8.7 Transformando AnalisisPerfilEstacional y AnalisisResidualEstacional...")
+            transformer_estacionalidad = EstacionalidadMedicionTransformer(
+                semanas_tendencia=etl_config.tendencia_semanas,
+                iteraciones=etl_config.estacionalidad_iteraciones
+            )
+            estacionalidad = transformer_estacionalidad.transform(self.transformed_data['hecho_medicion_ambiental'])
+            self.transformed_data['analisis_perfil_estacional'] = estacionalidad['perfil']
+            self.transformed_data['analisis_residual_estacional'] = estacionalidad['residual']
+            
+            # 8.8 Exposición por localidad-hora interpolada desde las estaciones cercanas (IDW)
+            if etl_config.exposicion_idw:
+                self.logger.info("\n8.8 Interpolando exposición por localidad (IDW)...")
+                transformer_idw = ExposicionLocalidadTransformer(
+                    k=etl_config.idw_vecinos,
+                    potencia=etl_config.idw_potencia,
+                    max_km=etl_config.idw_max_km
+                )
+                self.transformed_data['exposicion_localidad'] = transformer_idw.transform(
+                    self.transformed_data['hecho_medicion_ambiental']
+                )
             
             # 9. Transformar AnalisisCorrelacion (requiere dimensiones y hechos)
             self.logger.info("\n9. Transformando AnalisisCorrelacion...")
-            transformer_analisis = AnalisisCorrelacionTransformer()
+            transformer_analisis = AnalisisCorrelacionTransformer(
+                incremental=etl_config.analisis_incremental,
+                state_dir=etl_config.state_dir
+            )
             dim_data = {
                 'dim_fecha': self.transformed_data['dim_fecha'],
                 'dim_ubicacion': self.transformed_data['dim_ubicacion']
             }
+            # Con IDW la exposición de cada localidad viene de la interpolación y no solo
+            # de las estaciones asignadas a ella (las localidades sin estación no quedan vacías)
             fact_data = {
-                'hecho_medicion': self.transformed_data['hecho_medicion_ambiental'],
-                'hecho_hospitalizacion': self.transformed_data['hecho_hospitalizaciones']
+                'hecho_medicion': self.transformed_data.get('exposicion_localidad', df_agregados),
+                'hecho_hospitalizacion': self.transformed_data['hecho_hospitalizaciones'],
+                'completitud_diaria': self.transformed_data['completitud_diaria']
             }
             self.transformed_data['analisis_correlacion'] = transformer_analisis.transform(dim_data, fact_data)
+            self.estados_pendientes.append(transformer_analisis)
+            
+            # 9.1 Correlaciones rezagadas (sobre el estado completo del cubo)
+            self.logger.info("\n9.1 Transformando AnalisisCorrelacionLag...")
+            transformer_lag = AnalisisCorrelacionLagTransformer(max_lag=etl_config.max_lag_anios)
+            self.transformed_data['analisis_correlacion_lag'] = transformer_lag.transform(transformer_analisis.df_estado)
+            
+            # 9.2 Pearson y Spearman con intervalos bootstrap
+            self.logger.info("\n9.2 Transformando AnalisisCorrelacionResumen...")
+            transformer_resumen = AnalisisCorrelacionResumenTransformer(n_bootstrap=etl_config.bootstrap_replicas)
+            self.transformed_data['analisis_correlacion_resumen'] = transformer_resumen.transform(transformer_analisis.df_estado)
             
             self.logger.end_process("TRANSFORMACIÓN DE TODAS LAS DIMENSIONES Y HECHOS", success=True)
             return self.transformed_data
-            
+        
         except Exception as e:
             self.logger.error(f"Error en transformación maestra: {str(e)}")
             self.logger.end_process("TRANSFORMACIÓN DE TODAS LAS DIMENSIONES Y HECHOS", success=False)
@@ -110,6 +210,64 @@ class MasterTransformer:
                 }
         return summary
     
+    def transform_mediciones(self, df_medicion, motor_df=None):
+        """
+        Revisión de calidad, completitud, exposición móvil y rollups (pasos 8.1-8.4)
+        
+        Es la cadena que alimenta HechoMedicionDiaria y HechoMedicionMensual; el
+        refresco de un rollup (hecho_medicion_rollup_loader) la usa completa para
+        que coincida con una ejecución de transform_all.
+        
+        Args:
+            df_medicion: DataFrame de HechoMedicionAmbientalTransformer
+            motor_df: Motor de DataFrame (por defecto el de etl_config)
+        
+        Returns:
+            Mediciones de los agregados (con las horas interpoladas si se
+            interpolan huecos)
+        """
+        motor_df = motor_df or crear_motor(etl_config.motor_dataframe)
+        
+        # 8.1 Revisión de calidad (las mediciones se marcan con codigo_calidad, no se eliminan)
+        self.logger.info("\n8.1 Revisando calidad de mediciones...")
+        transformer_calidad = CalidadMedicionTransformer()
+        self.transformed_data['hecho_medicion_ambiental'] = transformer_calidad.transform(df_medicion)
+        
+        # 8.2 Completitud de las series horarias (e interpolación opcional de huecos cortos)
+        self.logger.info("\n8.2 Calculando completitud de series horarias...")
+        transformer_completitud = CompletitudMedicionTransformer(
+            interpolar=etl_config.interpolar_huecos,
+            max_horas_hueco=etl_config.max_horas_hueco,
+            motor=motor_df
+        )
+        self.transformed_data['completitud_diaria'] = transformer_completitud.transform(
+            self.transformed_data['hecho_medicion_ambiental']
+        )
+        # Mediciones de los agregados (rollups y AnalisisCorrelacion): con interpolación
+        # incluyen las horas llenadas; HechoMedicionAmbiental conserva solo las observadas
+        df_agregados = transformer_completitud.completar(self.transformed_data['hecho_medicion_ambiental'])
+        
+        # 8.3 Medias móviles regulatorias e IBOCA por estación-hora
+        self.logger.info("\n8.3 Calculando exposición móvil e IBOCA...")
+        transformer_exposicion_movil = ExposicionMovilTransformer()
+        self.transformed_data['exposicion_movil'] = transformer_exposicion_movil.transform(df_agregados)
+        
+        # 8.4 Rollups diario y mensual de mediciones (con los máximos de la exposición móvil)
+        self.logger.info("\n8.4 Transformando HechoMedicionDiaria y HechoMedicionMensual...")
+        transformer_rollup = RollupMedicionTransformer(motor_df)
+        rollups = transformer_rollup.transform(
+            self.transformed_data['exposicion_movil'],
+            df_completitud=self.transformed_data['completitud_diaria']
+        )
+        self.transformed_data['hecho_medicion_diaria'] = rollups['diaria']
+        self.transformed_data['hecho_medicion_mensual'] = rollups['mensual']
+        
+        return df_agregados
+    
+    def get_estados_pendientes(self):
+        """Transformadores con estado incremental que se guarda solo después de una carga exitosa"""
+        return self.estados_pendientes
+    
     def get_data(self, table_name):
         """Obtiene los datos transformados de una tabla específica"""
         return self.transformed_data.get(table_name)
@@ -1,25 +1,99 @@
 """
 Transformador para AnalisisCorrelacion
-Genera datos agregados por localidad, año y bimestre
+Genera datos agregados por localidad, año, bimestre e indicador
 """
+import numpy as np
 import pandas as pd
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.logger import ETLLogger
+from src.utils.state_store import StateStore
+from src.utils.group_stats import combine_codes, split_codes, grouped_stats
+from src.utils.air_quality import CALIDAD_VALIDA
+from src.utils.gazetteer import LOCALIDAD_DEFAULT
+
+# Llave de partición de la tabla de análisis (sin indicador)
+PARTICION = ['Localidad', 'Anio', 'Bimestre']
+
+# Llave del cubo: una fila por partición e indicador
+LLAVE_CUBO = PARTICION + ['Indicador']
+
+# Columnas del estado persistido por partición
+COLUMNAS_ESTADO = LLAVE_CUBO + [
+    'SumaConcentracion', 'NumMediciones', 'Concentracion_min',
+    'Concentracion_max', 'Concentracion_p95', 'HorasEsperadas', 'HorasValidas',
+    'Hospitalizaciones'
+]
+
+def anio_bimestre(fechas):
+    """
+    Calcula Anio y Bimestre por aritmética de fechas (sin join con DimFecha)
+    
+    Las fechas se factorizan primero: la conversión a datetime solo se hace
+    sobre los valores únicos (unos miles) y no sobre cada medición.
+    
+    Returns:
+        Tupla de arreglos (anio, bimestre)
+    """
+    codes, uniques = pd.factorize(fechas)
+    uniques = pd.DatetimeIndex(pd.to_datetime(uniques))
+    anio = np.asarray(uniques.year, dtype=np.int64)[codes]
+    bimestre = ((np.asarray(uniques.month, dtype=np.int64) - 1) // 2 + 1)[codes]
+    return anio, bimestre
+
+def estado_anual(df_estado):
+    """
+    Colapsa el estado por partición a series anuales por (Localidad, Indicador)
+    
+    Las hospitalizaciones de la fuente son anuales (Fecha = 1 de enero), así
+    que una correlación por bimestre solo compararía la exposición con el
+    bimestre 1 de cada año. La exposición anual es la media de todas las
+    mediciones del año y los casos son la suma anual; un año sin ningún dato
+    de casos queda nulo (no cero).
+    
+    Returns:
+        DataFrame con Localidad, Indicador, Anio, Concentracion_avg y Hospitalizaciones
+    """
+    anual = df_estado.groupby(['Localidad', 'Indicador', 'Anio'], sort=True).agg(
+        SumaConcentracion=('SumaConcentracion', 'sum'),
+        NumMediciones=('NumMediciones', 'sum'),
+        Hospitalizaciones=('Hospitalizaciones', lambda s: s.sum(min_count=1)),
+    ).reset_index()
+    anual['Concentracion_avg'] = anual['SumaConcentracion'] / anual['NumMediciones']
+    return anual[['Localidad', 'Indicador', 'Anio', 'Concentracion_avg', 'Hospitalizaciones']]
 
 class AnalisisCorrelacionTransformer:
     """Transformador para la tabla de análisis de correlación"""
     
-    def __init__(self):
+    def __init__(self, incremental=False, state_dir='state'):
+        """
+        Args:
+            incremental: Si True, persiste el estado por partición (suma, conteo,
+                casos) y solo recalcula las particiones tocadas por hechos nuevos
+            state_dir: Directorio donde se guarda el estado entre ejecuciones
+        """
         self.logger = ETLLogger('AnalisisCorrelacionTransformer')
+        self.incremental = incremental
+        self.state_store = StateStore('analisis_correlacion_particiones', state_dir)
         self.df_analisis = None
+        self.df_estado = None
+        self.estado_pendiente = None
     
     def transform(self, dim_data, fact_data):
         """
         Transforma los datos para generar análisis de correlación
         
+        Genera un cubo (Localidad, Anio, Bimestre, Indicador) con promedio,
+        mínimo, máximo, p95, conteo y completitud de concentración. CO y
+        PM2.5 tienen unidades distintas, por lo que nunca se promedian juntos.
+        Hospitalizaciones es nulo en los bimestres que la fuente no cubre (hoy
+        es anual: los casos del año quedan en el bimestre 1).
+        
+        En modo incremental solo retorna los registros de los grupos
+        (Anio, Bimestre) afectados; el resto de la tabla no cambia.
+        
         Args:
             dim_data: Diccionario con las dimensiones transformadas
             fact_data: Diccionario con los hechos transformados
@@ -28,106 +102,254 @@ class AnalisisCorrelacionTransformer:
             self.logger.info("Iniciando transformación de AnalisisCorrelacion...")
             
             # Obtener los DataFrames necesarios
-            df_fecha = dim_data['dim_fecha']
             df_ubicacion = dim_data['dim_ubicacion']
             df_medicion = fact_data['hecho_medicion']
             df_hospitalizacion = fact_data['hecho_hospitalizacion']
+            df_completitud = fact_data.get('completitud_diaria')
             
-            # Agregar datos de mediciones ambientales
-            # Convertir fecha a datetime si es necesario
-            df_medicion_copy = df_medicion.copy()
-            df_medicion_copy['fecha'] = pd.to_datetime(df_medicion_copy['fecha'])
+            # Solo se analizan las localidades presentes en DimUbicacion; los
+            # casos y estaciones sin localidad no forman una serie comparable
+            localidades = set(df_ubicacion['Localidad'].dropna().unique()) - {LOCALIDAD_DEFAULT}
             
-            # Necesitamos hacer merge con fecha y ubicación para obtener Bimestre y Localidad
-            df_med_enriquecido = df_medicion_copy.merge(
-                df_fecha[['Fecha', 'Anio', 'Bimestre']],
-                left_on='fecha',
-                right_on='Fecha',
-                how='left'
-            ).merge(
-                df_ubicacion[['Localidad', 'CodigoLocalidad']],
-                left_on='localidad',
-                right_on='Localidad',
-                how='left'
-            )
+            df_estado_previo = self._leer_estado() if self.incremental else None
             
-            # Agregar por Localidad, Año, Bimestre
-            med_agg = df_med_enriquecido.groupby(['Localidad', 'Anio', 'Bimestre']).agg({
-                'concentracion': 'mean',  # Promedio de concentración
-                'fecha': 'count'  # Número de mediciones
-            }).reset_index()
+            if df_estado_previo is None:
+                # Ejecución completa: agregar todas las particiones
+                med_agg = self._construir_cubo(df_medicion, localidades, df_completitud)
+                grupos_afectados = None
+            else:
+                # Ejecución incremental: reagregar desde el último bimestre procesado
+                med_agg, grupos_afectados = self._construir_cubo_incremental(
+                    df_estado_previo, df_medicion, localidades, df_completitud
+                )
             
-            med_agg.columns = ['Localidad', 'Anio', 'Bimestre', 'Concentracion_avg', 'NumMediciones']
+            # Las hospitalizaciones son pocas: se agregan siempre completas
+            hosp_agg = self._agregar_hospitalizaciones(df_hospitalizacion)
             
-            # Agregar datos de hospitalizaciones
-            # HechoHospitalizaciones ya incluye Localidad y CodigoLocalidad
-            df_hospitalizacion_copy = df_hospitalizacion.copy()
+            # Combinar ambos agregados (estado por partición e indicador)
+            self.df_estado = med_agg.merge(hosp_agg, on=PARTICION, how='left')
             
-            # HechoHospitalizaciones ya tiene las columnas 'Localidad' y 'Anio', solo necesitamos agregar Bimestre
-            # Primero, convertir Fecha a datetime si es necesario
-            df_hospitalizacion_copy['Fecha'] = pd.to_datetime(df_hospitalizacion_copy['Fecha'])
+            # Sin casos = 0 solo en los periodos que cubre la fuente de hospitalizaciones;
+            # en el resto el dato falta (nulo) y no debe entrar a las correlaciones como cero
+            cubiertos = pd.MultiIndex.from_frame(hosp_agg[['Anio', 'Bimestre']].drop_duplicates())
+            cubierto = pd.MultiIndex.from_frame(self.df_estado[['Anio', 'Bimestre']]).isin(cubiertos)
+            self.df_estado['Hospitalizaciones'] = self.df_estado['Hospitalizaciones'].mask(
+                cubierto & self.df_estado['Hospitalizaciones'].isna(), 0
+            ).astype('Int64')
             
-            # Hacer merge con fecha solo para obtener Bimestre
-            df_hosp_enriquecido = df_hospitalizacion_copy.merge(
-                df_fecha[['Fecha', 'Bimestre']],
-                left_on='Fecha',
-                right_on='Fecha',
-                how='left'
-            )
+            if grupos_afectados is not None:
+                # Sumar los grupos cuyo total de casos cambió respecto al estado previo
+                grupos_afectados = self._agregar_grupos_hospitalizacion(
+                    grupos_afectados, df_estado_previo, self.df_estado
+                )
+                self.logger.info(f"Grupos (Anio, Bimestre) afectados: {len(grupos_afectados)}")
+                df_salida = self.df_estado.merge(grupos_afectados, on=['Anio', 'Bimestre'], how='inner')
+            else:
+                df_salida = self.df_estado
             
-            # Agregar por Localidad (ya existe en df_hospitalizacion), Año, Bimestre
-            hosp_agg = df_hosp_enriquecido.groupby(['Localidad', 'Anio', 'Bimestre']).agg({
-                'NumeroCasos': 'sum'  # Suma de hospitalizaciones
-            }).reset_index()
+            # Calcular promedios y tasas (denominadores solo de los grupos de salida)
+            self.df_analisis = self._calcular_metricas(df_salida)
             
-            hosp_agg.columns = ['Localidad', 'Anio', 'Bimestre', 'Hospitalizaciones']
-            
-            # Combinar ambos agregados
-            self.df_analisis = med_agg.merge(
-                hosp_agg,
-                on=['Localidad', 'Anio', 'Bimestre'],
-                how='left'
-            )
-            
-            # Llenar hospitalizaciones faltantes con 0
-            self.df_analisis['Hospitalizaciones'] = self.df_analisis['Hospitalizaciones'].fillna(0).astype(int)
-            
-            # Calcular total de hospitalizaciones por Año y Bimestre (para toda Bogotá)
-            total_bogota = self.df_analisis.groupby(['Anio', 'Bimestre'])['Hospitalizaciones'].sum().reset_index()
-            total_bogota.columns = ['Anio', 'Bimestre', 'TotalBogota']
-            
-            # Hacer merge para obtener el total
-            self.df_analisis = self.df_analisis.merge(
-                total_bogota,
-                on=['Anio', 'Bimestre'],
-                how='left'
-            )
-            
-            # Calcular tasa de hospitalización (proporción respecto al total de Bogotá)
-            self.df_analisis['HospitalizacionRate'] = (
-                self.df_analisis['Hospitalizaciones'].astype(float) / 
-                self.df_analisis['TotalBogota']
-            )
-            
-            # Llenar con 0 donde no hay total
-            self.df_analisis['HospitalizacionRate'] = self.df_analisis['HospitalizacionRate'].fillna(0)
-            
-            # Eliminar la columna temporal TotalBogota
-            self.df_analisis = self.df_analisis.drop(columns=['TotalBogota'])
-            
-            # Remover filas sin Localidad
-            self.df_analisis = self.df_analisis.dropna(subset=['Localidad'])
+            # El estado solo se guarda después de una carga exitosa (guardar_estado); si la
+            # carga falla, la próxima ejecución vuelve a procesar las mismas particiones
+            if self.incremental:
+                self.estado_pendiente = self.df_estado[COLUMNAS_ESTADO]
             
             self.logger.success(f"AnalisisCorrelacion transformado: {len(self.df_analisis)} registros")
-            self.logger.info(f"Rango de años: {self.df_analisis['Anio'].min()} - {self.df_analisis['Anio'].max()}")
-            self.logger.info(f"Localidades únicas: {self.df_analisis['Localidad'].nunique()}")
+            if len(self.df_analisis) > 0:
+                self.logger.info(f"Rango de años: {self.df_analisis['Anio'].min()} - {self.df_analisis['Anio'].max()}")
+                self.logger.info(f"Localidades únicas: {self.df_analisis['Localidad'].nunique()}")
+                self.logger.info(f"Indicadores: {self.df_analisis['Indicador'].nunique()}")
             
             return self.df_analisis
-            
+        
         except Exception as e:
             self.logger.error(f"Error en transformación de AnalisisCorrelacion: {str(e)}")
             raise
     
+    def guardar_estado(self):
+        """Persiste el estado por partición de la última transformación (llamar tras cargar)"""
+        if self.estado_pendiente is None:
+            return
+        self.state_store.write(self.estado_pendiente)
+        self.logger.info(f"Estado por partición guardado: {len(self.estado_pendiente)} particiones")
+        self.estado_pendiente = None
+    
+    def _leer_estado(self):
+        """Lee el estado previo; si es de un formato anterior se ignora (ejecución completa)"""
+        df_estado_previo = self.state_store.read()
+        if df_estado_previo is None or df_estado_previo.empty:
+            return None
+        
+        faltantes = set(COLUMNAS_ESTADO) - set(df_estado_previo.columns)
+        if faltantes:
+            self.logger.warning(
+                f"Estado previo sin columnas {sorted(faltantes)}: se recalcula todo el historial"
+            )
+            return None
+        return df_estado_previo
+    
+    def _construir_cubo(self, df_medicion, localidades, df_completitud=None):
+        """
+        Construye el cubo de mediciones en un solo groupby sobre llaves enteras
+        
+        Localidad e indicador se factorizan, Anio y Bimestre salen de la fecha
+        y las cuatro llaves se combinan en un único int64. Si hay completitud
+        diaria, se suman las horas esperadas y válidas de cada celda.
+        """
+        loc_codes, loc_uniques = pd.factorize(df_medicion['localidad'])
+        ind_codes, ind_uniques = pd.factorize(df_medicion['indicador'])
+        anio, bimestre = anio_bimestre(df_medicion['fecha'])
+        
+        # Descartar localidades nulas o ausentes de DimUbicacion
+        loc_validas = np.array([loc in localidades for loc in loc_uniques], dtype=bool)
+        valid = (loc_codes >= 0) & (ind_codes >= 0)
+        valid[valid] = loc_validas[loc_codes[valid]]
+        
+        # Solo mediciones válidas según la revisión de calidad
+        if 'codigo_calidad' in df_medicion.columns:
+            valid &= df_medicion['codigo_calidad'].to_numpy() == CALIDAD_VALIDA
+        
+        anio_min = int(anio.min()) if len(anio) else 0
+        n_anios = int(anio.max()) - anio_min + 1 if len(anio) else 1
+        sizes = [len(loc_uniques), n_anios, 6, len(ind_uniques)]
+        
+        keys = combine_codes(
+            [loc_codes[valid], anio[valid] - anio_min, bimestre[valid] - 1, ind_codes[valid]],
+            sizes
+        )
+        stats = grouped_stats(
+            keys,
+            df_medicion['concentracion'].to_numpy(dtype=np.float64)[valid],
+            quantiles=(0.95,)
+        )
+        
+        loc, anio_off, bim_off, ind = split_codes(stats['key'], sizes)
+        
+        cubo = pd.DataFrame({
+            'Localidad': np.asarray(loc_uniques, dtype=object)[loc],
+            'Anio': anio_off + anio_min,
+            'Bimestre': bim_off + 1,
+            'Indicador': np.asarray(ind_uniques, dtype=object)[ind],
+            'SumaConcentracion': stats['sum'],
+            'NumMediciones': stats['count'],
+            'Concentracion_min': stats['min'],
+            'Concentracion_max': stats['max'],
+            'Concentracion_p95': stats['q0.95'],
+        })
+        return cubo.merge(self._agregar_completitud(df_completitud), on=LLAVE_CUBO, how='left')
+    
+    def _agregar_completitud(self, df_completitud):
+        """Suma horas esperadas y válidas por celda del cubo"""
+        if df_completitud is None or df_completitud.empty:
+            return pd.DataFrame(columns=LLAVE_CUBO + ['HorasEsperadas', 'HorasValidas']).astype(
+                {'Anio': np.int64, 'Bimestre': np.int64, 'HorasEsperadas': np.float64, 'HorasValidas': np.float64}
+            )
+        
+        anio, bimestre = anio_bimestre(df_completitud['fecha'])
+        return pd.DataFrame({
+            'Localidad': df_completitud['localidad'].to_numpy(),
+            'Anio': anio,
+            'Bimestre': bimestre,
+            'Indicador': df_completitud['indicador'].to_numpy(),
+            'HorasEsperadas': df_completitud['horas_esperadas'].to_numpy(),
+            'HorasValidas': df_completitud['horas_validas'].to_numpy(),
+        }).groupby(LLAVE_CUBO, sort=False).sum().reset_index()
+    
+    def _construir_cubo_incremental(self, df_estado_previo, df_medicion, localidades, df_completitud=None):
+        """
+        Reagrega solo las mediciones desde el último bimestre del estado previo
+        (ese bimestre pudo quedar incompleto) y conserva las particiones anteriores
+        
+        Returns:
+            Tupla (cubo de mediciones completo, grupos (Anio, Bimestre) recalculados)
+        """
+        periodo_previo = df_estado_previo['Anio'] * 6 + df_estado_previo['Bimestre'] - 1
+        periodo_corte = int(periodo_previo.max())
+        anio_corte, bimestre_corte = divmod(periodo_corte, 6)
+        fecha_corte = pd.Timestamp(year=anio_corte, month=2 * bimestre_corte + 1, day=1)
+        
+        self.logger.info(f"Modo incremental: recalculando mediciones desde {fecha_corte.date()}")
+        
+        anio, bimestre = anio_bimestre(df_medicion['fecha'])
+        df_medicion_nueva = df_medicion[anio * 6 + bimestre - 1 >= periodo_corte]
+        
+        if df_completitud is not None:
+            anio_c, bimestre_c = anio_bimestre(df_completitud['fecha'])
+            df_completitud = df_completitud[anio_c * 6 + bimestre_c - 1 >= periodo_corte]
+        
+        med_nuevo = self._construir_cubo(df_medicion_nueva, localidades, df_completitud)
+        
+        self.logger.info(
+            f"Mediciones reagregadas: {len(df_medicion_nueva):,} de {len(df_medicion):,} "
+            f"({len(med_nuevo)} particiones)"
+        )
+        
+        med_previo = df_estado_previo.loc[
+            periodo_previo < periodo_corte,
+            [c for c in COLUMNAS_ESTADO if c != 'Hospitalizaciones']
+        ]
+        med_agg = pd.concat([med_previo, med_nuevo], ignore_index=True)
+        
+        grupos_afectados = med_nuevo[['Anio', 'Bimestre']].drop_duplicates()
+        return med_agg, grupos_afectados
+    
+    def _agregar_hospitalizaciones(self, df_hospitalizacion):
+        """Agrega las hospitalizaciones por partición (Bimestre calculado desde la fecha)"""
+        anio, bimestre = anio_bimestre(df_hospitalizacion['Fecha'])
+        
+        # HechoHospitalizaciones ya tiene las columnas 'Localidad' y 'Anio'
+        hosp_agg = pd.DataFrame({
+            'Localidad': df_hospitalizacion['Localidad'].to_numpy(),
+            'Anio': anio,
+            'Bimestre': bimestre,
+            'NumeroCasos': df_hospitalizacion['NumeroCasos'].to_numpy()
+        }).groupby(PARTICION).agg({
+            'NumeroCasos': 'sum'  # Suma de hospitalizaciones
+        }).reset_index()
+        
+        hosp_agg.columns = PARTICION + ['Hospitalizaciones']
+        return hosp_agg
+    
+    def _agregar_grupos_hospitalizacion(self, grupos_afectados, df_estado_previo, df_estado):
+        """Agrega a los grupos afectados aquellos cuyas hospitalizaciones cambiaron"""
+        comparacion = df_estado[LLAVE_CUBO + ['Hospitalizaciones']].merge(
+            df_estado_previo[LLAVE_CUBO + ['Hospitalizaciones']],
+            on=LLAVE_CUBO,
+            how='outer',
+            suffixes=('', '_previo')
+        )
+        cambiados = comparacion[
+            comparacion['Hospitalizaciones'].fillna(0) != comparacion['Hospitalizaciones_previo'].fillna(0)
+        ]
+        grupos = pd.concat(
+            [grupos_afectados, cambiados[['Anio', 'Bimestre']]],
+            ignore_index=True
+        ).drop_duplicates()
+        return grupos.astype({'Anio': int, 'Bimestre': int})
+    
+    def _calcular_metricas(self, df_estado):
+        """Calcula las métricas del cubo y HospitalizacionRate a partir del estado por partición"""
+        df = df_estado[LLAVE_CUBO]
+        df['Concentracion_avg'] = df_estado['SumaConcentracion'] / df_estado['NumMediciones']
+        df['Concentracion_min'] = df_estado['Concentracion_min']
+        df['Concentracion_max'] = df_estado['Concentracion_max']
+        df['Concentracion_p95'] = df_estado['Concentracion_p95']
+        df['NumMediciones'] = df_estado['NumMediciones']
+        df['Completitud_pct'] = 100.0 * df_estado['HorasValidas'] / df_estado['HorasEsperadas']
+        df['Hospitalizaciones'] = df_estado['Hospitalizaciones']
+        
+        # Total de hospitalizaciones por Año, Bimestre e Indicador (para toda Bogotá);
+        # se separa por indicador para no contar dos veces la misma localidad
+        total_bogota = df.groupby(['Anio', 'Bimestre', 'Indicador'])['Hospitalizaciones'].transform('sum').astype(float)
+        
+        # Calcular tasa de hospitalización (proporción respecto al total de Bogotá);
+        # 0 si el periodo no tiene casos y nula si no hay dato de casos
+        casos = df['Hospitalizaciones'].astype(float)
+        df['HospitalizacionRate'] = (casos / total_bogota.where(total_bogota > 0)).mask(casos == 0, 0.0)
+        
+        return df.reset_index(drop=True)
+    
     def get_dataframe(self):
         """Retorna el DataFrame transformado"""
         if self.df_analisis is None:
@@ -135,11 +357,10 @@ class AnalisisCorrelacionTransformer:
         return self.df_analisis
 
 # Función de conveniencia
-def transform_analisis_correlacion(dim_data, fact_data):
-    """Transforma el análisis de correlación"""
-    transformer = AnalisisCorrelacionTransformer()
+def transform_analisis_correlacion(dim_data, fact_data, incremental=False):
+    """Transforma el análisis de correlación (en modo incremental el estado queda pendiente de guardar)"""
+    transformer = AnalisisCorrelacionTransformer(incremental=incremental)
     return transformer.transform(dim_data, fact_data)
 
 if __name__ == "__main__":
     print("Testing AnalisisCorrelacionTransformer...")
-
@@ -0,0 +1,123 @@
+"""
+Transformador para AnalisisCorrelacionLag
+Correlación entre exposición y hospitalizaciones con rezagos de 0..N años
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.correlacion import pearson
+from src.transformers.transform_analisis_correlacion import estado_anual
+
+class AnalisisCorrelacionLagTransformer:
+    """
+    Transformador de correlaciones rezagadas por localidad e indicador
+    
+    La resolución es anual porque es la de las hospitalizaciones (ver
+    estado_anual): un rezago en bimestres compararía la exposición con un
+    bimestre 1 que concentra los casos de todo el año. La exposición y los
+    casos anuales se alinean en matrices densas localidad x año y todas las
+    combinaciones (localidad, indicador, rezago) se calculan en una sola
+    operación vectorizada: la exposición del año t se compara con las
+    hospitalizaciones del año t + rezago.
+    """
+    
+    def __init__(self, max_lag=2):
+        """
+        Args:
+            max_lag: Rezago máximo en años
+        """
+        self.logger = ETLLogger('AnalisisCorrelacionLagTransformer')
+        self.max_lag = max_lag
+        self.df_lag = None
+    
+    def transform(self, df_estado):
+        """
+        Calcula la correlación de Pearson para cada rezago 0..max_lag
+        
+        Args:
+            df_estado: Estado por partición de AnalisisCorrelacionTransformer
+                (Localidad, Anio, Bimestre, Indicador, SumaConcentracion,
+                NumMediciones, Hospitalizaciones)
+        
+        Returns:
+            DataFrame con Localidad, Indicador, Lag, NumPeriodos y Correlacion
+        """
+        try:
+            self.logger.info(f"Iniciando correlaciones rezagadas (0..{self.max_lag} años)...")
+            
+            anual = estado_anual(df_estado)
+            periodo = anual['Anio'].to_numpy(dtype=np.int64)
+            p_min = int(periodo.min())
+            n_periodos = int(periodo.max()) - p_min + 1
+            t = periodo - p_min
+            
+            loc_codes, loc_uniques = pd.factorize(anual['Localidad'])
+            ind_codes, ind_uniques = pd.factorize(anual['Indicador'])
+            n_loc, n_ind = len(loc_uniques), len(ind_uniques)
+            
+            # Matrices densas: exposición [localidad, indicador, año] y casos [localidad, año];
+            # los años sin dato de casos quedan NaN y pearson los excluye
+            exposicion = np.full((n_loc, n_ind, n_periodos), np.nan)
+            exposicion[loc_codes, ind_codes, t] = anual['Concentracion_avg'].to_numpy(dtype=np.float64)
+            casos = np.full((n_loc, n_periodos), np.nan)
+            casos[loc_codes, t] = anual['Hospitalizaciones'].to_numpy(dtype=np.float64, na_value=np.nan)
+            
+            # Casos rezagados [localidad, rezago, periodo]: ventana deslizante sobre
+            # la serie extendida con NaN (sin copiar datos)
+            casos_ext = np.concatenate([casos, np.full((n_loc, self.max_lag), np.nan)], axis=1)
+            casos_lag = np.lib.stride_tricks.sliding_window_view(
+                casos_ext, n_periodos, axis=1
+            )[:, :self.max_lag + 1, :]
+            
+            # Broadcast a [localidad, indicador, rezago, periodo]
+            x = exposicion[:, :, None, :]
+            y = casos_lag[:, None, :, :]
+            correlacion, n = pearson(x, y)
+            
+            loc_idx, ind_idx, lag_idx = np.indices(correlacion.shape)
+            self.df_lag = pd.DataFrame({
+                'Localidad': np.asarray(loc_uniques, dtype=object)[loc_idx.ravel()],
+                'Indicador': np.asarray(ind_uniques, dtype=object)[ind_idx.ravel()],
+                'Lag': lag_idx.ravel(),
+                'NumPeriodos': n.ravel(),
+                'Correlacion': correlacion.ravel(),
+            })
+            self.df_lag = self.df_lag[self.df_lag['NumPeriodos'] > 0].reset_index(drop=True)
+            
+            con_valor = int(self.df_lag['Correlacion'].notna().sum())
+            self.logger.success(f"AnalisisCorrelacionLag transformado: {len(self.df_lag)} registros ({con_valor} con correlación)")
+            return self.df_lag
+        
+        except Exception as e:
+            self.logger.error(f"Error en correlaciones rezagadas: {str(e)}")
+            raise
+    
+    def get_dataframe(self):
+        """Retorna el DataFrame transformado"""
+        if self.df_lag is None:
+            raise ValueError("No se han calculado las correlaciones. Ejecuta transform() primero.")
+        return self.df_lag
+
+# Función de conveniencia
+def transform_analisis_correlacion_lag(df_estado, max_lag=2):
+    """Calcula las correlaciones rezagadas exposición-hospitalización"""
+    transformer = AnalisisCorrelacionLagTransformer(max_lag)
+    return transformer.transform(df_estado)
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing AnalisisCorrelacionLagTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.master_transformer import MasterTransformer
+    
+    extractor = MasterExtractor()
+    data = extractor.extract_all()
+    
+    transformed = MasterTransformer().transform_all(data)
+    df = transformed['analisis_correlacion_lag']
+    print(f"\nTotal registros: {len(df):,}")
+    print(df.dropna().sort_values('Correlacion').head(20))
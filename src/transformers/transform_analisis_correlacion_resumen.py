@@ -0,0 +1,126 @@
+"""
+Transformador para AnalisisCorrelacionResumen
+Pearson y Spearman entre exposición y hospitalizaciones con intervalos bootstrap
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.correlacion import bootstrap_correlaciones, MIN_PERIODOS_IC
+from src.transformers.transform_analisis_correlacion import estado_anual
+
+class AnalisisCorrelacionResumenTransformer:
+    """
+    Transformador del resumen de correlación por localidad e indicador
+    
+    Cada serie (localidad, indicador) es una fila de una matriz densa
+    serie x año (la resolución de las hospitalizaciones, ver estado_anual);
+    los coeficientes y sus réplicas bootstrap de todas las series se calculan
+    a la vez sobre esa matriz. Los años sin dato de casos no cuentan como
+    periodos y las series con menos de min_periodos_ic años no tienen
+    intervalo (NaN).
+    """
+    
+    def __init__(self, n_bootstrap=1000, nivel_confianza=0.95, semilla=0, min_periodos_ic=MIN_PERIODOS_IC):
+        """
+        Args:
+            n_bootstrap: Número de réplicas bootstrap
+            nivel_confianza: Nivel de los intervalos de confianza (0-1)
+            semilla: Semilla del remuestreo (resultados reproducibles)
+            min_periodos_ic: Mínimo de años con dato para reportar intervalos
+        """
+        self.logger = ETLLogger('AnalisisCorrelacionResumenTransformer')
+        self.n_bootstrap = n_bootstrap
+        self.nivel_confianza = nivel_confianza
+        self.semilla = semilla
+        self.min_periodos_ic = min_periodos_ic
+        self.df_resumen = None
+    
+    def transform(self, df_estado):
+        """
+        Calcula Pearson y Spearman con intervalos bootstrap por (localidad, indicador)
+        
+        Args:
+            df_estado: Estado por partición de AnalisisCorrelacionTransformer
+                (Localidad, Anio, Bimestre, Indicador, SumaConcentracion,
+                NumMediciones, Hospitalizaciones)
+        
+        Returns:
+            DataFrame con Localidad, Indicador, NumPeriodos, Pearson, Spearman y
+            los límites de sus intervalos
+        """
+        try:
+            self.logger.info(
+                f"Iniciando resumen de correlaciones ({self.n_bootstrap:,} réplicas bootstrap, "
+                f"IC {100 * self.nivel_confianza:.0f}%)..."
+            )
+            
+            anual = estado_anual(df_estado)
+            periodo = anual['Anio'].to_numpy(dtype=np.int64)
+            t = periodo - periodo.min()
+            n_periodos = int(t.max()) + 1
+            
+            series = anual[['Localidad', 'Indicador']].drop_duplicates().reset_index(drop=True)
+            serie_codes = pd.MultiIndex.from_frame(series).get_indexer(
+                pd.MultiIndex.from_frame(anual[['Localidad', 'Indicador']])
+            )
+            
+            # Matrices densas serie x año (NaN donde falta el dato)
+            exposicion = np.full((len(series), n_periodos), np.nan)
+            exposicion[serie_codes, t] = anual['Concentracion_avg'].to_numpy(dtype=np.float64)
+            casos = np.full((len(series), n_periodos), np.nan)
+            casos[serie_codes, t] = anual['Hospitalizaciones'].to_numpy(dtype=np.float64, na_value=np.nan)
+            
+            resultado = bootstrap_correlaciones(
+                exposicion, casos, self.n_bootstrap,
+                nivel_confianza=self.nivel_confianza, semilla=self.semilla,
+                min_periodos_ic=self.min_periodos_ic
+            )
+            
+            self.df_resumen = series.assign(
+                NumPeriodos=resultado['n'],
+                Pearson=resultado['pearson'],
+                Pearson_ICInf=resultado['pearson_inf'],
+                Pearson_ICSup=resultado['pearson_sup'],
+                Spearman=resultado['spearman'],
+                Spearman_ICInf=resultado['spearman_inf'],
+                Spearman_ICSup=resultado['spearman_sup'],
+                NumBootstrap=self.n_bootstrap
+            )
+            
+            con_valor = int(self.df_resumen['Pearson'].notna().sum())
+            self.logger.success(f"AnalisisCorrelacionResumen transformado: {len(self.df_resumen)} registros ({con_valor} con correlación)")
+            return self.df_resumen
+        
+        except Exception as e:
+            self.logger.error(f"Error en resumen de correlaciones: {str(e)}")
+            raise
+    
+    def get_dataframe(self):
+        """Retorna el DataFrame transformado"""
+        if self.df_resumen is None:
+            raise ValueError("No se ha calculado el resumen. Ejecuta transform() primero.")
+        return self.df_resumen
+
+# Función de conveniencia
+def transform_analisis_correlacion_resumen(df_estado, n_bootstrap=1000):
+    """Calcula Pearson y Spearman con intervalos bootstrap"""
+    transformer = AnalisisCorrelacionResumenTransformer(n_bootstrap)
+    return transformer.transform(df_estado)
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing AnalisisCorrelacionResumenTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.master_transformer import MasterTransformer
+    
+    extractor = MasterExtractor()
+    data = extractor.extract_all()
+    
+    transformed = MasterTransformer().transform_all(data)
+    df = transformed['analisis_correlacion_resumen']
+    print(f"\nTotal registros: {len(df):,}")
+    print(df.dropna().sort_values('Spearman'))
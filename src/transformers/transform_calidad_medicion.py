@@ -0,0 +1,166 @@
+"""
+Transformador para la revisión de calidad de HechoMedicionAmbiental
+Marca valores negativos, fuera de rango físico, sensores planos y picos atípicos
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.air_quality import (
+    CALIDAD_VALIDA, CALIDAD_NEGATIVA, CALIDAD_FUERA_RANGO, CALIDAD_SENSOR_PLANO,
+    CALIDAD_PICO, CODIGOS_CALIDAD, RANGOS_FISICOS, HORAS_SENSOR_PLANO,
+    VENTANA_PICOS, UMBRAL_PICO_MAD, PISO_MAD
+)
+from src.transformers.transform_exposicion_movil import horas_desde_epoca
+
+# Factor para que el MAD sea comparable con la desviación estándar (datos normales)
+FACTOR_MAD = 1.4826
+
+class CalidadMedicionTransformer:
+    """
+    Transformador que asigna un código de calidad a cada medición
+    
+    Cada serie (estación, tipo de medición) se ubica en una grilla horaria
+    densa; las series se separan con horas vacías para que ninguna ventana
+    cruce de una estación a otra. Así las pruebas por estación se calculan
+    con una sola pasada vectorizada sobre toda la grilla.
+    """
+    
+    def __init__(self):
+        self.logger = ETLLogger('CalidadMedicionTransformer')
+        self.df_calidad = None
+    
+    def transform(self, df_medicion):
+        """
+        Calcula el código de calidad de cada medición (las filas no se eliminan)
+        
+        Args:
+            df_medicion: DataFrame de HechoMedicionAmbientalTransformer (requiere
+                fecha, hora, estacion, tipo_medicion y concentracion)
+        
+        Returns:
+            DataFrame con las mediciones y la columna codigo_calidad (int8)
+        """
+        try:
+            self.logger.info("Iniciando revisión de calidad de mediciones...")
+            
+            valores = df_medicion['concentracion'].to_numpy(dtype=np.float64)
+            ts = horas_desde_epoca(df_medicion['fecha'], df_medicion['hora'])
+            tipo_codes, tipo_uniques = pd.factorize(df_medicion['tipo_medicion'])
+            est_codes, _ = pd.factorize(df_medicion['estacion'])
+            
+            # 1. Rango físico por tipo de medición
+            limites = np.array(
+                [RANGOS_FISICOS.get(t, (0.0, np.inf)) for t in tipo_uniques], dtype=np.float64
+            ).reshape(-1, 2)
+            negativo = valores < 0
+            fuera_rango = ~negativo & (
+                (valores < limites[tipo_codes, 0]) | (valores > limites[tipo_codes, 1])
+            )
+            
+            # Solo los valores plausibles entran a las pruebas por estación
+            en_rango = ~np.isnan(valores) & ~negativo & ~fuera_rango
+            serie_codes = est_codes.astype(np.int64) * len(tipo_uniques) + tipo_codes
+            posiciones, grilla = self._grilla_horaria(serie_codes, ts, valores, en_rango)
+            
+            # 2. Sensor plano: corridas de horas consecutivas con el mismo valor
+            plano = en_rango & self._corridas_planas(grilla)[posiciones]
+            
+            # 3. Picos: desviación respecto a la mediana móvil en unidades de MAD
+            piso = np.array([PISO_MAD.get(t, 0.0) for t in tipo_uniques], dtype=np.float64)
+            mediana, mad = self._mediana_mad_movil(grilla)
+            mad_fila = np.fmax(mad[posiciones], piso[tipo_codes])
+            with np.errstate(invalid='ignore'):
+                pico = en_rango & (np.abs(valores - mediana[posiciones]) > UMBRAL_PICO_MAD * mad_fila)
+            
+            # Asignar en orden inverso para que prevalezca el código menor
+            codigo = np.full(len(valores), CALIDAD_VALIDA, dtype=np.int8)
+            codigo[pico] = CALIDAD_PICO
+            codigo[plano] = CALIDAD_SENSOR_PLANO
+            codigo[fuera_rango] = CALIDAD_FUERA_RANGO
+            codigo[negativo] = CALIDAD_NEGATIVA
+            
+            self.df_calidad = df_medicion.assign(codigo_calidad=codigo)
+            
+            conteo = np.bincount(codigo, minlength=len(CODIGOS_CALIDAD))
+            for cod, nombre in CODIGOS_CALIDAD.items():
+                if cod != CALIDAD_VALIDA:
+                    self.logger.info(f"{nombre}: {conteo[cod]:,} mediciones")
+            marcadas = len(codigo) - conteo[CALIDAD_VALIDA]
+            self.logger.success(f"Revisión de calidad completada: {marcadas:,} de {len(codigo):,} mediciones marcadas")
+            
+            return self.df_calidad
+        
+        except Exception as e:
+            self.logger.error(f"Error en revisión de calidad de mediciones: {str(e)}")
+            raise
+    
+    def _grilla_horaria(self, serie_codes, ts, valores, en_rango):
+        """
+        Ubica cada serie en una grilla horaria densa, separadas por VENTANA_PICOS horas vacías
+        
+        Returns:
+            Tupla (posición de cada medición en la grilla, grilla con los valores en rango)
+        """
+        n_series = int(serie_codes.max()) + 1 if len(serie_codes) else 0
+        ts_min = np.full(n_series, np.iinfo(np.int64).max, dtype=np.int64)
+        ts_max = np.full(n_series, np.iinfo(np.int64).min, dtype=np.int64)
+        np.minimum.at(ts_min, serie_codes, ts)
+        np.maximum.at(ts_max, serie_codes, ts)
+        
+        largo = np.where(ts_max >= ts_min, ts_max - ts_min + 1, 0) + VENTANA_PICOS
+        inicio = np.concatenate(([0], np.cumsum(largo)[:-1]))
+        
+        posiciones = inicio[serie_codes] + (ts - ts_min[serie_codes])
+        grilla = np.full(int(largo.sum()), np.nan, dtype=np.float64)
+        grilla[posiciones[en_rango]] = valores[en_rango]
+        return posiciones, grilla
+    
+    def _corridas_planas(self, grilla):
+        """Marca las celdas que pertenecen a corridas de al menos HORAS_SENSOR_PLANO valores iguales"""
+        igual_anterior = np.zeros(len(grilla), dtype=bool)
+        igual_anterior[1:] = grilla[1:] == grilla[:-1]  # NaN nunca es igual: corta la corrida
+        corrida = np.cumsum(~igual_anterior)
+        largo_corrida = np.bincount(corrida)
+        return largo_corrida[corrida] >= HORAS_SENSOR_PLANO
+    
+    def _mediana_mad_movil(self, grilla):
+        """
+        Mediana móvil centrada y MAD escalado sobre la grilla
+        
+        El MAD se aproxima como la mediana móvil de |x - mediana móvil| (filtro
+        de Hampel), lo que evita recalcular la mediana de cada ventana.
+        """
+        minimo = VENTANA_PICOS // 2
+        mediana = pd.Series(grilla).rolling(VENTANA_PICOS, center=True, min_periods=minimo).median()
+        desviacion = (pd.Series(grilla) - mediana).abs()
+        mad = desviacion.rolling(VENTANA_PICOS, center=True, min_periods=minimo).median() * FACTOR_MAD
+        return mediana.to_numpy(), mad.to_numpy()
+    
+    def get_dataframe(self):
+        """Retorna el DataFrame transformado"""
+        if self.df_calidad is None:
+            raise ValueError("No se ha revisado la calidad. Ejecuta transform() primero.")
+        return self.df_calidad
+
+# Función de conveniencia
+def transform_calidad_medicion(df_medicion):
+    """Asigna el código de calidad a las mediciones"""
+    transformer = CalidadMedicionTransformer()
+    return transformer.transform(df_medicion)
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing CalidadMedicionTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    
+    extractor = MasterExtractor()
+    data = extractor.extract_all()
+    
+    df = transform_calidad_medicion(transform_hecho_medicion_ambiental(data))
+    print(f"\nTotal registros: {len(df):,}")
+    print(df['codigo_calidad'].map(CODIGOS_CALIDAD).value_counts())
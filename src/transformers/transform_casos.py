@@ -0,0 +1,203 @@
+"""
+Transformador de la tabla intermedia de casos
+Une neumonía e IRA en menores de 5 años en una sola tabla normalizada y
+categórica de la que derivan DimPaciente, DimUbicacion y HechoHospitalizaciones
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.helpers import normalize_sexo
+from src.utils.gazetteer import gazetteer
+from src.utils.group_stats import combine_codes
+
+# Fuentes de casos individuales: (llave en extracted_data, TipoEnfermedad)
+FUENTES_CASOS = [('neumonia', 'Neumonía'), ('ira5anos', 'IRA')]
+
+# Columnas de la tabla de casos (todas categóricas salvo Anio)
+COLUMNAS_CASOS = [
+    'Anio', 'TipoEnfermedad', 'Sexo', 'Migrante', 'GrupoEtario', 'EnfoqueDiferencial',
+    'RegimenSeguridadSocial', 'Localidad', 'CodigoLocalidad'
+]
+
+# Valores por defecto de atributos vacíos
+GRUPO_ETARIO_DEFAULT = 'Menores de 5 años'
+REGIMEN_DEFAULT = 'Contributivo'
+SIN_INFORMACION = 'Sin Información'
+
+def _texto(valor):
+    """Texto sin espacios externos, o None si es nulo o vacío"""
+    if pd.isna(valor):
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+def _con_default(default):
+    """Normalizador que reemplaza nulos y vacíos por default"""
+    return lambda valor: _texto(valor) or default
+
+def normalizar_sexo(valor):
+    """Sexo normalizado (Femenino, Masculino o Sin Información)"""
+    return normalize_sexo(valor) or SIN_INFORMACION
+
+# Normalizador por columna (se aplica solo sobre los valores únicos)
+NORMALIZADORES = {
+    'Sexo': normalizar_sexo,
+    'Migrante': _con_default(SIN_INFORMACION),
+    'GrupoEtario': _con_default(GRUPO_ETARIO_DEFAULT),
+    'EnfoqueDiferencial': _con_default(SIN_INFORMACION),
+    'RegimenSeguridadSocial': _con_default(REGIMEN_DEFAULT),
+}
+
+def categorico_normalizado(valores, funcion):
+    """
+    Aplica funcion a los valores únicos y retorna un Categorical con el resultado
+    
+    Los valores se factorizan (incluyendo el nulo como un valor más), la
+    función se evalúa una vez por valor único y los códigos se reasignan a
+    las categorías normalizadas, que pueden fusionar varios valores crudos.
+    """
+    codes, uniques = pd.factorize(pd.Series(valores), use_na_sentinel=False)
+    normalizados = [funcion(v) for v in uniques]
+    nuevos, categorias = pd.factorize(pd.Series(normalizados))
+    return pd.Categorical.from_codes(nuevos[codes], categories=categorias)
+
+def localidad_categorica(localidades, codigos_fuente):
+    """
+    Localidad y CodigoLocalidad resueltos con el gazetteer
+    
+    El nombre se resuelve a su código canónico (el código de la fuente es el
+    respaldo); ambas columnas salen del código, así que variantes como
+    'Bogotá' / 'Sin Dato' / 'Localidad Desconocida' quedan en un solo miembro.
+    """
+    gaz = gazetteer()
+    codigos = gaz.resolve(pd.Series(localidades), respaldo=pd.Series(codigos_fuente)).to_numpy()
+    presentes = np.unique(codigos)
+    posicion = np.searchsorted(presentes, codigos)
+    localidad = pd.Categorical.from_codes(posicion, categories=pd.Index(gaz.etiquetas(presentes), dtype=object))
+    codigo = pd.Categorical.from_codes(posicion, categories=pd.Index([str(c) for c in presentes], dtype=object))
+    return localidad, codigo
+
+class CasosTransformer:
+    """
+    Transformador de la tabla de casos (una fila por caso individual)
+    
+    Los atributos se normalizan una sola vez sobre los valores únicos y se
+    guardan como categóricos: las dimensiones se obtienen deduplicando
+    códigos y los hechos reutilizan los mismos códigos, así que las tres
+    salidas comparten exactamente los mismos valores.
+    """
+    
+    def __init__(self):
+        self.logger = ETLLogger('CasosTransformer')
+        self.df_casos = None
+    
+    def transform(self, extracted_data):
+        """
+        Construye la tabla de casos a partir de neumonía e IRA en menores de 5 años
+        
+        Returns:
+            DataFrame con COLUMNAS_CASOS (atributos categóricos)
+        """
+        try:
+            self.logger.info("Construyendo tabla intermedia de casos...")
+            
+            fuentes = []
+            for llave, tipo in FUENTES_CASOS:
+                df = extracted_data.get(llave)
+                if df is None:
+                    continue
+                fuente = {
+                    'Anio': df['anio'].to_numpy(dtype=np.int64),
+                    'TipoEnfermedad': np.full(len(df), tipo, dtype=object),
+                    'Sexo': df['sexo'].to_numpy(dtype=object),
+                    'Migrante': df['migrante'].to_numpy(dtype=object),
+                    # Neumonía no trae grupo etario: se asume el valor por defecto
+                    'GrupoEtario': (df['grupo_etario'].to_numpy(dtype=object) if 'grupo_etario' in df.columns
+                                    else np.full(len(df), None, dtype=object)),
+                    'EnfoqueDiferencial': df['enfoque_diferencial'].to_numpy(dtype=object),
+                    'RegimenSeguridadSocial': df['regimen_seguridad'].to_numpy(dtype=object),
+                    'Localidad': df['localidad'].to_numpy(dtype=object),
+                    'CodigoLocalidad': df['codigo_localidad'].to_numpy(dtype=object),
+                }
+                fuentes.append(fuente)
+                self.logger.info(f"  {tipo}: {len(df):,} casos")
+            
+            if not fuentes:
+                raise ValueError("No se encontraron datos de casos (neumonia, ira5anos)")
+            
+            columnas = {}
+            columnas['Localidad'], columnas['CodigoLocalidad'] = localidad_categorica(
+                np.concatenate([f['Localidad'] for f in fuentes]),
+                np.concatenate([f['CodigoLocalidad'] for f in fuentes])
+            )
+            for col in COLUMNAS_CASOS:
+                if col in columnas:
+                    continue
+                valores = np.concatenate([f[col] for f in fuentes])
+                if col == 'Anio':
+                    columnas[col] = valores
+                elif col in NORMALIZADORES:
+                    columnas[col] = categorico_normalizado(valores, NORMALIZADORES[col])
+                else:
+                    columnas[col] = pd.Categorical(valores)
+            
+            self.df_casos = pd.DataFrame({col: columnas[col] for col in COLUMNAS_CASOS})
+            
+            memoria_mb = self.df_casos.memory_usage(deep=True).sum() / 1024 / 1024
+            self.logger.success(f"Tabla de casos construida: {len(self.df_casos):,} casos ({memoria_mb:.2f} MB)")
+            return self.df_casos
+        
+        except Exception as e:
+            self.logger.error(f"Error construyendo la tabla de casos: {str(e)}")
+            raise
+    
+    def get_dataframe(self):
+        """Retorna la tabla de casos"""
+        if self.df_casos is None:
+            raise ValueError("No se ha construido la tabla de casos. Ejecuta transform() primero.")
+        return self.df_casos
+
+def unicos_por_codigos(df, columnas):
+    """
+    Primera fila de cada combinación distinta de las columnas categóricas
+    
+    La deduplicación se hace sobre los códigos enteros (sin comparar texto);
+    se conserva el orden de primera aparición. Las columnas se retornan con
+    el tipo de sus categorías (texto), no como categóricas.
+    """
+    # +1 para que el código de nulo (-1) también sea una combinación válida
+    codigos = [df[col].cat.codes.to_numpy(dtype=np.int64) + 1 for col in columnas]
+    tamanos = [len(df[col].cat.categories) + 1 for col in columnas]
+    llave = combine_codes(codigos, tamanos)
+    _, primera = np.unique(llave, return_index=True)
+    unicos = df.iloc[np.sort(primera)][columnas].reset_index(drop=True)
+    return unicos.astype({col: unicos[col].cat.categories.dtype for col in columnas})
+
+def casos_desde(extracted_data, df_casos=None):
+    """Retorna df_casos o la construye desde extracted_data si no se recibió"""
+    if df_casos is not None:
+        return df_casos
+    return CasosTransformer().transform(extracted_data)
+
+# Función de conveniencia
+def transform_casos(extracted_data):
+    """Construye la tabla intermedia de casos"""
+    transformer = CasosTransformer()
+    return transformer.transform(extracted_data)
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing CasosTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    
+    master = MasterExtractor()
+    data = master.extract_all()
+    
+    df = transform_casos(data)
+    print(f"\nTotal casos: {len(df):,}")
+    print(df.dtypes)
+    print(df.head(10))
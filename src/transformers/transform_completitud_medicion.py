@@ -0,0 +1,237 @@
+"""
+Transformador para la completitud de las series horarias de mediciones
+Reindexa cada estación a una grilla horaria completa, calcula horas esperadas
+y válidas por día y, opcionalmente, interpola huecos cortos
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.air_quality import CALIDAD_VALIDA
+from src.utils.motor_dataframe import crear_motor
+from src.transformers.transform_exposicion_movil import horas_desde_epoca
+
+class CompletitudMedicionTransformer:
+    """
+    Transformador de completitud e interpolación de series (estación, tipo de medición)
+    
+    Cada serie se extiende a días completos entre su primera y su última
+    medición; todas las series se reindexan a la vez con un único MultiIndex
+    (serie, hora). Una hora es válida si tiene al menos una medición no nula
+    con código de calidad válido.
+    
+    Con interpolar=True los huecos cortos se llenan y completar() agrega esas
+    horas a las mediciones como filas válidas; la completitud siempre se
+    calcula sobre las horas observadas.
+    """
+    
+    def __init__(self, interpolar=False, max_horas_hueco=3, motor=None):
+        """
+        Args:
+            interpolar: Si True, llena por interpolación lineal los huecos cortos
+            max_horas_hueco: Máximo de horas consecutivas faltantes a interpolar
+            motor: Motor de DataFrame (por defecto pandas)
+        """
+        self.logger = ETLLogger('CompletitudMedicionTransformer')
+        self.motor = motor or crear_motor()
+        self.interpolar = interpolar
+        self.max_horas_hueco = max_horas_hueco
+        self.df_completitud = None
+        self.df_interpoladas = None
+    
+    def transform(self, df_medicion):
+        """
+        Calcula la completitud diaria por (fecha, localidad, indicador)
+        
+        Args:
+            df_medicion: DataFrame de HechoMedicionAmbiental (con codigo_calidad
+                si ya pasó por la revisión de calidad)
+        
+        Returns:
+            DataFrame con fecha, localidad, indicador, horas_esperadas y horas_validas
+        """
+        try:
+            self.logger.info("Iniciando cálculo de completitud de series horarias...")
+            
+            ts = horas_desde_epoca(df_medicion['fecha'], df_medicion['hora'])
+            valores = df_medicion['concentracion'].to_numpy(dtype=np.float64)
+            if 'codigo_calidad' in df_medicion.columns:
+                valores = np.where(df_medicion['codigo_calidad'].to_numpy() == CALIDAD_VALIDA, valores, np.nan)
+            
+            series = self.motor.sin_duplicados(df_medicion[['estacion', 'tipo_medicion']])
+            serie_codes = pd.MultiIndex.from_frame(series).get_indexer(
+                pd.MultiIndex.from_frame(df_medicion[['estacion', 'tipo_medicion']])
+            )
+            primera = self._primera_fila_serie(serie_codes, len(series))
+            atributos = df_medicion[['localidad', 'indicador']].iloc[primera].reset_index(drop=True)
+            
+            serie_grilla, ts_grilla, valores_grilla = self._reindexar(serie_codes, ts, valores)
+            observadas = ~np.isnan(valores_grilla)
+            
+            self.logger.info(
+                f"Grilla horaria: {len(ts_grilla):,} horas esperadas en {len(series)} series, "
+                f"{int(observadas.sum()):,} válidas ({100 * observadas.mean():.1f}%)"
+            )
+            
+            # Horas esperadas y válidas por (día, localidad, indicador); localidad e
+            # indicador van como categóricas de categorías ordenadas (el mismo orden
+            # que el texto) para no expandir texto por cada hora de la grilla
+            dia = ts_grilla // 24
+            self.df_completitud = self.motor.agrupar(
+                pd.DataFrame({
+                    'dia': dia,
+                    'localidad': self._categorica_por_serie(atributos['localidad'], serie_grilla),
+                    'indicador': self._categorica_por_serie(atributos['indicador'], serie_grilla),
+                    'horas_validas': observadas.astype(np.int64),
+                }),
+                ['dia', 'localidad', 'indicador'],
+                {'horas_esperadas': ('horas_validas', 'size'), 'horas_validas': ('horas_validas', 'sum')}
+            )
+            self.df_completitud = self.df_completitud.astype({
+                col: self.df_completitud[col].cat.categories.dtype for col in ('localidad', 'indicador')
+            })
+            self.df_completitud.insert(
+                0, 'fecha', pd.to_datetime(self.df_completitud.pop('dia').to_numpy().astype('datetime64[D]'))
+            )
+            
+            if self.interpolar:
+                valores_grilla, interpolado = self._interpolar_huecos(serie_grilla, ts_grilla, valores_grilla)
+                self.logger.info(
+                    f"Interpolación lineal (huecos de hasta {self.max_horas_hueco} horas): "
+                    f"{int(interpolado.sum()):,} horas llenadas"
+                )
+                self.df_interpoladas = self._filas_interpoladas(
+                    df_medicion, primera[serie_grilla[interpolado]], ts_grilla[interpolado], valores_grilla[interpolado]
+                )
+            
+            self.logger.success(f"Completitud calculada: {len(self.df_completitud):,} registros (fecha, localidad, indicador)")
+            return self.df_completitud
+        
+        except Exception as e:
+            self.logger.error(f"Error en cálculo de completitud: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _categorica_por_serie(valores_serie, serie_grilla):
+        """Categórica por celda de la grilla a partir del valor de cada serie"""
+        codes, categorias = pd.factorize(valores_serie, sort=True)
+        return pd.Categorical.from_codes(codes[serie_grilla], categories=pd.Index(categorias))
+    
+    @staticmethod
+    def _primera_fila_serie(serie_codes, n_series):
+        """Posición de la primera medición de cada serie"""
+        primera = np.full(n_series, len(serie_codes), dtype=np.int64)
+        np.minimum.at(primera, serie_codes, np.arange(len(serie_codes)))
+        return primera
+    
+    @staticmethod
+    def _filas_interpoladas(df_medicion, filas_serie, ts, valores):
+        """
+        Horas interpoladas con las columnas de df_medicion
+        
+        Los atributos de la serie se copian de su primera medición; fecha,
+        hora y concentración son los de la hora llenada y la fila es válida.
+        """
+        df = df_medicion.iloc[filas_serie].reset_index(drop=True)
+        fechas = pd.DatetimeIndex((ts // 24).astype('datetime64[D]'))
+        df['fecha'] = fechas.date if df_medicion['fecha'].dtype == object else fechas
+        df['hora'] = (ts % 24).astype(df_medicion['hora'].dtype)
+        df['concentracion'] = valores.astype(df_medicion['concentracion'].dtype)
+        if 'codigo_calidad' in df.columns:
+            df['codigo_calidad'] = np.full(len(df), CALIDAD_VALIDA, dtype=df_medicion['codigo_calidad'].dtype)
+        return df
+    
+    def _reindexar(self, serie_codes, ts, valores):
+        """
+        Reindexa todas las series a su grilla horaria de días completos con un solo MultiIndex
+        
+        Returns:
+            Tupla (serie, hora desde época y valor de cada celda de la grilla)
+        """
+        # Una medición por (serie, hora): se prefiere la válida sobre la nula
+        orden = np.lexsort((np.isnan(valores), ts, serie_codes))
+        serie_ord, ts_ord = serie_codes[orden], ts[orden]
+        primera = np.r_[True, (serie_ord[1:] != serie_ord[:-1]) | (ts_ord[1:] != ts_ord[:-1])]
+        observado = pd.Series(
+            valores[orden][primera],
+            index=pd.MultiIndex.from_arrays([serie_ord[primera], ts_ord[primera]])
+        )
+        
+        # Rango de días completos por serie (los datos ya están ordenados por serie y hora)
+        cortes = np.flatnonzero(np.r_[True, serie_ord[primera][1:] != serie_ord[primera][:-1]])
+        series = serie_ord[primera][cortes]
+        inicio = (ts_ord[primera][cortes] // 24) * 24
+        fin = (ts_ord[primera][np.r_[cortes[1:], primera.sum()] - 1] // 24) * 24 + 24
+        largo = fin - inicio
+        
+        serie_grilla = np.repeat(series, largo)
+        desplazamiento = np.arange(largo.sum()) - np.repeat(np.cumsum(largo) - largo, largo)
+        ts_grilla = np.repeat(inicio, largo) + desplazamiento
+        
+        grilla = observado.reindex(pd.MultiIndex.from_arrays([serie_grilla, ts_grilla]))
+        return serie_grilla, ts_grilla, grilla.to_numpy(dtype=np.float64)
+    
+    def _interpolar_huecos(self, serie_grilla, ts_grilla, valores_grilla):
+        """
+        Interpolación lineal vectorizada de huecos de hasta max_horas_hueco horas
+        
+        Para cada hora faltante se ubica la última y la siguiente hora válida
+        con acumulados de índices; solo se llena si ambas pertenecen a la
+        misma serie y el hueco completo no supera el máximo.
+        """
+        n = len(valores_grilla)
+        validos = ~np.isnan(valores_grilla)
+        idx = np.arange(n)
+        
+        anterior = np.maximum.accumulate(np.where(validos, idx, -1))
+        siguiente = np.minimum.accumulate(np.where(validos, idx, n)[::-1])[::-1]
+        
+        hueco = ~validos & (anterior >= 0) & (siguiente < n)
+        ant = np.where(hueco, anterior, 0)
+        sig = np.where(hueco, siguiente, 0)
+        hueco &= (serie_grilla[ant] == serie_grilla[sig]) & (sig - ant - 1 <= self.max_horas_hueco)
+        
+        peso = (ts_grilla[hueco] - ts_grilla[ant[hueco]]) / (ts_grilla[sig[hueco]] - ts_grilla[ant[hueco]])
+        resultado = valores_grilla.copy()
+        resultado[hueco] = valores_grilla[ant[hueco]] + (valores_grilla[sig[hueco]] - valores_grilla[ant[hueco]]) * peso
+        return resultado, hueco
+    
+    def get_dataframe(self):
+        """Retorna la completitud diaria"""
+        if self.df_completitud is None:
+            raise ValueError("No se ha calculado la completitud. Ejecuta transform() primero.")
+        return self.df_completitud
+    
+    def completar(self, df_medicion):
+        """
+        Mediciones con las horas interpoladas agregadas como filas válidas
+        
+        Sin interpolación (o sin huecos llenados) retorna df_medicion sin copiar.
+        """
+        if self.df_interpoladas is None or self.df_interpoladas.empty:
+            return df_medicion
+        return pd.concat([df_medicion, self.df_interpoladas], ignore_index=True)
+
+# Función de conveniencia
+def transform_completitud_medicion(df_medicion, interpolar=False, max_horas_hueco=3, motor=None):
+    """Calcula la completitud diaria de las series horarias"""
+    transformer = CompletitudMedicionTransformer(interpolar, max_horas_hueco, motor)
+    return transformer.transform(df_medicion)
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing CompletitudMedicionTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    
+    extractor = MasterExtractor()
+    data = extractor.extract_all()
+    
+    transformer = CompletitudMedicionTransformer(interpolar=True)
+    df = transformer.transform(transform_hecho_medicion_ambiental(data))
+    print(f"\nTotal registros: {len(df):,}")
+    print(df.head(10))
+    print(f"Horas interpoladas: {len(transformer.df_interpoladas):,}")
@@ -0,0 +1,190 @@
+"""
+Transformador para HechoMedicionCuantilMensual
+Percentiles aproximados de concentración por estación y mes con sketches
+fusionables que se actualizan bloque por bloque y persisten entre ejecuciones
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.air_quality import CALIDAD_VALIDA
+from src.utils.state_store import StateStore
+from src.utils.sketch_cuantiles import (
+    ALFA_DEFAULT, construir_sketch, fusionar_sketches, cuantiles_sketch
+)
+
+# Grupo de cada sketch (la localidad depende de la estación; se guarda para los lookups)
+LLAVES_SKETCH = ['estacion', 'localidad', 'indicador', 'anio', 'mes']
+
+# Cuantiles reportados
+CUANTILES = (0.5, 0.95, 0.99)
+
+class CuantilesMedicionTransformer:
+    """
+    Transformador de percentiles por (estación, indicador, mes) con sketches de cubetas logarítmicas
+    
+    Las mediciones válidas se agregan a los sketches por bloques de hasta
+    max_filas registros sobre el hecho ya materializado: los extractores
+    entregan cada fuente completa, por lo que el bloqueo acota la memoria de
+    construcción de los sketches, no la del hecho. actualizar() no depende
+    del origen del bloque y puede alimentarse con un extractor por bloques
+    cuando exista. Los percentiles tienen error relativo de a lo sumo alfa
+    respecto al cuantil exacto (ver src/utils/sketch_cuantiles.py).
+    
+    En modo incremental los sketches se persisten por grupo. En la siguiente
+    ejecución los meses anteriores al último mes persistido se consideran
+    cerrados (sus mediciones no se vuelven a leer) y cada grupo presente en
+    los datos desde ese mes reemplaza a su sketch persistido. Los sketches
+    se guardan con guardar_estado() después de una carga exitosa.
+    """
+    
+    def __init__(self, alfa=ALFA_DEFAULT, incremental=False, state_dir='state', max_filas=1_000_000):
+        """
+        Args:
+            alfa: Error relativo máximo de los percentiles
+            incremental: Si True, persiste los sketches y solo reconstruye los
+                meses desde el último mes persistido
+            state_dir: Directorio donde se guarda el estado entre ejecuciones
+            max_filas: Máximo de registros por bloque de actualización
+        """
+        self.logger = ETLLogger('CuantilesMedicionTransformer')
+        self.alfa = alfa
+        self.incremental = incremental
+        self.max_filas = max_filas
+        self.state_store = StateStore('sketch_cuantiles_medicion', state_dir)
+        self.corte = None
+        self.sketch = None
+        self.df_cuantiles = None
+        self.estado_pendiente = None
+    
+    def transform(self, df_medicion):
+        """
+        Calcula los percentiles mensuales por estación e indicador
+        
+        Args:
+            df_medicion: DataFrame de HechoMedicionAmbiental (con codigo_calidad
+                si ya pasó por la revisión de calidad)
+        
+        Returns:
+            DataFrame con estacion, localidad, indicador, anio, mes,
+            num_mediciones, p50, p95, p99 y error_relativo
+        """
+        try:
+            self.logger.info(f"Iniciando percentiles mensuales (error relativo {self.alfa:.1%})...")
+            
+            sketch_previo = self._leer_estado() if self.incremental else None
+            if sketch_previo is not None:
+                self.corte = max(zip(sketch_previo['anio'], sketch_previo['mes']))
+                self.logger.info(f"Sketches previos: meses cerrados antes de {self.corte[0]}-{self.corte[1]:02d}")
+            
+            self.sketch = None
+            for inicio in range(0, len(df_medicion), self.max_filas):
+                self.actualizar(df_medicion.iloc[inicio:inicio + self.max_filas])
+            
+            if sketch_previo is not None:
+                self.sketch = self._combinar_con_previo(sketch_previo, self.sketch)
+            
+            if self.incremental:
+                self.estado_pendiente = self.sketch.assign(alfa=self.alfa)
+            
+            self.df_cuantiles = cuantiles_sketch(self.sketch, LLAVES_SKETCH, CUANTILES, self.alfa).rename(
+                columns={'num_valores': 'num_mediciones'}
+            )
+            self.df_cuantiles['error_relativo'] = self.alfa
+            
+            self.logger.success(
+                f"HechoMedicionCuantilMensual transformado: {len(self.df_cuantiles):,} registros "
+                f"(estación, indicador, mes) desde {len(self.sketch):,} cubetas"
+            )
+            return self.df_cuantiles
+        
+        except Exception as e:
+            self.logger.error(f"Error en percentiles mensuales: {str(e)}")
+            raise
+    
+    def guardar_estado(self):
+        """Persiste los sketches de la última transformación (llamar tras cargar)"""
+        if self.estado_pendiente is None:
+            return
+        self.state_store.write(self.estado_pendiente)
+        self.logger.info(f"Sketches guardados: {len(self.estado_pendiente):,} cubetas")
+        self.estado_pendiente = None
+    
+    def actualizar(self, df_bloque):
+        """
+        Agrega un bloque de mediciones a los sketches
+        
+        Solo cuentan las mediciones válidas; en modo incremental se omiten las
+        de meses cerrados (anteriores al último mes persistido).
+        """
+        codes, uniques = pd.factorize(df_bloque['fecha'])
+        fechas = pd.DatetimeIndex(pd.to_datetime(uniques))
+        anio = np.asarray(fechas.year, dtype=np.int64)[codes]
+        mes = np.asarray(fechas.month, dtype=np.int64)[codes]
+        
+        filas = codes >= 0
+        if 'codigo_calidad' in df_bloque.columns:
+            filas &= df_bloque['codigo_calidad'].to_numpy() == CALIDAD_VALIDA
+        if self.corte is not None:
+            filas &= anio * 12 + mes >= self.corte[0] * 12 + self.corte[1]
+        
+        bloque = df_bloque.loc[filas, ['estacion', 'localidad', 'indicador', 'concentracion']].assign(
+            anio=anio[filas], mes=mes[filas]
+        )
+        nuevo = construir_sketch(bloque, LLAVES_SKETCH, 'concentracion', self.alfa)
+        self.sketch = fusionar_sketches([self.sketch, nuevo], LLAVES_SKETCH)
+        return self.sketch
+    
+    def _leer_estado(self):
+        """Lee los sketches persistidos; si son de otro alfa o formato se ignoran"""
+        sketch_previo = self.state_store.read()
+        if sketch_previo is None or sketch_previo.empty:
+            return None
+        
+        faltantes = set(LLAVES_SKETCH + ['cubeta', 'conteo', 'alfa']) - set(sketch_previo.columns)
+        if faltantes:
+            self.logger.warning(f"Sketches previos sin columnas {sorted(faltantes)}: se recalcula todo el historial")
+            return None
+        if not np.isclose(sketch_previo['alfa'], self.alfa).all():
+            self.logger.warning("Sketches previos con otro error relativo: se recalcula todo el historial")
+            return None
+        return sketch_previo.drop(columns=['alfa'])
+    
+    def _combinar_con_previo(self, sketch_previo, sketch_nuevo):
+        """Sketches persistidos de los grupos sin datos nuevos más los sketches reconstruidos"""
+        grupos_nuevos = sketch_nuevo[LLAVES_SKETCH].drop_duplicates()
+        previo = sketch_previo.merge(grupos_nuevos, on=LLAVES_SKETCH, how='left', indicator=True)
+        conservados = previo[previo['_merge'] == 'left_only'].drop(columns=['_merge'])
+        self.logger.info(
+            f"Grupos reconstruidos: {len(grupos_nuevos):,}; "
+            f"grupos persistidos conservados: {len(conservados[LLAVES_SKETCH].drop_duplicates()):,}"
+        )
+        return fusionar_sketches([conservados, sketch_nuevo], LLAVES_SKETCH)
+    
+    def get_dataframe(self):
+        """Retorna los percentiles mensuales"""
+        if self.df_cuantiles is None:
+            raise ValueError("No se han calculado los percentiles. Ejecuta transform() primero.")
+        return self.df_cuantiles
+
+# Función de conveniencia
+def transform_cuantiles_medicion(df_medicion, alfa=ALFA_DEFAULT):
+    """Calcula los percentiles mensuales por estación e indicador"""
+    transformer = CuantilesMedicionTransformer(alfa)
+    return transformer.transform(df_medicion)
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing CuantilesMedicionTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    
+    extractor = MasterExtractor()
+    data = extractor.extract_all()
+    
+    df = transform_cuantiles_medicion(transform_hecho_medicion_ambiental(data))
+    print(f"\nTotal registros: {len(df):,}")
+    print(df.head(10))
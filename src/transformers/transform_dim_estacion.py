@@ -1,6 +1,6 @@
 """
 Transformador para DimEstacion
-Genera estaciones de monitoreo únicas
+Genera estaciones de monitoreo únicas con su localidad
 """
 import pandas as pd
 import sys
@@ -8,6 +8,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.logger import ETLLogger
+from src.utils.gazetteer import gazetteer, normalizar_estaciones, CODIGO_SIN_INFORMACION
 
 class DimEstacionTransformer:
     """Transformador para la dimensión de estaciones de monitoreo"""
@@ -20,6 +21,9 @@ class DimEstacionTransformer:
         """
         Transforma los datos extraídos en la dimensión estación
         Extrae estaciones únicas de las mediciones ambientales
+        
+        Los nombres se normalizan igual que en HechoMedicionAmbiental para que
+        el lookup de IDEstacion sea exacto; la localidad sale del gazetteer.
         """
         try:
             self.logger.info("Iniciando transformación de DimEstacion...")
@@ -30,26 +34,32 @@ class DimEstacionTransformer:
             # Extraer de SISAIRE-CO
             if 'sisaire_co' in extracted_data and extracted_data['sisaire_co'] is not None:
                 df_co = extracted_data['sisaire_co']
-                estaciones.extend(df_co['Estacion'].unique().tolist())
+                estaciones.extend(normalizar_estaciones(df_co['Estacion']).unique().tolist())
             
             # Extraer de IBOCA-PM25
             if 'iboca_pm25' in extracted_data and extracted_data['iboca_pm25'] is not None:
                 df_pm25 = extracted_data['iboca_pm25']
-                estaciones.extend(df_pm25['Estacion'].unique().tolist())
+                estaciones.extend(normalizar_estaciones(df_pm25['Estacion']).unique().tolist())
             
             if not estaciones:
                 raise ValueError("No se encontraron estaciones en los datos")
             
             # Crear DataFrame con estaciones únicas
             estaciones_unicas = sorted(set(estaciones))
+            gaz = gazetteer()
+            codigos = gaz.resolver_estaciones(pd.Series(estaciones_unicas)).to_numpy()
             
             self.df_dim_estacion = pd.DataFrame({
                 'NombreEstacion': estaciones_unicas,
                 'TipoEstacion': 'Calidad del Aire',
-                'Ubicacion': 'Bogotá, Colombia'
+                'Ubicacion': 'Bogotá, Colombia',
+                'Localidad': gaz.etiquetas(codigos)
             })
             
+            sin_localidad = (codigos == CODIGO_SIN_INFORMACION).sum()
             self.logger.success(f"DimEstacion transformada: {len(self.df_dim_estacion)} estaciones únicas")
+            if sin_localidad > 0:
+                self.logger.warning(f"{sin_localidad} estaciones sin localidad en el catálogo")
             return self.df_dim_estacion
             
         except Exception as e:
@@ -10,12 +10,18 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.logger import ETLLogger
 from src.utils.helpers import get_nombre_mes, get_trimestre, get_bimestre
+from src.utils.claves import id_fecha
 
 class DimFechaTransformer:
     """Transformador para la dimensión de fechas"""
     
-    def __init__(self):
+    def __init__(self, claves_inteligentes=False):
+        """
+        Args:
+            claves_inteligentes: Si True, genera IDFecha = yyyymmdd
+        """
         self.logger = ETLLogger('DimFechaTransformer')
+        self.claves_inteligentes = claves_inteligentes
         self.df_dim_fecha = None
     
     def transform(self, extracted_data):
@@ -60,6 +66,9 @@ class DimFechaTransformer:
             self.df_dim_fecha['Trimestre'] = self.df_dim_fecha['Mes'].apply(get_trimestre)
             self.df_dim_fecha['Bimestre'] = self.df_dim_fecha['Mes'].apply(get_bimestre)
             
+            if self.claves_inteligentes:
+                self.df_dim_fecha.insert(0, 'IDFecha', id_fecha(self.df_dim_fecha['Fecha']).astype(int))
+            
             self.logger.success(f"DimFecha transformada: {len(self.df_dim_fecha)} fechas generadas")
             return self.df_dim_fecha
             
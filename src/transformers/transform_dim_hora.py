@@ -8,12 +8,18 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.logger import ETLLogger
+from src.utils.claves import id_hora
 
 class DimHoraTransformer:
     """Transformador para la dimensión de hora"""
     
-    def __init__(self):
+    def __init__(self, claves_inteligentes=False):
+        """
+        Args:
+            claves_inteligentes: Si True, genera IDHora = hora (0-23)
+        """
         self.logger = ETLLogger('DimHoraTransformer')
+        self.claves_inteligentes = claves_inteligentes
         self.df_dim_hora = None
     
     def transform(self, extracted_data=None):
@@ -54,6 +60,9 @@ class DimHoraTransformer:
             # Formato de hora para visualización (HH:00)
             self.df_dim_hora['HoraFormato'] = self.df_dim_hora['Hora'].apply(lambda h: f"{h:02d}:00")
             
+            if self.claves_inteligentes:
+                self.df_dim_hora.insert(0, 'IDHora', id_hora(self.df_dim_hora['Hora']).astype(int))
+            
             self.logger.success(f"DimHora transformada: {len(self.df_dim_hora)} horas generadas")
             return self.df_dim_hora
             
@@ -8,7 +8,8 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.logger import ETLLogger
-from src.utils.helpers import normalize_sexo
+from src.utils.helpers import canonicalizar_atributos, hash_filas, COLUMNAS_PACIENTE
+from src.transformers.transform_casos import casos_desde, unicos_por_codigos
 
 class DimPacienteTransformer:
     """Transformador para la dimensión de pacientes"""
@@ -17,69 +18,36 @@ class DimPacienteTransformer:
         self.logger = ETLLogger('DimPacienteTransformer')
         self.df_dim_paciente = None
     
-    def transform(self, extracted_data):
+    def transform(self, extracted_data, df_casos=None):
         """
         Transforma los datos extraídos en la dimensión paciente
         Extrae combinaciones únicas de características de pacientes
+        
+        Args:
+            extracted_data: Datos extraídos (se usan si no se recibe df_casos)
+            df_casos: Tabla intermedia de casos de CasosTransformer (opcional)
         """
         try:
             self.logger.info("Iniciando transformación de DimPaciente...")
             
-            # Lista para almacenar DataFrames de pacientes
-            pacientes_list = []
+            # Combinaciones únicas sobre los códigos de la tabla de casos
+            # (sexo, grupo etario y régimen ya vienen normalizados)
+            df_casos = casos_desde(extracted_data, df_casos)
+            df_all_pacientes = unicos_por_codigos(df_casos, COLUMNAS_PACIENTE)
             
-            # Extraer de neumonía
-            if 'neumonia' in extracted_data and extracted_data['neumonia'] is not None:
-                df_neumonia = extracted_data['neumonia'].copy()
-                df_pacientes = df_neumonia[[
-                    'sexo', 'migrante', 'enfoque_diferencial', 
-                    'regimen_seguridad'
-                ]].copy()
-                df_pacientes['grupo_etario'] = 'Menores de 5 años'  # Asumido si no está especificado
-                pacientes_list.append(df_pacientes)
+            # Miembro desconocido: hechos sin atributos de paciente (nulos) se
+            # canonicalizan a 'Sin Información' y deben encontrar su llave
+            desconocido = pd.DataFrame([{col: 'Sin Información' for col in COLUMNAS_PACIENTE}])
+            df_all_pacientes = pd.concat([df_all_pacientes, desconocido], ignore_index=True)
             
-            # Extraer de IRA 5 años
-            if 'ira5anos' in extracted_data and extracted_data['ira5anos'] is not None:
-                df_ira5 = extracted_data['ira5anos'].copy()
-                df_pacientes = df_ira5[[
-                    'sexo', 'migrante', 'enfoque_diferencial', 
-                    'regimen_seguridad', 'grupo_etario'
-                ]].copy()
-                pacientes_list.append(df_pacientes)
-            
-            if not pacientes_list:
-                raise ValueError("No se encontraron datos de pacientes")
-            
-            # Combinar todos los pacientes
-            df_all_pacientes = pd.concat(pacientes_list, ignore_index=True)
-            
-            # Normalizar sexo
-            df_all_pacientes['sexo'] = df_all_pacientes['sexo'].apply(normalize_sexo)
-            
-            # Asignar valores por defecto
-            # Si grupo_etario está vacío o es NaN, asignar 'Menores de 5 años'
-            df_all_pacientes['grupo_etario'] = df_all_pacientes['grupo_etario'].fillna('Menores de 5 años')
-            df_all_pacientes.loc[df_all_pacientes['grupo_etario'].str.strip() == '', 'grupo_etario'] = 'Menores de 5 años'
-            
-            # Si regimen_seguridad está vacío o es NaN, asignar 'Contributivo'
-            df_all_pacientes['regimen_seguridad'] = df_all_pacientes['regimen_seguridad'].fillna('Contributivo')
-            df_all_pacientes.loc[df_all_pacientes['regimen_seguridad'].str.strip() == '', 'regimen_seguridad'] = 'Contributivo'
-            
-            # Obtener combinaciones únicas
-            self.df_dim_paciente = df_all_pacientes.drop_duplicates(
-                subset=['sexo', 'migrante', 'grupo_etario', 
-                       'enfoque_diferencial', 'regimen_seguridad']
+            # Canonicalizar atributos (nulos y vacíos -> 'Sin Información') y
+            # obtener combinaciones únicas por su hash de fila
+            self.df_dim_paciente = canonicalizar_atributos(df_all_pacientes, COLUMNAS_PACIENTE)
+            self.df_dim_paciente['HashPaciente'] = hash_filas(self.df_dim_paciente, COLUMNAS_PACIENTE)
+            self.df_dim_paciente = self.df_dim_paciente.drop_duplicates(
+                subset=['HashPaciente']
             ).reset_index(drop=True)
             
-            # Renombrar columnas para que coincidan con la BD (sin Ciudad, Estrato, SourceFile, CreatedAt)
-            self.df_dim_paciente.rename(columns={
-                'sexo': 'Sexo',
-                'grupo_etario': 'GrupoEtario',
-                'migrante': 'Migrante',
-                'enfoque_diferencial': 'EnfoqueDiferencial',
-                'regimen_seguridad': 'RegimenSeguridadSocial'
-            }, inplace=True)
-            
             self.logger.success(f"DimPaciente transformada: {len(self.df_dim_paciente)} combinaciones únicas")
             return self.df_dim_paciente
             
@@ -94,10 +62,10 @@ class DimPacienteTransformer:
         return self.df_dim_paciente
 
 # Función de conveniencia
-def transform_dim_paciente(extracted_data):
+def transform_dim_paciente(extracted_data, df_casos=None):
     """Transforma la dimensión paciente"""
     transformer = DimPacienteTransformer()
-    return transformer.transform(extracted_data)
+    return transformer.transform(extracted_data, df_casos)
 
 if __name__ == "__main__":
     # Test del transformador
@@ -8,7 +8,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.logger import ETLLogger
-from src.utils.helpers import normalize_localidad
+from src.transformers.transform_casos import casos_desde, unicos_por_codigos
 
 class DimUbicacionTransformer:
     """Transformador para la dimensión de ubicación"""
@@ -17,68 +17,25 @@ class DimUbicacionTransformer:
         self.logger = ETLLogger('DimUbicacionTransformer')
         self.df_dim_ubicacion = None
     
-    def transform(self, extracted_data):
+    def transform(self, extracted_data, df_casos=None):
         """
         Transforma los datos extraídos en la dimensión ubicación
         Extrae localidades únicas
+        
+        Args:
+            extracted_data: Datos extraídos (se usan si no se recibe df_casos)
+            df_casos: Tabla intermedia de casos de CasosTransformer (opcional)
         """
         try:
             self.logger.info("Iniciando transformación de DimUbicacion...")
             
-            # Lista para almacenar DataFrames de ubicaciones
-            ubicaciones_list = []
+            # La localidad ya viene resuelta con el gazetteer en la tabla de casos
+            # (un miembro por código de localidad, con el sufijo ", Bogota,
+            # Colombia" para geolocalización)
+            df_casos = casos_desde(extracted_data, df_casos)
             
-            # Extraer de neumonía
-            if 'neumonia' in extracted_data and extracted_data['neumonia'] is not None:
-                df_neumonia = extracted_data['neumonia'].copy()
-                df_ubicaciones = df_neumonia[[
-                    'localidad', 'codigo_localidad'
-                ]].copy()
-                ubicaciones_list.append(df_ubicaciones)
-            
-            # Extraer de IRA 5 años
-            if 'ira5anos' in extracted_data and extracted_data['ira5anos'] is not None:
-                df_ira5 = extracted_data['ira5anos'].copy()
-                df_ubicaciones = df_ira5[[
-                    'localidad', 'codigo_localidad'
-                ]].copy()
-                ubicaciones_list.append(df_ubicaciones)
-            
-            if not ubicaciones_list:
-                raise ValueError("No se encontraron datos de ubicación")
-            
-            # Combinar todas las ubicaciones
-            df_all_ubicaciones = pd.concat(ubicaciones_list, ignore_index=True)
-            
-            # Normalizar localidad
-            df_all_ubicaciones['localidad'] = df_all_ubicaciones['localidad'].apply(normalize_localidad)
-            
-            # Consolidar registros que solo dicen "Bogota" o sin información como "BogotaSinLocalidad"
-            df_all_ubicaciones.loc[
-                (df_all_ubicaciones['localidad'].str.strip().str.upper() == 'BOGOTA') | 
-                (df_all_ubicaciones['localidad'].isna()) | 
-                (df_all_ubicaciones['localidad'].str.strip() == ''),
-                'localidad'
-            ] = 'BogotaSinLocalidad'
-            
-            # Agregar "Bogota,Colombia" al final de la localidad para geolocalización
-            df_all_ubicaciones['localidad'] = df_all_ubicaciones['localidad'] + ', Bogota, Colombia'
-            
-            # Obtener combinaciones únicas
-            self.df_dim_ubicacion = df_all_ubicaciones.drop_duplicates(
-                subset=['localidad', 'codigo_localidad']
-            ).reset_index(drop=True)
-            
-            # Renombrar columnas (sin Barrio, Tipo, SourceFile, CreatedAt)
-            self.df_dim_ubicacion.rename(columns={
-                'localidad': 'Localidad',
-                'codigo_localidad': 'CodigoLocalidad'
-            }, inplace=True)
-            
-            # Reordenar columnas
-            self.df_dim_ubicacion = self.df_dim_ubicacion[[
-                'Localidad', 'CodigoLocalidad'
-            ]]
+            # Combinaciones únicas sobre los códigos (sin Barrio, Tipo, SourceFile, CreatedAt)
+            self.df_dim_ubicacion = unicos_por_codigos(df_casos, ['Localidad', 'CodigoLocalidad'])
             
             self.logger.success(f"DimUbicacion transformada: {len(self.df_dim_ubicacion)} ubicaciones únicas")
             return self.df_dim_ubicacion
@@ -94,10 +51,10 @@ class DimUbicacionTransformer:
         return self.df_dim_ubicacion
 
 # Función de conveniencia
-def transform_dim_ubicacion(extracted_data):
+def transform_dim_ubicacion(extracted_data, df_casos=None):
     """Transforma la dimensión ubicación"""
     transformer = DimUbicacionTransformer()
-    return transformer.transform(extracted_data)
+    return transformer.transform(extracted_data, df_casos)
 
 if __name__ == "__main__":
     # Test del transformador
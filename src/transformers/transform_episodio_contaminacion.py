@@ -0,0 +1,149 @@
+"""
+Transformador para HechoEpisodioContaminacion
+Detecta episodios de contaminación (horas consecutivas de una estación sobre
+el umbral de alerta) con codificación por corridas sobre arreglos ordenados
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.air_quality import UMBRALES_EPISODIO, CALIDAD_VALIDA
+from src.transformers.transform_exposicion_movil import horas_desde_epoca
+
+class EpisodioContaminacionTransformer:
+    """
+    Transformador de episodios de contaminación por estación e indicador
+    
+    Un episodio es una corrida de horas consecutivas de la misma serie
+    (estación, tipo de medición) con una medición válida sobre el umbral.
+    Una hora faltante, una medición marcada por la revisión de calidad o una
+    medición bajo el umbral terminan el episodio. Las corridas se encuentran
+    sin ciclos: se ordenan las horas sobre el umbral por (serie, hora) y cada
+    episodio empieza donde cambia la serie o el salto entre horas es mayor
+    que uno (diff); pico y promedio se reducen por tramo con reduceat.
+    """
+    
+    def __init__(self, umbrales=None, min_horas=1):
+        """
+        Args:
+            umbrales: Umbral horario por tipo de medición (por defecto
+                UMBRALES_EPISODIO, inicio de la categoría IBOCA 'Regular')
+            min_horas: Duración mínima (horas) para reportar un episodio
+        """
+        self.logger = ETLLogger('EpisodioContaminacionTransformer')
+        self.umbrales = umbrales or UMBRALES_EPISODIO
+        self.min_horas = min_horas
+        self.df_episodios = None
+    
+    def transform(self, df_medicion):
+        """
+        Calcula los episodios de contaminación
+        
+        Args:
+            df_medicion: DataFrame de HechoMedicionAmbiental (con codigo_calidad
+                si ya pasó por la revisión de calidad)
+        
+        Returns:
+            DataFrame con estacion, tipo_medicion, indicador, localidad,
+            codigo_localidad, fecha/hora de inicio y fin, duracion_horas,
+            concentracion_max, concentracion_avg y umbral de cada episodio
+        """
+        try:
+            self.logger.info("Iniciando detección de episodios de contaminación...")
+            
+            ts = horas_desde_epoca(df_medicion['fecha'], df_medicion['hora'])
+            valores = df_medicion['concentracion'].to_numpy(dtype=np.float64)
+            tipo_codes, tipo_uniques = pd.factorize(df_medicion['tipo_medicion'])
+            umbral_tipo = np.array([self.umbrales.get(t, np.inf) for t in tipo_uniques], dtype=np.float64)
+            umbral = np.append(umbral_tipo, np.inf)[tipo_codes]
+            
+            # Horas válidas sobre el umbral (NaN > umbral es False)
+            sobre = valores > umbral
+            if 'codigo_calidad' in df_medicion.columns:
+                sobre &= df_medicion['codigo_calidad'].to_numpy() == CALIDAD_VALIDA
+            
+            est_codes, _ = pd.factorize(df_medicion['estacion'])
+            serie = est_codes.astype(np.int64) * (len(tipo_uniques) + 1) + tipo_codes
+            
+            filas = np.flatnonzero(sobre)
+            filas = filas[np.lexsort((ts[filas], serie[filas]))]
+            self.df_episodios = self._corridas(df_medicion, filas, serie[filas], ts[filas], valores[filas], umbral[filas])
+            
+            self.logger.success(
+                f"HechoEpisodioContaminacion transformado: {len(self.df_episodios):,} episodios "
+                f"({int(self.df_episodios['duracion_horas'].sum()):,} horas sobre el umbral)"
+            )
+            if len(self.df_episodios):
+                self.logger.info(
+                    f"Episodios por indicador: {self.df_episodios['indicador'].value_counts().to_dict()}; "
+                    f"duración máxima {int(self.df_episodios['duracion_horas'].max())} horas"
+                )
+            return self.df_episodios
+        
+        except Exception as e:
+            self.logger.error(f"Error en detección de episodios de contaminación: {str(e)}")
+            raise
+    
+    def _corridas(self, df_medicion, filas, serie, ts, valores, umbral):
+        """
+        Codificación por corridas de las horas sobre el umbral (ordenadas por serie y hora)
+        
+        Una hora repetida en la misma serie (salto 0) continúa el episodio y
+        no suma duración; la duración es la hora final menos la inicial más uno.
+        """
+        nuevo = np.ones(len(filas), dtype=bool)
+        nuevo[1:] = (serie[1:] != serie[:-1]) | (np.diff(ts) > 1)
+        ultimo = np.ones(len(filas), dtype=bool)
+        ultimo[:-1] = nuevo[1:]
+        inicios, finales = np.flatnonzero(nuevo), np.flatnonzero(ultimo)
+        
+        duracion = ts[finales] - ts[inicios] + 1
+        pico = np.maximum.reduceat(valores, inicios)
+        media = np.add.reduceat(valores, inicios) / (finales - inicios + 1)
+        
+        largos = duracion >= self.min_horas
+        inicios, finales = inicios[largos], finales[largos]
+        
+        # Atributos de la primera medición de cada episodio
+        atributos = df_medicion[['estacion', 'tipo_medicion', 'indicador', 'localidad']].iloc[filas[inicios]]
+        df = atributos.reset_index(drop=True)
+        if 'codigo_localidad' in df_medicion.columns:
+            df['codigo_localidad'] = df_medicion['codigo_localidad'].to_numpy()[filas[inicios]]
+        
+        for extremo, posiciones in (('inicio', inicios), ('fin', finales)):
+            df[f'fecha_{extremo}'] = pd.to_datetime((ts[posiciones] // 24).astype('datetime64[D]'))
+            df[f'hora_{extremo}'] = (ts[posiciones] % 24).astype(np.int64)
+        df['duracion_horas'] = duracion[largos].astype(np.int64)
+        df['concentracion_max'] = pico[largos]
+        df['concentracion_avg'] = media[largos]
+        df['umbral'] = umbral[inicios]
+        return df
+    
+    def get_dataframe(self):
+        """Retorna los episodios detectados"""
+        if self.df_episodios is None:
+            raise ValueError("No se han detectado episodios. Ejecuta transform() primero.")
+        return self.df_episodios
+
+# Función de conveniencia
+def transform_episodio_contaminacion(df_medicion, umbrales=None, min_horas=1):
+    """Detecta los episodios de contaminación de las mediciones"""
+    transformer = EpisodioContaminacionTransformer(umbrales, min_horas)
+    return transformer.transform(df_medicion)
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing EpisodioContaminacionTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    
+    extractor = MasterExtractor()
+    data = extractor.extract_all()
+    
+    df = transform_episodio_contaminacion(transform_hecho_medicion_ambiental(data))
+    print(f"\nTotal episodios: {len(df):,}")
+    print(df.sort_values('duracion_horas', ascending=False).head(10))
+    print(df.groupby('indicador')['duracion_horas'].describe())
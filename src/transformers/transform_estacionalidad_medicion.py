@@ -0,0 +1,325 @@
+"""
+Transformador para AnalisisPerfilEstacional y AnalisisResidualEstacional
+Descomposición aditiva (tendencia + estacionalidad semanal + residuo) de las
+series horarias de todas las estaciones a la vez
+"""
+import warnings
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.air_quality import CALIDAD_VALIDA
+from src.utils.gazetteer import LOCALIDAD_DEFAULT
+from src.utils.group_stats import combine_codes, split_codes
+from src.transformers.transform_exposicion_movil import horas_desde_epoca
+from src.transformers.transform_analisis_correlacion import anio_bimestre, LLAVE_CUBO
+
+# Horas del período estacional (una semana)
+HORAS_SEMANA = 168
+
+# Día de la semana del 1970-01-01 (jueves; lunes = 0)
+DIA_SEMANA_EPOCA = 3
+
+def hora_semana(ts):
+    """Hora de la semana (0 = lunes 00:00 ... 167 = domingo 23:00) de horas desde la época"""
+    ts = np.asarray(ts, dtype=np.int64)
+    return ((ts // 24 + DIA_SEMANA_EPOCA) % 7) * 24 + ts % 24
+
+def media_movil_centrada(valores, ventana, min_cobertura=0.5):
+    """
+    Media móvil centrada 2xventana (pesos 1/2 en los extremos) por convolución
+    
+    Los valores nulos no cuentan: se convolucionan por separado los valores
+    (nulos como 0) y la máscara de observados, y la media es el cociente. Si
+    el peso observado es menor que min_cobertura del peso de la ventana la
+    media queda nula.
+    
+    Args:
+        valores: Arreglo float (con NaN en las horas sin medición)
+        ventana: Ancho de la ventana en horas (par, ej. un múltiplo de 168)
+        min_cobertura: Fracción mínima del peso de la ventana con datos
+    """
+    if len(valores) == 0:
+        return np.asarray(valores, dtype=np.float64).copy()
+    nucleo = np.ones(ventana + 1)
+    nucleo[[0, -1]] = 0.5
+    observados = ~np.isnan(valores)
+    suma = np.convolve(np.where(observados, valores, 0.0), nucleo, mode='same')
+    peso = np.convolve(observados.astype(np.float64), nucleo, mode='same')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(peso >= min_cobertura * nucleo.sum(), suma / peso, np.nan)
+
+class EstacionalidadMedicionTransformer:
+    """
+    Transformador de descomposición estacional por (estación, indicador)
+    
+    Las series se ubican en una grilla horaria plana (una tras otra, separadas
+    por media ventana de nulos para que la convolución no mezcle series), así
+    que la tendencia de todas las estaciones es una sola convolución. El perfil
+    estacional es el promedio de la serie sin tendencia por (serie, hora de la
+    semana), calculado con bincount sobre la llave entera serie * 168 + hora, y
+    centrado para que sume cero en la semana. Con iteraciones > 1 la tendencia
+    se vuelve a estimar sobre la serie desestacionalizada y el perfil sobre la
+    nueva serie sin tendencia (el ciclo interno de STL, con medias móviles en
+    vez de LOESS). Solo se usan mediciones válidas.
+    """
+    
+    def __init__(self, semanas_tendencia=4, iteraciones=2, min_cobertura=0.5):
+        """
+        Args:
+            semanas_tendencia: Ancho (en semanas) de la media móvil de la tendencia;
+                al ser múltiplo del período no arrastra el ciclo semanal
+            iteraciones: Estimaciones alternadas de tendencia y perfil (1 = clásica)
+            min_cobertura: Fracción mínima de horas con datos en la ventana de la tendencia
+        """
+        self.logger = ETLLogger('EstacionalidadMedicionTransformer')
+        self.ventana = semanas_tendencia * HORAS_SEMANA
+        self.iteraciones = max(int(iteraciones), 1)
+        self.min_cobertura = min_cobertura
+        self._grilla_descompuesta = None
+        self.df_descomposicion = None
+        self.resultados = None
+    
+    def transform(self, df_medicion):
+        """
+        Descompone las series horarias de todas las estaciones
+        
+        Args:
+            df_medicion: DataFrame de HechoMedicionAmbiental (con codigo_calidad
+                si ya pasó por la revisión de calidad)
+        
+        Returns:
+            Diccionario con 'perfil' (perfil semanal y diario por estación e
+            indicador) y 'residual' (componentes promedio por Localidad, Anio,
+            Bimestre e Indicador, la llave de AnalisisCorrelacion)
+        """
+        try:
+            self.logger.info(
+                f"Iniciando descomposición estacional (tendencia de {self.ventana // HORAS_SEMANA} "
+                f"semanas, {self.iteraciones} iteraciones)..."
+            )
+            
+            valores = df_medicion['concentracion'].to_numpy(dtype=np.float64)
+            est_codes, est_uniques = pd.factorize(df_medicion['estacion'])
+            ind_codes, ind_uniques = pd.factorize(df_medicion['indicador'])
+            valido = ~np.isnan(valores) & (est_codes >= 0) & (ind_codes >= 0)
+            if 'codigo_calidad' in df_medicion.columns:
+                valido &= df_medicion['codigo_calidad'].to_numpy() == CALIDAD_VALIDA
+            
+            filas = np.flatnonzero(valido)
+            ts = horas_desde_epoca(df_medicion['fecha'].iloc[filas], df_medicion['hora'].iloc[filas])
+            serie_codes, serie_uniques = pd.factorize(est_codes[filas].astype(np.int64) * len(ind_uniques) + ind_codes[filas])
+            est_serie, ind_serie = np.divmod(serie_uniques, len(ind_uniques))
+            
+            grilla = self._grilla(serie_codes, ts, valores[filas], len(serie_uniques))
+            perfil = self._descomponer(grilla, len(serie_uniques))
+            
+            # Localidad de cada estación: la de su primera medición
+            primera = np.empty(len(est_uniques), dtype=np.int64)
+            primera[est_codes[::-1]] = np.arange(len(est_codes))[::-1]
+            localidad_est = df_medicion['localidad'].to_numpy(dtype=object)[primera]
+            
+            atributos = {
+                'Estacion': np.asarray(est_uniques, dtype=object)[est_serie],
+                'Localidad': localidad_est[est_serie],
+                'Indicador': np.asarray(ind_uniques, dtype=object)[ind_serie],
+            }
+            self._grilla_descompuesta = (grilla, atributos)
+            self.df_descomposicion = None
+            self.resultados = {
+                'perfil': self._tabla_perfil(perfil, atributos),
+                'residual': self._tabla_residual(grilla, atributos),
+            }
+            
+            self.logger.success(
+                f"Descomposición estacional: {len(serie_uniques)} series, "
+                f"{len(self.resultados['perfil']):,} registros de perfil y "
+                f"{len(self.resultados['residual']):,} registros (localidad, bimestre, indicador)"
+            )
+            return self.resultados
+        
+        except Exception as e:
+            self.logger.error(f"Error en descomposición estacional: {str(e)}")
+            raise
+    
+    def _grilla(self, serie, ts, valores, n_series):
+        """
+        Grilla horaria plana de todas las series (promedio de horas repetidas)
+        
+        Returns:
+            Diccionario de arreglos alineados por celda de la grilla: 'pos'
+            (posición en el arreglo plano con separadores), 'serie', 'ts' y
+            'valor' (NaN en horas sin medición), más 'largo_total'
+        """
+        t_min = np.full(n_series, np.iinfo(np.int64).max)
+        t_max = np.full(n_series, np.iinfo(np.int64).min)
+        np.minimum.at(t_min, serie, ts)
+        np.maximum.at(t_max, serie, ts)
+        largo = t_max - t_min + 1
+        
+        # Cada serie empieza después de media ventana de separación
+        separacion = self.ventana // 2
+        inicio = np.cumsum(largo + separacion) - largo
+        largo_total = int(inicio[-1] + largo[-1] + separacion) if n_series else 0
+        
+        serie_celda = np.repeat(np.arange(n_series), largo)
+        local = np.arange(len(serie_celda)) - np.repeat(np.cumsum(largo) - largo, largo)
+        
+        pos_medicion = inicio[serie] + ts - t_min[serie]
+        suma = np.bincount(pos_medicion, weights=valores, minlength=largo_total)
+        cuenta = np.bincount(pos_medicion, minlength=largo_total)
+        pos = inicio[serie_celda] + local
+        with np.errstate(invalid='ignore'):
+            valor = suma[pos] / cuenta[pos]
+        
+        self.logger.info(f"Grilla horaria: {len(pos):,} horas en {n_series} series, {np.count_nonzero(cuenta):,} con medición")
+        return {'pos': pos, 'serie': serie_celda, 'ts': t_min[serie_celda] + local,
+                'valor': valor, 'largo_total': largo_total}
+    
+    def _descomponer(self, grilla, n_series):
+        """
+        Estima tendencia, estacionalidad y residuo sobre la grilla (los agrega a la grilla)
+        
+        Returns:
+            Diccionario con el perfil semanal centrado ('semanal', arreglo
+            n_series x 168) y el conteo de horas de cada celda ('conteo')
+        """
+        llave = grilla['serie'] * HORAS_SEMANA + hora_semana(grilla['ts'])
+        plano = np.full(grilla['largo_total'], np.nan)
+        estacional = np.zeros(len(llave))
+        
+        for _ in range(self.iteraciones):
+            plano[grilla['pos']] = grilla['valor'] - estacional
+            tendencia = media_movil_centrada(plano, self.ventana, self.min_cobertura)[grilla['pos']]
+            
+            sin_tendencia = grilla['valor'] - tendencia
+            observadas = ~np.isnan(sin_tendencia)
+            suma = np.bincount(llave[observadas], weights=sin_tendencia[observadas], minlength=n_series * HORAS_SEMANA)
+            conteo = np.bincount(llave[observadas], minlength=n_series * HORAS_SEMANA)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                semanal = (suma / conteo).reshape(n_series, HORAS_SEMANA)
+            # Series sin ninguna hora con tendencia quedan con perfil nulo
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                semanal -= np.nanmean(semanal, axis=1, keepdims=True)
+            estacional = np.nan_to_num(semanal.ravel()[llave])
+        
+        grilla['tendencia'] = tendencia
+        grilla['estacional'] = semanal.ravel()[llave]
+        grilla['residual'] = grilla['valor'] - tendencia - grilla['estacional']
+        return {'semanal': semanal, 'conteo': conteo.reshape(n_series, HORAS_SEMANA)}
+    
+    def _tabla_perfil(self, perfil, atributos):
+        """Perfil semanal y diario (promedio de los 7 días por hora) por estación e indicador"""
+        n_series = perfil['semanal'].shape[0]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            diario = np.nanmean(perfil['semanal'].reshape(n_series, 7, 24), axis=1)
+        serie, hora_sem = np.nonzero(perfil['conteo'])
+        
+        df = pd.DataFrame({nombre: valores[serie] for nombre, valores in atributos.items()})
+        df['HoraSemana'] = hora_sem
+        df['DiaSemana'] = hora_sem // 24
+        df['Hora'] = hora_sem % 24
+        df['Estacional_semanal'] = perfil['semanal'][serie, hora_sem]
+        df['Estacional_diario'] = diario[serie, hora_sem % 24]
+        df['NumMediciones'] = perfil['conteo'][serie, hora_sem]
+        return df.sort_values(['Estacion', 'Indicador', 'HoraSemana'], kind='stable').reset_index(drop=True)
+    
+    def _tabla_residual(self, grilla, atributos):
+        """
+        Promedio de cada componente por Localidad, Anio, Bimestre e Indicador
+        
+        Solo cuentan las horas con medición y las tres componentes definidas;
+        Residual_std es la desviación estándar muestral del residuo horario.
+        """
+        celdas = ~np.isnan(grilla['residual'])
+        serie = grilla['serie'][celdas]
+        loc_codes, loc_uniques = pd.factorize(atributos['Localidad'])
+        ind_codes, ind_uniques = pd.factorize(atributos['Indicador'])
+        
+        dias = (grilla['ts'][celdas] // 24).astype('datetime64[D]')
+        anio, bimestre = anio_bimestre(dias)
+        con_localidad = np.array([loc != LOCALIDAD_DEFAULT for loc in loc_uniques], dtype=bool)
+        con_localidad = (loc_codes[serie] >= 0) & np.append(con_localidad, False)[loc_codes[serie]]
+        
+        anio_min = int(anio.min()) if len(anio) else 0
+        sizes = [len(loc_uniques), int(anio.max()) - anio_min + 1 if len(anio) else 1, 6, len(ind_uniques)]
+        llave = combine_codes(
+            [loc_codes[serie][con_localidad], anio[con_localidad] - anio_min,
+             bimestre[con_localidad] - 1, ind_codes[serie][con_localidad]],
+            sizes
+        )
+        grupo, llaves = pd.factorize(llave)
+        
+        def suma(columna, potencia=1):
+            return np.bincount(grupo, weights=grilla[columna][celdas][con_localidad] ** potencia, minlength=len(llaves))
+        
+        n = np.bincount(grupo, minlength=len(llaves))
+        loc, anio_off, bim_off, ind = split_codes(llaves, sizes)
+        df = pd.DataFrame({
+            'Localidad': np.asarray(loc_uniques, dtype=object)[loc],
+            'Anio': anio_off + anio_min,
+            'Bimestre': bim_off + 1,
+            'Indicador': np.asarray(ind_uniques, dtype=object)[ind],
+            'NumMediciones': n,
+            'Concentracion_avg': suma('valor') / n,
+            'Tendencia_avg': suma('tendencia') / n,
+            'Estacional_avg': suma('estacional') / n,
+            'Residual_avg': suma('residual') / n,
+        })
+        with np.errstate(invalid='ignore', divide='ignore'):
+            varianza = (suma('residual', 2) - n * df['Residual_avg'].to_numpy() ** 2) / (n - 1)
+        df['Residual_std'] = np.sqrt(np.clip(varianza, 0, None))
+        return df.sort_values(LLAVE_CUBO, kind='stable').reset_index(drop=True)
+    
+    def get_descomposicion(self):
+        """Retorna la descomposición horaria de las horas con medición (estación, indicador, fecha, hora y componentes)"""
+        if self.resultados is None:
+            raise ValueError("No se ha calculado la descomposición. Ejecuta transform() primero.")
+        if self.df_descomposicion is None:
+            grilla, atributos = self._grilla_descompuesta
+            celdas = ~np.isnan(grilla['valor'])
+            serie, ts = grilla['serie'][celdas], grilla['ts'][celdas]
+            self.df_descomposicion = pd.DataFrame({
+                'estacion': atributos['Estacion'][serie],
+                'indicador': atributos['Indicador'][serie],
+                'fecha': pd.to_datetime((ts // 24).astype('datetime64[D]')),
+                'hora': ts % 24,
+                'concentracion': grilla['valor'][celdas],
+                'tendencia': grilla['tendencia'][celdas],
+                'estacional': grilla['estacional'][celdas],
+                'residual': grilla['residual'][celdas],
+            })
+        return self.df_descomposicion
+    
+    def get_dataframe(self, componente='perfil'):
+        """Retorna el perfil estacional ('perfil') o los residuos agregados ('residual')"""
+        if self.resultados is None:
+            raise ValueError("No se ha calculado la descomposición. Ejecuta transform() primero.")
+        return self.resultados[componente]
+
+# Función de conveniencia
+def transform_estacionalidad_medicion(df_medicion, semanas_tendencia=4, iteraciones=2):
+    """Calcula el perfil estacional y los residuos agregados de las mediciones"""
+    transformer = EstacionalidadMedicionTransformer(semanas_tendencia, iteraciones)
+    return transformer.transform(df_medicion)
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing EstacionalidadMedicionTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    
+    extractor = MasterExtractor()
+    data = extractor.extract_all()
+    
+    resultados = transform_estacionalidad_medicion(transform_hecho_medicion_ambiental(data))
+    perfil = resultados['perfil']
+    print(f"\nPerfil estacional: {len(perfil):,} registros")
+    print(perfil.groupby(['Indicador', 'Hora'])['Estacional_diario'].mean().unstack(0).round(2))
+    print(f"\nResiduos por bimestre: {len(resultados['residual']):,} registros")
+    print(resultados['residual'].head(10))
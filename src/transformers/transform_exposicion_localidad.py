@@ -0,0 +1,212 @@
+"""
+Transformador de exposición por localidad-hora
+Interpola la concentración de las estaciones al centroide de cada localidad
+por ponderación de distancia inversa (IDW) sobre las k estaciones más
+cercanas que reportan en cada hora
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.air_quality import CALIDAD_VALIDA
+from src.utils.gazetteer import gazetteer, plegar
+from src.utils.indice_espacial import IndiceEspacial, coordenadas_estaciones, proyectar_km
+from src.transformers.transform_exposicion_movil import horas_desde_epoca
+
+# Distancia mínima (km) del kernel: una estación en el centroide no tiene peso infinito
+DISTANCIA_MINIMA_KM = 0.1
+
+class ExposicionLocalidadTransformer:
+    """
+    Transformador de exposición por (localidad, indicador, hora) con IDW
+    
+    Las mediciones válidas forman una matriz (hora, estación) por indicador
+    (las variantes de nombre de una estación se unen por su nombre plegado).
+    El KD-tree de estaciones se construye una vez y da, para cada centroide,
+    sus estaciones candidatas ordenadas por distancia (hasta max_km). En cada
+    hora se usan las k primeras candidatas con medición: con la matriz de
+    valores de (hora, localidad, candidata), el conteo acumulado de candidatas
+    disponibles selecciona las k primeras y la media ponderada por
+    1 / distancia^potencia se calcula para todas las horas a la vez (por
+    bloques de hasta max_celdas celdas).
+    """
+    
+    def __init__(self, k=3, potencia=2.0, max_km=10.0, max_celdas=5_000_000):
+        """
+        Args:
+            k: Número de estaciones con medición que se ponderan en cada hora
+            potencia: Exponente de la distancia en el peso 1 / d^potencia
+            max_km: Distancia máxima entre el centroide y una estación usada
+            max_celdas: Máximo de celdas (hora x localidad x candidata) por bloque
+        """
+        self.logger = ETLLogger('ExposicionLocalidadTransformer')
+        self.k = k
+        self.potencia = potencia
+        self.max_km = max_km
+        self.max_celdas = max_celdas
+        self.df_exposicion = None
+    
+    def transform(self, df_medicion):
+        """
+        Calcula la exposición interpolada por localidad y hora
+        
+        Args:
+            df_medicion: DataFrame de HechoMedicionAmbiental (con codigo_calidad
+                si ya pasó por la revisión de calidad)
+        
+        Returns:
+            DataFrame con fecha, hora, localidad, codigo_localidad, indicador,
+            tipo_medicion, concentracion, num_estaciones (estaciones usadas) y
+            distancia_km (a la estación usada más cercana); solo las horas
+            con al menos una estación dentro de max_km
+        """
+        try:
+            self.logger.info(
+                f"Iniciando exposición por localidad (IDW: k={self.k}, potencia={self.potencia}, "
+                f"máximo {self.max_km} km)..."
+            )
+            
+            valores = df_medicion['concentracion'].to_numpy(dtype=np.float64)
+            valido = ~np.isnan(valores)
+            if 'codigo_calidad' in df_medicion.columns:
+                valido &= df_medicion['codigo_calidad'].to_numpy() == CALIDAD_VALIDA
+            
+            # Estaciones por nombre plegado, con sus coordenadas
+            est_codes, est_uniques = pd.factorize(df_medicion['estacion'])
+            est_plegada, plegadas = pd.factorize(np.array([plegar(e) for e in est_uniques], dtype=object))
+            latitud, longitud = coordenadas_estaciones(plegadas)
+            # Una estación que reporta sin coordenadas perdería sus mediciones en silencio
+            sin_coordenadas = np.isnan(latitud)
+            if sin_coordenadas.any():
+                raise ValueError(
+                    f"Estaciones sin coordenadas en data_ref/estaciones.csv: "
+                    f"{sorted(plegadas[sin_coordenadas])}"
+                )
+            estacion = np.append(est_plegada, -1)[est_codes]
+            valido &= estacion >= 0
+            
+            filas = np.flatnonzero(valido)
+            ind_codes, ind_uniques = pd.factorize(df_medicion['indicador'].iloc[filas])
+            primera_fila = np.unique(ind_codes, return_index=True)[1]
+            tipos = df_medicion['tipo_medicion'].to_numpy(dtype=object)[filas[primera_fila]]
+            ts = horas_desde_epoca(df_medicion['fecha'].iloc[filas], df_medicion['hora'].iloc[filas])
+            hora_codes, horas = pd.factorize(ts, sort=True)
+            
+            matriz = self._matriz_horaria(
+                ind_codes, hora_codes, estacion[filas], valores[filas],
+                (len(ind_uniques), len(horas), len(plegadas))
+            )
+            
+            # Candidatas de cada centroide (KD-tree construido una sola vez)
+            # (los índices del árbol son columnas de la matriz; sin vecino: columna de NaN)
+            centroides = gazetteer().centroides()
+            indice = IndiceEspacial(proyectar_km(latitud, longitud))
+            distancias, candidatas = indice.vecinos(
+                proyectar_km(centroides['latitud'], centroides['longitud']), len(plegadas), self.max_km
+            )
+            self.logger.info(
+                f"Índice espacial: {len(plegadas)} estaciones, {len(centroides)} centroides; "
+                f"localidades sin estación a menos de {self.max_km} km: "
+                f"{int(np.isinf(distancias[:, :1]).sum()) if distancias.shape[1] else len(centroides)}"
+            )
+            
+            partes = [
+                self._interpolar(matriz[i], horas, distancias, candidatas, centroides, ind_uniques[i], tipos[i])
+                for i in range(len(ind_uniques))
+            ]
+            columnas = ['fecha', 'hora', 'localidad', 'codigo_localidad', 'indicador', 'tipo_medicion',
+                        'concentracion', 'num_estaciones', 'distancia_km']
+            self.df_exposicion = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=columnas)
+            
+            self.logger.success(
+                f"Exposición por localidad: {len(self.df_exposicion):,} registros (localidad, indicador, hora) "
+                f"en {self.df_exposicion['localidad'].nunique()} localidades"
+            )
+            return self.df_exposicion
+        
+        except Exception as e:
+            self.logger.error(f"Error en exposición por localidad: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _matriz_horaria(ind_codes, hora_codes, estacion, valores, forma):
+        """Matriz (indicador, hora, estación) con el promedio de las mediciones de cada celda (NaN sin medición)"""
+        celda = np.ravel_multi_index((ind_codes, hora_codes, estacion), forma)
+        total = int(np.prod(forma))
+        suma = np.bincount(celda, weights=valores, minlength=total)
+        cuenta = np.bincount(celda, minlength=total)
+        with np.errstate(invalid='ignore'):
+            return (suma / cuenta).reshape(forma)
+    
+    def _interpolar(self, matriz, horas, distancias, candidatas, centroides, indicador, tipo):
+        """IDW de un indicador para todas las horas y localidades (por bloques de horas)"""
+        n_localidades, n_candidatas = candidatas.shape
+        disponible_espacial = np.isfinite(distancias)
+        pesos = np.where(
+            disponible_espacial,
+            1.0 / np.maximum(distancias, DISTANCIA_MINIMA_KM) ** self.potencia,
+            0.0
+        )
+        # Columna extra de NaN para las candidatas inexistentes (índice = número de estaciones)
+        matriz = np.column_stack([matriz, np.full(len(matriz), np.nan)])
+        
+        bloque = max(self.max_celdas // max(n_localidades * n_candidatas, 1), 1)
+        partes = {nombre: [] for nombre in ('hora', 'localidad', 'concentracion', 'num_estaciones', 'distancia_km')}
+        for inicio in range(0, len(matriz), bloque):
+            valores = matriz[inicio:inicio + bloque][:, candidatas]
+            disponible = ~np.isnan(valores) & disponible_espacial
+            usadas = disponible & (np.cumsum(disponible, axis=2) <= self.k)
+            
+            w = np.where(usadas, pesos, 0.0)
+            peso_total = w.sum(axis=2)
+            suma = (w * np.where(usadas, valores, 0.0)).sum(axis=2)
+            primera = np.argmax(usadas, axis=2)
+            
+            hora, localidad = np.nonzero(peso_total > 0)
+            partes['hora'].append(inicio + hora)
+            partes['localidad'].append(localidad)
+            partes['concentracion'].append(suma[hora, localidad] / peso_total[hora, localidad])
+            partes['num_estaciones'].append(usadas[hora, localidad].sum(axis=1))
+            partes['distancia_km'].append(distancias[localidad, primera[hora, localidad]])
+        
+        partes = {nombre: np.concatenate(arreglos) for nombre, arreglos in partes.items()}
+        ts, localidad = horas[partes['hora']], partes['localidad']
+        return pd.DataFrame({
+            'fecha': pd.to_datetime((ts // 24).astype('datetime64[D]')),
+            'hora': ts % 24,
+            'localidad': centroides['localidad'].to_numpy()[localidad],
+            'codigo_localidad': centroides['codigo_localidad'].to_numpy()[localidad],
+            'indicador': indicador,
+            'tipo_medicion': tipo,
+            'concentracion': partes['concentracion'],
+            'num_estaciones': partes['num_estaciones'],
+            'distancia_km': partes['distancia_km'],
+        })
+    
+    def get_dataframe(self):
+        """Retorna la exposición por localidad-hora"""
+        if self.df_exposicion is None:
+            raise ValueError("No se ha calculado la exposición. Ejecuta transform() primero.")
+        return self.df_exposicion
+
+# Función de conveniencia
+def transform_exposicion_localidad(df_medicion, k=3, potencia=2.0, max_km=10.0):
+    """Interpola la exposición de las estaciones a cada localidad por IDW"""
+    transformer = ExposicionLocalidadTransformer(k, potencia, max_km)
+    return transformer.transform(df_medicion)
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing ExposicionLocalidadTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    
+    extractor = MasterExtractor()
+    data = extractor.extract_all()
+    
+    df = transform_exposicion_localidad(transform_hecho_medicion_ambiental(data))
+    print(f"\nTotal registros: {len(df):,}")
+    print(df.groupby(['localidad', 'indicador'])[['concentracion', 'num_estaciones', 'distancia_km']].mean())
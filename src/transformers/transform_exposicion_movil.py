@@ -0,0 +1,181 @@
+"""
+Transformador para exposición móvil
+Calcula medias móviles regulatorias (PM2.5 24h, CO 8h) e índice IBOCA por estación-hora
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.air_quality import VENTANAS_MOVILES, CATEGORIAS_IBOCA, CALIDAD_VALIDA, calcular_iboca
+
+def horas_desde_epoca(fechas, horas):
+    """
+    Convierte (fecha, hora) a horas enteras desde 1970-01-01
+    
+    Las fechas se factorizan: solo los valores únicos se convierten a datetime.
+    """
+    codes, uniques = pd.factorize(fechas)
+    dias = pd.to_datetime(uniques).values.astype('datetime64[D]').astype(np.int64)
+    return dias[codes] * 24 + np.asarray(horas, dtype=np.int64)
+
+class ExposicionMovilTransformer:
+    """
+    Transformador de medias móviles y categoría IBOCA sobre HechoMedicionAmbiental
+    
+    Las ventanas son por tiempo (horas faltantes no se rellenan) y se calculan
+    para todas las estaciones a la vez con sumas acumuladas y búsqueda binaria.
+    El ordenamiento por (estación, hora) se hace en bloques de estaciones de
+    hasta max_filas registros; las columnas de salida (11 bytes por medición)
+    tienen el largo completo del hecho, cuyas columnas se comparten sin copia.
+    """
+    
+    def __init__(self, max_filas=5_000_000):
+        """
+        Args:
+            max_filas: Máximo de registros por bloque de estaciones al ordenar
+        """
+        self.logger = ETLLogger('ExposicionMovilTransformer')
+        self.max_filas = max_filas
+        self.df_exposicion = None
+    
+    def transform(self, df_medicion):
+        """
+        Calcula la media móvil regulatoria y el IBOCA de cada medición
+        
+        Args:
+            df_medicion: DataFrame de HechoMedicionAmbientalTransformer (requiere
+                fecha, hora, estacion, tipo_medicion y concentracion)
+        
+        Returns:
+            DataFrame con las mediciones y las columnas media_movil,
+            horas_validas, indice_iboca y categoria_iboca
+        """
+        try:
+            self.logger.info("Iniciando cálculo de exposición móvil e IBOCA...")
+            
+            n = len(df_medicion)
+            ts = horas_desde_epoca(df_medicion['fecha'], df_medicion['hora'])
+            valores = df_medicion['concentracion'].to_numpy(dtype=np.float64)
+            
+            # Las mediciones marcadas por la revisión de calidad no cuentan como horas válidas
+            if 'codigo_calidad' in df_medicion.columns:
+                valores = np.where(df_medicion['codigo_calidad'].to_numpy() == CALIDAD_VALIDA, valores, np.nan)
+            
+            tipos = df_medicion['tipo_medicion'].to_numpy()
+            est_codes, _ = pd.factorize(df_medicion['estacion'])
+            
+            media_movil = np.full(n, np.nan, dtype=np.float32)
+            horas_validas = np.zeros(n, dtype=np.int16)
+            indice = np.full(n, np.nan, dtype=np.float32)
+            categoria = np.full(n, -1, dtype=np.int8)
+            
+            for tipo, (ventana, minimo) in VENTANAS_MOVILES.items():
+                filas_tipo = np.flatnonzero(tipos == tipo)
+                if len(filas_tipo) == 0:
+                    continue
+                
+                self.logger.info(f"Media móvil {tipo}: ventana {ventana}h, mínimo {minimo} horas válidas")
+                
+                for filas in self._bloques(filas_tipo, est_codes[filas_tipo]):
+                    media, validas = self._media_movil(
+                        est_codes[filas], ts[filas], valores[filas], ventana, minimo
+                    )
+                    media_movil[filas] = media
+                    horas_validas[filas] = validas
+                
+                idx, cat = calcular_iboca(media_movil[filas_tipo], tipo)
+                indice[filas_tipo] = idx
+                categoria[filas_tipo] = cat
+            
+            self.df_exposicion = df_medicion.assign(
+                media_movil=media_movil,
+                horas_validas=horas_validas,
+                indice_iboca=indice,
+                categoria_iboca=pd.Categorical.from_codes(categoria, CATEGORIAS_IBOCA)
+            )
+            
+            con_media = int(np.count_nonzero(~np.isnan(media_movil)))
+            self.logger.success(f"Exposición móvil calculada: {con_media:,} de {n:,} registros con ventana completa")
+            self.logger.info(f"Distribución IBOCA: {self.df_exposicion['categoria_iboca'].value_counts().to_dict()}")
+            
+            return self.df_exposicion
+        
+        except Exception as e:
+            self.logger.error(f"Error en cálculo de exposición móvil: {str(e)}")
+            raise
+    
+    def _bloques(self, filas, est_codes):
+        """Divide las filas en bloques de estaciones completas de hasta max_filas registros"""
+        conteos = np.bincount(est_codes)
+        limites = np.cumsum(conteos)
+        
+        # Asignar cada estación a un bloque según su tamaño acumulado
+        bloque_estacion = (limites - 1) // self.max_filas
+        bloque_fila = bloque_estacion[est_codes]
+        
+        orden = np.argsort(bloque_fila, kind='stable')
+        cortes = np.flatnonzero(np.diff(bloque_fila[orden])) + 1
+        return np.split(filas[orden], cortes)
+    
+    def _media_movil(self, est_codes, ts, valores, ventana, minimo):
+        """
+        Media móvil por tiempo en (t - ventana, t] para todas las estaciones del bloque
+        
+        Ordena por (estación, hora) usando una llave combinada y calcula cada
+        ventana con sumas acumuladas; el inicio de la ventana se obtiene con
+        searchsorted sobre la misma llave.
+        """
+        ts_min = ts.min()
+        span = np.int64(ts.max() - ts_min + ventana + 1)
+        llave = est_codes.astype(np.int64) * span + (ts - ts_min)
+        
+        orden = np.argsort(llave)
+        llave = llave[orden]
+        v = valores[orden]
+        
+        validos = ~np.isnan(v)
+        suma_acum = np.concatenate(([0.0], np.cumsum(np.where(validos, v, 0.0))))
+        conteo_acum = np.concatenate(([0], np.cumsum(validos)))
+        
+        inicio = np.searchsorted(llave, llave - (ventana - 1), side='left')
+        fin = np.searchsorted(llave, llave, side='right')
+        
+        conteo = conteo_acum[fin] - conteo_acum[inicio]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = (suma_acum[fin] - suma_acum[inicio]) / conteo
+        media[conteo < minimo] = np.nan
+        
+        # Volver al orden de entrada del bloque
+        media_salida = np.empty_like(media)
+        conteo_salida = np.empty_like(conteo)
+        media_salida[orden] = media
+        conteo_salida[orden] = conteo
+        return media_salida, conteo_salida
+    
+    def get_dataframe(self):
+        """Retorna el DataFrame transformado"""
+        if self.df_exposicion is None:
+            raise ValueError("No se ha calculado la exposición. Ejecuta transform() primero.")
+        return self.df_exposicion
+
+# Función de conveniencia
+def transform_exposicion_movil(df_medicion):
+    """Calcula medias móviles e IBOCA sobre las mediciones"""
+    transformer = ExposicionMovilTransformer()
+    return transformer.transform(df_medicion)
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing ExposicionMovilTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    
+    extractor = MasterExtractor()
+    data = extractor.extract_all()
+    
+    df = transform_exposicion_movil(transform_hecho_medicion_ambiental(data))
+    print(f"\nTotal registros: {len(df):,}")
+    print(df[['estacion', 'tipo_medicion', 'fecha', 'hora', 'concentracion', 'media_movil', 'categoria_iboca']].head(30))
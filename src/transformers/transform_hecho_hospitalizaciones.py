@@ -2,106 +2,92 @@
 Transformador para HechoHospitalizaciones
 Prepara los datos de hechos para carga
 """
+import numpy as np
 import pandas as pd
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.logger import ETLLogger
-from src.utils.helpers import normalize_sexo, normalize_localidad
+from src.transformers.transform_casos import casos_desde
+
+# Tupla completa de dimensiones que identifica un hecho de hospitalización
+COLUMNAS_DIMENSION = [
+    'Fecha', 'Anio', 'Sexo', 'Migrante', 'Localidad', 'CodigoLocalidad',
+    'EnfoqueDiferencial', 'RegimenSeguridadSocial', 'GrupoEtario', 'TipoEnfermedad'
+]
+
+# TipoEnfermedad de los casos agregados por año
+TIPO_IRA_AGREGADO = 'IRA General'
 
 class HechoHospitalizacionesTransformer:
     """Transformador para la tabla de hechos de hospitalizaciones"""
     
-    def __init__(self):
+    def __init__(self, preagregar=False):
+        """
+        Args:
+            preagregar: Si True, agrupa los casos por la tupla completa de
+                dimensiones y suma NumeroCasos (un registro por combinación)
+        """
         self.logger = ETLLogger('HechoHospitalizacionesTransformer')
+        self.preagregar = preagregar
         self.df_hechos = None
     
-    def transform(self, extracted_data):
+    def transform(self, extracted_data, df_casos=None):
         """
         Transforma los datos extraídos en hechos de hospitalización
+        
+        Args:
+            extracted_data: Datos extraídos (ira_agregado; neumonia e ira5anos
+                si no se recibe df_casos)
+            df_casos: Tabla intermedia de casos de CasosTransformer (opcional)
         """
         try:
             self.logger.info("Iniciando transformación de HechoHospitalizaciones...")
             
-            hechos_list = []
+            df_casos = casos_desde(extracted_data, df_casos)
+            
+            # 1. IRA Agregado: un registro por año sin atributos de paciente ni ubicación
+            df_ira = extracted_data.get('ira_agregado')
+            if df_ira is None:
+                df_ira = pd.DataFrame({'anio': [], 'numero_casos': []})
+            n_ira = len(df_ira)
             
-            # 1. Procesar IRA Agregado (casos por año)
-            if 'ira_agregado' in extracted_data and extracted_data['ira_agregado'] is not None:
-                df_ira = extracted_data['ira_agregado'].copy()
-                
-                # Para datos agregados, crear un registro por año
-                for _, row in df_ira.iterrows():
-                    hecho = {
-                        'Fecha': pd.Timestamp(year=row['anio'], month=1, day=1).date(),
-                        'Anio': row['anio'],
-                        'Sexo': None,
-                        'Migrante': None,
-                        'Localidad': None,
-                        'CodigoLocalidad': None,
-                        'EnfoqueDiferencial': None,
-                        'RegimenSeguridadSocial': None,
-                        'GrupoEtario': None,
-                        'TipoEnfermedad': 'IRA General',
-                        'NumeroCasos': row['numero_casos']
-                    }
-                    hechos_list.append(hecho)
+            # 2. Casos individuales (neumonía e IRA menores de 5 años): se reutilizan
+            # los códigos categóricos de la tabla de casos, anteponiendo las filas
+            # de IRA Agregado con código nulo
+            anio = np.concatenate([
+                df_ira['anio'].to_numpy(dtype=np.int64), df_casos['Anio'].to_numpy(dtype=np.int64)
+            ])
+            if len(anio) == 0:
+                raise ValueError("No se generaron hechos de hospitalización")
             
-            # 2. Procesar Neumonía (casos individuales)
-            if 'neumonia' in extracted_data and extracted_data['neumonia'] is not None:
-                df_neumonia = extracted_data['neumonia'].copy()
-                
-                for _, row in df_neumonia.iterrows():
-                    localidad = normalize_localidad(row['localidad'])
-                    # Agregar sufijo si no es None
-                    if localidad:
-                        localidad = f"{localidad}, Bogota, Colombia"
-                    
-                    hecho = {
-                        'Fecha': pd.Timestamp(year=row['anio'], month=1, day=1).date(),
-                        'Anio': row['anio'],
-                        'Sexo': normalize_sexo(row['sexo']),
-                        'Migrante': row['migrante'],
-                        'Localidad': localidad,
-                        'CodigoLocalidad': row['codigo_localidad'],
-                        'EnfoqueDiferencial': row['enfoque_diferencial'],
-                        'RegimenSeguridadSocial': row['regimen_seguridad'],  # Nombre correcto de la columna
-                        'GrupoEtario': 'Menores de 5 años',  # Default igual que en DimPaciente
-                        'TipoEnfermedad': 'Neumonía',
-                        'NumeroCasos': 1  # Cada fila es un caso
-                    }
-                    hechos_list.append(hecho)
+            hechos = {}
+            for col in COLUMNAS_DIMENSION:
+                if col in ('Fecha', 'Anio'):
+                    continue
+                categorico = df_casos[col].array
+                codigos_ira = np.full(n_ira, -1, dtype=np.int64)
+                if col == 'TipoEnfermedad':
+                    if TIPO_IRA_AGREGADO not in categorico.categories:
+                        categorico = categorico.add_categories([TIPO_IRA_AGREGADO])
+                    codigos_ira[:] = categorico.categories.get_loc(TIPO_IRA_AGREGADO)
+                hechos[col] = pd.Categorical.from_codes(
+                    np.concatenate([codigos_ira, categorico.codes]), categories=categorico.categories
+                )
             
-            # 3. Procesar IRA menores de 5 años
-            if 'ira5anos' in extracted_data and extracted_data['ira5anos'] is not None:
-                df_ira5 = extracted_data['ira5anos'].copy()
-                
-                for _, row in df_ira5.iterrows():
-                    localidad = normalize_localidad(row['localidad'])
-                    # Agregar sufijo si no es None
-                    if localidad:
-                        localidad = f"{localidad}, Bogota, Colombia"
-                    
-                    hecho = {
-                        'Fecha': pd.Timestamp(year=row['anio'], month=1, day=1).date(),
-                        'Anio': row['anio'],
-                        'Sexo': normalize_sexo(row['sexo']),
-                        'Migrante': row['migrante'],
-                        'Localidad': localidad,
-                        'CodigoLocalidad': row['codigo_localidad'],
-                        'EnfoqueDiferencial': row['enfoque_diferencial'],
-                        'RegimenSeguridadSocial': row['regimen_seguridad'],  # Nombre correcto de la columna
-                        'GrupoEtario': row['grupo_etario'],
-                        'TipoEnfermedad': 'IRA',
-                        'NumeroCasos': 1  # Cada fila es un caso
-                    }
-                    hechos_list.append(hecho)
+            # Fecha = 1 de enero del año (se construye solo para los años únicos)
+            anios, inverso = np.unique(anio, return_inverse=True)
+            fechas = np.array([pd.Timestamp(year=int(a), month=1, day=1).date() for a in anios], dtype=object)
             
-            if not hechos_list:
-                raise ValueError("No se generaron hechos de hospitalización")
+            self.df_hechos = pd.DataFrame({'Fecha': fechas[inverso], 'Anio': anio, **hechos})[COLUMNAS_DIMENSION]
+            self.df_hechos['NumeroCasos'] = np.concatenate([
+                df_ira['numero_casos'].to_numpy(dtype=np.int64), np.ones(len(df_casos), dtype=np.int64)
+            ])
             
-            # Crear DataFrame de hechos
-            self.df_hechos = pd.DataFrame(hechos_list)
+            # Pre-agregar casos idénticos si está habilitado
+            if self.preagregar:
+                self.df_hechos = self._preagregar(self.df_hechos)
             
             self.logger.success(f"HechoHospitalizaciones transformado: {len(self.df_hechos)} registros")
             self.logger.info(f"Total casos: {self.df_hechos['NumeroCasos'].sum():,}")
@@ -112,6 +98,32 @@ class HechoHospitalizacionesTransformer:
             self.logger.error(f"Error en transformación de HechoHospitalizaciones: {str(e)}")
             raise
     
+    def _preagregar(self, df):
+        """
+        Agrupa los hechos por la tupla completa de dimensiones sumando NumeroCasos
+        Verifica que el total de casos se conserve
+        """
+        total_antes = df['NumeroCasos'].sum()
+        registros_antes = len(df)
+        
+        # dropna=False conserva las combinaciones con dimensiones nulas (ej. IRA General)
+        df_agregado = df.groupby(
+            COLUMNAS_DIMENSION, dropna=False, sort=False, observed=True
+        )['NumeroCasos'].sum().reset_index()
+        
+        total_despues = df_agregado['NumeroCasos'].sum()
+        if total_despues != total_antes:
+            raise ValueError(
+                f"La pre-agregación alteró el total de casos: {total_antes:,} -> {total_despues:,}"
+            )
+        
+        factor = registros_antes / len(df_agregado) if len(df_agregado) else 0
+        self.logger.info(
+            f"Pre-agregación: {registros_antes:,} -> {len(df_agregado):,} registros "
+            f"(factor {factor:.1f}x, total casos verificado: {total_despues:,})"
+        )
+        return df_agregado
+    
     def get_dataframe(self):
         """Retorna el DataFrame transformado"""
         if self.df_hechos is None:
@@ -126,17 +138,17 @@ class HechoHospitalizacionesTransformer:
         summary = {
             'total_registros': len(self.df_hechos),
             'total_casos': self.df_hechos['NumeroCasos'].sum(),
-            'por_enfermedad': self.df_hechos.groupby('TipoEnfermedad')['NumeroCasos'].sum().to_dict(),
+            'por_enfermedad': self.df_hechos.groupby('TipoEnfermedad', observed=True)['NumeroCasos'].sum().to_dict(),
             'por_anio': self.df_hechos.groupby('Anio')['NumeroCasos'].sum().to_dict(),
             'años_cubiertos': sorted(self.df_hechos['Anio'].unique().tolist())
         }
         return summary
 
 # Función de conveniencia
-def transform_hecho_hospitalizaciones(extracted_data):
+def transform_hecho_hospitalizaciones(extracted_data, preagregar=False, df_casos=None):
     """Transforma el hecho de hospitalizaciones"""
-    transformer = HechoHospitalizacionesTransformer()
-    return transformer.transform(extracted_data)
+    transformer = HechoHospitalizacionesTransformer(preagregar=preagregar)
+    return transformer.transform(extracted_data, df_casos)
 
 if __name__ == "__main__":
     # Test del transformador
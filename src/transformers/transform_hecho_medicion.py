@@ -2,104 +2,74 @@
 Transformador para HechoMedicionAmbiental
 Prepara datos de mediciones de CO y PM2.5
 """
+import numpy as np
 import pandas as pd
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.logger import ETLLogger
+from src.utils.gazetteer import gazetteer, normalizar_estaciones
+from src.utils.motor_dataframe import crear_motor
+
+# Fuentes de mediciones: (llave en extracted_data, columna, indicador, tipo)
+FUENTES_MEDICION = [
+    ('sisaire_co', 'CO', 'Monóxido de Carbono (CO)', 'CO'),
+    ('iboca_pm25', 'PM25', 'Material Particulado PM2.5', 'PM25'),
+]
 
 class HechoMedicionAmbientalTransformer:
     """Transformador para el hecho de mediciones ambientales"""
     
-    def __init__(self):
+    def __init__(self, motor=None):
+        """
+        Args:
+            motor: Motor de DataFrame (por defecto pandas)
+        """
         self.logger = ETLLogger('HechoMedicionAmbientalTransformer')
+        self.motor = motor or crear_motor()
         self.df_hecho = None
     
     def transform(self, extracted_data):
         """
         Transforma los datos de mediciones ambientales en el hecho
+        
+        Cada fila lleva la etiqueta de su localidad y el código entero del
+        gazetteer (codigo_localidad), que es la llave del cruce con DimUbicacion.
         """
         try:
             self.logger.info("Iniciando transformación de HechoMedicionAmbiental...")
             
-            records = []
+            gaz = gazetteer()
             
-            # Mapeo de estaciones a localidades de Bogotá
-            # Las estaciones se mapean a localidades aproximadas según su ubicación
-            estacion_a_localidad = {
-                'USME': 'Usme, Bogota, Colombia',
-                'TUNAL': 'Tunjuelito, Bogota, Colombia',
-                'KENNEDY': 'Kennedy, Bogota, Colombia',
-                'SUBA': 'Suba, Bogota, Colombia',
-                'FONTIBON': 'Fontibón, Bogota, Colombia',
-                'FONTIBÓN': 'Fontibón, Bogota, Colombia',
-                'PUENTE ARANDA': 'Puente Aranda, Bogota, Colombia',
-                'CARVAJAL': 'Kennedy, Bogota, Colombia',
-                'LAS FERIAS': 'Engativá, Bogota, Colombia',
-                'GUAYMARAL': 'Suba, Bogota, Colombia',
-                'USAQUEN': 'Usaquén, Bogota, Colombia',
-                'USAQUÉN': 'Usaquén, Bogota, Colombia',
-                'SAN CRISTOBAL': 'San Cristóbal, Bogota, Colombia',
-                'SAN CRISTÓBAL': 'San Cristóbal, Bogota, Colombia',
-                'ENGATIVA': 'Engativá, Bogota, Colombia',
-                'ENGATIVÁ': 'Engativá, Bogota, Colombia',
-                'CIUDAD BOLIVAR': 'Ciudad Bolívar, Bogota, Colombia',
-                'CIUDAD BOLÍVAR': 'Ciudad Bolívar, Bogota, Colombia',
-                'BOLIVIA': 'Ciudad Bolívar, Bogota, Colombia',
-                'CDAR': 'Fontibón, Bogota, Colombia',
-                'COLINA': 'Suba, Bogota, Colombia',
-                'SEVILLANA': 'Kennedy, Bogota, Colombia',
-                'MOVIL 7MA': 'Sin Información, Bogota, Colombia',
-                'MÓVIL 7MA': 'Sin Información, Bogota, Colombia',
-                'MINAMBIENTE': 'Santa Fe, Bogota, Colombia',
-                'JAZMIN': 'Puente Aranda, Bogota, Colombia',
-                'JAZMÍN': 'Puente Aranda, Bogota, Colombia'
-            }
-            
-            # Procesar SISAIRE-CO
-            if 'sisaire_co' in extracted_data and extracted_data['sisaire_co'] is not None:
-                self.logger.info("Procesando mediciones de CO...")
-                df_co = extracted_data['sisaire_co'].copy()
+            partes = []
+            for llave, columna, indicador, tipo in FUENTES_MEDICION:
+                df = extracted_data.get(llave)
+                if df is None:
+                    continue
+                self.logger.info(f"Procesando mediciones de {tipo}...")
                 
-                for _, row in df_co.iterrows():
-                    estacion = str(row['Estacion']).strip().upper()
-                    # Buscar la localidad correspondiente
-                    localidad = estacion_a_localidad.get(estacion, 'Sin Información, Bogota, Colombia')
-                    
-                    records.append({
-                        'fecha': row['fecha'],
-                        'hora': row['hora'],
-                        'indicador': 'Monóxido de Carbono (CO)',
-                        'localidad': localidad,
-                        'concentracion': row['CO'],
-                        'tipo_medicion': 'CO'
-                    })
-            
-            # Procesar IBOCA-PM25
-            if 'iboca_pm25' in extracted_data and extracted_data['iboca_pm25'] is not None:
-                self.logger.info("Procesando mediciones de PM2.5...")
-                df_pm25 = extracted_data['iboca_pm25'].copy()
+                # Localidad de cada estación con el gazetteer (se resuelven solo
+                # los nombres únicos, tolerando tildes y texto mal decodificado)
+                estacion = normalizar_estaciones(df['Estacion'])
+                codigos = gaz.resolver_estaciones(estacion).to_numpy()
                 
-                for _, row in df_pm25.iterrows():
-                    estacion = str(row['Estacion']).strip().upper()
-                    # Buscar la localidad correspondiente
-                    localidad = estacion_a_localidad.get(estacion, 'Sin Información, Bogota, Colombia')
-                    
-                    records.append({
-                        'fecha': row['fecha'],
-                        'hora': row['hora'],
-                        'indicador': 'Material Particulado PM2.5',
-                        'localidad': localidad,
-                        'concentracion': row['PM25'],
-                        'tipo_medicion': 'PM25'
-                    })
+                partes.append(pd.DataFrame({
+                    'fecha': df['fecha'].to_numpy(dtype=object),
+                    'hora': df['hora'].to_numpy(dtype=np.int64),
+                    'estacion': estacion.to_numpy(dtype=object),
+                    'indicador': indicador,
+                    'localidad': gaz.etiquetas(codigos),
+                    'codigo_localidad': codigos,
+                    'concentracion': df[columna].to_numpy(dtype=np.float64),
+                    'tipo_medicion': tipo
+                }))
             
-            if not records:
+            if not partes:
                 raise ValueError("No se generaron registros de mediciones")
             
             # Crear DataFrame del hecho
-            self.df_hecho = pd.DataFrame(records)
+            self.df_hecho = self.motor.concatenar(partes)
             
             # Estadísticas
             total_co_records = self.df_hecho[self.df_hecho['tipo_medicion'] == 'CO'].shape[0]
@@ -110,7 +80,7 @@ class HechoMedicionAmbientalTransformer:
             self.logger.info(f"Total mediciones PM2.5: {total_pm25_records:,}")
             
             return self.df_hecho
-            
+        
         except Exception as e:
             self.logger.error(f"Error en transformación de HechoMedicionAmbiental: {str(e)}")
             raise
@@ -122,9 +92,9 @@ class HechoMedicionAmbientalTransformer:
         return self.df_hecho
 
 # Función de conveniencia
-def transform_hecho_medicion_ambiental(extracted_data):
+def transform_hecho_medicion_ambiental(extracted_data, motor=None):
     """Transforma el hecho de mediciones ambientales"""
-    transformer = HechoMedicionAmbientalTransformer()
+    transformer = HechoMedicionAmbientalTransformer(motor)
     return transformer.transform(extracted_data)
 
 if __name__ == "__main__":
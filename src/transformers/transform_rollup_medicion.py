@@ -0,0 +1,219 @@
+"""
+Transformador para los rollups de HechoMedicionAmbiental
+Genera HechoMedicionDiaria y HechoMedicionMensual por localidad e indicador
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.utils.logger import ETLLogger
+from src.utils.air_quality import UMBRALES_HORA, CALIDAD_VALIDA
+from src.utils.group_stats import combine_codes, split_codes, grouped_stats
+from src.utils.motor_dataframe import crear_motor
+
+# Niveles de rollup disponibles
+NIVELES_ROLLUP = ('diaria', 'mensual')
+
+class RollupMedicionTransformer:
+    """
+    Transformador de rollups diario y mensual de mediciones ambientales
+    
+    El rollup diario se calcula en una sola pasada ordenada sobre las
+    mediciones horarias; el mensual se deriva del diario (sumas, conteos y
+    máximos se combinan sin volver a leer las mediciones horarias). Si las
+    mediciones traen la exposición móvil (ExposicionMovilTransformer), cada
+    rollup lleva también la máxima media móvil regulatoria y el máximo IBOCA.
+    """
+    
+    def __init__(self, motor=None):
+        """
+        Args:
+            motor: Motor de DataFrame (por defecto pandas)
+        """
+        self.logger = ETLLogger('RollupMedicionTransformer')
+        self.motor = motor or crear_motor()
+        self.rollups = {}
+    
+    def transform(self, df_medicion, niveles=NIVELES_ROLLUP, df_completitud=None):
+        """
+        Genera los rollups solicitados
+        
+        Args:
+            df_medicion: DataFrame de HechoMedicionAmbientalTransformer o de
+                ExposicionMovilTransformer (con media_movil e indice_iboca)
+            niveles: Niveles a generar ('diaria', 'mensual')
+            df_completitud: Completitud diaria de CompletitudMedicionTransformer
+                (opcional); agrega horas_esperadas y completitud_pct
+        
+        Returns:
+            Diccionario {nivel: DataFrame}
+        """
+        try:
+            self.logger.info(f"Iniciando rollups de mediciones: {', '.join(niveles)}...")
+            
+            for nivel in niveles:
+                if nivel not in NIVELES_ROLLUP:
+                    raise ValueError(f"Nivel de rollup no soportado: {nivel}")
+            
+            df_diaria = self._rollup_diario(df_medicion)
+            
+            if 'mensual' in niveles:
+                self.rollups['mensual'] = self._agregar_completitud(
+                    self._rollup_mensual(df_diaria), df_completitud, ['anio', 'mes']
+                )
+                self.logger.success(f"HechoMedicionMensual transformado: {len(self.rollups['mensual'])} registros")
+            
+            if 'diaria' in niveles:
+                self.rollups['diaria'] = self._agregar_completitud(
+                    df_diaria.drop(columns=['suma_concentracion']), df_completitud, ['fecha']
+                )
+                self.logger.success(f"HechoMedicionDiaria transformado: {len(self.rollups['diaria'])} registros")
+            
+            return self.rollups
+        
+        except Exception as e:
+            self.logger.error(f"Error en rollups de mediciones: {str(e)}")
+            raise
+    
+    def _rollup_diario(self, df_medicion):
+        """Agrega las mediciones horarias por (fecha, localidad, indicador)"""
+        fecha_codes, fecha_uniques = pd.factorize(df_medicion['fecha'])
+        loc_codes, loc_uniques = pd.factorize(df_medicion['localidad'])
+        ind_codes, ind_uniques = pd.factorize(df_medicion['indicador'])
+        
+        valid = (fecha_codes >= 0) & (loc_codes >= 0) & (ind_codes >= 0)
+        
+        # Solo mediciones válidas según la revisión de calidad
+        if 'codigo_calidad' in df_medicion.columns:
+            valid &= df_medicion['codigo_calidad'].to_numpy() == CALIDAD_VALIDA
+        
+        # Superación del umbral horario según el tipo de medición
+        umbral = self.motor.mapear_categorico(df_medicion['tipo_medicion'], UMBRALES_HORA, default=np.inf)
+        valores = df_medicion['concentracion'].to_numpy(dtype=np.float64)
+        sobre_umbral = valores > umbral.astype(np.float64)
+        
+        sizes = [len(fecha_uniques), len(loc_uniques), len(ind_uniques)]
+        keys = combine_codes([fecha_codes[valid], loc_codes[valid], ind_codes[valid]], sizes)
+        stats = grouped_stats(keys, valores[valid])
+        
+        # Horas distintas del día con alguna medición válida sobre el umbral: varias
+        # estaciones de la localidad sobre el umbral en la misma hora cuentan una vez
+        sobre = sobre_umbral[valid]
+        horas = df_medicion['hora'].to_numpy(dtype=np.int64)[valid][sobre]
+        llave_hora = np.unique(keys[sobre] * 24 + horas)
+        horas_sobre_umbral = np.bincount(
+            np.searchsorted(stats['key'], llave_hora // 24), minlength=len(stats['key'])
+        )
+        
+        fecha, loc, ind = split_codes(stats['key'], sizes)
+        
+        df_diaria = pd.DataFrame({
+            'fecha': pd.to_datetime(np.asarray(fecha_uniques, dtype=object)[fecha]),
+            'localidad': np.asarray(loc_uniques, dtype=object)[loc],
+            'indicador': np.asarray(ind_uniques, dtype=object)[ind],
+            'concentracion_avg': stats['mean'],
+            'concentracion_max': stats['max'],
+            'num_mediciones': stats['count'],
+            'horas_sobre_umbral': horas_sobre_umbral.astype(np.int64),
+            'suma_concentracion': stats['sum'],
+        })
+        
+        # Máximos del día de la exposición móvil (media regulatoria e índice IBOCA)
+        # (solo filas con concentración: las demás no forman grupo en grouped_stats)
+        if 'media_movil' in df_medicion.columns:
+            con_valor = ~np.isnan(valores[valid])
+            grupo = np.searchsorted(stats['key'], keys[con_valor])
+            for columna in ('media_movil', 'indice_iboca'):
+                df_diaria[f'{columna}_max'] = self._maximo_por_grupo(
+                    grupo, df_medicion[columna].to_numpy(dtype=np.float64)[valid][con_valor], len(df_diaria)
+                )
+        return df_diaria
+    
+    @staticmethod
+    def _maximo_por_grupo(grupo, valores, n_grupos):
+        """Máximo por grupo ignorando NaN (NaN si el grupo no tiene valores)"""
+        maximo = np.full(n_grupos, np.nan)
+        np.fmax.at(maximo, grupo, valores)
+        return maximo
+    
+    def _rollup_mensual(self, df_diaria):
+        """Combina los agregados diarios en agregados mensuales"""
+        df = df_diaria.assign(
+            anio=df_diaria['fecha'].dt.year,
+            mes=df_diaria['fecha'].dt.month
+        )
+        
+        agregaciones = {
+            'suma_concentracion': ('suma_concentracion', 'sum'),
+            'concentracion_max': ('concentracion_max', 'max'),
+            'num_mediciones': ('num_mediciones', 'sum'),
+            'horas_sobre_umbral': ('horas_sobre_umbral', 'sum')
+        }
+        for columna in ('media_movil_max', 'indice_iboca_max'):
+            if columna in df.columns:
+                agregaciones[columna] = (columna, 'max')
+        df_mensual = self.motor.agrupar(df, ['anio', 'mes', 'localidad', 'indicador'], agregaciones)
+        
+        df_mensual.insert(
+            4, 'concentracion_avg',
+            df_mensual['suma_concentracion'] / df_mensual['num_mediciones']
+        )
+        return df_mensual.drop(columns=['suma_concentracion'])
+    
+    def _agregar_completitud(self, df_rollup, df_completitud, llave_tiempo):
+        """
+        Agrega horas esperadas y porcentaje de completitud (horas válidas / esperadas)
+        
+        La completitud mensual se suma desde la diaria, incluyendo los días sin
+        ninguna medición válida.
+        """
+        if df_completitud is None:
+            return df_rollup
+        
+        df_comp = df_completitud.assign(fecha=pd.to_datetime(df_completitud['fecha']).astype('datetime64[ns]'))
+        if llave_tiempo == ['anio', 'mes']:
+            df_comp = df_comp.assign(anio=df_comp['fecha'].dt.year, mes=df_comp['fecha'].dt.month)
+        else:
+            df_rollup = df_rollup.assign(fecha=df_rollup['fecha'].astype('datetime64[ns]'))
+        
+        # La agrupación queda en el formato nativo del motor y se combina sin pasar por pandas
+        llave = llave_tiempo + ['localidad', 'indicador']
+        df_comp = self.motor.agrupar(df_comp, llave, {
+            'horas_esperadas': ('horas_esperadas', 'sum'),
+            'horas_validas': ('horas_validas', 'sum')
+        }, ordenar=False, nativo=True)
+        
+        df = self.motor.combinar(df_rollup, df_comp, on=llave, how='left')
+        df['completitud_pct'] = 100.0 * df['horas_validas'] / df['horas_esperadas']
+        return df.drop(columns=['horas_validas'])
+    
+    def get_dataframe(self, nivel):
+        """Retorna el rollup transformado de un nivel"""
+        if nivel not in self.rollups:
+            raise ValueError(f"No se ha transformado el rollup {nivel}. Ejecuta transform() primero.")
+        return self.rollups[nivel]
+
+# Función de conveniencia
+def transform_rollup_medicion(df_medicion, nivel, df_completitud=None, motor=None):
+    """Genera un solo rollup ('diaria' o 'mensual') para refrescarlo de forma independiente"""
+    transformer = RollupMedicionTransformer(motor)
+    return transformer.transform(df_medicion, niveles=(nivel,), df_completitud=df_completitud)[nivel]
+
+if __name__ == "__main__":
+    # Test del transformador
+    print("Testing RollupMedicionTransformer...")
+    from src.extractors.master_extractor import MasterExtractor
+    from src.transformers.transform_hecho_medicion import transform_hecho_medicion_ambiental
+    
+    extractor = MasterExtractor()
+    data = extractor.extract_all()
+    
+    from src.transformers.transform_exposicion_movil import transform_exposicion_movil
+    
+    transformer = RollupMedicionTransformer()
+    rollups = transformer.transform(transform_exposicion_movil(transform_hecho_medicion_ambiental(data)))
+    for nivel, df in rollups.items():
+        print(f"\n{nivel.upper()}: {len(df):,} registros")
+        print(df.head(10))
@@ -0,0 +1,100 @@
+"""
+Parámetros de calidad del aire para Bogotá
+Ventanas regulatorias e índice IBOCA por contaminante
+"""
+import numpy as np
+
+# Ventana móvil regulatoria por tipo de medición: (horas, horas mínimas con dato)
+# Se exige 75% de datos válidos dentro de la ventana
+VENTANAS_MOVILES = {
+    'PM25': (24, 18),
+    'CO': (8, 6),
+}
+
+# Umbral horario para contar horas de superación por tipo de medición (µg/m³)
+# PM2.5: norma de 24 horas (Res. 2254 de 2017); CO: norma de 1 hora
+UMBRALES_HORA = {
+    'PM25': 37.0,
+    'CO': 35000.0,
+}
+
+# Códigos de calidad de las mediciones (las filas se marcan, no se eliminan).
+# Si una medición falla varias pruebas se reporta el código menor
+CALIDAD_VALIDA = 0
+CALIDAD_NEGATIVA = 1
+CALIDAD_FUERA_RANGO = 2
+CALIDAD_SENSOR_PLANO = 3
+CALIDAD_PICO = 4
+CODIGOS_CALIDAD = {
+    CALIDAD_VALIDA: 'Válida',
+    CALIDAD_NEGATIVA: 'Valor negativo',
+    CALIDAD_FUERA_RANGO: 'Fuera de rango físico',
+    CALIDAD_SENSOR_PLANO: 'Sensor plano',
+    CALIDAD_PICO: 'Pico atípico',
+}
+
+# Rango físico plausible por tipo de medición (µg/m³)
+RANGOS_FISICOS = {
+    'PM25': (0.0, 1000.0),
+    'CO': (0.0, 60000.0),
+}
+
+# Parámetros de la revisión de calidad por estación:
+# - horas consecutivas con el mismo valor para considerar el sensor plano
+# - ventana centrada (horas) para la mediana/MAD móvil y umbral en MADs
+# - piso del MAD para no marcar picos en series casi constantes (µg/m³)
+HORAS_SENSOR_PLANO = 8
+VENTANA_PICOS = 25
+UMBRAL_PICO_MAD = 6.0
+PISO_MAD = {
+    'PM25': 2.0,
+    'CO': 50.0,
+}
+
+# Categorías del IBOCA y rangos del índice (0-500)
+CATEGORIAS_IBOCA = ['Favorable', 'Moderada', 'Regular', 'Mala', 'Muy mala', 'Peligrosa']
+RANGOS_INDICE_IBOCA = np.array([0, 50, 100, 150, 200, 300, 500], dtype=np.float64)
+
+# Puntos de corte de concentración por contaminante (µg/m³), alineados con RANGOS_INDICE_IBOCA
+# PM2.5 sobre media móvil de 24 horas, CO sobre media móvil de 8 horas
+PUNTOS_CORTE_IBOCA = {
+    'PM25': np.array([0, 12.5, 37.5, 55.5, 150.5, 250.5, 500.5], dtype=np.float64),
+    'CO': np.array([0, 5094.5, 10819.5, 14254.5, 17688.5, 34862.5, 57703.5], dtype=np.float64),
+}
+
+# Episodios de contaminación: horas consecutivas de una estación con la concentración
+# horaria sobre el inicio de la categoría IBOCA de alerta ('Regular')
+CATEGORIA_EPISODIO = CATEGORIAS_IBOCA.index('Regular')
+UMBRALES_EPISODIO = {
+    tipo: float(puntos[CATEGORIA_EPISODIO]) for tipo, puntos in PUNTOS_CORTE_IBOCA.items()
+}
+
+def calcular_iboca(concentraciones, tipo_medicion):
+    """
+    Calcula el índice IBOCA y su categoría con búsqueda binaria sobre los puntos de corte
+    
+    El índice se interpola linealmente dentro de cada rango. Los valores sobre
+    el último punto de corte se reportan como 500 (Peligrosa).
+    
+    Args:
+        concentraciones: Arreglo de concentraciones (media móvil regulatoria)
+        tipo_medicion: 'PM25' o 'CO'
+    
+    Returns:
+        Tupla (índice float64, código de categoría int8; -1 si la concentración es nula)
+    """
+    puntos = PUNTOS_CORTE_IBOCA[tipo_medicion]
+    c = np.asarray(concentraciones, dtype=np.float64)
+    nulos = np.isnan(c)
+    
+    c_acotada = np.clip(np.where(nulos, 0.0, c), puntos[0], puntos[-1])
+    rango = np.clip(np.searchsorted(puntos, c_acotada, side='right') - 1, 0, len(puntos) - 2)
+    
+    bp_lo, bp_hi = puntos[rango], puntos[rango + 1]
+    i_lo, i_hi = RANGOS_INDICE_IBOCA[rango], RANGOS_INDICE_IBOCA[rango + 1]
+    indice = i_lo + (i_hi - i_lo) * (c_acotada - bp_lo) / (bp_hi - bp_lo)
+    
+    indice[nulos] = np.nan
+    categoria = rango.astype(np.int8)
+    categoria[nulos] = -1
+    return indice, categoria
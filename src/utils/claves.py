@@ -0,0 +1,31 @@
+"""
+Llaves inteligentes (deterministas) para DimFecha y DimHora
+IDFecha = yyyymmdd, IDHora = hora del día (0-23)
+"""
+import numpy as np
+import pandas as pd
+
+# Columna de llave inteligente por dimensión
+CLAVES_INTELIGENTES = {
+    'DimFecha': 'IDFecha',
+    'DimHora': 'IDHora',
+}
+
+def id_fecha(fechas):
+    """
+    Calcula IDFecha = yyyymmdd sin consultar DimFecha
+    
+    Las fechas se factorizan: solo los valores únicos se convierten a datetime.
+    Las fechas nulas o inválidas quedan como NaN.
+    """
+    codes, uniques = pd.factorize(pd.Series(fechas), use_na_sentinel=True)
+    fechas_unicas = pd.to_datetime(pd.Series(uniques), errors='coerce')
+    ids_unicos = (
+        fechas_unicas.dt.year * 10000 + fechas_unicas.dt.month * 100 + fechas_unicas.dt.day
+    ).to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.where(codes >= 0, ids_unicos[np.maximum(codes, 0)], np.nan)
+
+def id_hora(horas):
+    """Calcula IDHora = hora (0-23) sin consultar DimHora; fuera de rango queda como NaN"""
+    horas = pd.to_numeric(pd.Series(horas), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.where((horas >= 0) & (horas <= 23), horas, np.nan)
@@ -0,0 +1,187 @@
+"""
+Correlaciones vectorizadas sobre arreglos con valores faltantes
+Pearson y Spearman por fila y bootstrap con índices de remuestreo compartidos
+"""
+import numpy as np
+
+# Mínimo de pares (x, y) sin nulos para reportar una correlación
+MIN_PERIODOS = 4
+
+# Mínimo de pares para reportar un intervalo bootstrap: con menos, las réplicas
+# repiten dos o tres puntos y el percentil degenera en [-1, 1]
+MIN_PERIODOS_IC = 6
+
+def pearson(x, y, min_periodos=MIN_PERIODOS):
+    """
+    Correlación de Pearson sobre el último eje usando solo los pares sin nulos
+    
+    Args:
+        x, y: Arreglos con NaN en los valores faltantes (se aplica broadcasting)
+        min_periodos: Mínimo de pares válidos
+    
+    Returns:
+        Tupla (correlación, número de pares); NaN si hay menos de
+        min_periodos pares o varianza cero
+    """
+    mask = ~np.isnan(x) & ~np.isnan(y)
+    n = mask.sum(axis=-1)
+    xm = np.where(mask, x, 0.0)
+    ym = np.where(mask, y, 0.0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mx = xm.sum(axis=-1) / n
+        my = ym.sum(axis=-1) / n
+        dx = np.where(mask, x - mx[..., None], 0.0)
+        dy = np.where(mask, y - my[..., None], 0.0)
+        cov = (dx * dy).sum(axis=-1)
+        var = (dx * dx).sum(axis=-1) * (dy * dy).sum(axis=-1)
+        # El redondeo puede dejar |r| apenas por encima de 1
+        correlacion = np.clip(cov / np.sqrt(var), -1.0, 1.0)
+    
+    correlacion[(n < min_periodos) | ~np.isfinite(correlacion)] = np.nan
+    return correlacion, n
+
+def rangos_promedio(valores):
+    """
+    Rangos (1..n, empates promediados) sobre el último eje; los NaN quedan como NaN
+    
+    Un solo ordenamiento por (fila, valor) resuelve todas las filas a la vez.
+    """
+    return _rangos(valores)[0]
+
+def _rangos(valores):
+    """
+    Rangos promedio y densos (0..k-1) sobre el último eje
+    
+    Returns:
+        Tupla (rangos promedio con NaN en los faltantes, rangos densos con 0
+        en los faltantes)
+    """
+    forma = valores.shape
+    planos = valores.reshape(-1, forma[-1])
+    n_filas, n_cols = planos.shape
+    fila = np.repeat(np.arange(n_filas), n_cols)
+    v = planos.ravel()
+    
+    # Los NaN quedan al final de cada fila y nunca son iguales entre sí
+    orden = np.lexsort((v, fila))
+    v_ord, fila_ord = v[orden], fila[orden]
+    nueva_fila = np.r_[True, fila_ord[1:] != fila_ord[:-1]]
+    nueva = nueva_fila | np.r_[False, v_ord[1:] != v_ord[:-1]]
+    corrida = np.cumsum(nueva) - 1
+    inicio = np.flatnonzero(nueva)
+    fin = np.r_[inicio[1:], len(v_ord)]
+    posicion = np.arange(len(v_ord)) - fila_ord * n_cols
+    
+    promedio = np.empty(len(v), dtype=np.float64)
+    promedio[orden] = ((posicion[inicio] + posicion[fin - 1]) / 2.0 + 1.0)[corrida]
+    densos = np.empty(len(v), dtype=np.int64)
+    densos[orden] = corrida - corrida[np.flatnonzero(nueva_fila)][fila_ord]
+    
+    faltantes = np.isnan(v)
+    promedio[faltantes] = np.nan
+    densos[faltantes] = 0
+    return promedio.reshape(forma), densos.reshape(forma)
+
+def compactar(x, y):
+    """
+    Mueve a la izquierda los pares válidos de cada fila
+    
+    Returns:
+        Tupla (x, y compactados con NaN al final, número de pares por fila)
+    """
+    mask = ~np.isnan(x) & ~np.isnan(y)
+    n = mask.sum(axis=-1)
+    orden = np.argsort(~mask, axis=-1, kind='stable')
+    xc = np.take_along_axis(np.where(mask, x, np.nan), orden, axis=-1)
+    yc = np.take_along_axis(np.where(mask, y, np.nan), orden, axis=-1)
+    return xc, yc, n
+
+def bootstrap_correlaciones(x, y, n_bootstrap, nivel_confianza=0.95, semilla=0,
+                            min_periodos=MIN_PERIODOS, min_periodos_ic=MIN_PERIODOS_IC, bloque=500):
+    """
+    Pearson y Spearman con intervalos de confianza bootstrap (percentil) por fila
+    
+    Las uniformes de remuestreo (n_bootstrap x n_max) se generan una sola vez y
+    se escalan al número de pares de cada fila, formando los índices 3-D
+    (fila, réplica, posición) que se aplican a todas las filas a la vez. Los
+    rangos de cada réplica se obtienen contando, por réplica, cuántas veces
+    aparece cada rango denso de la muestra original (sin reordenar).
+    
+    Args:
+        x, y: Arreglos 2-D (fila, periodo) con NaN en los valores faltantes
+        n_bootstrap: Número de réplicas
+        nivel_confianza: Nivel del intervalo (0-1)
+        semilla: Semilla del generador aleatorio
+        min_periodos: Mínimo de pares válidos por fila
+        min_periodos_ic: Mínimo de pares válidos para reportar el intervalo
+            (con menos, los límites son NaN)
+        bloque: Réplicas procesadas por bloque (limita la memoria)
+    
+    Returns:
+        Diccionario de arreglos por fila: n, pearson, pearson_inf, pearson_sup,
+        spearman, spearman_inf, spearman_sup
+    """
+    xc, yc, n = compactar(x, y)
+    n_filas, n_max = xc.shape
+    
+    # Los rangos densos (0..k-1) de la muestra original permiten recalcular
+    # los rangos de cada réplica sin reordenar
+    rangos_x, densos_x = _rangos(xc)
+    rangos_y, densos_y = _rangos(yc)
+    
+    resultado = {'n': n}
+    resultado['pearson'], _ = pearson(xc, yc, min_periodos)
+    resultado['spearman'], _ = pearson(rangos_x, rangos_y, min_periodos)
+    
+    rng = np.random.default_rng(semilla)
+    uniformes = rng.random((n_bootstrap, n_max))
+    indices = np.minimum((uniformes[None, :, :] * n[:, None, None]).astype(np.int32),
+                         np.maximum(n - 1, 0)[:, None, None])
+    validas = np.arange(n_max)[None, None, :] < n[:, None, None]
+    
+    filas = np.arange(n_filas)[:, None, None]
+    boot_p = np.empty((n_filas, n_bootstrap))
+    boot_s = np.empty((n_filas, n_bootstrap))
+    for inicio in range(0, n_bootstrap, bloque):
+        idx = indices[:, inicio:inicio + bloque]
+        mask = np.broadcast_to(validas, idx.shape)
+        
+        bx = np.where(mask, xc[filas, idx], np.nan)
+        by = np.where(mask, yc[filas, idx], np.nan)
+        boot_p[:, inicio:inicio + bloque], _ = pearson(bx, by, min_periodos)
+        
+        rx = _rangos_replica(densos_x[filas, idx], mask, n_max)
+        ry = _rangos_replica(densos_y[filas, idx], mask, n_max)
+        boot_s[:, inicio:inicio + bloque], _ = pearson(rx, ry, min_periodos)
+    
+    alfa = (1.0 - nivel_confianza) / 2.0
+    with np.errstate(invalid='ignore'):
+        for nombre, boot in (('pearson', boot_p), ('spearman', boot_s)):
+            sin_nulos = ~np.isnan(boot).all(axis=1)
+            inf = np.full(n_filas, np.nan)
+            sup = np.full(n_filas, np.nan)
+            if sin_nulos.any():
+                inf[sin_nulos], sup[sin_nulos] = np.nanquantile(boot[sin_nulos], [alfa, 1.0 - alfa], axis=1)
+            invalida = np.isnan(resultado[nombre]) | (n < min_periodos_ic)
+            inf[invalida] = np.nan
+            sup[invalida] = np.nan
+            resultado[f'{nombre}_inf'] = inf
+            resultado[f'{nombre}_sup'] = sup
+    
+    return resultado
+
+def _rangos_replica(densos, mask, n_max):
+    """
+    Rangos promedio de cada réplica a partir de los rangos densos remuestreados
+    
+    rango = (# valores menores) + (# valores iguales + 1) / 2, con los conteos
+    por réplica obtenidos con un solo bincount.
+    """
+    n_filas, n_rep, _ = densos.shape
+    replica = (np.arange(n_filas * n_rep, dtype=np.int64) * n_max).reshape(n_filas, n_rep, 1)
+    llave = replica + densos
+    conteo = np.bincount(llave[mask], minlength=n_filas * n_rep * n_max).reshape(n_filas, n_rep, n_max)
+    menores = np.cumsum(conteo, axis=-1) - conteo
+    rangos = np.take_along_axis(menores, densos, axis=-1) + (np.take_along_axis(conteo, densos, axis=-1) + 1) / 2.0
+    return np.where(mask, rangos, np.nan)
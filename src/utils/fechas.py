@@ -0,0 +1,86 @@
+"""
+Parseo vectorizado de columnas de fecha
+Estándar para las columnas de fecha que ingieren los extractores (mediciones
+horarias y archivos de casos): cada formato se prueba sobre la serie completa
+de valores aún no parseados, nunca valor por valor con excepciones.
+"""
+import numpy as np
+import pandas as pd
+from datetime import date
+
+# Formatos aceptados, en el orden en que se prueban sin pista de la fuente
+FORMATOS_FECHA = [
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y',
+    '%Y/%m/%d %H:%M',
+    '%Y/%m/%d',
+    '%d-%m-%Y %H:%M',
+    '%d-%m-%Y',
+]
+
+# Pista por fuente: formatos que funcionaron en la última columna parseada,
+# del más al menos frecuente (se prueban primero en la siguiente)
+_FORMATOS_POR_FUENTE = {}
+
+def formatos_para(fuente, formatos=FORMATOS_FECHA):
+    """Formatos en orden de prueba: primero los que funcionaron para la fuente"""
+    pista = _FORMATOS_POR_FUENTE.get(fuente, [])
+    return pista + [fmt for fmt in formatos if fmt not in pista]
+
+def parsear_fechas(valores, formatos=FORMATOS_FECHA, fuente=None):
+    """
+    Parsea una columna de fechas en varios formatos (vectorizado)
+    
+    Se trabaja sobre los valores únicos: los que ya son fechas (p. ej. celdas
+    de Excel) se convierten directamente y el texto se prueba formato por
+    formato solo sobre el subconjunto que sigue sin parsear. Si se da una
+    fuente, los formatos que le funcionaron se recuerdan y se prueban primero.
+    
+    Args:
+        valores: Serie (o arreglo) con fechas como texto, datetime o nulos
+        formatos: Formatos strptime a probar
+        fuente: Nombre de la fuente para memorizar sus formatos (opcional)
+    
+    Returns:
+        Tupla (fechas, fallidas): Serie datetime64 con NaT donde no se pudo
+        parsear y máscara booleana de los valores no nulos que fallaron
+    """
+    serie = pd.Series(valores)
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return serie, np.zeros(len(serie), dtype=bool)
+    
+    codes, uniques = pd.factorize(serie)
+    unicos = pd.Series(np.asarray(uniques, dtype=object))
+    parseadas = pd.Series(pd.NaT, index=unicos.index, dtype=object)
+    
+    # Valores que ya son fechas
+    nativas = unicos.map(lambda v: isinstance(v, (date, np.datetime64))).to_numpy(dtype=bool)
+    if nativas.any():
+        parseadas[nativas] = list(pd.to_datetime(unicos[nativas]))
+    
+    # Texto: cada formato solo sobre lo que sigue pendiente
+    texto = unicos.astype(str).str.strip()
+    pendientes = ~nativas
+    aciertos = {}
+    for fmt in formatos_para(fuente, formatos):
+        if not pendientes.any():
+            break
+        intento = pd.to_datetime(texto[pendientes], format=fmt, errors='coerce')
+        ok = intento.notna().to_numpy()
+        if ok.any():
+            parseadas[intento.index[ok]] = list(intento[ok])
+            aciertos[fmt] = int(ok.sum())
+            pendientes[intento.index[ok]] = False
+    
+    if fuente is not None and aciertos:
+        _FORMATOS_POR_FUENTE[fuente] = sorted(aciertos, key=aciertos.get, reverse=True)
+    
+    # Volver a las filas (code -1 = nulo -> NaT)
+    fechas_unicas = pd.to_datetime(parseadas)
+    fechas = pd.Series(fechas_unicas.reindex(codes).to_numpy(), index=serie.index)
+    fallidas = np.append(pendientes, False)[codes]
+    return fechas, fallidas
@@ -0,0 +1,184 @@
+"""
+Gazetteer de localidades de Bogotá
+La tabla canónica (código, nombre, alias, estaciones de monitoreo y centroide)
+se mantiene como datos en data_ref/localidades.csv. Los nombres se comparan plegados (sin
+tildes, en mayúsculas, con el texto mal decodificado reparado) contra un índice
+precompilado, y el código entero de localidad es la llave de los cruces.
+"""
+import unicodedata
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+RUTA_LOCALIDADES = Path(__file__).parent.parent.parent / 'data_ref' / 'localidades.csv'
+
+# Sufijo de las etiquetas de localidad (para geolocalización en Power BI)
+SUFIJO_LOCALIDAD = ', Bogota, Colombia'
+
+# Código de localidad asignado a valores sin correspondencia en el gazetteer
+CODIGO_SIN_INFORMACION = 0
+
+# Etiqueta de las estaciones y casos sin localidad
+LOCALIDAD_DEFAULT = f'Sin Información{SUFIJO_LOCALIDAD}'
+
+_NO_ALFANUMERICO = re.compile(r'[^A-Z0-9]+')
+_PREFIJO_CODIGO = re.compile(r'^\d+\s+-\s+')
+
+def reparar_texto(valor):
+    """
+    Repara texto UTF-8 decodificado como latin-1 o cp1251 ('BOLÃ\\x8dVAR',
+    'JAZMГ\\xadN'); el texto correcto se retorna sin cambios
+    """
+    for codificacion in ('latin-1', 'cp1251'):
+        try:
+            return valor.encode(codificacion).decode('utf-8')
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            continue
+    return valor
+
+def plegar(valor):
+    """Texto sin tildes, en mayúsculas y solo con letras y dígitos separados por un espacio"""
+    texto = unicodedata.normalize('NFKD', reparar_texto(str(valor).strip()))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).upper()
+    return _NO_ALFANUMERICO.sub(' ', texto).strip()
+
+def plegar_localidad(valor):
+    """Como plegar, quitando el sufijo ', Bogota, Colombia' y el código de '00 - Bogotá'"""
+    texto = str(valor).split(',')[0].strip()
+    return plegar(_PREFIJO_CODIGO.sub('', texto))
+
+def normalizar_estaciones(estaciones):
+    """
+    Normaliza nombres de estación (sin espacios externos, en mayúsculas)
+    
+    Solo se normalizan los nombres únicos (unas decenas) y se expanden por
+    código; los nulos quedan como el texto 'nan', igual que con astype(str).
+    """
+    serie = pd.Series(estaciones)
+    codes, uniques = pd.factorize(serie, use_na_sentinel=False)
+    normalizados = pd.Series(uniques, dtype=object).astype(str).str.strip().str.upper()
+    return pd.Series(normalizados.to_numpy(dtype=object)[codes], index=serie.index, dtype=object)
+
+def _alias(texto):
+    """Lista de alias separados por '|' (vacía si no hay)"""
+    return [a for a in texto.split('|') if a.strip()] if texto else []
+
+class Gazetteer:
+    """
+    Tabla canónica de localidades con índices plegados precompilados
+    
+    resolve() y resolver_estaciones() pliegan solo los valores únicos de la
+    serie y los buscan en un diccionario, así que el costo no depende del
+    número de filas sino de la cantidad de nombres distintos.
+    """
+    
+    def __init__(self, ruta=RUTA_LOCALIDADES):
+        catalogo = pd.read_csv(ruta, encoding='utf-8', dtype=str, keep_default_na=False)
+        self.codigos = catalogo['Codigo'].astype(int).to_numpy()
+        self.nombres = dict(zip(self.codigos, catalogo['Localidad']))
+        
+        # Etiqueta por código (arreglo indexado por el código entero)
+        self._etiquetas = np.full(self.codigos.max() + 1, LOCALIDAD_DEFAULT, dtype=object)
+        self._etiquetas[self.codigos] = [f"{n}{SUFIJO_LOCALIDAD}" for n in catalogo['Localidad']]
+        
+        # Centroide de cada localidad (columnas opcionales; sin coordenadas: NaN)
+        coordenadas = catalogo.reindex(columns=['Latitud', 'Longitud']).apply(pd.to_numeric, errors='coerce')
+        self._latitudes = coordenadas['Latitud']
+        self._longitudes = coordenadas['Longitud']
+        
+        # Índices plegados: alias -> código, estación -> código
+        self._indice = {}
+        self._indice_estaciones = {}
+        for codigo, fila in zip(self.codigos, catalogo.itertuples(index=False)):
+            for alias in [fila.Localidad, str(codigo)] + _alias(fila.Alias):
+                self._registrar(self._indice, plegar_localidad(alias), codigo)
+            for estacion in _alias(fila.Estaciones):
+                self._registrar(self._indice_estaciones, plegar(estacion), codigo)
+    
+    @staticmethod
+    def _registrar(indice, clave, codigo):
+        """Agrega una clave al índice; un alias no puede apuntar a dos localidades"""
+        if indice.get(clave, codigo) != codigo:
+            raise ValueError(f"Alias '{clave}' asignado a las localidades {indice[clave]} y {codigo}")
+        indice[clave] = codigo
+    
+    @staticmethod
+    def _buscar(valores, indice, plegado):
+        """Código por fila buscando cada valor único plegado (-1 sin correspondencia o nulo)"""
+        valores = pd.Series(valores)
+        codes, uniques = pd.factorize(valores)
+        encontrados = np.array([indice.get(plegado(v), -1) for v in uniques], dtype=np.int16)
+        # Centinela al final: los nulos (code -1) no tienen correspondencia
+        return np.append(encontrados, np.int16(-1))[codes]
+    
+    def resolve(self, valores, respaldo=None, default=CODIGO_SIN_INFORMACION):
+        """
+        Código entero de localidad de cada valor (vectorizado)
+        
+        Args:
+            valores: Serie de nombres de localidad en cualquier formato
+                ('Fontibón', 'FONTIBON', '09 - Fontibón', 'Fontibón, Bogota, Colombia')
+            respaldo: Serie alineada (p. ej. el código de localidad de la
+                fuente) que se usa donde valores no tiene correspondencia
+            default: Código para los valores que no se resuelven
+        
+        Returns:
+            Serie int16 con el índice de valores
+        """
+        indice = valores.index if isinstance(valores, pd.Series) else None
+        codigos = self._buscar(valores, self._indice, plegar_localidad)
+        if respaldo is not None:
+            faltantes = codigos < 0
+            codigos[faltantes] = self._buscar(respaldo, self._indice, plegar_localidad)[faltantes]
+        codigos[codigos < 0] = default
+        return pd.Series(codigos, index=indice, dtype=np.int16)
+    
+    def resolver_estaciones(self, estaciones, default=CODIGO_SIN_INFORMACION):
+        """Código de localidad de cada estación de monitoreo (vectorizado)"""
+        indice = estaciones.index if isinstance(estaciones, pd.Series) else None
+        codigos = self._buscar(estaciones, self._indice_estaciones, plegar)
+        codigos[codigos < 0] = default
+        return pd.Series(codigos, index=indice, dtype=np.int16)
+    
+    def etiquetas(self, codigos):
+        """Etiqueta 'Localidad, Bogota, Colombia' de cada código"""
+        return self._etiquetas[np.asarray(codigos, dtype=np.int64)]
+    
+    def centroides(self):
+        """
+        Centroide de las localidades con coordenadas en el catálogo
+        
+        Returns:
+            DataFrame con codigo_localidad, localidad (etiqueta), latitud y longitud
+        """
+        con_centroide = (self._latitudes.notna() & self._longitudes.notna()).to_numpy()
+        codigos = self.codigos[con_centroide]
+        return pd.DataFrame({
+            'codigo_localidad': codigos.astype(np.int16),
+            'localidad': self.etiquetas(codigos),
+            'latitud': self._latitudes.to_numpy(dtype=np.float64)[con_centroide],
+            'longitud': self._longitudes.to_numpy(dtype=np.float64)[con_centroide],
+        })
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    """Gazetteer compartido (el catálogo se lee e indexa una sola vez por proceso)"""
+    return Gazetteer()
+
+def ids_ubicacion_por_codigo(dim_ubicacion):
+    """
+    IDUbicacion por código de localidad a partir de DimUbicacion
+    
+    Las filas se resuelven por Localidad (y CodigoLocalidad como respaldo);
+    si varias filas comparten código se conserva la primera.
+    
+    Returns:
+        DataFrame con codigo_localidad e IDUbicacion (un registro por código)
+    """
+    codigos = gazetteer().resolve(dim_ubicacion['Localidad'], respaldo=dim_ubicacion.get('CodigoLocalidad'))
+    return pd.DataFrame({
+        'codigo_localidad': codigos.to_numpy(),
+        'IDUbicacion': dim_ubicacion['IDUbicacion'].to_numpy()
+    }).drop_duplicates(subset=['codigo_localidad'])
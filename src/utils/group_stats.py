@@ -0,0 +1,112 @@
+"""
+Estadísticas agrupadas vectorizadas sobre llaves enteras
+Calcula conteo, suma, mínimo, máximo y cuantiles en una sola pasada ordenada
+"""
+import numpy as np
+import pandas as pd
+
+def combine_codes(codes, sizes):
+    """
+    Combina varios arreglos de códigos enteros (0..size-1) en una sola llave int64
+    
+    Args:
+        codes: Lista de arreglos de códigos (mismo largo)
+        sizes: Cardinalidad de cada arreglo de códigos
+    
+    Returns:
+        Arreglo int64 con la llave combinada (orden lexicográfico de los códigos)
+    """
+    key = np.zeros(len(codes[0]), dtype=np.int64)
+    for code, size in zip(codes, sizes):
+        key = key * np.int64(size) + np.asarray(code, dtype=np.int64)
+    return key
+
+def split_codes(key, sizes):
+    """Operación inversa de combine_codes: retorna la lista de códigos"""
+    key = np.asarray(key, dtype=np.int64)
+    codes = []
+    for size in reversed(sizes):
+        key, code = np.divmod(key, np.int64(size))
+        codes.append(code)
+    return codes[::-1]
+
+def grouped_stats(keys, values, quantiles=(), sums=None):
+    """
+    Calcula estadísticas por grupo con un solo ordenamiento por (llave, valor)
+    
+    Los valores nulos se descartan. Los cuantiles usan interpolación lineal
+    (igual que pandas/numpy por defecto).
+    
+    Args:
+        keys: Arreglo de llaves enteras (ver combine_codes)
+        values: Arreglo de valores numéricos
+        quantiles: Cuantiles a calcular, ej. (0.5, 0.95)
+        sums: Diccionario opcional {nombre: arreglo} con columnas adicionales
+            a sumar por grupo (ej. indicadores booleanos de superación)
+    
+    Returns:
+        Diccionario con 'key', 'count', 'sum', 'mean', 'min', 'max',
+        'q<cuantil>' (ej. 'q0.95') y las sumas adicionales por nombre,
+        como arreglos alineados por grupo
+    """
+    sums = sums or {}
+    keys = np.asarray(keys, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    
+    valid = ~np.isnan(values)
+    if not valid.all():
+        keys = keys[valid]
+        values = values[valid]
+        sums = {name: np.asarray(arr)[valid] for name, arr in sums.items()}
+    
+    if len(keys) == 0:
+        empty_f = np.array([], dtype=np.float64)
+        result = {'key': np.array([], dtype=np.int64), 'count': np.array([], dtype=np.int64),
+                  'sum': empty_f, 'mean': empty_f, 'min': empty_f, 'max': empty_f}
+        for q in quantiles:
+            result[f'q{q}'] = empty_f
+        for name in sums:
+            result[name] = empty_f
+        return result
+    
+    # Llaves densas 0..G-1 por hash (O(n)), sin ordenar las llaves originales
+    codes, uniques = pd.factorize(keys)
+    
+    # Orden por valor y luego orden estable por llave densa: queda ordenado por
+    # (llave, valor). Con menos de 65536 grupos el orden estable es radix sort
+    order = np.argsort(values)
+    code_dtype = np.uint16 if len(uniques) <= np.iinfo(np.uint16).max else np.int64
+    order = order[np.argsort(codes[order].astype(code_dtype), kind='stable')]
+    sorted_codes = codes[order]
+    sorted_values = values[order]
+    
+    # Límites de cada grupo en el arreglo ordenado
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    ends = np.r_[starts[1:], len(sorted_codes)]
+    counts = ends - starts
+    
+    totals = np.add.reduceat(sorted_values, starts)
+    
+    result = {
+        'key': uniques[sorted_codes[starts]],
+        'count': counts,
+        'sum': totals,
+        'mean': totals / counts,
+        'min': sorted_values[starts],
+        'max': sorted_values[ends - 1],
+    }
+    
+    # Cuantiles por posición dentro de cada grupo ordenado
+    for q in quantiles:
+        pos = starts + q * (counts - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, ends - 1)
+        frac = pos - lo
+        result[f'q{q}'] = sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * frac
+    
+    for name, arr in sums.items():
+        result[name] = np.add.reduceat(np.asarray(arr, dtype=np.float64)[order], starts)
+    
+    # Grupos en orden ascendente de llave
+    key_order = np.argsort(result['key'])
+    return {name: arr[key_order] for name, arr in result.items()}
@@ -1,10 +1,21 @@
 """
 Funciones auxiliares para el ETL
 """
+import numpy as np
 import pandas as pd
-from datetime import datetime
 import hashlib
 
+# Atributos que identifican un miembro de DimPaciente (el orden define el hash)
+COLUMNAS_PACIENTE = ['Sexo', 'Migrante', 'GrupoEtario', 'EnfoqueDiferencial', 'RegimenSeguridadSocial']
+
+# Separador de atributos en el texto canónico que se hashea (no aparece en los datos)
+SEPARADOR_HASH = '\x1f'
+
+def habilitar_copy_on_write():
+    """Activa copy-on-write en pandas 2.x (desde pandas 3.0 siempre está activo)"""
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
 def clean_column_names(df):
     """Limpia nombres de columnas: sin espacios, minúsculas"""
     df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
@@ -16,23 +27,49 @@ def standardize_text(text):
         return None
     return str(text).strip()
 
-def parse_date(date_str, formats=['%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d']):
-    """Intenta parsear una fecha con múltiples formatos"""
-    if pd.isna(date_str):
-        return None
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(str(date_str), fmt).date()
-        except:
-            continue
-    return None
-
 def generate_hash(*args):
     """Genera un hash MD5 a partir de múltiples valores"""
     combined = '|'.join(str(arg) for arg in args if arg is not None)
     return hashlib.md5(combined.encode()).hexdigest()
 
+def canonicalizar_atributos(df, columnas, valor_nulo='Sin Información'):
+    """
+    Retorna las columnas como texto canónico: sin espacios externos y con
+    nulos o vacíos reemplazados por valor_nulo
+    """
+    canonico = {}
+    for col in columnas:
+        valores = df[col].astype('string').str.strip()
+        canonico[col] = valores.mask(valores == '').fillna(valor_nulo).astype(str)
+    return pd.DataFrame(canonico, index=df.index)
+
+def hash_texto(texto):
+    """
+    Hash de 64 bits de un texto: primeros 8 bytes de BLAKE2b sobre su UTF-8,
+    leídos big-endian como entero con signo (cabe en una columna BIGINT)
+    """
+    digest = hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+def hash_filas(df, columnas, valor_nulo='Sin Información'):
+    """
+    Hash de 64 bits por fila sobre las columnas dadas
+    
+    Los atributos se canonicalizan antes (ver canonicalizar_atributos), así
+    que un nulo y 'Sin Información' producen el mismo hash. El texto canónico
+    de la fila son sus valores unidos por SEPARADOR_HASH en el orden de
+    columnas, y se resume con hash_texto: el resultado es estable entre
+    versiones de pandas/Python porque se guarda en la BD (HashPaciente,
+    HashDiff). Se calcula una vez por combinación distinta de valores.
+    """
+    canonico = canonicalizar_atributos(df, columnas, valor_nulo)
+    texto = canonico[columnas[0]]
+    for col in columnas[1:]:
+        texto = texto + SEPARADOR_HASH + canonico[col]
+    codigos, unicos = pd.factorize(texto)
+    hashes = np.fromiter((hash_texto(t) for t in unicos), dtype=np.int64, count=len(unicos))
+    return hashes[codigos]
+
 def safe_int(value, default=None):
     """Convierte a entero de forma segura"""
     try:
@@ -0,0 +1,104 @@
+"""
+Índice espacial de estaciones de monitoreo
+Coordenadas de las estaciones (data_ref/estaciones.csv), proyección plana en
+kilómetros y búsqueda de los k vecinos más cercanos con un KD-tree (scipy si
+está instalado; si no, distancias por fuerza bruta con numpy, suficiente para
+las pocas decenas de estaciones de la red)
+"""
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from src.utils.gazetteer import plegar
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+RUTA_ESTACIONES = Path(__file__).parent.parent.parent / 'data_ref' / 'estaciones.csv'
+
+# Latitud de referencia de la proyección (centro de Bogotá)
+LATITUD_REFERENCIA = 4.65
+
+# Kilómetros por grado de latitud
+KM_POR_GRADO = 111.32
+
+def proyectar_km(latitudes, longitudes):
+    """
+    Proyección equirectangular a kilómetros (x al este, y al norte)
+    
+    En la extensión de Bogotá el error de distancia es muy inferior al de
+    las propias coordenadas de las estaciones.
+    
+    Returns:
+        Arreglo (n, 2) de coordenadas en kilómetros
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    escala_x = KM_POR_GRADO * np.cos(np.radians(LATITUD_REFERENCIA))
+    return np.column_stack([longitudes * escala_x, latitudes * KM_POR_GRADO])
+
+@lru_cache(maxsize=1)
+def _catalogo_estaciones(ruta=RUTA_ESTACIONES):
+    """Índice plegado nombre o alias -> (latitud, longitud)"""
+    catalogo = pd.read_csv(ruta, encoding='utf-8', dtype={'Alias': str}, keep_default_na=False)
+    indice = {}
+    for fila in catalogo.itertuples(index=False):
+        for nombre in [fila.Estacion] + [a for a in fila.Alias.split('|') if a.strip()]:
+            indice[plegar(nombre)] = (float(fila.Latitud), float(fila.Longitud))
+    return indice
+
+def coordenadas_estaciones(estaciones):
+    """
+    Latitud y longitud de cada estación (vectorizado sobre los nombres únicos)
+    
+    Los nombres se comparan plegados, así que las variantes con tildes o mal
+    decodificadas ('MÃ“VIL 7MA') caen en la misma estación.
+    
+    Returns:
+        Tupla de arreglos (latitud, longitud), NaN para estaciones sin coordenadas
+    """
+    indice = _catalogo_estaciones()
+    codes, uniques = pd.factorize(pd.Series(estaciones))
+    coordenadas = np.array([indice.get(plegar(e), (np.nan, np.nan)) for e in uniques], dtype=np.float64).reshape(-1, 2)
+    coordenadas = np.vstack([coordenadas, [np.nan, np.nan]])[codes]
+    return coordenadas[:, 0], coordenadas[:, 1]
+
+class IndiceEspacial:
+    """KD-tree sobre puntos en kilómetros (construido una sola vez)"""
+    
+    def __init__(self, puntos_km):
+        self.puntos = np.asarray(puntos_km, dtype=np.float64).reshape(-1, 2)
+        self.arbol = cKDTree(self.puntos) if cKDTree is not None and len(self.puntos) else None
+    
+    def vecinos(self, consultas_km, k, max_km=np.inf):
+        """
+        k vecinos más cercanos de cada consulta, ordenados por distancia
+        
+        Args:
+            consultas_km: Arreglo (m, 2) de puntos en kilómetros
+            k: Número de vecinos (se limita al número de puntos)
+            max_km: Distancia máxima; los vecinos más lejanos no se retornan
+        
+        Returns:
+            Tupla (distancias (m, k), índices (m, k)); las posiciones sin vecino
+            tienen distancia inf e índice igual al número de puntos
+        """
+        consultas = np.asarray(consultas_km, dtype=np.float64).reshape(-1, 2)
+        k = min(int(k), len(self.puntos))
+        if k == 0:
+            return np.empty((len(consultas), 0)), np.empty((len(consultas), 0), dtype=np.int64)
+        
+        if self.arbol is not None:
+            distancias, indices = self.arbol.query(consultas, k=k, distance_upper_bound=max_km)
+            return distancias.reshape(len(consultas), k), indices.reshape(len(consultas), k).astype(np.int64)
+        
+        distancias = np.hypot(*(consultas[:, None, :] - self.puntos[None, :, :]).transpose(2, 0, 1))
+        indices = np.argsort(distancias, axis=1, kind='stable')[:, :k]
+        distancias = np.take_along_axis(distancias, indices, axis=1)
+        lejanos = distancias > max_km
+        distancias[lejanos] = np.inf
+        indices[lejanos] = len(self.puntos)
+        return distancias, indices
@@ -0,0 +1,234 @@
+"""
+Motores de DataFrame intercambiables para los transformadores
+Expone las operaciones que usan los transformadores (concatenar, combinar,
+agrupar con agregaciones, mapeo categórico y eliminación de duplicados) con
+un backend pandas y un backend columnar multihilo en Polars. Ambos reciben y
+retornan DataFrames de pandas, así que cambiar de motor no cambia el resto
+del pipeline; el motor se elige por ejecución con ETL_MOTOR_DATAFRAME. Las
+operaciones encadenadas pueden pedir la tabla nativa del motor (nativo=True)
+y convertir a pandas solo al final (a_pandas).
+
+pandas es el motor por defecto y el de referencia. El motor Polars es
+experimental: solo cubre algunas operaciones de los transformadores, cada
+etapa vuelve a pandas y sobre un solo núcleo no es más rápido; se mantiene
+para comparar resultados (scripts/paridad_motor_dataframe.py).
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:  # Dependencia opcional: solo la requiere ETL_MOTOR_DATAFRAME=polars
+    pl = None
+
+# Funciones de agregación soportadas por agrupar()
+AGREGACIONES = ('sum', 'mean', 'min', 'max', 'size', 'count', 'first')
+
+class MotorPandas:
+    """Motor de referencia: operaciones directas de pandas (su formato nativo es pandas)"""
+    
+    nombre = 'pandas'
+    
+    def a_pandas(self, tabla):
+        """Convierte una tabla nativa del motor a pandas (aquí no hay conversión)"""
+        return tabla
+    
+    def concatenar(self, frames, nativo=False):
+        """Concatena DataFrames con las mismas columnas (índice nuevo)"""
+        return pd.concat(frames, ignore_index=True)
+    
+    def combinar(self, izquierda, derecha, on, how='left', nativo=False):
+        """Merge por las columnas on; conserva el orden de las filas de la izquierda"""
+        return izquierda.merge(derecha, on=on, how=how)
+    
+    def agrupar(self, df, llaves, agregaciones, ordenar=True, nativo=False):
+        """
+        Agrupa por llaves y calcula agregaciones con nombre
+        
+        Args:
+            df: DataFrame de entrada (de pandas o nativo del motor)
+            llaves: Columnas de agrupación (las filas con llave nula se descartan)
+            agregaciones: Diccionario {salida: (columna, funcion)} con funcion en AGREGACIONES
+            ordenar: Si True los grupos salen ordenados por llave; si no, en
+                orden de primera aparición
+            nativo: Si True retorna la tabla nativa del motor, para encadenarla
+                en otra operación sin pasar por pandas (ver a_pandas)
+        
+        Returns:
+            DataFrame con las llaves y una columna por agregación
+        """
+        _validar_agregaciones(agregaciones)
+        return df.groupby(llaves, sort=ordenar).agg(**agregaciones).reset_index()
+    
+    def mapear_categorico(self, valores, mapeo, default=None):
+        """Aplica un diccionario a los valores únicos y retorna el arreglo por fila"""
+        codes, uniques = pd.factorize(pd.Series(valores))
+        mapeados = np.array([mapeo.get(v, default) for v in uniques] + [default])
+        return mapeados[codes]
+    
+    def sin_duplicados(self, df, subset=None, nativo=False):
+        """Primera fila de cada combinación distinta (orden de aparición, índice nuevo)"""
+        return df.drop_duplicates(subset=subset).reset_index(drop=True)
+
+class MotorPolars:
+    """
+    Motor columnar multihilo sobre Polars (experimental)
+    
+    Las operaciones reciben DataFrames de pandas o de Polars. Con nativo=True
+    el resultado queda en Polars y la siguiente operación lo usa sin
+    convertir, así que una cadena de operaciones de un transformador paga la
+    conversión a pandas una sola vez (a_pandas). La conversión no usa pyarrow:
+    las columnas de texto se factorizan y se reconstruyen en Polars desde sus
+    valores únicos, los NaN de punto flotante pasan a nulos para que las
+    agregaciones los omitan igual que pandas y las categóricas de texto viajan
+    como pl.Enum (mismo orden de categorías). De vuelta en pandas los tipos
+    son los que produce MotorPandas.
+    """
+    
+    nombre = 'polars'
+    
+    def __init__(self):
+        if pl is None:
+            raise ImportError("El motor polars requiere polars (pip install polars)")
+    
+    def a_pandas(self, tabla):
+        """Convierte una tabla nativa (Polars) a pandas"""
+        return _a_pandas(tabla) if isinstance(tabla, pl.DataFrame) else tabla
+    
+    def concatenar(self, frames, nativo=False):
+        """
+        Concatena DataFrames con las mismas columnas (índice nuevo)
+        
+        Entre DataFrames de pandas con salida en pandas no hay nada que
+        calcular: convertir a Polars y de vuelta solo agregaría dos copias, así
+        que se concatena directamente en pandas.
+        """
+        if not nativo and not any(isinstance(df, pl.DataFrame) for df in frames):
+            return pd.concat(frames, ignore_index=True)
+        tablas = [_como_polars(df) for df in frames]
+        # Categóricas con categorías distintas se concatenan como texto (como en pandas)
+        for col in tablas[0].columns:
+            tipos = {tabla.schema[col] for tabla in tablas}
+            if len(tipos) > 1 and any(isinstance(t, pl.Enum) for t in tipos):
+                tablas = [tabla.with_columns(_sin_enum(tabla, [col])) for tabla in tablas]
+        return self._salida(pl.concat(tablas, how='vertical_relaxed'), nativo)
+    
+    def combinar(self, izquierda, derecha, on, how='left', nativo=False):
+        """Merge por las columnas on; conserva el orden de las filas de la izquierda"""
+        llaves = [on] if isinstance(on, str) else list(on)
+        # Las llaves categóricas se cruzan como texto; las demás categóricas se conservan
+        izquierda, derecha = _como_polars(izquierda), _como_polars(derecha)
+        tabla = izquierda.with_columns(_sin_enum(izquierda, llaves)).join(
+            derecha.with_columns(_sin_enum(derecha, llaves)),
+            on=llaves, how=how, maintain_order='left', nulls_equal=True
+        )
+        return self._salida(tabla, nativo)
+    
+    def agrupar(self, df, llaves, agregaciones, ordenar=True, nativo=False):
+        """Agrupa por llaves y calcula agregaciones con nombre (ver MotorPandas.agrupar)"""
+        _validar_agregaciones(agregaciones)
+        llaves = [llaves] if isinstance(llaves, str) else list(llaves)
+        columnas = list(dict.fromkeys(llaves + [c for c, _ in agregaciones.values()]))
+        
+        # Las llaves pl.Enum se ordenan por el orden de sus categorías (como
+        # pandas); pandas descarta las llaves nulas
+        tabla = _como_polars(df, columnas).drop_nulls(subset=llaves)
+        expresiones = [_expresion(salida, columna, funcion, tabla.schema[columna])
+                       for salida, (columna, funcion) in agregaciones.items()]
+        resultado = tabla.group_by(llaves, maintain_order=not ordenar).agg(expresiones)
+        if ordenar:
+            resultado = resultado.sort(llaves)
+        return self._salida(resultado, nativo)
+    
+    def mapear_categorico(self, valores, mapeo, default=None):
+        """Aplica un diccionario a los valores únicos y retorna el arreglo por fila"""
+        serie = _serie_polars('valor', pd.Series(valores))
+        if isinstance(serie.dtype, pl.Enum):
+            serie = serie.cast(pl.String)
+        unicos = serie.unique()
+        destino = pl.Series('destino', [mapeo.get(v, default) for v in unicos.to_list()])
+        mapeados = serie.replace_strict(unicos, destino, default=default)
+        return mapeados.to_numpy()
+    
+    def sin_duplicados(self, df, subset=None, nativo=False):
+        """Primera fila de cada combinación distinta (orden de aparición, índice nuevo)"""
+        resultado = _como_polars(df).unique(subset=subset, keep='first', maintain_order=True)
+        return self._salida(resultado, nativo)
+    
+    @staticmethod
+    def _salida(tabla, nativo):
+        """Tabla nativa o convertida a pandas según nativo"""
+        return tabla if nativo else _a_pandas(tabla)
+
+# Motores disponibles por nombre
+MOTORES = {
+    MotorPandas.nombre: MotorPandas,
+    MotorPolars.nombre: MotorPolars,
+}
+
+def crear_motor(nombre='pandas'):
+    """Instancia el motor de DataFrame indicado ('pandas' o 'polars')"""
+    if nombre not in MOTORES:
+        raise ValueError(f"Motor de DataFrame no soportado: {nombre} (opciones: {', '.join(MOTORES)})")
+    return MOTORES[nombre]()
+
+def _validar_agregaciones(agregaciones):
+    """Verifica que todas las funciones de agregación estén soportadas"""
+    for salida, (_, funcion) in agregaciones.items():
+        if funcion not in AGREGACIONES:
+            raise ValueError(f"Agregación no soportada para {salida}: {funcion}")
+
+def _expresion(salida, columna, funcion, tipo):
+    """Expresión Polars equivalente a la agregación de pandas"""
+    if funcion == 'size':
+        return pl.len().cast(pl.Int64).alias(salida)
+    expresion = getattr(pl.col(columna), funcion)()
+    # pandas retorna int64 en conteos y en sumas de enteros o booleanos
+    if funcion == 'count' or (funcion == 'sum' and (tipo.is_integer() or tipo == pl.Boolean)):
+        expresion = expresion.cast(pl.Int64)
+    return expresion.alias(salida)
+
+def _serie_polars(nombre, serie):
+    """Convierte una serie de pandas a Polars sin pasar por pyarrow"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        if not pd.api.types.is_string_dtype(categorias):
+            # Solo las categorías de texto pueden ser pl.Enum: las demás viajan como valores
+            return _serie_polars(nombre, serie.astype(categorias.dtype))
+        codes = serie.cat.codes.to_numpy()
+        unicos = pl.Series(nombre, list(categorias) + [None], dtype=pl.String)
+        return unicos.gather(np.where(codes < 0, len(categorias), codes)).cast(pl.Enum(list(categorias)))
+    if serie.dtype.kind in 'biufM':
+        return pl.Series(nombre, serie.to_numpy(), nan_to_null=True)
+    
+    # Texto y objetos: se construyen los únicos y se expanden por código
+    codes, uniques = pd.factorize(serie)
+    unicos = pl.Series(nombre, list(uniques) + [None])
+    return unicos.gather(np.where(codes < 0, len(uniques), codes))
+
+def _como_polars(df, columnas=None):
+    """Tabla de Polars desde un DataFrame de pandas o de Polars (opcionalmente solo columnas)"""
+    if isinstance(df, pl.DataFrame):
+        return df if columnas is None else df.select(columnas)
+    columnas = df.columns if columnas is None else columnas
+    return pl.DataFrame([_serie_polars(col, df[col]) for col in columnas])
+
+def _sin_enum(tabla, columnas):
+    """Expresiones que convierten a texto las columnas pl.Enum indicadas"""
+    return [pl.col(col).cast(pl.String) for col in columnas if isinstance(tabla.schema[col], pl.Enum)]
+
+def _a_pandas(df):
+    """DataFrame de Polars a pandas con los tipos que usaría pandas"""
+    columnas = {}
+    for col in df.columns:
+        serie, tipo = df[col], df.schema[col]
+        if isinstance(tipo, pl.Enum):
+            codes = serie.to_physical().fill_null(-1).to_numpy()
+            columnas[col] = pd.Categorical.from_codes(codes, categories=pd.Index(tipo.categories.to_list()))
+            continue
+        valores = serie.to_numpy()
+        # Las fechas sin hora vienen de objetos date de Python: se restauran como objetos
+        if tipo == pl.Date:
+            valores = valores.astype(object)
+        columnas[col] = valores
+    return pd.DataFrame(columnas)
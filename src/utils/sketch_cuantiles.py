@@ -0,0 +1,113 @@
+"""
+Sketch de cuantiles con error relativo acotado (cubetas logarítmicas, tipo DDSketch)
+Cada valor positivo x cae en la cubeta i = ceil(log_gamma(x)), con
+gamma = (1 + alfa) / (1 - alfa), y la cubeta se representa con el valor
+2 * gamma^i / (gamma + 1). Un sketch es solo el conteo por cubeta, así que se
+fusiona sumando conteos y se actualiza bloque por bloque sin guardar valores.
+
+Cota de error: para el cuantil q de un grupo con n valores, el valor
+retornado x' cumple |x' - x| <= alfa * x, donde x es el valor de rango
+floor(q * (n - 1)) de los datos ordenados (cuantil 'lower' de numpy). Los
+valores menores que VALOR_MINIMO (incluido el cero) van a una cubeta de cero
+representada por 0, con error absoluto menor que VALOR_MINIMO. Los valores
+negativos y nulos no se incluyen.
+
+Los sketches de muchos grupos se guardan como una tabla larga (llaves,
+cubeta, conteo), que se fusiona y consulta con operaciones vectorizadas.
+"""
+import numpy as np
+import pandas as pd
+
+# Error relativo por defecto de los cuantiles (1%)
+ALFA_DEFAULT = 0.01
+
+# Valores por debajo de este mínimo se cuentan en la cubeta de cero
+VALOR_MINIMO = 1e-6
+
+# Índice de la cubeta de cero (menor que cualquier cubeta logarítmica)
+CUBETA_CERO = np.iinfo(np.int32).min
+
+def gamma_de(alfa):
+    """Razón entre los límites de dos cubetas consecutivas para un error relativo alfa"""
+    return (1.0 + alfa) / (1.0 - alfa)
+
+def cubetas(valores, alfa=ALFA_DEFAULT):
+    """
+    Cubeta de cada valor
+    
+    Returns:
+        Tupla (índice int32 de la cubeta, máscara de valores incluidos: no
+        nulos y no negativos)
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    incluidos = valores >= 0
+    indice = np.full(len(valores), CUBETA_CERO, dtype=np.int32)
+    positivos = valores >= VALOR_MINIMO
+    indice[positivos] = np.ceil(np.log(valores[positivos]) / np.log(gamma_de(alfa))).astype(np.int32)
+    return indice, incluidos
+
+def valor_cubeta(indice, alfa=ALFA_DEFAULT):
+    """Valor representativo de cada cubeta (0 para la cubeta de cero)"""
+    indice = np.asarray(indice)
+    gamma = gamma_de(alfa)
+    valores = 2.0 * np.power(gamma, indice.astype(np.float64)) / (gamma + 1.0)
+    return np.where(indice == CUBETA_CERO, 0.0, valores)
+
+def construir_sketch(df, llaves, columna, alfa=ALFA_DEFAULT):
+    """
+    Sketch por grupo de los valores de una columna
+    
+    Args:
+        df: DataFrame con las llaves y la columna de valores
+        llaves: Columnas que identifican cada grupo
+        columna: Columna de valores
+        alfa: Error relativo de los cuantiles
+    
+    Returns:
+        DataFrame largo con las llaves, cubeta y conteo (una fila por cubeta
+        no vacía de cada grupo)
+    """
+    indice, incluidos = cubetas(df[columna].to_numpy(dtype=np.float64), alfa)
+    tabla = df.loc[incluidos, llaves].assign(cubeta=indice[incluidos])
+    return tabla.groupby(llaves + ['cubeta'], sort=False).size().rename('conteo').reset_index()
+
+def fusionar_sketches(sketches, llaves):
+    """Fusiona sketches (mismo alfa) sumando los conteos de cada (grupo, cubeta)"""
+    sketches = [s for s in sketches if s is not None and len(s)]
+    if not sketches:
+        return pd.DataFrame(columns=llaves + ['cubeta', 'conteo'])
+    return pd.concat(sketches, ignore_index=True).groupby(
+        llaves + ['cubeta'], sort=False
+    )['conteo'].sum().reset_index()
+
+def cuantiles_sketch(sketch, llaves, cuantiles, alfa=ALFA_DEFAULT):
+    """
+    Cuantiles de cada grupo a partir de su sketch
+    
+    Las cubetas se ordenan por (grupo, cubeta) y con el conteo acumulado se
+    busca, para cada grupo y cuantil, la primera cubeta cuyo acumulado supera
+    el rango floor(q * (n - 1)) (búsqueda binaria sobre todo el arreglo).
+    
+    Returns:
+        DataFrame con las llaves, num_valores y una columna por cuantil
+        (ej. 'p95' para 0.95), un registro por grupo en orden de llaves
+    """
+    ordenado = sketch.sort_values(llaves + ['cubeta'], kind='stable').reset_index(drop=True)
+    grupo = ordenado.groupby(llaves, sort=False).ngroup().to_numpy()
+    cambio = np.ones(len(grupo) + 1, dtype=bool)
+    cambio[1:-1] = grupo[1:] != grupo[:-1]
+    limites = np.flatnonzero(cambio)
+    inicios, finales = limites[:-1], limites[1:]
+    
+    acumulado = np.cumsum(ordenado['conteo'].to_numpy(dtype=np.int64))
+    base = np.r_[0, acumulado][inicios]
+    total = np.r_[0, acumulado][finales] - base
+    valores = valor_cubeta(ordenado['cubeta'].to_numpy(), alfa)
+    
+    resultado = ordenado.loc[inicios, llaves].reset_index(drop=True)
+    resultado['num_valores'] = total
+    for q in cuantiles:
+        rango = base + np.floor(q * (total - 1)).astype(np.int64)
+        posicion = np.searchsorted(acumulado, rango, side='right')
+        resultado[f'p{q * 100:g}'] = valores[posicion]
+    return resultado
@@ -0,0 +1,36 @@
+"""
+Almacenamiento de estado entre ejecuciones del ETL
+Persiste DataFrames pequeños (agregados por partición, marcas) en archivos CSV
+"""
+import pandas as pd
+from pathlib import Path
+
+class StateStore:
+    """Clase para leer y escribir el estado persistente de una etapa del ETL"""
+
+    def __init__(self, name, state_dir='state'):
+        self.name = name
+        self.state_dir = Path(state_dir)
+        self.file_path = self.state_dir / f"{name}.csv"
+
+    def exists(self):
+        """Indica si existe estado previo"""
+        return self.file_path.exists()
+
+    def read(self, dtype=None):
+        """Lee el estado previo. Retorna None si no existe"""
+        if not self.exists():
+            return None
+        return pd.read_csv(self.file_path, encoding='utf-8', dtype=dtype)
+
+    def write(self, df):
+        """Escribe el estado de forma atómica (archivo temporal + reemplazo)"""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.file_path.with_suffix('.csv.tmp')
+        df.to_csv(tmp_path, index=False, encoding='utf-8')
+        tmp_path.replace(self.file_path)
+
+    def clear(self):
+        """Elimina el estado (la próxima ejecución será completa)"""
+        if self.exists():
+            self.file_path.unlink()
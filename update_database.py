@@ -1,7 +1,13 @@
 """
 Script para actualizar la base de datos con las nuevas tablas
 """
+import sys
+from pathlib import Path
+import pandas as pd
 import pyodbc
+sys.path.append(str(Path(__file__).parent))
+
+from src.utils.helpers import hash_filas, COLUMNAS_PACIENTE
 
 def execute_sql():
     # Conectar a SQL Server
@@ -19,7 +25,8 @@ def execute_sql():
                 IDEstacion INT IDENTITY(1,1) PRIMARY KEY,
                 NombreEstacion NVARCHAR(200) NOT NULL,
                 TipoEstacion NVARCHAR(100),
-                Ubicacion NVARCHAR(200)
+                Ubicacion NVARCHAR(200),
+                Localidad NVARCHAR(150)
             )
             PRINT 'Tabla DimEstacion creada'
         END
@@ -29,6 +36,298 @@ def execute_sql():
         cursor.execute(sql_dim_estacion)
         print("✓ DimEstacion OK")
         
+        # 1.1 Agregar Localidad a DimEstacion (mapeo estación -> localidad)
+        cursor.execute("""
+        IF COL_LENGTH('dbo.DimEstacion', 'Localidad') IS NULL
+            ALTER TABLE dbo.DimEstacion ADD Localidad NVARCHAR(150) NULL
+        """)
+        print("✓ DimEstacion.Localidad OK")
+        
+        # 1.2 Agregar HashPaciente a DimPaciente (lookup por hash de fila)
+        cursor.execute("""
+        IF COL_LENGTH('dbo.DimPaciente', 'HashPaciente') IS NULL
+            ALTER TABLE dbo.DimPaciente ADD HashPaciente BIGINT NULL
+        """)
+        print("✓ DimPaciente.HashPaciente OK (se llena en la próxima carga de DimPaciente)")
+        
+        # 1.3 Agregar CodigoCalidad a HechoMedicionAmbiental (revisión de calidad)
+        cursor.execute("""
+        IF COL_LENGTH('dbo.HechoMedicionAmbiental', 'CodigoCalidad') IS NULL
+            ALTER TABLE dbo.HechoMedicionAmbiental ADD CodigoCalidad TINYINT NOT NULL
+                CONSTRAINT DF_HechoMedicion_CodigoCalidad DEFAULT 0
+        """)
+        print("✓ HechoMedicionAmbiental.CodigoCalidad OK")
+        
+        # 1.4 Crear AnalisisCorrelacionLag (correlaciones rezagadas)
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name='AnalisisCorrelacionLag')
+            CREATE TABLE dbo.AnalisisCorrelacionLag (
+                IDAnalisisLag INT IDENTITY(1,1) PRIMARY KEY,
+                Localidad NVARCHAR(150) NOT NULL,
+                Indicador NVARCHAR(200) NOT NULL,
+                Lag INT NOT NULL,
+                NumPeriodos INT NOT NULL,
+                Correlacion FLOAT,
+                UNIQUE (Localidad, Indicador, Lag)
+            )
+        """)
+        print("✓ AnalisisCorrelacionLag OK")
+        
+        # 1.5 Crear AnalisisCorrelacionResumen (Pearson/Spearman con IC bootstrap)
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name='AnalisisCorrelacionResumen')
+            CREATE TABLE dbo.AnalisisCorrelacionResumen (
+                IDResumen INT IDENTITY(1,1) PRIMARY KEY,
+                Localidad NVARCHAR(150) NOT NULL,
+                Indicador NVARCHAR(200) NOT NULL,
+                NumPeriodos INT NOT NULL,
+                Pearson FLOAT,
+                Pearson_ICInf FLOAT,
+                Pearson_ICSup FLOAT,
+                Spearman FLOAT,
+                Spearman_ICInf FLOAT,
+                Spearman_ICSup FLOAT,
+                NumBootstrap INT NOT NULL,
+                UNIQUE (Localidad, Indicador)
+            )
+        """)
+        print("✓ AnalisisCorrelacionResumen OK")
+        
+        # 1.6 Columnas de versionado SCD tipo 2 en DimPaciente y DimUbicacion
+        for tabla in ('DimPaciente', 'DimUbicacion'):
+            cursor.execute(f"""
+            IF COL_LENGTH('dbo.{tabla}', 'HashDiff') IS NULL
+                ALTER TABLE dbo.{tabla} ADD HashDiff BIGINT NULL
+            IF COL_LENGTH('dbo.{tabla}', 'FechaInicio') IS NULL
+                ALTER TABLE dbo.{tabla} ADD FechaInicio DATE NOT NULL
+                    CONSTRAINT DF_{tabla}_FechaInicio DEFAULT CAST(GETDATE() AS DATE)
+            IF COL_LENGTH('dbo.{tabla}', 'FechaFin') IS NULL
+                ALTER TABLE dbo.{tabla} ADD FechaFin DATE NULL
+            IF COL_LENGTH('dbo.{tabla}', 'EsActual') IS NULL
+                ALTER TABLE dbo.{tabla} ADD EsActual BIT NOT NULL
+                    CONSTRAINT DF_{tabla}_EsActual DEFAULT 1
+            """)
+        
+        # La unicidad de la llave de negocio aplica solo a la versión vigente
+        cursor.execute("""
+        IF EXISTS (SELECT * FROM sys.key_constraints WHERE name='UQ_DimPaciente_Hash')
+            ALTER TABLE dbo.DimPaciente DROP CONSTRAINT UQ_DimPaciente_Hash
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='UX_DimPaciente_Hash_Actual')
+            CREATE UNIQUE INDEX UX_DimPaciente_Hash_Actual ON dbo.DimPaciente(HashPaciente) WHERE EsActual = 1
+        IF EXISTS (SELECT * FROM sys.indexes WHERE name='UX_DimUbicacion_Actual')
+            DROP INDEX UX_DimUbicacion_Actual ON dbo.DimUbicacion
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='UX_DimUbicacion_Codigo_Actual')
+            CREATE UNIQUE INDEX UX_DimUbicacion_Codigo_Actual ON dbo.DimUbicacion(CodigoLocalidad) WHERE EsActual = 1
+        """)
+        print("✓ DimPaciente/DimUbicacion SCD2 (HashDiff, FechaInicio, FechaFin, EsActual) OK")
+        
+        # 1.7 AnalisisCorrelacion como cubo por indicador (mínimo, máximo, p95 y completitud)
+        cursor.execute("""
+        IF COL_LENGTH('dbo.AnalisisCorrelacion', 'Indicador') IS NULL
+            ALTER TABLE dbo.AnalisisCorrelacion ADD Indicador NVARCHAR(200) NULL
+        IF COL_LENGTH('dbo.AnalisisCorrelacion', 'Concentracion_min') IS NULL
+            ALTER TABLE dbo.AnalisisCorrelacion ADD Concentracion_min FLOAT NULL
+        IF COL_LENGTH('dbo.AnalisisCorrelacion', 'Concentracion_max') IS NULL
+            ALTER TABLE dbo.AnalisisCorrelacion ADD Concentracion_max FLOAT NULL
+        IF COL_LENGTH('dbo.AnalisisCorrelacion', 'Concentracion_p95') IS NULL
+            ALTER TABLE dbo.AnalisisCorrelacion ADD Concentracion_p95 FLOAT NULL
+        IF COL_LENGTH('dbo.AnalisisCorrelacion', 'Completitud_pct') IS NULL
+            ALTER TABLE dbo.AnalisisCorrelacion ADD Completitud_pct FLOAT NULL
+        """)
+        
+        # La llave única anterior (Localidad, Anio, Bimestre) no tiene nombre fijo; las filas
+        # sin indicador promediaban CO y PM2.5 juntos y se eliminan (la próxima carga las recalcula)
+        cursor.execute("""
+        DECLARE @uq SYSNAME = (
+            SELECT TOP 1 kc.name
+            FROM sys.key_constraints kc
+            WHERE kc.parent_object_id = OBJECT_ID('dbo.AnalisisCorrelacion') AND kc.type = 'UQ'
+              AND NOT EXISTS (
+                  SELECT * FROM sys.index_columns ic
+                  WHERE ic.object_id = kc.parent_object_id AND ic.index_id = kc.unique_index_id
+                    AND COL_NAME(ic.object_id, ic.column_id) = 'Indicador'
+              )
+        )
+        IF @uq IS NOT NULL
+            EXEC('ALTER TABLE dbo.AnalisisCorrelacion DROP CONSTRAINT ' + @uq)
+        
+        DELETE FROM dbo.AnalisisCorrelacion WHERE Indicador IS NULL
+        IF COLUMNPROPERTY(OBJECT_ID('dbo.AnalisisCorrelacion'), 'Indicador', 'AllowsNull') = 1
+            ALTER TABLE dbo.AnalisisCorrelacion ALTER COLUMN Indicador NVARCHAR(200) NOT NULL
+        """)
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.key_constraints WHERE name='UQ_AnalisisCorrelacion_Cubo')
+            ALTER TABLE dbo.AnalisisCorrelacion ADD CONSTRAINT UQ_AnalisisCorrelacion_Cubo
+                UNIQUE (Localidad, Anio, Bimestre, Indicador)
+        """)
+        print("✓ AnalisisCorrelacion por indicador (Indicador, Concentracion_min/max/p95, Completitud_pct) OK")
+        
+        # 1.8 Crear los rollups HechoMedicionDiaria y HechoMedicionMensual
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name='HechoMedicionDiaria')
+            CREATE TABLE dbo.HechoMedicionDiaria (
+                IDMedicionDiaria BIGINT IDENTITY(1,1) PRIMARY KEY,
+                IDFecha INT NOT NULL,
+                IDUbicacion INT NOT NULL,
+                IDExposicion INT NOT NULL,
+                Concentracion_avg FLOAT,
+                Concentracion_max FLOAT,
+                NumMediciones INT NOT NULL,
+                HorasSobreUmbral INT NOT NULL,
+                HorasEsperadas INT,
+                CompletitudPct FLOAT,
+                MediaMovilMax FLOAT,
+                IndiceIBOCAMax FLOAT,
+                CONSTRAINT FK_MedDia_Fecha FOREIGN KEY (IDFecha) REFERENCES dbo.DimFecha(IDFecha),
+                CONSTRAINT FK_MedDia_Ubicacion FOREIGN KEY (IDUbicacion) REFERENCES dbo.DimUbicacion(IDUbicacion),
+                CONSTRAINT FK_MedDia_Exposicion FOREIGN KEY (IDExposicion) REFERENCES dbo.DimExposicion(IDExposicion)
+            )
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='IX_HechoMedicionDiaria_Fecha')
+            CREATE NONCLUSTERED INDEX IX_HechoMedicionDiaria_Fecha ON dbo.HechoMedicionDiaria(IDFecha)
+        """)
+        print("✓ HechoMedicionDiaria OK")
+        
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name='HechoMedicionMensual')
+            CREATE TABLE dbo.HechoMedicionMensual (
+                IDMedicionMensual INT IDENTITY(1,1) PRIMARY KEY,
+                Anio INT NOT NULL,
+                Mes INT NOT NULL,
+                IDFecha INT NOT NULL,
+                IDUbicacion INT NOT NULL,
+                IDExposicion INT NOT NULL,
+                Concentracion_avg FLOAT,
+                Concentracion_max FLOAT,
+                NumMediciones INT NOT NULL,
+                HorasSobreUmbral INT NOT NULL,
+                HorasEsperadas INT,
+                CompletitudPct FLOAT,
+                MediaMovilMax FLOAT,
+                IndiceIBOCAMax FLOAT,
+                CONSTRAINT FK_MedMes_Fecha FOREIGN KEY (IDFecha) REFERENCES dbo.DimFecha(IDFecha),
+                CONSTRAINT FK_MedMes_Ubicacion FOREIGN KEY (IDUbicacion) REFERENCES dbo.DimUbicacion(IDUbicacion),
+                CONSTRAINT FK_MedMes_Exposicion FOREIGN KEY (IDExposicion) REFERENCES dbo.DimExposicion(IDExposicion)
+            )
+        """)
+        print("✓ HechoMedicionMensual OK")
+        
+        # 1.9 Máximos de la exposición móvil (media regulatoria e IBOCA) en los rollups
+        for tabla in ('HechoMedicionDiaria', 'HechoMedicionMensual'):
+            cursor.execute(f"""
+            IF OBJECT_ID('dbo.{tabla}') IS NOT NULL AND COL_LENGTH('dbo.{tabla}', 'MediaMovilMax') IS NULL
+                ALTER TABLE dbo.{tabla} ADD MediaMovilMax FLOAT NULL
+            IF OBJECT_ID('dbo.{tabla}') IS NOT NULL AND COL_LENGTH('dbo.{tabla}', 'IndiceIBOCAMax') IS NULL
+                ALTER TABLE dbo.{tabla} ADD IndiceIBOCAMax FLOAT NULL
+            """)
+        print("✓ HechoMedicionDiaria/HechoMedicionMensual (MediaMovilMax, IndiceIBOCAMax) OK")
+        
+        # 1.10 Recalcular HashPaciente con el hash estable (BLAKE2b del texto canónico);
+        # los HashDiff anteriores se anulan y el loader SCD2 los recalcula de los atributos
+        columnas = ', '.join(['IDPaciente'] + COLUMNAS_PACIENTE)
+        cursor.execute(f"SELECT {columnas} FROM dbo.DimPaciente")
+        df_paciente = pd.DataFrame.from_records(
+            cursor.fetchall(), columns=['IDPaciente'] + COLUMNAS_PACIENTE
+        )
+        hashes = hash_filas(df_paciente, COLUMNAS_PACIENTE)
+        cursor.fast_executemany = True
+        if len(df_paciente) > 0:
+            cursor.executemany(
+                "UPDATE dbo.DimPaciente SET HashPaciente = ? WHERE IDPaciente = ?",
+                list(zip(hashes.tolist(), df_paciente['IDPaciente'].tolist()))
+            )
+        for tabla in ('DimPaciente', 'DimUbicacion'):
+            cursor.execute(f"UPDATE dbo.{tabla} SET HashDiff = NULL")
+        print(f"✓ DimPaciente.HashPaciente recalculado ({len(df_paciente)} filas), HashDiff reiniciado")
+        
+        # 1.11 Crear HechoEpisodioContaminacion (horas consecutivas sobre el umbral de alerta)
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name='HechoEpisodioContaminacion')
+            CREATE TABLE dbo.HechoEpisodioContaminacion (
+                IDEpisodio BIGINT IDENTITY(1,1) PRIMARY KEY,
+                IDFechaInicio INT NOT NULL,
+                IDHoraInicio INT NOT NULL,
+                IDFechaFin INT NOT NULL,
+                IDHoraFin INT NOT NULL,
+                IDExposicion INT NOT NULL,
+                IDUbicacion INT NOT NULL,
+                IDEstacion INT NOT NULL,
+                DuracionHoras INT NOT NULL,
+                Concentracion_max FLOAT NOT NULL,
+                Concentracion_avg FLOAT NOT NULL,
+                Umbral FLOAT NOT NULL,
+                CONSTRAINT FK_Epi_FechaInicio FOREIGN KEY (IDFechaInicio) REFERENCES dbo.DimFecha(IDFecha),
+                CONSTRAINT FK_Epi_HoraInicio FOREIGN KEY (IDHoraInicio) REFERENCES dbo.DimHora(IDHora),
+                CONSTRAINT FK_Epi_FechaFin FOREIGN KEY (IDFechaFin) REFERENCES dbo.DimFecha(IDFecha),
+                CONSTRAINT FK_Epi_HoraFin FOREIGN KEY (IDHoraFin) REFERENCES dbo.DimHora(IDHora),
+                CONSTRAINT FK_Epi_Exposicion FOREIGN KEY (IDExposicion) REFERENCES dbo.DimExposicion(IDExposicion),
+                CONSTRAINT FK_Epi_Ubicacion FOREIGN KEY (IDUbicacion) REFERENCES dbo.DimUbicacion(IDUbicacion),
+                CONSTRAINT FK_Epi_Estacion FOREIGN KEY (IDEstacion) REFERENCES dbo.DimEstacion(IDEstacion)
+            )
+        """)
+        print("✓ HechoEpisodioContaminacion OK")
+        
+        # 1.12 Crear HechoMedicionCuantilMensual (percentiles mensuales por estación)
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name='HechoMedicionCuantilMensual')
+            CREATE TABLE dbo.HechoMedicionCuantilMensual (
+                IDCuantilMensual INT IDENTITY(1,1) PRIMARY KEY,
+                Anio INT NOT NULL,
+                Mes INT NOT NULL,
+                IDFecha INT NOT NULL,
+                IDUbicacion INT NOT NULL,
+                IDExposicion INT NOT NULL,
+                IDEstacion INT NOT NULL,
+                NumMediciones INT NOT NULL,
+                Concentracion_p50 FLOAT NOT NULL,
+                Concentracion_p95 FLOAT NOT NULL,
+                Concentracion_p99 FLOAT NOT NULL,
+                ErrorRelativo FLOAT NOT NULL,
+                CONSTRAINT FK_CuaMes_Fecha FOREIGN KEY (IDFecha) REFERENCES dbo.DimFecha(IDFecha),
+                CONSTRAINT FK_CuaMes_Ubicacion FOREIGN KEY (IDUbicacion) REFERENCES dbo.DimUbicacion(IDUbicacion),
+                CONSTRAINT FK_CuaMes_Exposicion FOREIGN KEY (IDExposicion) REFERENCES dbo.DimExposicion(IDExposicion),
+                CONSTRAINT FK_CuaMes_Estacion FOREIGN KEY (IDEstacion) REFERENCES dbo.DimEstacion(IDEstacion)
+            )
+        """)
+        print("✓ HechoMedicionCuantilMensual OK")
+        
+        # 1.13 Crear AnalisisPerfilEstacional y AnalisisResidualEstacional (descomposición estacional)
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name='AnalisisPerfilEstacional')
+            CREATE TABLE dbo.AnalisisPerfilEstacional (
+                IDPerfil INT IDENTITY(1,1) PRIMARY KEY,
+                Estacion NVARCHAR(200) NOT NULL,
+                Localidad NVARCHAR(150),
+                Indicador NVARCHAR(200) NOT NULL,
+                HoraSemana INT NOT NULL,
+                DiaSemana INT NOT NULL,
+                Hora INT NOT NULL,
+                Estacional_semanal FLOAT,
+                Estacional_diario FLOAT,
+                NumMediciones INT NOT NULL,
+                UNIQUE (Estacion, Indicador, HoraSemana)
+            )
+        """)
+        print("✓ AnalisisPerfilEstacional OK")
+        
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name='AnalisisResidualEstacional')
+            CREATE TABLE dbo.AnalisisResidualEstacional (
+                IDResidual INT IDENTITY(1,1) PRIMARY KEY,
+                Localidad NVARCHAR(150) NOT NULL,
+                Anio INT NOT NULL,
+                Bimestre INT NOT NULL,
+                Indicador NVARCHAR(200) NOT NULL,
+                NumMediciones INT NOT NULL,
+                Concentracion_avg FLOAT NOT NULL,
+                Tendencia_avg FLOAT NOT NULL,
+                Estacional_avg FLOAT NOT NULL,
+                Residual_avg FLOAT NOT NULL,
+                Residual_std FLOAT,
+                UNIQUE (Localidad, Anio, Bimestre, Indicador)
+            )
+        """)
+        print("✓ AnalisisResidualEstacional OK")
+        
         # 2. Verificar si HechoMedicionAmbiental necesita actualizarse
         print("\nVerificando HechoMedicionAmbiental...")
         cursor.execute("""
@@ -47,7 +346,7 @@ def execute_sql():
             print("✓ HechoMedicionAmbiental ya tiene las columnas correctas")
         
         print("\n✅ Actualización completada")
-        
+    
     except Exception as e:
         print(f"✗ Error: {str(e)}")
     finally: